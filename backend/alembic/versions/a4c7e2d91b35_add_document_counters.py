@@ -0,0 +1,36 @@
+"""Add document counter table for invoice and journal numbering
+
+Revision ID: a4c7e2d91b35
+Revises: f2b8d4e6a913
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7e2d91b35'
+down_revision: Union[str, None] = 'f2b8d4e6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The table may already have been created by Base.metadata.create_all at startup.
+    # Counters are seeded from the highest existing number on first use.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS document_counters (
+            document_type VARCHAR(100) NOT NULL,
+            period VARCHAR(20) NOT NULL DEFAULT '',
+            last_value BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            PRIMARY KEY (document_type, period)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('document_counters')
@@ -0,0 +1,46 @@
+"""Make demand forecast rows unique per item and date
+
+Revision ID: b6d2f8a41c07
+Revises: a4c7e2d91b35
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2f8a41c07'
+down_revision: Union[str, None] = 'a4c7e2d91b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows keyed by model were left behind when auto selection switched models; keep the newest
+    op.execute("""
+        DELETE FROM demand_forecasts df
+        USING (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY item_id, forecast_date
+                ORDER BY created_at DESC, id DESC
+            ) AS rn
+            FROM demand_forecasts
+        ) ranked
+        WHERE df.id = ranked.id AND ranked.rn > 1
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_demand_forecasts_item_date
+        ON demand_forecasts (item_id, forecast_date)
+    """)
+    op.execute("DROP INDEX IF EXISTS uq_demand_forecasts_item_date_model")
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_demand_forecasts_item_date_model
+        ON demand_forecasts (item_id, forecast_date, model_used)
+    """)
+    op.drop_index('uq_demand_forecasts_item_date', table_name='demand_forecasts')
@@ -0,0 +1,34 @@
+"""Tag daily sales facts with their invoice
+
+Revision ID: c3e9a7d15f42
+Revises: b6d2f8a41c07
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a7d15f42'
+down_revision: Union[str, None] = 'b6d2f8a41c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE sales_daily_facts ADD COLUMN IF NOT EXISTS invoice_id UUID")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_facts_invoice ON sales_daily_facts (invoice_id)")
+
+    # Untagged rows cannot be replaced per invoice; rebuild every fact at the new grain
+    from services.sales_fact_service import SalesFactService
+    bind = op.get_bind()
+    bind.execute(sa.text("DELETE FROM sales_daily_facts"))
+    bind.execute(SalesFactService.backfill_statement())
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sales_daily_facts_invoice', table_name='sales_daily_facts')
+    op.drop_column('sales_daily_facts', 'invoice_id')
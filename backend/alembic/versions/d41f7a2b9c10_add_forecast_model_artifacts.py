@@ -0,0 +1,33 @@
+"""Add fitted parameter storage to forecast models
+
+Revision ID: d41f7a2b9c10
+Revises: c9e1d5f57c3a
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f7a2b9c10'
+down_revision: Union[str, None] = 'c9e1d5f57c3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tables may already have been created by Base.metadata.create_all at startup
+    op.execute("ALTER TABLE forecast_models ADD COLUMN IF NOT EXISTS data_fingerprint VARCHAR(64)")
+    op.execute("ALTER TABLE forecast_models ADD COLUMN IF NOT EXISTS model_params JSONB")
+    op.execute("ALTER TABLE forecast_models ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_forecast_models_item_type ON forecast_models (item_id, model_type)")
+
+
+def downgrade() -> None:
+    op.drop_index('idx_forecast_models_item_type', table_name='forecast_models')
+    op.drop_column('forecast_models', 'updated_at')
+    op.drop_column('forecast_models', 'model_params')
+    op.drop_column('forecast_models', 'data_fingerprint')
@@ -0,0 +1,41 @@
+"""Make demand forecast rows unique per item, date and model
+
+Revision ID: e7a3c1f08b52
+Revises: d41f7a2b9c10
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c1f08b52'
+down_revision: Union[str, None] = 'd41f7a2b9c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Earlier refreshes appended a full copy of every forecast; keep the newest row
+    op.execute("""
+        DELETE FROM demand_forecasts df
+        USING (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY item_id, forecast_date, model_used
+                ORDER BY created_at DESC, id DESC
+            ) AS rn
+            FROM demand_forecasts
+        ) ranked
+        WHERE df.id = ranked.id AND ranked.rn > 1
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_demand_forecasts_item_date_model
+        ON demand_forecasts (item_id, forecast_date, model_used)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_demand_forecasts_item_date_model', table_name='demand_forecasts')
@@ -0,0 +1,56 @@
+"""Add daily sales fact table for KPI roll-ups
+
+Revision ID: f2b8d4e6a913
+Revises: e7a3c1f08b52
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4e6a913'
+down_revision: Union[str, None] = 'e7a3c1f08b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The table may already have been created by Base.metadata.create_all at startup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_facts (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            sale_date DATE NOT NULL,
+            item_id UUID,
+            category_id UUID,
+            customer_id UUID,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+            cost NUMERIC(14, 2) NOT NULL DEFAULT 0,
+            invoice_amount NUMERIC(14, 4) NOT NULL DEFAULT 0,
+            labor_cost NUMERIC(14, 4) NOT NULL DEFAULT 0,
+            tax_cost NUMERIC(14, 4) NOT NULL DEFAULT 0,
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            invoice_share NUMERIC(14, 6) NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_facts_date ON sales_daily_facts (sale_date)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_facts_item_date ON sales_daily_facts (item_id, sale_date)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_facts_customer_date ON sales_daily_facts (customer_id, sale_date)")
+
+    # Backfill from existing invoices; later changes are maintained by the app
+    from services.sales_fact_service import SalesFactService
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT NOT EXISTS (SELECT 1 FROM sales_daily_facts)")).scalar():
+        bind.execute(SalesFactService.backfill_statement())
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sales_daily_facts_customer_date', table_name='sales_daily_facts')
+    op.drop_index('idx_sales_daily_facts_item_date', table_name='sales_daily_facts')
+    op.drop_index('idx_sales_daily_facts_date', table_name='sales_daily_facts')
+    op.drop_table('sales_daily_facts')
@@ -13,25 +13,33 @@ from typing import Dict, List, Optional, Any, Tuple
 import logging
 import json
 
-from celery import Task
+from celery import Task, chord, group
 from celery.exceptions import Retry
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, text
+from sqlalchemy import text, func
+from sqlalchemy.dialects.postgresql import insert
 import os
 import numpy as np
 from decimal import Decimal
 
 from celery_app import celery_app
+from database import get_sessionmaker
 from models import InventoryItem, DemandForecast, ForecastModel
 from services.forecasting_service import ForecastingService
-from redis_config import get_analytics_cache
+from services.forecast_executor import get_forecast_executor
+from redis_config import get_sync_analytics_cache
 
 logger = logging.getLogger(__name__)
 
-# Database setup for background tasks
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:password@db:5432/goldshop")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Database setup for background tasks: the shared pool of the forecasting
+# workload profile (see database.ENGINE_PROFILES)
+SessionLocal = get_sessionmaker("celery-forecast")
+
+# Fan-out settings for catalog-wide forecast refreshes
+FORECAST_BATCH_SIZE = int(os.getenv("FORECAST_BATCH_SIZE", "25"))
+FORECAST_MAX_CONCURRENCY = int(os.getenv("FORECAST_MAX_CONCURRENCY", "8"))
+
+# Rows per multi-row INSERT when writing forecasts
+FORECAST_UPSERT_CHUNK_SIZE = int(os.getenv("FORECAST_UPSERT_CHUNK_SIZE", "1000"))
 
 class DatabaseTask(Task):
     """Base task class with database session management"""
@@ -43,12 +51,186 @@ class DatabaseTask(Task):
     def run_with_db(self, db, *args, **kwargs):
         raise NotImplementedError
 
+def _generate_and_store_forecast(
+    db,
+    item_id: str,
+    periods: int,
+    model_type: str
+) -> Dict[str, Any]:
+    """
+    Generate, persist and cache the demand forecast for a single item
+    """
+    # Initialize forecasting service
+    forecasting_service = ForecastingService(db, executor=get_forecast_executor("worker"))
+
+    # Generate forecast
+    forecast_result = asyncio.run(forecasting_service.forecast_demand(
+        item_id=item_id,
+        periods=periods,
+        model_type=model_type
+    ))
+
+    return _store_forecast(db, item_id, periods, model_type, forecast_result)
+
+def _store_forecast(
+    db,
+    item_id: str,
+    periods: int,
+    model_type: str,
+    forecast_result
+) -> Dict[str, Any]:
+    """
+    Persist and cache a generated forecast
+
+    Shared by the single-item task and the batch fan-out tasks so that
+    both paths store identical rows and cache entries.
+    """
+    _upsert_demand_forecasts(db, _demand_forecast_rows(item_id, forecast_result))
+    _cache_forecast(item_id, forecast_result)
+    return _forecast_summary(item_id, periods, model_type, forecast_result)
+
+def _demand_forecast_rows(item_id: str, forecast_result) -> List[Dict[str, Any]]:
+    """Build demand_forecasts rows for one forecast as plain dicts"""
+    confidence_score = forecast_result.confidence_score
+    return [
+        {
+            "item_id": item_id,
+            "forecast_date": date.fromisoformat(prediction['date']),
+            "forecast_period": "daily",
+            "predicted_demand": prediction['predicted_demand'],
+            "confidence_interval_lower": prediction['confidence_lower'],
+            "confidence_interval_upper": prediction['confidence_upper'],
+            "confidence_score": confidence_score,
+            "model_used": forecast_result.model_used,
+            "accuracy_score": confidence_score,
+            "historical_data": {
+                "day_of_week": prediction['day_of_week'],
+                "month": prediction['month'],
+                "seasonal_patterns": forecast_result.seasonal_patterns
+            }
+        }
+        for prediction in forecast_result.predictions
+    ]
+
+def _upsert_demand_forecasts(db, rows: List[Dict[str, Any]]) -> None:
+    """
+    Write forecast rows with multi-row INSERT ... ON CONFLICT DO UPDATE
+
+    Rows are keyed by (item_id, forecast_date), so a refresh replaces the
+    previous forecast for those days instead of appending, including when
+    automatic selection picks a different model than last time.
+    """
+    if not rows:
+        return
+
+    table = DemandForecast.__table__
+    for start in range(0, len(rows), FORECAST_UPSERT_CHUNK_SIZE):
+        statement = insert(table).values(rows[start:start + FORECAST_UPSERT_CHUNK_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.item_id, table.c.forecast_date],
+            set_={
+                "forecast_period": statement.excluded.forecast_period,
+                "model_used": statement.excluded.model_used,
+                "predicted_demand": statement.excluded.predicted_demand,
+                "confidence_interval_lower": statement.excluded.confidence_interval_lower,
+                "confidence_interval_upper": statement.excluded.confidence_interval_upper,
+                "confidence_score": statement.excluded.confidence_score,
+                "accuracy_score": statement.excluded.accuracy_score,
+                "historical_data": statement.excluded.historical_data,
+                "created_at": func.now()
+            }
+        )
+        db.execute(statement)
+
+    db.commit()
+
+def _cache_forecast(item_id: str, forecast_result) -> None:
+    """Cache forecast results for the API"""
+    cache = get_sync_analytics_cache()
+    forecast_period = f"{forecast_result.forecast_period_start}_{forecast_result.forecast_period_end}"
+    cache.set_forecast_data(
+        item_id=item_id,
+        forecast_period=forecast_period,
+        data={
+            "predictions": forecast_result.predictions,
+            "confidence_score": forecast_result.confidence_score,
+            "model_used": forecast_result.model_used,
+            "accuracy_metrics": forecast_result.accuracy_metrics
+        },
+        ttl=3600  # 1 hour cache
+    )
+
+def _forecast_summary(item_id: str, periods: int, model_type: str, forecast_result) -> Dict[str, Any]:
+    """Task result entry for a stored forecast"""
+    return {
+        "forecast_id": f"forecast_{item_id}_{datetime.utcnow().isoformat()}",
+        "item_id": item_id,
+        "model_type": model_type,
+        "periods": periods,
+        "predictions_count": len(forecast_result.predictions),
+        "confidence_score": forecast_result.confidence_score,
+        "forecast_period_start": forecast_result.forecast_period_start.isoformat(),
+        "forecast_period_end": forecast_result.forecast_period_end.isoformat(),
+        "accuracy_metrics": forecast_result.accuracy_metrics,
+        "generated_at": datetime.utcnow().isoformat(),
+        "status": "completed"
+    }
+
+def _chunk_forecast_items(
+    items: List[Dict[str, Any]],
+    batch_size: int = FORECAST_BATCH_SIZE,
+    max_concurrency: int = FORECAST_MAX_CONCURRENCY
+) -> List[List[Dict[str, Any]]]:
+    """
+    Split items into batches so that at most ``max_concurrency`` batch
+    tasks are dispatched, each holding at least ``batch_size`` items
+    """
+    if not items:
+        return []
+
+    chunk_size = max(1, batch_size, -(-len(items) // max(1, max_concurrency)))
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+def _dispatch_forecast_fan_out(
+    items: List[Dict[str, Any]],
+    periods: int,
+    model_type: str,
+    summary_metadata: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Dispatch a chord of forecast batch tasks with a single aggregation callback
+
+    The dispatcher returns immediately; the callback builds the summary
+    once every batch has reported back.
+    """
+    batches = _chunk_forecast_items(items)
+
+    header = group(
+        forecast_item_batch_task.s(batch, periods, model_type)
+        for batch in batches
+    )
+    callback = aggregate_forecast_results_task.s(
+        total_items=len(items),
+        summary_metadata=summary_metadata
+    )
+    chord_result = chord(header)(callback)
+
+    return {
+        **summary_metadata,
+        "total_items": len(items),
+        "batches_dispatched": len(batches),
+        "batch_size": len(batches[0]) if batches else 0,
+        "aggregation_task_id": chord_result.id,
+        "dispatched_at": datetime.utcnow().isoformat(),
+        "status": "dispatched"
+    }
+
 @celery_app.task(bind=True, name="analytics_tasks.forecasting_tasks.generate_demand_forecast")
 def generate_demand_forecast_task(
     self, 
     item_id: str, 
     periods: int = 30, 
-    model_type: str = "arima"
+    model_type: str = "auto"
 ) -> Dict[str, Any]:
     """
     Generate demand forecast for a specific inventory item
@@ -65,66 +247,7 @@ def generate_demand_forecast_task(
         logger.info(f"Starting demand forecast for item {item_id} using {model_type} model")
         
         with SessionLocal() as db:
-            # Initialize forecasting service
-            forecasting_service = ForecastingService(db)
-        
-            # Generate forecast
-            forecast_result = asyncio.run(forecasting_service.forecast_demand(
-                item_id=item_id,
-                periods=periods,
-                model_type=model_type
-            ))
-            
-            # Store forecast in database
-            for prediction in forecast_result.predictions:
-                demand_forecast = DemandForecast(
-                    item_id=item_id,
-                    forecast_date=datetime.fromisoformat(prediction['date']).date(),
-                    forecast_period="daily",
-                    predicted_demand=Decimal(str(prediction['predicted_demand'])),
-                    confidence_interval_lower=Decimal(str(prediction['confidence_lower'])),
-                    confidence_interval_upper=Decimal(str(prediction['confidence_upper'])),
-                    confidence_score=Decimal(str(forecast_result.confidence_score)),
-                    model_used=model_type,
-                    accuracy_score=Decimal(str(forecast_result.confidence_score)),
-                    historical_data={
-                        "day_of_week": prediction['day_of_week'],
-                        "month": prediction['month'],
-                        "seasonal_patterns": forecast_result.seasonal_patterns
-                    }
-                )
-                db.add(demand_forecast)
-            
-            db.commit()
-            
-            # Cache forecast results
-            cache = get_analytics_cache()
-            forecast_period = f"{forecast_result.forecast_period_start}_{forecast_result.forecast_period_end}"
-            asyncio.run(cache.set_forecast_data(
-                item_id=item_id,
-                forecast_period=forecast_period,
-                data={
-                    "predictions": forecast_result.predictions,
-                    "confidence_score": forecast_result.confidence_score,
-                    "model_used": forecast_result.model_used,
-                    "accuracy_metrics": forecast_result.accuracy_metrics
-                },
-                ttl=3600  # 1 hour cache
-            ))
-            
-            result = {
-                "forecast_id": f"forecast_{item_id}_{datetime.utcnow().isoformat()}",
-                "item_id": item_id,
-                "model_type": model_type,
-                "periods": periods,
-                "predictions_count": len(forecast_result.predictions),
-                "confidence_score": forecast_result.confidence_score,
-                "forecast_period_start": forecast_result.forecast_period_start.isoformat(),
-                "forecast_period_end": forecast_result.forecast_period_end.isoformat(),
-                "accuracy_metrics": forecast_result.accuracy_metrics,
-                "generated_at": datetime.utcnow().isoformat(),
-                "status": "completed"
-            }
+            result = _generate_and_store_forecast(db, item_id, periods, model_type)
             
             logger.info(f"Demand forecast completed for item {item_id}")
             return result
@@ -133,61 +256,159 @@ def generate_demand_forecast_task(
         logger.error(f"Error generating demand forecast for item {item_id}: {str(e)}")
         raise self.retry(countdown=120, max_retries=3, exc=e)
 
-@celery_app.task(bind=True, base=DatabaseTask, name="analytics_tasks.forecasting_tasks.update_all_forecasts")
-def update_all_forecasts_task(self, db) -> Dict[str, Any]:
+@celery_app.task(bind=True, name="analytics_tasks.forecasting_tasks.forecast_item_batch")
+def forecast_item_batch_task(
+    self,
+    items: List[Dict[str, Any]],
+    periods: int = 30,
+    model_type: str = "auto"
+) -> Dict[str, Any]:
     """
-    Update demand forecasts for all active inventory items
+    Generate demand forecasts for a batch of inventory items
     
+    Per-item failures are collected rather than raised so that a single
+    bad item never fails the surrounding chord.
+    
+    Args:
+        items: List of {"item_id", "item_name"} dicts
+        periods: Number of periods to forecast
+        model_type: Forecasting model type
+        
     Returns:
-        Dict containing update results
+        Dict containing successful and failed forecasts for the batch
     """
-    try:
-        logger.info("Starting forecast update for all active inventory items")
-        
-        # Get all active inventory items
-        active_items = db.query(InventoryItem).filter(
-            InventoryItem.is_active == True,
-            InventoryItem.stock_quantity > 0
-        ).all()
-        
-        successful_forecasts = []
-        failed_forecasts = []
-        
-        for item in active_items:
+    successful_forecasts = []
+    failed_forecasts = []
+    
+    with SessionLocal() as db:
+        # Load sales history for the whole batch in one query
+        try:
+            forecasting_service = ForecastingService(db, executor=get_forecast_executor("worker"))
+            forecasts, forecast_errors = asyncio.run(forecasting_service.forecast_demand_batch(
+                [item["item_id"] for item in items], periods, model_type
+            ))
+        except Exception as batch_error:
+            db.rollback()
+            logger.error(f"Failed to forecast batch: {str(batch_error)}")
+            forecasts = {}
+            forecast_errors = {item["item_id"]: str(batch_error) for item in items}
+        
+        # Write every forecast in the batch with one bulk upsert
+        try:
+            _upsert_demand_forecasts(db, [
+                row
+                for item_id, forecast in forecasts.items()
+                for row in _demand_forecast_rows(item_id, forecast)
+            ])
+        except Exception as write_error:
+            db.rollback()
+            logger.error(f"Failed to store forecasts for batch: {str(write_error)}")
+            forecast_errors.update({item_id: str(write_error) for item_id in forecasts})
+            forecasts = {}
+        
+        for item in items:
             try:
-                # Generate forecast for each item
-                forecast_task = generate_demand_forecast_task.apply_async(
-                    args=[str(item.id), 30, "arima"]
-                )
+                if item["item_id"] not in forecasts:
+                    raise ValueError(forecast_errors.get(item["item_id"], "Forecast not generated"))
                 
-                # Wait for completion with timeout
-                forecast_result = forecast_task.get(timeout=300)  # 5 minute timeout
+                forecast = forecasts[item["item_id"]]
+                _cache_forecast(item["item_id"], forecast)
                 successful_forecasts.append({
-                    "item_id": str(item.id),
-                    "item_name": item.name,
-                    "forecast_result": forecast_result
+                    "item_id": item["item_id"],
+                    "item_name": item.get("item_name"),
+                    "forecast_result": _forecast_summary(item["item_id"], periods, model_type, forecast)
                 })
                 
             except Exception as item_error:
-                logger.error(f"Failed to forecast for item {item.id}: {str(item_error)}")
+                logger.error(f"Failed to forecast for item {item['item_id']}: {str(item_error)}")
                 failed_forecasts.append({
-                    "item_id": str(item.id),
-                    "item_name": item.name,
+                    "item_id": item["item_id"],
+                    "item_name": item.get("item_name"),
                     "error": str(item_error)
                 })
+    
+    return {
+        "successful": successful_forecasts,
+        "failed": failed_forecasts
+    }
+
+@celery_app.task(bind=True, name="analytics_tasks.forecasting_tasks.aggregate_forecast_results")
+def aggregate_forecast_results_task(
+    self,
+    batch_results: List[Dict[str, Any]],
+    total_items: int,
+    summary_metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Chord callback that builds the summary for a forecast fan-out
+    
+    Args:
+        batch_results: Results returned by each forecast_item_batch task
+        total_items: Number of items that were dispatched
+        summary_metadata: Extra fields to include in the summary
         
-        result = {
-            "update_id": f"forecast_update_{datetime.utcnow().isoformat()}",
-            "total_items": len(active_items),
-            "successful_forecasts": len(successful_forecasts),
-            "failed_forecasts": len(failed_forecasts),
-            "success_details": successful_forecasts,
-            "failure_details": failed_forecasts,
-            "updated_at": datetime.utcnow().isoformat(),
-            "status": "completed"
-        }
+    Returns:
+        Dict containing update results
+    """
+    successful_forecasts = []
+    failed_forecasts = []
+    
+    for batch_result in batch_results or []:
+        successful_forecasts.extend(batch_result.get("successful", []))
+        failed_forecasts.extend(batch_result.get("failed", []))
+    
+    result = {
+        **(summary_metadata or {}),
+        "total_items": total_items,
+        "successful_forecasts": len(successful_forecasts),
+        "failed_forecasts": len(failed_forecasts),
+        "success_details": successful_forecasts,
+        "failure_details": failed_forecasts,
+        "updated_at": datetime.utcnow().isoformat(),
+        "status": "completed"
+    }
+    
+    logger.info(f"Forecast fan-out completed: {len(successful_forecasts)}/{total_items} successful")
+    return result
+
+@celery_app.task(bind=True, name="analytics_tasks.forecasting_tasks.update_all_forecasts")
+def update_all_forecasts_task(self) -> Dict[str, Any]:
+    """
+    Update demand forecasts for all active inventory items
+    
+    Items are split into batches and dispatched as a chord; the
+    aggregate_forecast_results callback builds the final summary, so this
+    task never blocks a worker slot waiting on sub-tasks.
+    
+    Returns:
+        Dict describing the dispatched fan-out
+    """
+    try:
+        logger.info("Starting forecast update for all active inventory items")
+        
+        # Get all active inventory items
+        with SessionLocal() as db:
+            active_items = db.query(InventoryItem.id, InventoryItem.name).filter(
+                InventoryItem.is_active == True,
+                InventoryItem.stock_quantity > 0
+            ).all()
+        
+        items = [
+            {"item_id": str(item.id), "item_name": item.name}
+            for item in active_items
+        ]
+        update_id = f"forecast_update_{datetime.utcnow().isoformat()}"
+        
+        if not items:
+            return aggregate_forecast_results_task.run(
+                [], total_items=0, summary_metadata={"update_id": update_id}
+            )
+        
+        result = _dispatch_forecast_fan_out(
+            items, 30, "auto", {"update_id": update_id}
+        )
         
-        logger.info(f"Forecast update completed: {len(successful_forecasts)}/{len(active_items)} successful")
+        logger.info(f"Forecast update dispatched: {len(items)} items in {result['batches_dispatched']} batches")
         return result
         
     except Exception as e:
@@ -230,7 +451,7 @@ def train_forecasting_models_task(self, db) -> Dict[str, Any]:
             }
         
         # Initialize forecasting service
-        forecasting_service = ForecastingService(db)
+        forecasting_service = ForecastingService(db, executor=get_forecast_executor("worker"))
         
         model_performance = {}
         training_results = []
@@ -496,7 +717,7 @@ def generate_seasonal_analysis_task(self, db, item_id: str) -> Dict[str, Any]:
         logger.info(f"Starting seasonal analysis for item {item_id}")
         
         # Initialize forecasting service
-        forecasting_service = ForecastingService(db)
+        forecasting_service = ForecastingService(db, executor=get_forecast_executor("worker"))
         
         # Get historical sales data
         historical_data = forecasting_service._get_historical_sales_data(item_id)
@@ -533,13 +754,12 @@ def generate_seasonal_analysis_task(self, db, item_id: str) -> Dict[str, Any]:
         logger.error(f"Error in seasonal analysis for item {item_id}: {str(e)}")
         raise self.retry(countdown=60, max_retries=3, exc=e)
 
-@celery_app.task(bind=True, base=DatabaseTask, name="analytics_tasks.forecasting_tasks.bulk_forecast_generation")
+@celery_app.task(bind=True, name="analytics_tasks.forecasting_tasks.bulk_forecast_generation")
 def bulk_forecast_generation_task(
     self, 
-    db, 
     item_ids: List[str], 
     periods: int = 30, 
-    model_type: str = "arima"
+    model_type: str = "auto"
 ) -> Dict[str, Any]:
     """
     Generate forecasts for multiple items in bulk
@@ -555,42 +775,21 @@ def bulk_forecast_generation_task(
     try:
         logger.info(f"Starting bulk forecast generation for {len(item_ids)} items")
         
-        successful_forecasts = []
-        failed_forecasts = []
-        
-        for item_id in item_ids:
-            try:
-                # Generate forecast for each item
-                forecast_result = generate_demand_forecast_task.apply_async(
-                    args=[item_id, periods, model_type]
-                ).get(timeout=300)  # 5 minute timeout per item
-                
-                successful_forecasts.append({
-                    "item_id": item_id,
-                    "forecast_result": forecast_result
-                })
-                
-            except Exception as item_error:
-                logger.error(f"Failed to generate forecast for item {item_id}: {str(item_error)}")
-                failed_forecasts.append({
-                    "item_id": item_id,
-                    "error": str(item_error)
-                })
-        
-        result = {
+        summary_metadata = {
             "bulk_forecast_id": f"bulk_forecast_{datetime.utcnow().isoformat()}",
-            "total_items": len(item_ids),
-            "successful_forecasts": len(successful_forecasts),
-            "failed_forecasts": len(failed_forecasts),
             "model_type": model_type,
-            "periods": periods,
-            "success_details": successful_forecasts,
-            "failure_details": failed_forecasts,
-            "generated_at": datetime.utcnow().isoformat(),
-            "status": "completed"
+            "periods": periods
         }
+        items = [{"item_id": item_id, "item_name": None} for item_id in item_ids]
+        
+        if not items:
+            return aggregate_forecast_results_task.run(
+                [], total_items=0, summary_metadata=summary_metadata
+            )
+        
+        result = _dispatch_forecast_fan_out(items, periods, model_type, summary_metadata)
         
-        logger.info(f"Bulk forecast generation completed: {len(successful_forecasts)}/{len(item_ids)} successful")
+        logger.info(f"Bulk forecast generation dispatched: {len(item_ids)} items in {result['batches_dispatched']} batches")
         return result
         
     except Exception as e:
@@ -8,33 +8,95 @@ Requirements covered: 1.4
 """
 
 import asyncio
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 import logging
 
-from celery import Task
+from celery import Task, chord, group
 from celery.exceptions import Retry
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import insert
 import os
 
 from celery_app import celery_app
-from database import get_db
+from database import get_db, get_sessionmaker
 from models import KPISnapshot, InventoryItem, Invoice, Customer
 from services.kpi_calculator_service import (
     FinancialKPICalculator, 
     OperationalKPICalculator, 
     CustomerKPICalculator
 )
-from redis_config import get_analytics_cache
+from services.sales_fact_service import SalesFactService, SALES_FACT_RECONCILE_DAYS
+from services.cache_warming_service import CacheWarmingService, WARM_TOP_N
+from redis_config import get_sync_analytics_cache
 
 logger = logging.getLogger(__name__)
 
-# Database setup for background tasks
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:password@db:5432/goldshop")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Database setup for background tasks: the shared pool of the KPI
+# workload profile (see database.ENGINE_PROFILES)
+SessionLocal = get_sessionmaker("celery-kpi")
+
+# 'chord' fans the calculators out to workers; 'concurrent' runs them in
+# threads of the snapshot task, each on its own session
+KPI_SNAPSHOT_MODE = os.getenv("KPI_SNAPSHOT_MODE", "chord")
+
+# KPI groups written as snapshots: (kpi_type, result key, name prefix)
+SNAPSHOT_KPI_GROUPS = [
+    ("financial", "revenue_kpis", "revenue"),
+    ("operational", "inventory_kpis", "inventory"),
+    ("customer", "acquisition_kpis", "acquisition"),
+]
+
+# Event loop of each thread that runs KPI calculations. asyncio.run() would
+# build a loop, and with it a Redis connection pool, for every calculator
+# call; one long-lived loop per thread keeps its pool open across tasks
+_thread_state = threading.local()
+_runners = []
+_runners_lock = threading.Lock()
+
+# Threads of 'concurrent' mode, kept for the life of the worker process so
+# that their loops are reused too
+_snapshot_pool = None
+
+def _run_async(coroutine):
+    """Run a calculator coroutine on the calling thread's event loop"""
+    runner = getattr(_thread_state, "runner", None)
+    if runner is None:
+        runner = _thread_state.runner = asyncio.Runner()
+        with _runners_lock:
+            _runners.append(runner)
+    return runner.run(coroutine)
+
+def _get_snapshot_pool() -> ThreadPoolExecutor:
+    global _snapshot_pool
+    with _runners_lock:
+        if _snapshot_pool is None:
+            _snapshot_pool = ThreadPoolExecutor(
+                max_workers=len(SNAPSHOT_KPI_GROUPS), thread_name_prefix="kpi-snapshot"
+            )
+        return _snapshot_pool
+
+def _reset_after_fork():
+    """Loops, their connections and the pool threads belong to the parent"""
+    global _thread_state, _runners, _runners_lock, _snapshot_pool
+    _thread_state = threading.local()
+    _runners = []
+    _runners_lock = threading.Lock()
+    _snapshot_pool = None
+
+@atexit.register
+def _close_runners():
+    for runner in _runners:
+        try:
+            runner.close()
+        except Exception as e:
+            logger.warning(f"Error closing KPI event loop: {str(e)}")
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 class DatabaseTask(Task):
     """Base task class with database session management"""
@@ -46,6 +108,155 @@ class DatabaseTask(Task):
     def run_with_db(self, db, *args, **kwargs):
         raise NotImplementedError
 
+def _calculate_financial_kpis(db, start_date: str, end_date: str, targets: Optional[Dict] = None) -> Dict[str, Any]:
+    """Calculate financial KPIs on the given session"""
+    # Parse dates
+    start_dt = datetime.fromisoformat(start_date).date()
+    end_dt = datetime.fromisoformat(end_date).date()
+    
+    # Initialize calculator
+    calculator = FinancialKPICalculator(db)
+    
+    # Calculate KPIs
+    revenue_kpis = _run_async(calculator.calculate_revenue_kpis(start_dt, end_dt, targets))
+    profit_kpis = _run_async(calculator.calculate_profit_margin_kpis(start_dt, end_dt, targets))
+    
+    if targets:
+        achievement_kpis = _run_async(calculator.calculate_achievement_rate_kpis(start_dt, end_dt, targets))
+    else:
+        achievement_kpis = {}
+    
+    # Combine results
+    return {
+        "calculation_id": f"financial_kpis_{start_date}_{end_date}_{datetime.utcnow().isoformat()}",
+        "period_start": start_date,
+        "period_end": end_date,
+        "calculated_at": datetime.utcnow().isoformat(),
+        "revenue_kpis": revenue_kpis,
+        "profit_kpis": profit_kpis,
+        "achievement_kpis": achievement_kpis,
+        "status": "completed"
+    }
+
+def _calculate_operational_kpis(db, start_date: str, end_date: str) -> Dict[str, Any]:
+    """Calculate operational KPIs on the given session"""
+    # Parse dates
+    start_dt = datetime.fromisoformat(start_date).date()
+    end_dt = datetime.fromisoformat(end_date).date()
+    
+    # Initialize calculator
+    calculator = OperationalKPICalculator(db)
+    
+    # Calculate KPIs
+    inventory_kpis = _run_async(calculator.calculate_inventory_turnover_kpis(start_dt, end_dt))
+    stockout_kpis = _run_async(calculator.calculate_stockout_frequency_kpis(start_dt, end_dt))
+    carrying_cost_kpis = _run_async(calculator.calculate_carrying_cost_kpis(start_dt, end_dt))
+    
+    # Combine results
+    return {
+        "calculation_id": f"operational_kpis_{start_date}_{end_date}_{datetime.utcnow().isoformat()}",
+        "period_start": start_date,
+        "period_end": end_date,
+        "calculated_at": datetime.utcnow().isoformat(),
+        "inventory_kpis": inventory_kpis,
+        "stockout_kpis": stockout_kpis,
+        "carrying_cost_kpis": carrying_cost_kpis,
+        "status": "completed"
+    }
+
+def _calculate_customer_kpis(db, start_date: str, end_date: str) -> Dict[str, Any]:
+    """Calculate customer KPIs on the given session"""
+    # Parse dates
+    start_dt = datetime.fromisoformat(start_date).date()
+    end_dt = datetime.fromisoformat(end_date).date()
+    
+    # Initialize calculator
+    calculator = CustomerKPICalculator(db)
+    
+    # Calculate KPIs
+    acquisition_kpis = _run_async(calculator.calculate_customer_acquisition_kpis(start_dt, end_dt))
+    retention_kpis = _run_async(calculator.calculate_customer_retention_kpis(start_dt, end_dt))
+    value_kpis = _run_async(calculator.calculate_customer_value_kpis(start_dt, end_dt))
+    
+    # Combine results
+    return {
+        "calculation_id": f"customer_kpis_{start_date}_{end_date}_{datetime.utcnow().isoformat()}",
+        "period_start": start_date,
+        "period_end": end_date,
+        "calculated_at": datetime.utcnow().isoformat(),
+        "acquisition_kpis": acquisition_kpis,
+        "retention_kpis": retention_kpis,
+        "value_kpis": value_kpis,
+        "status": "completed"
+    }
+
+def _run_with_session(calculate, *args) -> Dict[str, Any]:
+    """Run a KPI calculation on a session of its own (thread-safe)"""
+    with SessionLocal() as db:
+        return calculate(db, *args)
+
+def _snapshot_period(interval: str) -> Tuple[date, date]:
+    """Date range covered by a snapshot interval"""
+    end_date = date.today()
+    
+    if interval == "hourly":
+        start_date = end_date
+    elif interval == "daily":
+        start_date = end_date - timedelta(days=1)
+    elif interval == "weekly":
+        start_date = end_date - timedelta(days=7)
+    elif interval == "monthly":
+        start_date = end_date - timedelta(days=30)
+    else:
+        raise ValueError(f"Invalid interval: {interval}")
+    
+    return start_date, end_date
+
+def _store_kpi_snapshots(
+    db,
+    kpi_results: List[Dict[str, Any]],
+    interval: str,
+    start_date: date,
+    end_date: date
+) -> Dict[str, Any]:
+    """
+    Write snapshot rows for the financial, operational and customer results
+    
+    ``kpi_results`` follows the order of SNAPSHOT_KPI_GROUPS. All rows are
+    written with a single multi-row INSERT.
+    """
+    period_start = datetime.combine(start_date, datetime.min.time())
+    period_end = datetime.combine(end_date, datetime.min.time())
+    
+    rows = []
+    for (kpi_type, result_key, prefix), kpi_result in zip(SNAPSHOT_KPI_GROUPS, kpi_results):
+        for kpi_name, kpi_data in (kpi_result or {}).get(result_key, {}).items():
+            if isinstance(kpi_data, (int, float, Decimal)):
+                rows.append({
+                    "kpi_type": kpi_type,
+                    "kpi_name": f"{prefix}_{kpi_name}",
+                    "value": Decimal(str(kpi_data)),
+                    "period_start": period_start,
+                    "period_end": period_end,
+                    "kpi_metadata": {"source": "automated_snapshot", "interval": interval}
+                })
+    
+    if rows:
+        db.execute(insert(KPISnapshot).values(rows))
+    db.commit()
+    
+    snapshots_created = [row["kpi_name"] for row in rows]
+    return {
+        "snapshot_id": f"kpi_snapshots_{interval}_{datetime.utcnow().isoformat()}",
+        "interval": interval,
+        "period_start": start_date.isoformat(),
+        "period_end": end_date.isoformat(),
+        "snapshots_created": len(snapshots_created),
+        "snapshot_names": snapshots_created,
+        "generated_at": datetime.utcnow().isoformat(),
+        "status": "completed"
+    }
+
 @celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.calculate_financial_kpis")
 def calculate_financial_kpis_task(self, start_date: str, end_date: str, targets: Optional[Dict] = None) -> Dict[str, Any]:
     """
@@ -64,33 +275,7 @@ def calculate_financial_kpis_task(self, start_date: str, end_date: str, targets:
         
         # Create database session
         with SessionLocal() as db:
-            # Parse dates
-            start_dt = datetime.fromisoformat(start_date).date()
-            end_dt = datetime.fromisoformat(end_date).date()
-            
-            # Initialize calculator
-            calculator = FinancialKPICalculator(db)
-            
-            # Calculate KPIs
-            revenue_kpis = asyncio.run(calculator.calculate_revenue_kpis(start_dt, end_dt, targets))
-            profit_kpis = asyncio.run(calculator.calculate_profit_margin_kpis(start_dt, end_dt, targets))
-            
-            if targets:
-                achievement_kpis = asyncio.run(calculator.calculate_achievement_rate_kpis(start_dt, end_dt, targets))
-            else:
-                achievement_kpis = {}
-            
-            # Combine results
-            result = {
-                "calculation_id": f"financial_kpis_{start_date}_{end_date}_{datetime.utcnow().isoformat()}",
-                "period_start": start_date,
-                "period_end": end_date,
-                "calculated_at": datetime.utcnow().isoformat(),
-                "revenue_kpis": revenue_kpis,
-                "profit_kpis": profit_kpis,
-                "achievement_kpis": achievement_kpis,
-                "status": "completed"
-            }
+            result = _calculate_financial_kpis(db, start_date, end_date, targets)
             
             logger.info(f"Financial KPI calculation completed successfully")
             return result
@@ -99,8 +284,8 @@ def calculate_financial_kpis_task(self, start_date: str, end_date: str, targets:
         logger.error(f"Error in financial KPI calculation: {str(e)}")
         raise self.retry(countdown=60, max_retries=3, exc=e)
 
-@celery_app.task(bind=True, base=DatabaseTask, name="analytics_tasks.kpi_tasks.calculate_operational_kpis")
-def calculate_operational_kpis_task(self, db, start_date: str, end_date: str) -> Dict[str, Any]:
+@celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.calculate_operational_kpis")
+def calculate_operational_kpis_task(self, start_date: str, end_date: str) -> Dict[str, Any]:
     """
     Background task for operational KPI calculations
     
@@ -114,29 +299,7 @@ def calculate_operational_kpis_task(self, db, start_date: str, end_date: str) ->
     try:
         logger.info(f"Starting operational KPI calculation for period {start_date} to {end_date}")
         
-        # Parse dates
-        start_dt = datetime.fromisoformat(start_date).date()
-        end_dt = datetime.fromisoformat(end_date).date()
-        
-        # Initialize calculator
-        calculator = OperationalKPICalculator(db)
-        
-        # Calculate KPIs
-        inventory_kpis = asyncio.run(calculator.calculate_inventory_turnover_kpis(start_dt, end_dt))
-        stockout_kpis = asyncio.run(calculator.calculate_stockout_frequency_kpis(start_dt, end_dt))
-        carrying_cost_kpis = asyncio.run(calculator.calculate_carrying_cost_kpis(start_dt, end_dt))
-        
-        # Combine results
-        result = {
-            "calculation_id": f"operational_kpis_{start_date}_{end_date}_{datetime.utcnow().isoformat()}",
-            "period_start": start_date,
-            "period_end": end_date,
-            "calculated_at": datetime.utcnow().isoformat(),
-            "inventory_kpis": inventory_kpis,
-            "stockout_kpis": stockout_kpis,
-            "carrying_cost_kpis": carrying_cost_kpis,
-            "status": "completed"
-        }
+        result = _run_with_session(_calculate_operational_kpis, start_date, end_date)
         
         logger.info(f"Operational KPI calculation completed successfully")
         return result
@@ -145,8 +308,8 @@ def calculate_operational_kpis_task(self, db, start_date: str, end_date: str) ->
         logger.error(f"Error in operational KPI calculation: {str(e)}")
         raise self.retry(countdown=60, max_retries=3, exc=e)
 
-@celery_app.task(bind=True, base=DatabaseTask, name="analytics_tasks.kpi_tasks.calculate_customer_kpis")
-def calculate_customer_kpis_task(self, db, start_date: str, end_date: str) -> Dict[str, Any]:
+@celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.calculate_customer_kpis")
+def calculate_customer_kpis_task(self, start_date: str, end_date: str) -> Dict[str, Any]:
     """
     Background task for customer KPI calculations
     
@@ -160,31 +323,7 @@ def calculate_customer_kpis_task(self, db, start_date: str, end_date: str) -> Di
     try:
         logger.info(f"Starting customer KPI calculation for period {start_date} to {end_date}")
         
-        # Parse dates
-        start_dt = datetime.fromisoformat(start_date).date()
-        end_dt = datetime.fromisoformat(end_date).date()
-        
-        # Initialize calculator
-        calculator = CustomerKPICalculator(db)
-        
-        # Calculate KPIs
-        acquisition_kpis = asyncio.run(calculator.calculate_acquisition_rate_kpis(start_dt, end_dt))
-        retention_kpis = asyncio.run(calculator.calculate_retention_rate_kpis(start_dt, end_dt))
-        transaction_kpis = asyncio.run(calculator.calculate_transaction_value_kpis(start_dt, end_dt))
-        lifetime_value_kpis = asyncio.run(calculator.calculate_lifetime_value_kpis(start_dt, end_dt))
-        
-        # Combine results
-        result = {
-            "calculation_id": f"customer_kpis_{start_date}_{end_date}_{datetime.utcnow().isoformat()}",
-            "period_start": start_date,
-            "period_end": end_date,
-            "calculated_at": datetime.utcnow().isoformat(),
-            "acquisition_kpis": acquisition_kpis,
-            "retention_kpis": retention_kpis,
-            "transaction_kpis": transaction_kpis,
-            "lifetime_value_kpis": lifetime_value_kpis,
-            "status": "completed"
-        }
+        result = _run_with_session(_calculate_customer_kpis, start_date, end_date)
         
         logger.info(f"Customer KPI calculation completed successfully")
         return result
@@ -194,119 +333,104 @@ def calculate_customer_kpis_task(self, db, start_date: str, end_date: str) -> Di
         raise self.retry(countdown=60, max_retries=3, exc=e)
 
 @celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.generate_kpi_snapshots")
-def generate_kpi_snapshots(self, interval: str = "daily") -> Dict[str, Any]:
+def generate_kpi_snapshots(self, interval: str = "daily", mode: Optional[str] = None) -> Dict[str, Any]:
     """
     Generate automated KPI snapshots with configurable intervals
     
+    The three calculators never block this task on sub-task results: in
+    'chord' mode they run as a chord whose callback stores the snapshots,
+    in 'concurrent' mode they run in threads with separate sessions.
+    
     Args:
         interval: Snapshot interval ('hourly', 'daily', 'weekly', 'monthly')
+        mode: 'chord' or 'concurrent' (defaults to KPI_SNAPSHOT_MODE)
         
     Returns:
-        Dict containing snapshot generation results
+        Dict containing snapshot generation results, or the dispatch
+        details in 'chord' mode
     """
     try:
         logger.info(f"Starting {interval} KPI snapshot generation")
         
-        with SessionLocal() as db:
-            # Determine date range based on interval
-            end_date = date.today()
-            
-            if interval == "hourly":
-                start_date = end_date
-            elif interval == "daily":
-                start_date = end_date - timedelta(days=1)
-            elif interval == "weekly":
-                start_date = end_date - timedelta(days=7)
-            elif interval == "monthly":
-                start_date = end_date - timedelta(days=30)
-            else:
-                raise ValueError(f"Invalid interval: {interval}")
-        
-            # Calculate all KPI types
-            financial_task = calculate_financial_kpis_task.delay(
-                start_date.isoformat(), 
-                end_date.isoformat()
-            )
-            operational_task = calculate_operational_kpis_task.delay(
-                start_date.isoformat(), 
-                end_date.isoformat()
-            )
-            customer_task = calculate_customer_kpis_task.delay(
-                start_date.isoformat(), 
-                end_date.isoformat()
-            )
-            
-            # Wait for all tasks to complete
-            financial_result = financial_task.get(timeout=1800)  # 30 minutes timeout
-            operational_result = operational_task.get(timeout=1800)
-            customer_result = customer_task.get(timeout=1800)
-            
-            # Store snapshots in database
-            snapshots_created = []
+        mode = mode or KPI_SNAPSHOT_MODE
+        start_date, end_date = _snapshot_period(interval)
+        period = (start_date.isoformat(), end_date.isoformat())
+        
+        if mode == "chord":
+            callback = store_kpi_snapshots_task.s(interval=interval, period_start=period[0], period_end=period[1])
+            async_result = chord(group(
+                calculate_financial_kpis_task.s(*period),
+                calculate_operational_kpis_task.s(*period),
+                calculate_customer_kpis_task.s(*period)
+            ))(callback)
             
-            # Financial KPI snapshots
-            for kpi_name, kpi_data in financial_result.get("revenue_kpis", {}).items():
-                if isinstance(kpi_data, (int, float, Decimal)):
-                    snapshot = KPISnapshot(
-                        kpi_type="financial",
-                        kpi_name=f"revenue_{kpi_name}",
-                        value=Decimal(str(kpi_data)),
-                        period_start=datetime.combine(start_date, datetime.min.time()),
-                        period_end=datetime.combine(end_date, datetime.min.time()),
-                        kpi_metadata={"source": "automated_snapshot", "interval": interval}
-                    )
-                    db.add(snapshot)
-                    snapshots_created.append(f"revenue_{kpi_name}")
-            
-            # Operational KPI snapshots
-            for kpi_name, kpi_data in operational_result.get("inventory_kpis", {}).items():
-                if isinstance(kpi_data, (int, float, Decimal)):
-                    snapshot = KPISnapshot(
-                        kpi_type="operational",
-                        kpi_name=f"inventory_{kpi_name}",
-                        value=Decimal(str(kpi_data)),
-                        period_start=datetime.combine(start_date, datetime.min.time()),
-                        period_end=datetime.combine(end_date, datetime.min.time()),
-                        kpi_metadata={"source": "automated_snapshot", "interval": interval}
-                    )
-                    db.add(snapshot)
-                    snapshots_created.append(f"inventory_{kpi_name}")
-            
-            # Customer KPI snapshots
-            for kpi_name, kpi_data in customer_result.get("acquisition_kpis", {}).items():
-                if isinstance(kpi_data, (int, float, Decimal)):
-                    snapshot = KPISnapshot(
-                        kpi_type="customer",
-                        kpi_name=f"acquisition_{kpi_name}",
-                        value=Decimal(str(kpi_data)),
-                        period_start=datetime.combine(start_date, datetime.min.time()),
-                        period_end=datetime.combine(end_date, datetime.min.time()),
-                        kpi_metadata={"source": "automated_snapshot", "interval": interval}
-                    )
-                    db.add(snapshot)
-                    snapshots_created.append(f"acquisition_{kpi_name}")
-            
-            # Commit all snapshots
-            db.commit()
-            
-            result = {
-                "snapshot_id": f"kpi_snapshots_{interval}_{datetime.utcnow().isoformat()}",
+            logger.info(f"KPI snapshot generation dispatched as chord {async_result.id}")
+            return {
                 "interval": interval,
-                "period_start": start_date.isoformat(),
-                "period_end": end_date.isoformat(),
-                "snapshots_created": len(snapshots_created),
-                "snapshot_names": snapshots_created,
-                "generated_at": datetime.utcnow().isoformat(),
-                "status": "completed"
+                "period_start": period[0],
+                "period_end": period[1],
+                "aggregation_task_id": async_result.id,
+                "dispatched_at": datetime.utcnow().isoformat(),
+                "status": "dispatched"
             }
-            
-            logger.info(f"KPI snapshot generation completed: {len(snapshots_created)} snapshots created")
-            return result
+        
+        if mode != "concurrent":
+            raise ValueError(f"Invalid snapshot mode: {mode}")
+        
+        pool = _get_snapshot_pool()
+        futures = [
+            pool.submit(_run_with_session, calculate, *period)
+            for calculate in (_calculate_financial_kpis, _calculate_operational_kpis, _calculate_customer_kpis)
+        ]
+        kpi_results = [future.result() for future in futures]
+        
+        with SessionLocal() as db:
+            result = _store_kpi_snapshots(db, kpi_results, interval, start_date, end_date)
+        
+        logger.info(f"KPI snapshot generation completed: {result['snapshots_created']} snapshots created")
+        return result
         
     except Exception as e:
         logger.error(f"Error in KPI snapshot generation: {str(e)}")
         raise self.retry(countdown=300, max_retries=3, exc=e)  # 5 minute retry delay
 
+@celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.store_kpi_snapshots")
+def store_kpi_snapshots_task(
+    self,
+    kpi_results: List[Dict[str, Any]],
+    interval: str,
+    period_start: str,
+    period_end: str
+) -> Dict[str, Any]:
+    """
+    Chord callback that stores the snapshots for one generation run
+    
+    Args:
+        kpi_results: Financial, operational and customer results, in that order
+        interval: Snapshot interval
+        period_start: Start date in ISO format
+        period_end: End date in ISO format
+        
+    Returns:
+        Dict containing snapshot generation results
+    """
+    try:
+        with SessionLocal() as db:
+            result = _store_kpi_snapshots(
+                db,
+                kpi_results,
+                interval,
+                date.fromisoformat(period_start),
+                date.fromisoformat(period_end)
+            )
+        
+        logger.info(f"KPI snapshot generation completed: {result['snapshots_created']} snapshots created")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error storing KPI snapshots: {str(e)}")
+        raise self.retry(countdown=60, max_retries=3, exc=e)
+
 @celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.cleanup_expired_cache")
 def cleanup_expired_cache(self) -> Dict[str, Any]:
     """
@@ -318,10 +442,10 @@ def cleanup_expired_cache(self) -> Dict[str, Any]:
     try:
         logger.info("Starting analytics cache cleanup")
         
-        cache = get_analytics_cache()
+        cache = get_sync_analytics_cache()
         
         # Perform cache cleanup
-        asyncio.run(cache.cleanup_expired_cache())
+        cache.cleanup_expired_cache()
         
         # Get cache statistics
         cache_stats = cache.get_cache_stats()
@@ -340,6 +464,72 @@ def cleanup_expired_cache(self) -> Dict[str, Any]:
         logger.error(f"Error in cache cleanup: {str(e)}")
         raise self.retry(countdown=60, max_retries=3, exc=e)
 
+@celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.reconcile_sales_facts")
+def reconcile_sales_facts_task(self, days: int = SALES_FACT_RECONCILE_DAYS) -> Dict[str, Any]:
+    """
+    Rebuild the trailing window of daily sales facts
+    
+    Catches invoice changes made outside the invoice endpoints and item
+    cost changes that the per-invoice maintenance does not see.
+    
+    Args:
+        days: Number of trailing days to rebuild
+        
+    Returns:
+        Dict containing reconciliation results
+    """
+    try:
+        logger.info(f"Starting sales fact reconciliation for the last {days} days")
+        
+        with SessionLocal() as db:
+            SalesFactService(db).reconcile(days)
+        
+        result = {
+            "reconciliation_id": f"sales_facts_{datetime.utcnow().isoformat()}",
+            "period_start": (date.today() - timedelta(days=days)).isoformat(),
+            "period_end": date.today().isoformat(),
+            "reconciled_at": datetime.utcnow().isoformat(),
+            "status": "completed"
+        }
+        
+        logger.info("Sales fact reconciliation completed")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error in sales fact reconciliation: {str(e)}")
+        raise self.retry(countdown=300, max_retries=3, exc=e)
+
+@celery_app.task(bind=True, name="analytics_tasks.kpi_tasks.warm_popular_caches")
+def warm_popular_caches(self, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Recompute the most valuable KPI cache entries before they expire
+    
+    Runs every minute from beat and shortly after invalidations, so that
+    entries read at this time of day (e.g. the dashboard at opening) are
+    already cached when requested.
+    
+    Args:
+        limit: Number of top entries to consider (default ANALYTICS_WARM_TOP_N)
+        
+    Returns:
+        Dict containing warming results
+    """
+    try:
+        with SessionLocal() as db:
+            service = CacheWarmingService(db)
+            result = _run_async(service.warm_popular_entries(limit or WARM_TOP_N))
+        
+        return {
+            "warming_id": f"cache_warming_{datetime.utcnow().isoformat()}",
+            "warmed_at": datetime.utcnow().isoformat(),
+            **result
+        }
+        
+    except Exception as e:
+        logger.error(f"Error in cache warming: {str(e)}")
+        # The next beat run retries; a stale warm-up is worth nothing
+        return {"status": "failed", "error": str(e)}
+
 @celery_app.task(bind=True, base=DatabaseTask, name="analytics_tasks.kpi_tasks.calculate_kpi_trends")
 def calculate_kpi_trends_task(self, db, kpi_type: str, kpi_name: str, periods: int = 30) -> Dict[str, Any]:
     """
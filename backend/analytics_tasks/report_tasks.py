@@ -17,22 +17,23 @@ from pathlib import Path
 
 from celery import Task
 from celery.exceptions import Retry
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from decimal import Decimal
 
 from celery_app import celery_app
+from database import get_sessionmaker
 from models import CustomReport, ScheduledReport, ReportExecution
+from models_accounting import AccountBalanceSnapshot
+from services.accounting_service import AccountingService
 from services.report_engine_service import ReportEngineService
 from services.report_scheduler_service import ReportSchedulerService
-from redis_config import get_analytics_cache
+from redis_config import get_sync_analytics_cache
 
 logger = logging.getLogger(__name__)
 
-# Database setup for background tasks
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:password@db:5432/goldshop")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Database setup for background tasks: the shared pool of the report
+# workload profile (see database.ENGINE_PROFILES)
+SessionLocal = get_sessionmaker("reporting")
 
 class DatabaseTask(Task):
     """Base task class with database session management"""
@@ -109,8 +110,8 @@ def generate_custom_report_task(
         db.commit()
         
         # Cache report results
-        cache = get_analytics_cache()
-        asyncio.run(cache.set_report_data(
+        cache = get_sync_analytics_cache()
+        cache.set_report_data(
             report_id=report_id,
             data={
                 "report_data": report_result,
@@ -118,7 +119,7 @@ def generate_custom_report_task(
                 "generated_at": datetime.utcnow().isoformat()
             },
             ttl=1800  # 30 minutes cache
-        ))
+        )
         
         result = {
             "generation_id": f"report_gen_{report_id}_{datetime.utcnow().isoformat()}",
@@ -487,12 +488,15 @@ def generate_analytics_summary_report_task(
         if include_forecasts:
             try:
                 from analytics_tasks.forecasting_tasks import update_all_forecasts_task
-                forecast_result = update_all_forecasts_task.apply_async().get(timeout=1800)
+                # The refresh fans out as a chord; queue it and report the
+                # scheduled task instead of blocking this worker on it
+                forecast_refresh = update_all_forecasts_task.apply_async()
                 forecast_data = {
                     "forecast_summary": {
-                        "total_items_forecasted": forecast_result.get("successful_forecasts", 0),
                         "forecast_period": "30 days",
-                        "last_updated": forecast_result.get("updated_at")
+                        "refresh_status": "scheduled",
+                        "refresh_task_id": forecast_refresh.id,
+                        "scheduled_at": datetime.utcnow().isoformat()
                     }
                 }
             except Exception as forecast_error:
@@ -543,4 +547,47 @@ def generate_analytics_summary_report_task(
         
     except Exception as e:
         logger.error(f"Error generating analytics summary report: {str(e)}")
-        raise self.retry(countdown=300, max_retries=2, exc=e)
\ No newline at end of file
+        raise self.retry(countdown=300, max_retries=2, exc=e)
+
+@celery_app.task(bind=True, name="analytics_tasks.report_tasks.snapshot_account_balances")
+def snapshot_account_balances_task(self, period_end: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Snapshot account balances at the end of the last completed month
+    
+    As-of-date accounting reports start from the latest snapshot, so
+    only the lines posted after it are summed. A snapshot dropped by a
+    back-dated posting is rebuilt on the next run.
+    
+    Args:
+        period_end: Snapshot date (YYYY-MM-DD), defaults to last month end
+        
+    Returns:
+        Dict containing snapshot results
+    """
+    try:
+        snapshot_date = (
+            date.fromisoformat(period_end) if period_end
+            else date.today().replace(day=1) - timedelta(days=1)
+        )
+        
+        with SessionLocal() as db:
+            exists = db.query(AccountBalanceSnapshot.id).filter(
+                AccountBalanceSnapshot.period_end == snapshot_date
+            ).first() is not None
+            
+            rows = 0
+            if period_end or not exists:
+                logger.info(f"Snapshotting account balances as of {snapshot_date}")
+                rows = asyncio.run(AccountingService(db).snapshot_account_balances(snapshot_date))
+        
+        return {
+            "period_end": snapshot_date.isoformat(),
+            "rows": rows,
+            "skipped": not period_end and exists,
+            "snapshotted_at": datetime.utcnow().isoformat(),
+            "status": "completed"
+        }
+        
+    except Exception as e:
+        logger.error(f"Error snapshotting account balances: {str(e)}")
+        raise self.retry(countdown=300, max_retries=3, exc=e)
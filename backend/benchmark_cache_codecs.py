@@ -0,0 +1,183 @@
+"""
+Analytics Cache Codec Benchmark
+
+Compares payload size, encode/decode latency and (when Redis is reachable)
+Redis memory per entry for each cache type across the available codecs.
+The legacy column is the json.dumps(default=str) format used before the
+codec layer.
+
+Usage:
+    python benchmark_cache_codecs.py [--iterations 200] [--redis]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+import cache_codec
+from cache_codec import CacheCodec
+
+
+def _wrap(cache_type: str, data: Any, ttl: int) -> Dict:
+    """Entry metadata as written by AnalyticsCache"""
+    return {
+        "data": data,
+        "cached_at": datetime.utcnow().isoformat(),
+        "ttl": ttl,
+        "cache_type": cache_type,
+        "version": "1.0"
+    }
+
+
+def sample_payloads() -> Dict[str, Dict]:
+    """Representative entry per cache type"""
+    rng = random.Random(42)
+    today = date.today()
+
+    kpi = {
+        "current_revenue": Decimal("152340.25"),
+        "previous_revenue": Decimal("139220.10"),
+        "growth_rate": 9.42,
+        "achievement_rate": 87.3,
+        "trend": "up",
+        "calculated_at": datetime.utcnow()
+    }
+    forecast = {
+        "item_id": "6c1d6d2e-1a3c-4b31-9a7c-3f0a3c2e8b11",
+        "model_used": "arima",
+        "accuracy_score": 0.87,
+        "predictions": [
+            {
+                "date": today + timedelta(days=d),
+                "predicted_demand": round(rng.uniform(5, 40), 4),
+                "lower_bound": round(rng.uniform(0, 5), 4),
+                "upper_bound": round(rng.uniform(40, 60), 4)
+            }
+            for d in range(365)
+        ]
+    }
+    chart = {
+        "labels": [(today - timedelta(days=d)).isoformat() for d in range(180)],
+        "datasets": [
+            {"label": name, "data": [round(rng.uniform(1000, 9000), 2) for _ in range(180)]}
+            for name in ("revenue", "cost", "profit")
+        ]
+    }
+    report = {
+        "rows": [
+            {
+                "category": f"Category {i % 12}",
+                "item": f"Item {i}",
+                "quantity": rng.randint(1, 500),
+                "revenue": Decimal(str(round(rng.uniform(10, 5000), 2)))
+            }
+            for i in range(1000)
+        ],
+        "totals": {"quantity": 250000, "revenue": Decimal("2504033.50")}
+    }
+    aggregation = {
+        "groups": {f"category-{i}": {"sum": rng.uniform(0, 1e5), "count": rng.randint(1, 900)} for i in range(40)}
+    }
+
+    return {
+        "kpi": _wrap("kpi", kpi, 300),
+        "forecast": _wrap("forecast", forecast, 3600),
+        "chart": _wrap("chart", chart, 600),
+        "report": _wrap("report", report, 1800),
+        "aggregation": _wrap("aggregation", aggregation, 900)
+    }
+
+
+def available_codecs() -> Dict[str, Dict[str, Callable]]:
+    """Encoder/decoder pairs for every codec usable in this environment"""
+    codecs = {
+        "legacy-json": {
+            "encode": lambda entry: json.dumps(entry, default=str).encode(),
+            "decode": json.loads
+        }
+    }
+
+    serializers = ["orjson" if cache_codec.ORJSON_AVAILABLE else "json"]
+    if cache_codec.MSGPACK_AVAILABLE:
+        serializers.append("msgpack")
+    compressions = ["none"]
+    if cache_codec.ZSTD_AVAILABLE:
+        compressions.append("zstd")
+    if cache_codec.LZ4_AVAILABLE:
+        compressions.append("lz4")
+
+    for serializer in serializers:
+        for compression in compressions:
+            codec = CacheCodec(serializer, compression, compress_min_bytes=cache_codec.CACHE_COMPRESS_MIN_BYTES)
+            codecs[codec.name] = {"encode": codec.encode, "decode": codec.decode}
+    return codecs
+
+
+def _median_ms(func: Callable, arg: Any, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run_benchmark(iterations: int = 200, redis_client=None) -> List[Dict[str, Any]]:
+    """Measure every codec against every cache type"""
+    results = []
+    for cache_type, entry in sample_payloads().items():
+        for name, codec in available_codecs().items():
+            payload = codec["encode"](entry)
+            row = {
+                "cache_type": cache_type,
+                "codec": name,
+                "bytes": len(payload),
+                "encode_ms": _median_ms(codec["encode"], entry, iterations),
+                "decode_ms": _median_ms(codec["decode"], payload, iterations),
+                "redis_bytes": None
+            }
+            if redis_client is not None:
+                key = f"benchmark:codec:{cache_type}:{name}"
+                redis_client.set(key, payload, ex=60)
+                row["redis_bytes"] = redis_client.memory_usage(key)
+                redis_client.delete(key)
+            results.append(row)
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    """Print one table per cache type, relative to the legacy format"""
+    for cache_type in dict.fromkeys(row["cache_type"] for row in results):
+        rows = [row for row in results if row["cache_type"] == cache_type]
+        baseline = rows[0]
+        print(f"\n📊 {cache_type}")
+        print(f"{'codec':<16}{'bytes':>10}{'size %':>9}{'redis':>10}{'encode ms':>12}{'decode ms':>12}")
+        for row in rows:
+            redis_bytes = row["redis_bytes"] if row["redis_bytes"] is not None else "-"
+            print(
+                f"{row['codec']:<16}{row['bytes']:>10}"
+                f"{row['bytes'] / baseline['bytes'] * 100:>8.1f}%"
+                f"{redis_bytes:>10}"
+                f"{row['encode_ms']:>12.4f}{row['decode_ms']:>12.4f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark analytics cache codecs")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--redis", action="store_true", help="also measure MEMORY USAGE in Redis")
+    args = parser.parse_args()
+
+    client = None
+    if args.redis:
+        import os
+        import redis
+        # Binary payloads need a non-decoding connection
+        client = redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+    print_results(run_benchmark(args.iterations, client))
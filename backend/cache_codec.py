@@ -0,0 +1,222 @@
+"""
+Payload codecs for the analytics cache
+
+Entries are written as one header byte followed by the encoded body:
+
+    bits 0-3  serializer   (1 = JSON via orjson/json, 2 = msgpack)
+    bits 4-5  compression  (0 = none, 1 = zstd, 2 = lz4)
+
+Bodies smaller than the compression threshold are stored uncompressed.
+Entries written before the codec layer are plain JSON text starting with
+"{", which is not a valid header, so they are still read (and can be
+re-encoded in place with AnalyticsCache.reencode_legacy_entries).
+"""
+
+import json
+import os
+from datetime import date, datetime, time
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+SERIALIZER_JSON = 0x01
+SERIALIZER_MSGPACK = 0x02
+
+COMPRESSION_NONE = 0x00
+COMPRESSION_ZSTD = 0x10
+COMPRESSION_LZ4 = 0x20
+
+_SERIALIZER_MASK = 0x0F
+_COMPRESSION_MASK = 0x30
+
+SERIALIZERS = {"json": SERIALIZER_JSON, "orjson": SERIALIZER_JSON, "msgpack": SERIALIZER_MSGPACK}
+COMPRESSIONS = {"none": COMPRESSION_NONE, "zstd": COMPRESSION_ZSTD, "lz4": COMPRESSION_LZ4}
+
+# Codec used for new entries; readers handle every format regardless
+CACHE_SERIALIZER = os.getenv("ANALYTICS_CACHE_SERIALIZER", "orjson")
+CACHE_COMPRESSION = os.getenv("ANALYTICS_CACHE_COMPRESSION", "zstd")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("ANALYTICS_CACHE_COMPRESS_MIN_BYTES", "1024"))
+CACHE_COMPRESSION_LEVEL = int(os.getenv("ANALYTICS_CACHE_COMPRESSION_LEVEL", "3"))
+
+
+class CodecError(ValueError):
+    """Raised when a cached payload cannot be decoded"""
+
+
+def _to_primitive(value: Any) -> Any:
+    """Fallback for values the serializers do not support natively"""
+    if hasattr(value, "tolist"):  # numpy arrays and scalars
+        return value.tolist()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _json_dumps(data: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            data,
+            default=_to_primitive,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(data, default=_to_primitive, separators=(",", ":")).encode()
+
+
+def _json_loads(body: Union[bytes, str]) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class CacheCodec:
+    """
+    Encodes cache entries to bytes and decodes any supported format
+
+    Serializers or compressors whose package is missing fall back to JSON and
+    no compression respectively, so a misconfigured worker still writes
+    entries every other worker can read.
+    """
+
+    def __init__(self, serializer: str = "orjson", compression: str = "none",
+                 compress_min_bytes: int = 1024, compression_level: int = 3):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer '{serializer}'")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression '{compression}'")
+
+        if serializer == "msgpack" and not MSGPACK_AVAILABLE:
+            print("⚠️ msgpack is not installed, caching analytics entries as JSON")
+            serializer = "orjson"
+        if serializer == "orjson" and not ORJSON_AVAILABLE:
+            serializer = "json"
+        if (compression == "zstd" and not ZSTD_AVAILABLE) or (compression == "lz4" and not LZ4_AVAILABLE):
+            print(f"⚠️ {compression} is not installed, caching analytics entries uncompressed")
+            compression = "none"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self.compression_level = compression_level
+        self._serializer_id = SERIALIZERS[serializer]
+        self._compression_id = COMPRESSIONS[compression]
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+
+    @property
+    def name(self) -> str:
+        return self.serializer if self.compression == "none" else f"{self.serializer}+{self.compression}"
+
+    def describe(self) -> Dict[str, Any]:
+        """Codec settings for stats and configuration endpoints"""
+        return {
+            "serializer": self.serializer,
+            "compression": self.compression,
+            "compress_min_bytes": self.compress_min_bytes,
+            "compression_level": self.compression_level
+        }
+
+    def encode(self, data: Any) -> bytes:
+        """Serialize ``data`` and prefix the header byte"""
+        if self._serializer_id == SERIALIZER_MSGPACK:
+            body = msgpack.packb(data, default=_to_primitive, use_bin_type=True)
+        else:
+            body = _json_dumps(data)
+
+        compression = COMPRESSION_NONE
+        if self._compression_id != COMPRESSION_NONE and len(body) >= self.compress_min_bytes:
+            compression = self._compression_id
+            body = self._compress(compression, body)
+
+        return bytes((self._serializer_id | compression,)) + body
+
+    def decode(self, payload: Union[bytes, str]) -> Any:
+        """Decode a payload in any supported format, including legacy JSON text"""
+        if isinstance(payload, str):
+            return json.loads(payload)
+        if not payload:
+            raise CodecError("Empty cache payload")
+        if is_legacy_payload(payload):
+            return _json_loads(payload)
+
+        header = payload[0]
+        serializer = header & _SERIALIZER_MASK
+        compression = header & _COMPRESSION_MASK
+        if header & ~(_SERIALIZER_MASK | _COMPRESSION_MASK):
+            raise CodecError(f"Unknown cache payload header 0x{header:02x}")
+
+        body = payload[1:]
+        if compression != COMPRESSION_NONE:
+            body = self._decompress(compression, body)
+
+        if serializer == SERIALIZER_JSON:
+            return _json_loads(body)
+        if serializer == SERIALIZER_MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise CodecError("msgpack is required to read this cache entry")
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        raise CodecError(f"Unknown cache serializer 0x{serializer:02x}")
+
+    def _compress(self, compression: int, body: bytes) -> bytes:
+        if compression == COMPRESSION_ZSTD:
+            if self._zstd_compressor is None:
+                self._zstd_compressor = zstandard.ZstdCompressor(level=self.compression_level)
+            return self._zstd_compressor.compress(body)
+        return lz4.frame.compress(body, compression_level=self.compression_level)
+
+    def _decompress(self, compression: int, body: bytes) -> bytes:
+        if compression == COMPRESSION_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise CodecError("zstandard is required to read this cache entry")
+            if self._zstd_decompressor is None:
+                self._zstd_decompressor = zstandard.ZstdDecompressor()
+            return self._zstd_decompressor.decompress(body)
+        if compression == COMPRESSION_LZ4:
+            if not LZ4_AVAILABLE:
+                raise CodecError("lz4 is required to read this cache entry")
+            return lz4.frame.decompress(body)
+        raise CodecError(f"Unknown cache compression 0x{compression:02x}")
+
+
+def is_legacy_payload(payload: Union[bytes, str]) -> bool:
+    """True for entries written as plain JSON text before the codec layer"""
+    if isinstance(payload, str):
+        return True
+    return payload[:1] in (b"{", b"[")
+
+
+_cache_codec: Optional[CacheCodec] = None
+
+
+def get_cache_codec() -> CacheCodec:
+    """Codec configured through the ANALYTICS_CACHE_* environment variables"""
+    global _cache_codec
+    if _cache_codec is None:
+        _cache_codec = CacheCodec(
+            serializer=CACHE_SERIALIZER,
+            compression=CACHE_COMPRESSION,
+            compress_min_bytes=CACHE_COMPRESS_MIN_BYTES,
+            compression_level=CACHE_COMPRESSION_LEVEL
+        )
+    return _cache_codec
@@ -78,6 +78,12 @@ celery_app.conf.update(
             "args": ("daily",),
         },
         
+        # Nightly rebuild of recent daily sales facts
+        "reconcile-sales-facts": {
+            "task": "analytics_tasks.kpi_tasks.reconcile_sales_facts",
+            "schedule": 86400.0,  # Every day
+        },
+        
         # Demand forecasting updates
         "update-demand-forecasts": {
             "task": "analytics_tasks.forecasting_tasks.update_all_forecasts",
@@ -90,6 +96,13 @@ celery_app.conf.update(
             "schedule": 604800.0,  # Weekly
         },
         
+        # Predictive cache warming of popular, expensive entries
+        "warm-popular-caches": {
+            "task": "analytics_tasks.kpi_tasks.warm_popular_caches",
+            "schedule": 60.0,  # Every minute
+            "options": {"expires": 55},  # Skip runs that could not start in time
+        },
+        
         # Cache cleanup
         "cleanup-analytics-cache": {
             "task": "analytics_tasks.kpi_tasks.cleanup_expired_cache",
@@ -102,6 +115,12 @@ celery_app.conf.update(
             "schedule": 300.0,  # Every 5 minutes
         },
         
+        # Month-end account balance snapshots for as-of-date reports
+        "snapshot-account-balances": {
+            "task": "analytics_tasks.report_tasks.snapshot_account_balances",
+            "schedule": 86400.0,  # Daily, skipped once the snapshot exists
+        },
+        
         # Backup tasks
         "daily-full-backup": {
             "task": "analytics_tasks.backup_tasks.create_scheduled_full_backup",
@@ -158,5 +177,9 @@ celery_app.conf.update(
 # Task discovery
 celery_app.autodiscover_tasks()
 
+# Commits made by tasks invalidate analytics caches like API commits do
+from services.cache_invalidation_service import register_cache_invalidation_listeners
+register_cache_invalidation_listeners()
+
 if __name__ == "__main__":
     celery_app.start()
\ No newline at end of file
@@ -23,7 +23,7 @@ def create_accounting_tables():
         accounting_tables = [t for t in tables if any(keyword in t for keyword in [
             'chart_of_accounts', 'subsidiary_accounts', 'journal_entries', 'journal_entry_lines',
             'check_management', 'installment_accounts', 'installment_payments',
-            'bank_reconciliation', 'accounting_periods', 'accounting_audit_trail'
+            'bank_reconciliation', 'accounting_periods', 'account_balance_snapshots', 'accounting_audit_trail'
         ])]
         
         print(f"📋 Created accounting tables: {accounting_tables}")
@@ -1,22 +1,203 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from typing import Any, Dict, Optional
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://goldshop_user:goldshop_password@db:5432/goldshop")
 
-# Create engine with analytics-optimized settings
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False  # Set to True for SQL debugging
-)
+# Connection pool per workload. Every process builds engines through
+# get_engine(), so a worker holds one pool per profile it actually uses
+# instead of one per task module. Budget: the sum over all processes of
+# pool_size + max_overflow must stay below Postgres max_connections (or the
+# PgBouncer default_pool_size). Each setting can be overridden with
+# DB_<PROFILE>_<SETTING>, e.g. DB_CELERY_KPI_POOL_SIZE=6, and DB_<SETTING>
+# overrides it for every profile.
+ENGINE_PROFILES = {
+    "api": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30, "pool_recycle": 3600, "statement_timeout_ms": 0},
+    "celery-kpi": {"pool_size": 4, "max_overflow": 4, "pool_timeout": 60, "pool_recycle": 1800, "statement_timeout_ms": 0},
+    "celery-forecast": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 120, "pool_recycle": 1800, "statement_timeout_ms": 0},
+    "reporting": {"pool_size": 3, "max_overflow": 2, "pool_timeout": 120, "pool_recycle": 1800, "statement_timeout_ms": 0},
+    # Single-statement counter transactions of DocumentNumberService; kept
+    # apart so that numbering never waits on a pool its caller is holding
+    "numbering": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 10, "pool_recycle": 1800, "statement_timeout_ms": 5000},
+}
+
+# Profile of this process; task modules ask for their own workload profile
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "api")
+
+# Behind PgBouncer in transaction pooling mode the bouncer does the pooling:
+# no client-side pool (NullPool) and no "options" startup parameter, which
+# PgBouncer rejects. Set statement timeouts on the database role instead
+# (ALTER ROLE ... SET statement_timeout).
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+_engines: Dict[str, Engine] = {}
+_telemetry: Dict[str, "PoolTelemetry"] = {}
+_engines_lock = threading.Lock()
+
+def engine_settings(profile: str) -> Dict[str, int]:
+    """Pool settings of a profile after applying environment overrides"""
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown database engine profile: {profile}")
+    
+    settings = dict(ENGINE_PROFILES[profile])
+    prefix = f"DB_{profile.upper().replace('-', '_')}_"
+    for name in settings:
+        value = os.getenv(f"{prefix}{name.upper()}", os.getenv(f"DB_{name.upper()}"))
+        if value is not None:
+            settings[name] = int(value)
+    return settings
+
+class PoolTelemetry:
+    """Checkout wait times, timeouts and overflow of one engine's pool"""
+    
+    def __init__(self, profile: str):
+        self.profile = profile
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_peak = 0
+        self.connections_opened = 0
+        self.invalidated = 0
+    
+    def record_checkout(self, wait_seconds: float, overflow: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+    
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+    
+    def snapshot(self, pool) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "profile": self.profile,
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_avg_ms": round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.wait_seconds_max * 1000, 3),
+                "overflow_peak": self.overflow_peak,
+                "connections_opened": self.connections_opened,
+                "connections_invalidated": self.invalidated
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0)
+            })
+        return stats
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long callers wait for a connection
+    
+    Each engine gets a subclass carrying its telemetry, so that pools
+    recreated by engine.dispose() keep reporting to it.
+    """
+    
+    telemetry: PoolTelemetry = None
+    
+    @classmethod
+    def reporting_to(cls, telemetry: PoolTelemetry) -> type:
+        return type(cls.__name__, (cls,), {"telemetry": telemetry})
+    
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.telemetry.record_timeout()
+            raise
+        self.telemetry.record_checkout(time.perf_counter() - started, max(self.overflow(), 0))
+        return connection
+
+def _attach_telemetry(engine: Engine, telemetry: PoolTelemetry):
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        telemetry.connections_opened += 1
+    
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        telemetry.invalidated += 1
+
+def _build_engine(profile: str) -> Engine:
+    settings = engine_settings(profile)
+    telemetry = PoolTelemetry(profile)
+    url = make_url(DATABASE_URL)
+    options: Dict[str, Any] = {"pool_pre_ping": True, "echo": False}  # Set echo to True for SQL debugging
+    connect_args: Dict[str, Any] = {}
+    
+    if url.get_backend_name() == "postgresql":
+        # Shows up in pg_stat_activity (PgBouncer passes it through)
+        connect_args["application_name"] = f"goldshop-{profile}"
+        if settings["statement_timeout_ms"] and not DB_PGBOUNCER:
+            connect_args["options"] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+    
+    if DB_PGBOUNCER:
+        options["poolclass"] = NullPool
+    elif url.get_backend_name() != "sqlite":
+        options.update({
+            "poolclass": InstrumentedQueuePool.reporting_to(telemetry),
+            "pool_size": settings["pool_size"],
+            "max_overflow": settings["max_overflow"],
+            "pool_timeout": settings["pool_timeout"],
+            "pool_recycle": settings["pool_recycle"]
+        })
+    
+    engine = create_engine(DATABASE_URL, connect_args=connect_args, **options)
+    _attach_telemetry(engine, telemetry)
+    _telemetry[profile] = telemetry
+    return engine
+
+def get_engine(profile: Optional[str] = None) -> Engine:
+    """Shared engine of a workload profile (DB_ENGINE_PROFILE by default)"""
+    profile = profile or DB_ENGINE_PROFILE
+    engine = _engines.get(profile)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(profile)
+            if engine is None:
+                engine = _engines[profile] = _build_engine(profile)
+    return engine
+
+def get_sessionmaker(profile: Optional[str] = None) -> sessionmaker:
+    """Session factory bound to the engine of a workload profile"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine(profile))
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Telemetry of every pool created in this process, by profile"""
+    return {
+        profile: _telemetry[profile].snapshot(engine.pool)
+        for profile, engine in list(_engines.items())
+    }
+
+def _dispose_engines_after_fork():
+    # Connections inherited from the parent (e.g. the Celery master) belong
+    # to it; the child opens its own without closing the parent's sockets
+    for engine in list(_engines.values()):
+        engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_engines_after_fork)
+
+engine = get_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -13,7 +13,7 @@ from datetime import datetime
 from typing import Dict, Any
 import logging
 
-from database import get_db
+from database import get_db, pool_metrics
 from redis_config import get_redis_client
 
 logger = logging.getLogger(__name__)
@@ -50,7 +50,8 @@ async def detailed_health_check(db: Session = Depends(get_db)):
         health_status["components"]["database"] = {
             "status": "healthy",
             "response_time_ms": round(db_response_time, 2),
-            "connection": "active"
+            "connection": "active",
+            "pools": pool_metrics()
         }
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
@@ -225,6 +226,18 @@ async def metrics_endpoint(db: Session = Depends(get_db)):
         for table, count in db_metrics.items():
             metrics_output.append(f'goldshop_db_{table} {count}')
         
+        # Connection pool metrics of this process
+        for profile, pool in pool_metrics().items():
+            labels = f'profile="{profile}"'
+            metrics_output.append(f'goldshop_db_pool_checkouts_total{{{labels}}} {pool["checkouts"]}')
+            metrics_output.append(f'goldshop_db_pool_checkout_timeouts_total{{{labels}}} {pool["checkout_timeouts"]}')
+            metrics_output.append(f'goldshop_db_pool_checkout_wait_avg_ms{{{labels}}} {pool["checkout_wait_avg_ms"]}')
+            metrics_output.append(f'goldshop_db_pool_checkout_wait_max_ms{{{labels}}} {pool["checkout_wait_max_ms"]}')
+            metrics_output.append(f'goldshop_db_pool_overflow_peak{{{labels}}} {pool["overflow_peak"]}')
+            if "checked_out" in pool:
+                metrics_output.append(f'goldshop_db_pool_checked_out{{{labels}}} {pool["checked_out"]}')
+                metrics_output.append(f'goldshop_db_pool_overflow{{{labels}}} {pool["overflow"]}')
+        
         # Redis metrics
         metrics_output.append(f'goldshop_redis_connected_clients {redis_info.get("connected_clients", 0)}')
         metrics_output.append(f'goldshop_redis_used_memory_bytes {redis_info.get("used_memory", 0)}')
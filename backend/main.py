@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
@@ -73,6 +74,27 @@ app.include_router(system_admin.router)
 # Include health check routes
 app.include_router(health_checks.router)
 
+# Commits to tracked tables invalidate the related analytics caches
+from services.cache_invalidation_service import register_cache_invalidation_listeners
+register_cache_invalidation_listeners()
+
+@app.on_event("startup")
+async def start_cache_invalidation_consumer():
+    from services.cache_invalidation_service import INVALIDATION_MODE, consume_invalidation_stream
+    if INVALIDATION_MODE == "stream":
+        app.state.cache_invalidation_consumer = asyncio.create_task(consume_invalidation_stream())
+
+@app.on_event("shutdown")
+def shutdown_forecast_pools():
+    from services.forecast_executor import shutdown_forecast_executors
+    shutdown_forecast_executors()
+
+@app.on_event("shutdown")
+def stop_cache_invalidation_consumer():
+    consumer = getattr(app.state, "cache_invalidation_consumer", None)
+    if consumer is not None:
+        consumer.cancel()
+
 @app.get("/")
 async def root():
     return {"message": "Gold Shop Management API", "status": "running"}
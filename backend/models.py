@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Date, Text, DECIMAL, ForeignKey, Index
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, DateTime, Date, Text, DECIMAL, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
@@ -695,6 +695,42 @@ class KPISnapshot(Base):
     kpi_metadata = Column(JSONB)  # Additional KPI-specific data
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class SalesDailyFact(Base):
+    """Daily sales roll-up (day x item x category x customer x invoice) feeding the KPI calculators"""
+    __tablename__ = "sales_daily_facts"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sale_date = Column(Date, nullable=False)
+    invoice_id = Column(UUID(as_uuid=True))  # Facts are rebuilt per invoice
+    item_id = Column(UUID(as_uuid=True))
+    category_id = Column(UUID(as_uuid=True))
+    customer_id = Column(UUID(as_uuid=True))
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(DECIMAL(14, 2), nullable=False, default=0)  # Sum of line totals
+    cost = Column(DECIMAL(14, 2), nullable=False, default=0)  # Units x item purchase price
+    invoice_amount = Column(DECIMAL(14, 4), nullable=False, default=0)  # Invoice totals allocated to lines
+    labor_cost = Column(DECIMAL(14, 4), nullable=False, default=0)  # Allocated like invoice_amount
+    tax_cost = Column(DECIMAL(14, 4), nullable=False, default=0)  # Allocated like invoice_amount
+    invoice_count = Column(Integer, nullable=False, default=0)  # Distinct invoices at this grain
+    invoice_share = Column(DECIMAL(14, 6), nullable=False, default=0)  # Allocated invoice count; sums to invoices across items
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_sales_daily_facts_date', 'sale_date'),
+        Index('idx_sales_daily_facts_item_date', 'item_id', 'sale_date'),
+        Index('idx_sales_daily_facts_customer_date', 'customer_id', 'sale_date'),
+        Index('idx_sales_daily_facts_invoice', 'invoice_id'),
+    )
+
+class DocumentCounter(Base):
+    """Last issued sequence number per document type and period (see DocumentNumberService)"""
+    __tablename__ = "document_counters"
+
+    document_type = Column(String(100), primary_key=True)  # e.g. 'invoice', 'journal_entry'
+    period = Column(String(20), primary_key=True, default='')  # e.g. '202410'; '' for running counters
+    last_value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class DemandForecast(Base):
     """Demand forecasting table"""
     __tablename__ = "demand_forecasts"
@@ -718,6 +754,11 @@ class DemandForecast(Base):
     # Relationships
     item = relationship("InventoryItem")
 
+    __table_args__ = (
+        # Conflict target for forecast upserts; re-runs replace rows
+        Index('uq_demand_forecasts_item_date', 'item_id', 'forecast_date', unique=True),
+    )
+
 # Duplicate CustomReport removed - using the one defined earlier
 
 class AnalyticsCache(Base):
@@ -928,7 +969,10 @@ class ForecastModel(Base):
     accuracy_metrics = Column(JSONB)
     training_date = Column(Date, nullable=False)
     is_active = Column(Boolean, default=True)
+    data_fingerprint = Column(String(64))  # Hash of the series the parameters were fitted/applied on
+    model_params = Column(JSONB)  # Fitted model parameters (e.g. ARIMA order and coefficients)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     item = relationship("InventoryItem")
     
@@ -936,6 +980,7 @@ class ForecastModel(Base):
         Index('idx_forecast_models_item', 'item_id'),
         Index('idx_forecast_models_active', 'is_active'),
         Index('idx_forecast_models_confidence', 'confidence_score'),
+        Index('idx_forecast_models_item_type', 'item_id', 'model_type'),
     )
 
 class ReportExecution(Base):
@@ -561,6 +561,29 @@ class AccountingPeriod(Base):
         CheckConstraint('start_date < end_date', name='check_period_date_order'),
     )
 
+# Closed-period balance snapshots for as-of-date reports
+class AccountBalanceSnapshot(Base):
+    __tablename__ = "account_balance_snapshots"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    period_end = Column(Date, nullable=False)
+    period_code = Column(String(7), nullable=False)  # YYYY-MM
+    
+    # One row per account and subsidiary (NULL for lines without one)
+    account_id = Column(UUID(as_uuid=True), ForeignKey("chart_of_accounts.id"), nullable=False)
+    subsidiary_account_id = Column(UUID(as_uuid=True), ForeignKey("subsidiary_accounts.id"))
+    
+    # Cumulative posted totals up to and including period_end
+    debit_total = Column(DECIMAL(15,2), nullable=False, default=0)
+    credit_total = Column(DECIMAL(15,2), nullable=False, default=0)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index('idx_account_balance_snapshots_period', 'period_end'),
+        Index('idx_account_balance_snapshots_account', 'account_id', 'period_end'),
+    )
+
 # Audit Trail for all accounting changes
 class AccountingAuditTrail(Base):
     __tablename__ = "accounting_audit_trail"
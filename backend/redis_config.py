@@ -1,42 +1,188 @@
 """
 Redis Configuration for Analytics Caching
 Provides Redis connection and caching utilities for the analytics system
+
+AnalyticsCache is asynchronous (redis.asyncio) so that API routes never
+block the event loop on Redis; SyncAnalyticsCache exposes the same methods
+as blocking calls for Celery tasks and scripts.
 """
 
 import redis
+import redis.asyncio as aioredis
+import asyncio
+import functools
+import inspect
+import threading
+import time
+import math
+import random
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
 import json
 import os
-from typing import Optional, Any, Dict, List
-from datetime import datetime, timedelta
+import hashlib
+import uuid
+from decimal import Decimal
+from typing import Optional, Any, Dict, List, Tuple, AsyncIterator
+from datetime import date, datetime, timedelta, timezone
+from contextvars import ContextVar
 from dotenv import load_dotenv
 
+from cache_codec import CacheCodec, get_cache_codec, is_legacy_payload
+
 load_dotenv()
 
+# Bumping the version moves every analytics key to a fresh namespace, which
+# retires entries written in an older key or payload format
+CACHE_KEY_VERSION = os.getenv("ANALYTICS_CACHE_KEY_VERSION", "v2")
+CACHE_NAMESPACE = f"analytics:{CACHE_KEY_VERSION}"
+
+# Keys per UNLINK command when invalidating
+INVALIDATION_BATCH_SIZE = int(os.getenv("ANALYTICS_CACHE_INVALIDATION_BATCH", "500"))
+
+# COUNT hint for SCAN/SSCAN; keeps each call short so Redis stays responsive
+SCAN_COUNT = 1000
+
+# In-process L1 tier in front of Redis; entries live at most L1_MAX_TTL
+# seconds so a missed invalidation message is bounded
+L1_ENABLED = os.getenv("ANALYTICS_L1_ENABLED", "true").lower() == "true"
+L1_MAX_BYTES = int(os.getenv("ANALYTICS_L1_MAX_BYTES", str(32 * 1024 * 1024)))
+L1_MAX_TTL = int(os.getenv("ANALYTICS_L1_MAX_TTL", "60"))
+
+# Channel carrying invalidations to the L1 tier of every process
+L1_INVALIDATION_CHANNEL = f"{CACHE_NAMESPACE}:l1:invalidate"
+
+# Single-flight refresh: the process holding the refresh lock recomputes an
+# entry; others wait up to COALESCE_WAIT_SECONDS for it (or serve stale data)
+COALESCE_LOCK_TTL_MS = int(os.getenv("ANALYTICS_COALESCE_LOCK_TTL_MS", "30000"))
+COALESCE_WAIT_SECONDS = float(os.getenv("ANALYTICS_COALESCE_WAIT_SECONDS", "5"))
+
+# Predictive warming: per-hour sorted sets of read counts per key, the last
+# read time of each key, and how to recompute each warmable entry. Reads
+# are counted in process and flushed every ACCESS_FLUSH_SECONDS.
+WARM_STATS_PREFIX = f"{CACHE_NAMESPACE}:warm"
+WARM_RECIPES_KEY = f"{WARM_STATS_PREFIX}:recipes"
+WARM_LAST_ACCESS_KEY = f"{WARM_STATS_PREFIX}:last_access"
+ACCESS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_ACCESS_FLUSH_SECONDS", "10"))
+# Eight days, so the same hour a week ago is still known
+ACCESS_STATS_RETENTION = 8 * 24 * 3600
+
+# Hit/miss metrics shared by every API and Celery process: one hash per UTC
+# minute with "<cache_type>:hits", "<cache_type>:misses", a latency
+# histogram ("<cache_type>:lat:<le_ms>" plus "<cache_type>:lat_sum_us") and
+# a HyperLogLog of distinct keys looked up per cache type. Lookups are
+# counted in process and flushed every METRICS_FLUSH_SECONDS.
+METRICS_PREFIX = f"{CACHE_NAMESPACE}:metrics"
+METRICS_RESET_KEY = f"{METRICS_PREFIX}:reset_at"
+METRICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_METRICS_FLUSH_SECONDS", "5"))
+METRICS_RETENTION = int(os.getenv("ANALYTICS_METRICS_RETENTION", str(2 * 24 * 3600)))
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Deletes the refresh lock only if it still holds our token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# KPI entries fetched by AnalyticsCache.prefetch_kpi_data for the current
+# request (or task), keyed by cache key; None records a miss
+_prefetched_kpis: ContextVar[Optional[Dict[str, Optional[Dict]]]] = ContextVar("prefetched_kpis", default=None)
+
+# Set while cache warming recomputes entries, so that calculators skip reads
+_recomputing: ContextVar[bool] = ContextVar("recomputing", default=False)
+
+# Refresh locks won by the current task (or request): cache_key -> (token,
+# started_at). Per task rather than per process, so that other coroutines of
+# the same process contend for the lock like any other process would.
+_refresh_leases: ContextVar[Optional[Dict[str, Tuple[str, float]]]] = ContextVar("refresh_leases", default=None)
+
+def _canonical_value(value: Any) -> Any:
+    """JSON fallback that renders non-JSON values the same way in every process"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=lambda v: json.dumps(v, sort_keys=True, default=_canonical_value))
+    return str(value)
+
+def params_digest(params: Dict[str, Any]) -> str:
+    """
+    Stable digest of cache key parameters
+
+    Parameters are serialized as JSON with sorted keys and no whitespace, so
+    the digest depends only on their values - not on dict ordering or the
+    interpreter's hash seed (unlike ``hash()``).
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=_canonical_value)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+def latency_bucket(latency_ms: float) -> str:
+    """Histogram bucket (upper bound in ms, or "inf") a lookup latency falls into"""
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return str(bound)
+    return "inf"
+
+def histogram_percentile(buckets: Dict[str, int], percentile: float) -> Optional[float]:
+    """
+    Upper bound of the bucket holding the given percentile
+
+    Exact to the bucket resolution; None without samples, inf when the
+    percentile lies beyond the largest bound.
+    """
+    total = sum(buckets.values())
+    if not total:
+        return None
+    threshold = total * percentile / 100
+    seen = 0
+    for bound in [str(b) for b in LATENCY_BUCKETS_MS] + ["inf"]:
+        seen += buckets.get(bound, 0)
+        if seen >= threshold:
+            return float(bound)
+    return float("inf")
+
 class RedisConfig:
     """Redis configuration and connection management"""
     
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://redis:6379/0")
+        self.max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
         self.redis_client = None
+        self.async_client = None
+        self.async_binary_client = None
         self._connect()
     
+    def _client_options(self) -> Dict[str, Any]:
+        """Connection options shared by the sync and async clients"""
+        return {
+            "decode_responses": True,
+            "socket_connect_timeout": 5,
+            "socket_timeout": 5,
+            "retry_on_timeout": True,
+            "health_check_interval": 30,
+            "max_connections": self.max_connections
+        }
+    
     def _connect(self):
         """Establish Redis connection"""
         try:
-            self.redis_client = redis.from_url(
-                self.redis_url,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                retry_on_timeout=True,
-                health_check_interval=30
-            )
+            self.redis_client = redis.from_url(self.redis_url, **self._client_options())
             # Test connection
             self.redis_client.ping()
+            self.async_client = AsyncRedisClient(self.redis_url, **self._client_options())
+            self.async_binary_client = AsyncRedisClient(
+                self.redis_url, **{**self._client_options(), "decode_responses": False}
+            )
             print("✅ Redis connection established successfully")
         except Exception as e:
             print(f"❌ Redis connection failed: {e}")
             self.redis_client = None
+            self.async_client = None
+            self.async_binary_client = None
     
     def get_client(self) -> Optional[redis.Redis]:
         """Get Redis client instance"""
@@ -44,6 +190,17 @@ class RedisConfig:
             self._connect()
         return self.redis_client
     
+    def get_async_client(self, decode_responses: bool = True) -> Optional["AsyncRedisClient"]:
+        """
+        Get the shared async Redis client
+
+        Pass ``decode_responses=False`` for a client returning raw bytes, as
+        needed for binary cache payloads.
+        """
+        if self.async_client is None:
+            self._connect()
+        return self.async_client if decode_responses else self.async_binary_client
+    
     def is_connected(self) -> bool:
         """Check if Redis is connected"""
         try:
@@ -54,15 +211,154 @@ class RedisConfig:
             pass
         return False
 
+class AsyncRedisClient:
+    """
+    redis.asyncio client with one connection pool per event loop
+
+    asyncio connections cannot be shared across event loops. The API server
+    runs a single loop and therefore shares one pool; Celery code that calls
+    asyncio.run() gets a pool for that loop, which is disconnected when
+    asyncio.run() cancels the loop's remaining tasks on exit. Commands are
+    proxied to the client of the running loop.
+    """
+    
+    def __init__(self, url: str, **options):
+        self.url = url
+        self.options = options
+        self._clients = {}  # loop -> (client, task that closes it)
+        self._lock = threading.Lock()
+    
+    def client(self) -> aioredis.Redis:
+        """Client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Forget loops that have already closed; their pools were
+            # disconnected by _close_with_loop while the loop shut down
+            for closed_loop in [l for l in self._clients if l.is_closed()]:
+                del self._clients[closed_loop]
+            
+            entry = self._clients.get(loop)
+            if entry is None:
+                client = aioredis.from_url(self.url, **self.options)
+                entry = (client, loop.create_task(self._close_with_loop(client)))
+                self._clients[loop] = entry
+        return entry[0]
+    
+    @staticmethod
+    async def _close_with_loop(client: aioredis.Redis):
+        """Idle until the loop cancels its tasks on shutdown, then close the pool"""
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await client.connection_pool.disconnect()
+    
+    def __getattr__(self, name: str):
+        return getattr(self.client(), name)
+
+class LocalCache:
+    """
+    Per-process LRU cache with per-entry expiry and a byte budget
+
+    Holds decoded entries, so hits skip both the network hop and
+    json.loads. Callers must treat returned entries as read-only. Entry
+    size is the length of the serialized payload.
+    """
+    
+    def __init__(self, max_bytes: int = L1_MAX_BYTES, max_ttl: int = L1_MAX_TTL):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Entry for ``key``, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+    
+    def put(self, key: str, value: Dict, size: int, ttl: float):
+        """Store ``value``; entries larger than an eighth of the budget are skipped"""
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0 or size > self.max_bytes // 8:
+            self.discard(key)
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def discard(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def discard_matching(self, pattern: str) -> int:
+        """Drop entries whose key matches a glob pattern"""
+        with self._lock:
+            matching = [key for key in self._entries if fnmatchcase(key, pattern)]
+            for key in matching:
+                self._remove(key)
+            return len(matching)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
 class AnalyticsCache:
     """Analytics-specific caching utilities with advanced strategies"""
     
     def __init__(self, redis_config: RedisConfig):
-        self.redis = redis_config.get_client()
+        self.redis_config = redis_config
+        self.redis = redis_config.get_async_client()
+        # Entries are binary (see cache_codec); tags, locks and scans stay on
+        # the decoding client
+        self.payload_redis = redis_config.get_async_client(decode_responses=False)
+        self.codec: CacheCodec = get_cache_codec()
         self.default_ttl = 300  # 5 minutes default TTL
         self.cache_hit_stats = {}
         self.cache_miss_stats = {}
         
+        # L1 tier; kept coherent by the invalidation listener thread
+        self.local_cache = LocalCache() if L1_ENABLED else None
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self._invalidation_listener = None
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        
         # Cache TTL strategies by data type
         self.ttl_strategies = {
             "kpi": 300,           # 5 minutes - frequently updated
@@ -77,60 +373,505 @@ class AnalyticsCache:
             "optimization": 7200  # 2 hours - optimization calculations
         }
         
-    def _generate_key(self, cache_type: str, entity_type: str = None, entity_id: str = None, **kwargs) -> str:
-        """Generate standardized cache key"""
-        key_parts = ["analytics", cache_type]
+        # Refresh behaviour per ttl_strategies entry:
+        # - stale_while_revalidate: seconds past the TTL during which the old
+        #   value is still served while one process recomputes (0 disables)
+        # - xfetch_beta: XFetch early-refresh aggressiveness (0 disables);
+        #   1.0 refreshes shortly before expiry, scaled by compute time
+        self.refresh_strategies = {
+            cache_type: {"stale_while_revalidate": 0, "xfetch_beta": 1.0}
+            for cache_type in self.ttl_strategies
+        }
+        self.refresh_strategies["kpi"]["stale_while_revalidate"] = 120
+        self.refresh_strategies["dashboard"]["stale_while_revalidate"] = 120
+        self.refresh_strategies["forecast"]["stale_while_revalidate"] = 1800
+        self.refresh_strategies["optimization"]["stale_while_revalidate"] = 3600
         
-        if entity_type:
-            key_parts.append(entity_type)
-        if entity_id:
-            key_parts.append(str(entity_id))
-            
-        # Add additional parameters
-        for k, v in sorted(kwargs.items()):
-            if v is not None:
-                key_parts.append(f"{k}:{v}")
-                
+        # Recomputations won by a task of this process, awaited by the other
+        # readers of the key in place of polling Redis
+        self._local_refreshes: Dict[str, asyncio.Future] = {}
+        
+        # Reads per key since the last flush to the access statistics
+        self._access_counts = Counter()
+        self._access_flushed_at = time.monotonic()
+
+        # Lookups since the last flush to the shared metrics:
+        # (minute, field) -> count and (minute, cache_type) -> keys
+        self._metric_counts = Counter()
+        self._metric_keys = {}
+        self._metrics_flushed_at = time.monotonic()
+
+    @staticmethod
+    def build_key(cache_type: str, *parts: Any, params: Dict[str, Any] = None) -> str:
+        """
+        Build a canonical cache key
+
+        Keys look like ``analytics:<version>:<cache_type>:<part>...:<digest>``.
+        The readable parts keep pattern invalidation (``kpi:financial:*``)
+        working; everything else that distinguishes one entry from another
+        goes into ``params`` and is folded into a stable digest. Parameters
+        that are None are ignored.
+        """
+        key_parts = [CACHE_NAMESPACE, cache_type]
+        key_parts.extend(str(part) for part in parts if part is not None)
+
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        if params:
+            key_parts.append(params_digest(params))
+
         return ":".join(key_parts)
+
+    def _generate_key(self, cache_type: str, entity_type: str = None, entity_id: str = None, **kwargs) -> str:
+        """Generate standardized cache key"""
+        return self.build_key(cache_type, entity_type, entity_id, params=kwargs)
+
+    def _kpi_key(self, kpi_type: str, kpi_name: str, period: str = None, params: Dict = None) -> str:
+        """Cache key of a KPI entry"""
+        return self._generate_key("kpi", kpi_type, kpi_name, period=period, params=params)
+
+    @staticmethod
+    def tag_key(tag: str) -> str:
+        """Redis set holding the keys of every entry registered under ``tag``"""
+        return f"{CACHE_NAMESPACE}:tag:{tag}"
+
+    @staticmethod
+    def tags_for(*parts: Any) -> List[str]:
+        """
+        Hierarchical tags for an entry, e.g. ``kpi``, ``kpi:financial`` and
+        ``kpi:financial:revenue`` for a revenue KPI
+        """
+        parts = [str(part) for part in parts if part is not None]
+        return [":".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+    async def _store(self, cache_key: str, ttl: int, cache_data: Dict, *tag_parts: Any, recipe: Dict = None):
+        """
+        Write an entry and register it in its tag sets in one round trip
+
+        Tag sets outlive the longest TTL strategy; members whose entry has
+        already expired are pruned by ``cleanup_expired_cache``. ``recipe``
+        describes how to recompute the entry for cache warming.
+        """
+        lease = self._take_lease(cache_key)
+        if lease is not None:
+            cache_data["compute_seconds"] = round(time.monotonic() - lease[1], 3)
+
+        # Redis keeps the entry through its stale-while-revalidate window;
+        # freshness is judged from cached_at + ttl in the payload
+        redis_ttl = ttl + self._refresh_strategy(tag_parts[0])["stale_while_revalidate"]
+        tag_ttl = max([redis_ttl, *self.ttl_strategies.values()])
+        payload = self.codec.encode(cache_data)
+
+        pipe = self.payload_redis.pipeline(transaction=False)
+        pipe.setex(cache_key, redis_ttl, payload)
+        for tag in self.tags_for(*tag_parts):
+            pipe.sadd(self.tag_key(tag), cache_key)
+            pipe.expire(self.tag_key(tag), tag_ttl)
+        if recipe is not None:
+            recipe = {
+                **recipe,
+                "recorded_on": date.today().isoformat(),
+                "compute_seconds": cache_data.get("compute_seconds")
+            }
+            pipe.hset(WARM_RECIPES_KEY, cache_key, json.dumps(recipe, default=_canonical_value))
+        await pipe.execute()
+
+        if lease is not None:
+            await self._release_refresh_lock(cache_key, lease[0])
+            self._finish_local_refresh(cache_key)
+
+        if self.local_cache is not None:
+            # Round-trip through the codec so L1 hits look exactly like L2 hits
+            self._l1_put(cache_key, self.codec.decode(payload), len(payload), ttl)
+
+    def _refresh_strategy(self, cache_type: str) -> Dict[str, float]:
+        return self.refresh_strategies.get(cache_type, {"stale_while_revalidate": 0, "xfetch_beta": 0})
+
+    @staticmethod
+    def _lock_key(cache_key: str) -> str:
+        return f"{CACHE_NAMESPACE}:lock:{cache_key[len(CACHE_NAMESPACE) + 1:]}"
+
+    async def _acquire_refresh_lock(self, cache_key: str) -> bool:
+        """
+        Try to become the single process that recomputes ``cache_key``
+
+        The lease belongs to the calling task, and only that task skips the
+        lock on later reads. The winner's next write of the key releases the
+        lock; if it never writes (e.g. the computation failed) the lock
+        expires.
+        """
+        lease = (_refresh_leases.get() or {}).get(cache_key)
+        if lease is not None and time.monotonic() - lease[1] < COALESCE_LOCK_TTL_MS / 1000:
+            return True
+
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(self._lock_key(cache_key), token, nx=True, px=COALESCE_LOCK_TTL_MS)
+        if acquired:
+            _refresh_leases.set({**(_refresh_leases.get() or {}), cache_key: (token, time.monotonic())})
+            self._local_refreshes[cache_key] = asyncio.get_running_loop().create_future()
+        return bool(acquired)
+
+    @staticmethod
+    def _take_lease(cache_key: str) -> Optional[Tuple[str, float]]:
+        """Remove and return the current task's lease on ``cache_key``"""
+        leases = _refresh_leases.get()
+        if not leases or cache_key not in leases:
+            return None
+        leases = dict(leases)
+        lease = leases.pop(cache_key)
+        _refresh_leases.set(leases)
+        return lease
+
+    def _finish_local_refresh(self, cache_key: str):
+        """Wake the readers of this process waiting for ``cache_key``"""
+        future = self._local_refreshes.pop(cache_key, None)
+        if future is None or future.done():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if future.get_loop() is running:
+            future.set_result(None)
+        elif not future.get_loop().is_closed():
+            future.get_loop().call_soon_threadsafe(
+                lambda: future.done() or future.set_result(None)
+            )
+
+    async def begin_refresh(self, cache_key: str) -> bool:
+        """
+        Take the refresh lock of ``cache_key`` for a recomputation outside
+        the read path (e.g. cache warming). False if another process holds it.
+        """
+        if not self.redis:
+            return False
+        return await self._acquire_refresh_lock(cache_key)
+
+    async def abandon_refresh(self, cache_key: str):
+        """Give up a refresh lock whose recomputation did not write the entry"""
+        lease = self._take_lease(cache_key)
+        if lease is not None:
+            await self._release_refresh_lock(cache_key, lease[0])
+            self._finish_local_refresh(cache_key)
+
+    @staticmethod
+    @contextmanager
+    def recomputing():
+        """Make KPI reads in this context miss, so calculators recompute and write"""
+        token = _recomputing.set(True)
+        try:
+            yield
+        finally:
+            _recomputing.reset(token)
+
+    @staticmethod
+    def access_stats_key(hour: datetime) -> str:
+        """Sorted set of read counts per key during ``hour`` (UTC)"""
+        return f"{WARM_STATS_PREFIX}:access:{hour:%Y%m%d%H}"
+
+    async def _track_access(self, *cache_keys: str):
+        """Count reads; flushed to Redis at most every ACCESS_FLUSH_SECONDS"""
+        self._access_counts.update(cache_keys)
+        if time.monotonic() - self._access_flushed_at >= ACCESS_FLUSH_SECONDS:
+            await self.flush_access_stats()
+
+    async def flush_access_stats(self):
+        """Add the reads counted in this process to the shared access statistics"""
+        counts, self._access_counts = self._access_counts, Counter()
+        self._access_flushed_at = time.monotonic()
+        if not counts or not self.redis:
+            return
+
+        now = datetime.utcnow()
+        access_key = self.access_stats_key(now)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for cache_key, count in counts.items():
+                pipe.zincrby(access_key, count, cache_key)
+            pipe.expire(access_key, ACCESS_STATS_RETENTION)
+            pipe.zadd(WARM_LAST_ACCESS_KEY, {cache_key: now.timestamp() for cache_key in counts})
+            await pipe.execute()
+        except Exception as e:
+            print(f"Error flushing cache access statistics: {e}")
+
+    async def _prune_warm_recipes(self) -> int:
+        """Forget recipes of entries nobody has read within the retention period"""
+        cutoff = datetime.utcnow().timestamp() - ACCESS_STATS_RETENTION
+        stale = await self.redis.zrangebyscore(WARM_LAST_ACCESS_KEY, "-inf", cutoff)
+        for start in range(0, len(stale), INVALIDATION_BATCH_SIZE):
+            batch = stale[start:start + INVALIDATION_BATCH_SIZE]
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hdel(WARM_RECIPES_KEY, *batch)
+            pipe.zrem(WARM_LAST_ACCESS_KEY, *batch)
+            await pipe.execute()
+        return len(stale)
+
+    async def _release_refresh_lock(self, cache_key: str, token: str):
+        try:
+            await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, self._lock_key(cache_key), token)
+        except Exception as e:
+            print(f"Error releasing refresh lock for {cache_key}: {e}")
+
+    def _expires_at(self, data: Dict, cache_type: str) -> float:
+        """Epoch seconds at which an entry stops being fresh"""
+        try:
+            cached_at = datetime.fromisoformat(data["cached_at"]).replace(tzinfo=timezone.utc)
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+        ttl = data.get("ttl") or self.ttl_strategies.get(cache_type, self.default_ttl)
+        return cached_at.timestamp() + ttl
+
+    def _should_refresh_early(self, data: Dict, expires_at: float, cache_type: str) -> bool:
+        """
+        XFetch (Vattani et al.): refresh before expiry with a probability that
+        grows as expiry nears and with how long the value took to compute
+        """
+        beta = self._refresh_strategy(cache_type)["xfetch_beta"]
+        delta = data.get("compute_seconds") or 0
+        if beta <= 0 or delta <= 0:
+            return False
+        return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+    async def _wait_for_refresh(self, cache_key: str, cache_type: str) -> Optional[Dict]:
+        """
+        Poll for the value another process is computing, up to COALESCE_WAIT_SECONDS
+
+        When the winner is a task of this process, its write wakes the
+        waiters immediately instead of at the next poll.
+        """
+        deadline = time.monotonic() + COALESCE_WAIT_SECONDS
+        delay = 0.025
+        while time.monotonic() < deadline:
+            local = self._local_refreshes.get(cache_key)
+            if local is not None and local.get_loop() is asyncio.get_running_loop():
+                await asyncio.wait([local], timeout=delay)
+            else:
+                await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.4)
+            data = await self._fetch(cache_key)
+            if data is not None and time.time() < self._expires_at(data, cache_type):
+                return data
+        return None
+
+    async def _read_coalesced(self, cache_key: str, cache_type: str) -> Optional[Dict]:
+        """
+        Read an entry with stampede protection
+
+        Returns the cached entry, or None when the caller should compute the
+        value and write it back. At most one process at a time gets None for
+        a key: the others wait for its result, or are served the previous
+        value while it is stale-but-revalidatable. Fresh entries may be
+        handed out for early refresh (XFetch) to one caller before expiry.
+        """
+        data = await self._fetch(cache_key)
+        now = time.time()
+
+        if data is not None:
+            expires_at = self._expires_at(data, cache_type)
+            if now < expires_at:
+                if self._should_refresh_early(data, expires_at, cache_type) and await self._acquire_refresh_lock(cache_key):
+                    return None
+                return data
+
+            stale_window = self._refresh_strategy(cache_type)["stale_while_revalidate"]
+            if now < expires_at + stale_window:
+                if await self._acquire_refresh_lock(cache_key):
+                    return None
+                return data
+
+        if await self._acquire_refresh_lock(cache_key):
+            return None
+        return await self._wait_for_refresh(cache_key, cache_type)
+
+    async def _fetch(self, cache_key: str) -> Optional[Dict]:
+        """Read an entry from L1, falling back to Redis and filling L1"""
+        await self._flush_metrics_if_due()
+        if self.local_cache is not None:
+            cached = self.local_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            self._ensure_invalidation_listener()
+
+        payload = await self.payload_redis.get(cache_key)
+        if not payload:
+            self.l2_misses += 1
+            return None
+
+        self.l2_hits += 1
+        data = self.codec.decode(payload)
+        if self.local_cache is not None:
+            self._l1_put(cache_key, data, len(payload), data.get("ttl", self.default_ttl))
+        return data
+
+    def _l1_put(self, cache_key: str, data: Dict, size: int, ttl: int):
+        """Cache in L1 no longer than the entry has left in Redis"""
+        try:
+            age = (datetime.utcnow() - datetime.fromisoformat(data["cached_at"])).total_seconds()
+            remaining = (ttl or self.default_ttl) - age
+        except (KeyError, TypeError, ValueError):
+            remaining = ttl or self.default_ttl
+        self.local_cache.put(cache_key, data, size, remaining)
+
+    def _ensure_invalidation_listener(self):
+        """
+        Subscribe this process to L1 invalidation messages
+
+        Started lazily (and again after fork) on a daemon thread using the
+        sync client. If the subscription fails, L1 is cleared and the
+        listener restarts on the next read.
+        """
+        if self._listener_pid == os.getpid():
+            return
+
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+
+            client = self.redis_config.get_client()
+            if client is None:
+                return
+
+            def on_error(error, pubsub, thread):
+                print(f"L1 invalidation listener stopped: {error}")
+                self.local_cache.clear()
+                self._listener_pid = None
+                thread.stop()
+
+            self.local_cache.clear()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{L1_INVALIDATION_CHANNEL: self._handle_invalidation_message})
+            self._invalidation_listener = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=on_error
+            )
+            self._listener_pid = os.getpid()
+
+    def _handle_invalidation_message(self, message: Dict):
+        """Apply an invalidation published by any process to this L1"""
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            self.local_cache.clear()
+            return
+
+        for key in payload.get("keys", []):
+            self.local_cache.discard(key)
+        for pattern in payload.get("patterns", []):
+            self.local_cache.discard_matching(f"{CACHE_NAMESPACE}:{pattern}*")
+
+    def _invalidate_local(self, keys: List[str] = None, patterns: List[str] = None):
+        """Drop entries from this process's L1"""
+        if self.local_cache is None:
+            return
+        for key in keys or []:
+            self.local_cache.discard(key)
+        for pattern in patterns or []:
+            self.local_cache.discard_matching(f"{CACHE_NAMESPACE}:{pattern}*")
+
+    async def _publish_invalidation(self, keys: List[str] = None, patterns: List[str] = None):
+        """Invalidate L1 here and tell every other process to do the same"""
+        self._invalidate_local(keys, patterns)
+        message = {"keys": keys or [], "patterns": patterns or []}
+        await self.redis.publish(L1_INVALIDATION_CHANNEL, json.dumps(message))
+
+    async def _unlink_keys(self, keys: AsyncIterator[str]) -> int:
+        """UNLINK keys in pipelined batches; returns the number of keys sent"""
+        pipe = self.redis.pipeline(transaction=False)
+        batch = []
+        count = 0
+
+        async for key in keys:
+            batch.append(key)
+            if len(batch) >= INVALIDATION_BATCH_SIZE:
+                pipe.unlink(*batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            pipe.unlink(*batch)
+            count += len(batch)
+
+        await pipe.execute()
+        return count
+
+    async def _invalidate_tag(self, tag: str) -> int:
+        """
+        Delete every entry registered under ``tag``
+
+        The tag set is renamed first so that entries written while the
+        invalidation runs register in a fresh set and survive it.
+        """
+        claimed_key = f"{self.tag_key(tag)}:invalidating:{uuid.uuid4().hex}"
+        try:
+            await self.redis.rename(self.tag_key(tag), claimed_key)
+        except redis.ResponseError:
+            return 0  # Nothing cached under this tag
+
+        members = self.redis.sscan_iter(claimed_key, count=SCAN_COUNT)
+        count = await self._unlink_keys(members)
+        await self.redis.unlink(claimed_key)
+        return count
+
+    async def _invalidate_pattern(self, pattern: str) -> int:
+        """
+        Invalidate entries matching ``pattern`` (relative to the namespace)
+
+        Segment-aligned prefixes such as ``kpi:financial:*`` map to a tag and
+        never enumerate the keyspace; anything else falls back to an
+        incremental SCAN.
+        """
+        tag = pattern.rstrip("*").rstrip(":")
+        if tag and not any(c in tag for c in "*?[]"):
+            return await self._invalidate_tag(tag)
+
+        matches = self.redis.scan_iter(match=f"{CACHE_NAMESPACE}:{pattern}*", count=SCAN_COUNT)
+        return await self._unlink_keys(matches)
+
+    async def count_cached_entries(self) -> Dict[str, int]:
+        """Entries registered per cache type, read from tag set cardinalities"""
+        pipe = self.redis.pipeline(transaction=False)
+        cache_types = list(self.ttl_strategies.keys())
+        for cache_type in cache_types:
+            pipe.scard(self.tag_key(cache_type))
+        return dict(zip(cache_types, await pipe.execute()))
     
-    async def get_kpi_data(self, kpi_type: str, kpi_name: str, period: str = None) -> Optional[Dict]:
+    async def get_kpi_data(self, kpi_type: str, kpi_name: str, period: str = None, params: Dict = None) -> Optional[Dict]:
         """Get cached KPI data with hit/miss tracking"""
+        started = time.perf_counter()
         if not self.redis:
             self._record_cache_miss("kpi", f"{kpi_type}:{kpi_name}")
             return None
             
         try:
-            cache_key = self._generate_key("kpi", kpi_type, kpi_name, period=period)
-            cached_data = self.redis.get(cache_key)
+            if _recomputing.get():
+                return None
+            
+            cache_key = self._kpi_key(kpi_type, kpi_name, period, params)
+            
+            prefetched = _prefetched_kpis.get()
+            if prefetched is not None and cache_key in prefetched:
+                # Hit/miss and access were recorded when the batch was fetched
+                return prefetched[cache_key]
+            
+            await self._track_access(cache_key)
+            cached_data = await self._read_coalesced(cache_key, "kpi")
             
             if cached_data:
-                self._record_cache_hit("kpi", f"{kpi_type}:{kpi_name}")
-                data = json.loads(cached_data)
-                
-                # Check if data is still fresh based on timestamp
-                if self._is_cache_fresh(data, self.ttl_strategies["kpi"]):
-                    return data
-                else:
-                    # Data is stale, remove it
-                    await self.invalidate_cache_key(cache_key)
-                    self._record_cache_miss("kpi", f"{kpi_type}:{kpi_name}")
-                    return None
+                self._record_cache_hit("kpi", cache_key, started)
+                return cached_data
             else:
-                self._record_cache_miss("kpi", f"{kpi_type}:{kpi_name}")
+                self._record_cache_miss("kpi", cache_key, started)
                 
         except Exception as e:
             print(f"Error retrieving KPI cache: {e}")
-            self._record_cache_miss("kpi", f"{kpi_type}:{kpi_name}")
+            self._record_cache_miss("kpi", f"{kpi_type}:{kpi_name}", started)
         
         return None
     
-    async def set_kpi_data(self, kpi_type: str, kpi_name: str, data: Dict, ttl: int = None, period: str = None):
+    async def set_kpi_data(self, kpi_type: str, kpi_name: str, data: Dict, ttl: int = None, period: str = None, params: Dict = None):
         """Cache KPI data with intelligent TTL and metadata"""
         if not self.redis:
             return
             
         try:
-            cache_key = self._generate_key("kpi", kpi_type, kpi_name, period=period)
+            cache_key = self._kpi_key(kpi_type, kpi_name, period, params)
             ttl = ttl or self.ttl_strategies["kpi"]
             
             # Add comprehensive metadata
@@ -142,30 +883,107 @@ class AnalyticsCache:
                 "kpi_type": kpi_type,
                 "kpi_name": kpi_name,
                 "period": period,
-                "data_size": len(json.dumps(data, default=str)),
+                "params": params,
                 "version": "1.0"
             }
             
-            # Set cache with TTL
-            self.redis.setex(cache_key, ttl, json.dumps(cache_data, default=str))
+            # Set cache with TTL and register it for tag invalidation; entries
+            # computed from params can be recomputed by cache warming
+            recipe = {"kpi_type": kpi_type, "kpi_name": kpi_name, "params": params} if params and not period else None
+            await self._store(cache_key, ttl, cache_data, "kpi", kpi_type, kpi_name, recipe=recipe)
             
-            # Add to cache index for efficient invalidation
-            await self._add_to_cache_index("kpi", cache_key, kpi_type, kpi_name)
+            prefetched = _prefetched_kpis.get()
+            if prefetched is not None and cache_key in prefetched:
+                prefetched[cache_key] = cache_data
             
         except Exception as e:
             print(f"Error caching KPI data: {e}")
     
+    async def get_many_kpi_data(self, requests: List[Tuple[str, str, Optional[Dict]]]) -> List[Optional[Dict]]:
+        """
+        Get several cached KPI entries with a single MGET
+        
+        Args:
+            requests: (kpi_type, kpi_name, params) tuples as passed to get_kpi_data
+            
+        Returns:
+            Cached entries in request order; None for misses and stale entries
+        """
+        if not requests:
+            return []
+        
+        started = time.perf_counter()
+        keys = [self._kpi_key(kpi_type, kpi_name, params=params) for kpi_type, kpi_name, params in requests]
+        values = [None] * len(keys)
+        await self._track_access(*keys)
+        await self._flush_metrics_if_due()
+        
+        # Serve what we can from L1, then fetch the rest with one MGET
+        if self.local_cache is not None:
+            values = [self.local_cache.get(key) for key in keys]
+            self._ensure_invalidation_listener()
+        remote = [i for i, value in enumerate(values) if value is None]
+        
+        if self.redis and remote:
+            try:
+                payloads = await self.payload_redis.mget([keys[i] for i in remote])
+                for i, payload in zip(remote, payloads):
+                    if not payload:
+                        self.l2_misses += 1
+                        continue
+                    self.l2_hits += 1
+                    values[i] = self.codec.decode(payload)
+                    if self.local_cache is not None:
+                        self._l1_put(keys[i], values[i], len(payload), values[i].get("ttl", self.default_ttl))
+            except Exception as e:
+                print(f"Error retrieving KPI cache batch: {e}")
+        
+        # Every entry of the batch waited for the whole round trip
+        results = []
+        for key, data in zip(keys, values):
+            if data is not None and time.time() < self._expires_at(data, "kpi"):
+                self._record_cache_hit("kpi", key, started)
+            else:
+                data = None
+                self._record_cache_miss("kpi", key, started)
+            results.append(data)
+        
+        return results
+    
+    async def prefetch_kpi_data(self, requests: List[Tuple[str, str, Optional[Dict]]]):
+        """
+        Fetch KPI entries in one round trip for the rest of the current context
+        
+        Later get_kpi_data calls for these entries (including from tasks
+        created afterwards) are answered from the batch instead of Redis.
+        Misses are not remembered so that they go through the coalesced
+        read and only one process recomputes them.
+        """
+        results = await self.get_many_kpi_data(requests)
+        prefetched = dict(_prefetched_kpis.get() or {})
+        for (kpi_type, kpi_name, params), data in zip(requests, results):
+            if data is not None:
+                prefetched[self._kpi_key(kpi_type, kpi_name, params=params)] = data
+        _prefetched_kpis.set(prefetched)
+    
+    async def clear_kpi_cache(self, kpi_type: str):
+        """Invalidate every cached KPI of a type, e.g. ``financial``"""
+        await self.invalidate_by_pattern(f"kpi:{kpi_type}:*")
+    
     async def get_forecast_data(self, item_id: str, forecast_period: str) -> Optional[Dict]:
         """Get cached forecast data"""
         if not self.redis:
             return None
             
+        started = time.perf_counter()
         try:
             cache_key = self._generate_key("forecast", "item", item_id, period=forecast_period)
-            cached_data = self.redis.get(cache_key)
+            cached_data = await self._read_coalesced(cache_key, "forecast")
             
             if cached_data:
-                return json.loads(cached_data)
+                self._record_cache_hit("forecast", cache_key, started)
+                return cached_data
+            self._record_cache_miss("forecast", cache_key, started)
         except Exception as e:
             print(f"Error retrieving forecast cache: {e}")
         
@@ -185,7 +1003,7 @@ class AnalyticsCache:
                 "ttl": ttl
             }
             
-            self.redis.setex(cache_key, ttl, json.dumps(cache_data, default=str))
+            await self._store(cache_key, ttl, cache_data, "forecast", "item", item_id)
         except Exception as e:
             print(f"Error caching forecast data: {e}")
     
@@ -194,12 +1012,15 @@ class AnalyticsCache:
         if not self.redis:
             return None
             
+        started = time.perf_counter()
         try:
             cache_key = self._generate_key("report", "custom", report_id)
-            cached_data = self.redis.get(cache_key)
+            cached_data = await self._fetch(cache_key)
             
             if cached_data:
-                return json.loads(cached_data)
+                self._record_cache_hit("report", cache_key, started)
+                return cached_data
+            self._record_cache_miss("report", cache_key, started)
         except Exception as e:
             print(f"Error retrieving report cache: {e}")
         
@@ -219,7 +1040,7 @@ class AnalyticsCache:
                 "ttl": ttl
             }
             
-            self.redis.setex(cache_key, ttl, json.dumps(cache_data, default=str))
+            await self._store(cache_key, ttl, cache_data, "report", "custom", report_id)
         except Exception as e:
             print(f"Error caching report data: {e}")
     
@@ -228,20 +1049,16 @@ class AnalyticsCache:
         if not self.redis:
             return None
             
+        started = time.perf_counter()
         try:
-            # Build cache key manually to avoid parameter conflicts
-            key_parts = ["analytics", "chart", chart_type, entity_type]
-            if entity_id:
-                key_parts.append(entity_id)
-            for k, v in sorted(params.items()):
-                if v is not None:
-                    key_parts.append(f"{k}:{v}")
-            cache_key = ":".join(key_parts)
+            cache_key = self.build_key("chart", chart_type, entity_type, entity_id, params=params)
             
-            cached_data = self.redis.get(cache_key)
+            cached_data = await self._fetch(cache_key)
             
             if cached_data:
-                return json.loads(cached_data)
+                self._record_cache_hit("chart", cache_key, started)
+                return cached_data
+            self._record_cache_miss("chart", cache_key, started)
         except Exception as e:
             print(f"Error retrieving chart cache: {e}")
         
@@ -253,14 +1070,7 @@ class AnalyticsCache:
             return
             
         try:
-            # Build cache key manually to avoid parameter conflicts
-            key_parts = ["analytics", "chart", chart_type, entity_type]
-            if entity_id:
-                key_parts.append(entity_id)
-            for k, v in sorted(params.items()):
-                if v is not None:
-                    key_parts.append(f"{k}:{v}")
-            cache_key = ":".join(key_parts)
+            cache_key = self.build_key("chart", chart_type, entity_type, entity_id, params=params)
             
             cache_data = {
                 "data": data,
@@ -268,7 +1078,7 @@ class AnalyticsCache:
                 "ttl": ttl
             }
             
-            self.redis.setex(cache_key, ttl, json.dumps(cache_data, default=str))
+            await self._store(cache_key, ttl, cache_data, "chart", chart_type, entity_type, entity_id)
         except Exception as e:
             print(f"Error caching chart data: {e}")
     
@@ -278,10 +1088,10 @@ class AnalyticsCache:
             return
             
         try:
-            keys = self.redis.keys(f"analytics:{pattern}*")
-            if keys:
-                self.redis.delete(*keys)
-                print(f"Invalidated {len(keys)} cache entries matching pattern: {pattern}")
+            count = await self._invalidate_pattern(pattern)
+            await self._publish_invalidation(patterns=[pattern])
+            if count:
+                print(f"Invalidated {count} cache entries matching pattern: {pattern}")
         except Exception as e:
             print(f"Error invalidating cache: {e}")
     
@@ -291,47 +1101,115 @@ class AnalyticsCache:
             return
             
         try:
-            # Redis automatically handles TTL expiration, but we can clean up any manual entries
-            expired_keys = []
-            
-            # Get all analytics cache keys
-            keys = self.redis.keys("analytics:*")
-            
-            for key in keys:
-                ttl = self.redis.ttl(key)
-                if ttl == -2:  # Key doesn't exist
-                    expired_keys.append(key)
-            
-            if expired_keys:
-                self.redis.delete(*expired_keys)
-                print(f"Cleaned up {len(expired_keys)} expired cache entries")
+            # Redis expires the entries themselves; prune tag set members
+            # whose entry is gone so the sets (and stats) stay accurate
+            pruned = 0
+            
+            async for tag_key in self.redis.scan_iter(match=self.tag_key("*"), count=SCAN_COUNT):
+                batch = []
+                async for member in self.redis.sscan_iter(tag_key, count=SCAN_COUNT):
+                    batch.append(member)
+                    if len(batch) >= INVALIDATION_BATCH_SIZE:
+                        pruned += await self._prune_tag_members(tag_key, batch)
+                        batch = []
+                if batch:
+                    pruned += await self._prune_tag_members(tag_key, batch)
+            
+            if pruned:
+                print(f"Cleaned up {pruned} expired cache entries")
+            
+            forgotten = await self._prune_warm_recipes()
+            if forgotten:
+                print(f"Removed {forgotten} cache warming recipes without recent reads")
                 
         except Exception as e:
             print(f"Error during cache cleanup: {e}")
     
-    def get_cache_stats(self) -> Dict:
-        """Get comprehensive cache statistics"""
+    async def reencode_legacy_entries(self) -> int:
+        """
+        Rewrite entries stored as plain JSON in the current codec format
+
+        Readers accept both formats, so this only reclaims memory early;
+        legacy entries otherwise disappear as they expire. TTLs are kept.
+        Returns the number of rewritten entries.
+        """
+        if not self.redis:
+            return 0
+
+        rewritten = 0
+        batch = []
+
+        async def rewrite(keys: List[str]) -> int:
+            pipe = self.payload_redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(key)
+                pipe.pttl(key)
+            # Tag sets and locks share the namespace; GET on a set fails
+            results = await pipe.execute(raise_on_error=False)
+
+            pipe = self.payload_redis.pipeline(transaction=False)
+            count = 0
+            for key, payload, pttl in zip(keys, results[::2], results[1::2]):
+                if isinstance(payload, Exception) or not payload or not is_legacy_payload(payload):
+                    continue
+                if not isinstance(pttl, int) or pttl <= 0:
+                    continue
+                pipe.set(key, self.codec.encode(self.codec.decode(payload)), px=pttl, xx=True)
+                count += 1
+            if count:
+                await pipe.execute()
+            return count
+
+        try:
+            async for key in self.redis.scan_iter(match=f"{CACHE_NAMESPACE}:*", count=SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= INVALIDATION_BATCH_SIZE:
+                    rewritten += await rewrite(batch)
+                    batch = []
+            if batch:
+                rewritten += await rewrite(batch)
+        except Exception as e:
+            print(f"Error re-encoding legacy cache entries: {e}")
+
+        return rewritten
+    
+    async def _prune_tag_members(self, tag_key: str, members: List[str]) -> int:
+        """Remove members of a tag set whose entry no longer exists"""
+        pipe = self.redis.pipeline(transaction=False)
+        for member in members:
+            pipe.exists(member)
+        expired = [member for member, exists in zip(members, await pipe.execute()) if not exists]
+        if expired:
+            await self.redis.srem(tag_key, *expired)
+        return len(expired)
+    
+    async def get_cache_stats(self, minutes: int = 60) -> Dict:
+        """Get comprehensive cache statistics; hit/miss figures cover the last ``minutes``"""
         if not self.redis:
             return {"status": "disconnected"}
             
         try:
-            info = self.redis.info()
-            analytics_keys = len(self.redis.keys("analytics:*"))
-            
-            # Calculate hit rates
-            total_hits = sum(self.cache_hit_stats.values())
-            total_misses = sum(self.cache_miss_stats.values())
+            info = await self.redis.info()
+            entry_counts = await self.count_cached_entries()
+            analytics_keys = sum(entry_counts.values())
+            
+            # Hit rates of all processes over the metrics window
+            metrics = await self.get_metrics(minutes=minutes)
+            total_hits = metrics["totals"]["hits"]
+            total_misses = metrics["totals"]["misses"]
             total_requests = total_hits + total_misses
             hit_rate = (total_hits / total_requests * 100) if total_requests > 0 else 0
             
             # Get cache type breakdown
             cache_type_stats = {}
             for cache_type in self.ttl_strategies.keys():
-                type_keys = len(self.redis.keys(f"analytics:{cache_type}:*"))
+                type_metrics = metrics["cache_types"].get(cache_type, {})
                 cache_type_stats[cache_type] = {
-                    "keys": type_keys,
-                    "hits": self.cache_hit_stats.get(cache_type, 0),
-                    "misses": self.cache_miss_stats.get(cache_type, 0)
+                    "keys": entry_counts.get(cache_type, 0),
+                    "hits": type_metrics.get("hits", 0),
+                    "misses": type_metrics.get("misses", 0),
+                    "unique_keys_read": type_metrics.get("unique_keys", 0),
+                    "p95_latency_ms": type_metrics.get("p95_latency_ms")
                 }
             
             return {
@@ -343,6 +1221,7 @@ class AnalyticsCache:
                 "connected_clients": info.get("connected_clients", 0),
                 "uptime_seconds": info.get("uptime_in_seconds", 0),
                 "cache_performance": {
+                    "window_since": metrics["since"],
                     "total_requests": total_requests,
                     "cache_hits": total_hits,
                     "cache_misses": total_misses,
@@ -350,19 +1229,166 @@ class AnalyticsCache:
                     "miss_rate_percent": round(100 - hit_rate, 2)
                 },
                 "cache_type_breakdown": cache_type_stats,
+                "tiers": self._tier_stats(),
+                "codec": self.codec.describe(),
                 "ttl_strategies": self.ttl_strategies
             }
         except Exception as e:
             return {"status": "error", "error": str(e)}
     
-    def _record_cache_hit(self, cache_type: str, key: str):
-        """Record cache hit for statistics"""
-        self.cache_hit_stats[cache_type] = self.cache_hit_stats.get(cache_type, 0) + 1
+    def _tier_stats(self) -> Dict[str, Any]:
+        """Hit ratios of the in-process L1 and of Redis (L2) for lookups L1 missed"""
+        l2_lookups = self.l2_hits + self.l2_misses
+        return {
+            "l1": self.local_cache.stats() if self.local_cache is not None else {"enabled": False},
+            "l2": {
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "hit_ratio": round(self.l2_hits / l2_lookups, 4) if l2_lookups else 0.0
+            }
+        }
     
-    def _record_cache_miss(self, cache_type: str, key: str):
-        """Record cache miss for statistics"""
+    def _record_cache_hit(self, cache_type: str, key: str, started: float = None):
+        """Record cache hit for statistics; ``started`` is the lookup's perf_counter()"""
+        self.cache_hit_stats[cache_type] = self.cache_hit_stats.get(cache_type, 0) + 1
+        self._record_lookup(cache_type, key, "hits", started)
+
+    def _record_cache_miss(self, cache_type: str, key: str, started: float = None):
+        """Record cache miss for statistics; ``started`` is the lookup's perf_counter()"""
         self.cache_miss_stats[cache_type] = self.cache_miss_stats.get(cache_type, 0) + 1
-    
+        self._record_lookup(cache_type, key, "misses", started)
+
+    def _record_lookup(self, cache_type: str, key: str, outcome: str, started: float = None):
+        """Buffer a lookup for the shared per-minute metrics"""
+        minute = datetime.utcnow().strftime("%Y%m%d%H%M")
+        self._metric_counts[(minute, f"{cache_type}:{outcome}")] += 1
+        self._metric_keys.setdefault((minute, cache_type), set()).add(key)
+        if started is not None:
+            latency_ms = (time.perf_counter() - started) * 1000
+            self._metric_counts[(minute, f"{cache_type}:lat:{latency_bucket(latency_ms)}")] += 1
+            self._metric_counts[(minute, f"{cache_type}:lat_sum_us")] += int(latency_ms * 1000)
+
+    @staticmethod
+    def metrics_key(minute: str) -> str:
+        """Hash of lookup counters for a UTC minute formatted as %Y%m%d%H%M"""
+        return f"{METRICS_PREFIX}:{minute}"
+
+    @staticmethod
+    def metrics_keys_key(minute: str, cache_type: str) -> str:
+        """HyperLogLog of distinct keys of ``cache_type`` looked up during a minute"""
+        return f"{METRICS_PREFIX}:keys:{cache_type}:{minute}"
+
+    async def _flush_metrics_if_due(self):
+        if time.monotonic() - self._metrics_flushed_at >= METRICS_FLUSH_SECONDS:
+            await self.flush_metrics()
+
+    async def flush_metrics(self):
+        """Add the lookups counted in this process to the shared metrics (one round trip)"""
+        counts, self._metric_counts = self._metric_counts, Counter()
+        keys, self._metric_keys = self._metric_keys, {}
+        self._metrics_flushed_at = time.monotonic()
+        if not counts or not self.redis:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for (minute, field), count in counts.items():
+                pipe.hincrby(self.metrics_key(minute), field, count)
+            for minute in {minute for minute, _ in counts}:
+                pipe.expire(self.metrics_key(minute), METRICS_RETENTION)
+            for (minute, cache_type), members in keys.items():
+                hll_key = self.metrics_keys_key(minute, cache_type)
+                pipe.pfadd(hll_key, *members)
+                pipe.expire(hll_key, METRICS_RETENTION)
+            await pipe.execute()
+        except Exception as e:
+            print(f"Error flushing cache metrics: {e}")
+
+    async def get_metrics(self, minutes: int = 60, since: datetime = None, cache_types: List[str] = None) -> Dict[str, Any]:
+        """
+        Hit/miss counters and latency histograms aggregated over every process
+
+        Covers the last ``minutes`` UTC minutes (including the current one),
+        or the minutes from ``since`` on, but never minutes before the last
+        reset_cache_stats() call. Resolution is one minute.
+        """
+        await self.flush_metrics()
+        now = datetime.utcnow().replace(second=0, microsecond=0)
+        start = (since or now - timedelta(minutes=max(minutes, 1) - 1)).replace(second=0, microsecond=0)
+        cache_types = list(cache_types or self.ttl_strategies)
+        result = {
+            "status": "connected",
+            "since": start.isoformat(),
+            "until": now.isoformat(),
+            "totals": {"hits": 0, "misses": 0},
+            "cache_types": {},
+            "per_minute": []
+        }
+        if not self.redis:
+            return {**result, "status": "disconnected"}
+
+        reset_at = await self.redis.get(METRICS_RESET_KEY)
+        if reset_at:
+            start = max(start, datetime.utcfromtimestamp(float(reset_at)).replace(second=0, microsecond=0))
+            result["since"] = start.isoformat()
+        minute_keys = []
+        minute = start
+        while minute <= now:
+            minute_keys.append(minute.strftime("%Y%m%d%H%M"))
+            minute += timedelta(minutes=1)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for minute_key in minute_keys:
+            pipe.hgetall(self.metrics_key(minute_key))
+        for cache_type in cache_types:
+            pipe.pfcount(*[self.metrics_keys_key(minute_key, cache_type) for minute_key in minute_keys])
+        replies = await pipe.execute()
+        buckets, unique_keys = replies[:len(minute_keys)], replies[len(minute_keys):]
+
+        per_type = {
+            cache_type: {"hits": 0, "misses": 0, "lat_sum_us": 0, "latency_histogram": {}}
+            for cache_type in cache_types
+        }
+        for minute_key, counters in zip(minute_keys, buckets):
+            minute_totals = {"minute": datetime.strptime(minute_key, "%Y%m%d%H%M").isoformat(), "hits": 0, "misses": 0}
+            for field, value in (counters or {}).items():
+                cache_type, _, name = field.partition(":")
+                if cache_type not in per_type:
+                    continue
+                stats = per_type[cache_type]
+                if name in ("hits", "misses"):
+                    stats[name] += int(value)
+                    minute_totals[name] += int(value)
+                elif name == "lat_sum_us":
+                    stats["lat_sum_us"] += int(value)
+                elif name.startswith("lat:"):
+                    bound = name[len("lat:"):]
+                    stats["latency_histogram"][bound] = stats["latency_histogram"].get(bound, 0) + int(value)
+            result["per_minute"].append(minute_totals)
+
+        for cache_type, distinct in zip(cache_types, unique_keys):
+            stats = per_type[cache_type]
+            lookups = stats["hits"] + stats["misses"]
+            timed = sum(stats["latency_histogram"].values())
+            lat_sum_us = stats.pop("lat_sum_us")
+            stats.update({
+                "requests": lookups,
+                "hit_rate_percent": round(stats["hits"] / lookups * 100, 2) if lookups else 0,
+                "unique_keys": distinct,
+                "avg_latency_ms": round(lat_sum_us / timed / 1000, 3) if timed else None,
+                "p50_latency_ms": histogram_percentile(stats["latency_histogram"], 50),
+                "p95_latency_ms": histogram_percentile(stats["latency_histogram"], 95),
+                "p99_latency_ms": histogram_percentile(stats["latency_histogram"], 99)
+            })
+            result["totals"]["hits"] += stats["hits"]
+            result["totals"]["misses"] += stats["misses"]
+            result["cache_types"][cache_type] = stats
+
+        total = result["totals"]["hits"] + result["totals"]["misses"]
+        result["totals"]["requests"] = total
+        result["totals"]["hit_rate_percent"] = round(result["totals"]["hits"] / total * 100, 2) if total else 0
+        return result
+
     def _is_cache_fresh(self, cached_data: Dict, max_age_seconds: int) -> bool:
         """Check if cached data is still fresh"""
         try:
@@ -372,54 +1398,47 @@ class AnalyticsCache:
         except:
             return False
     
-    async def _add_to_cache_index(self, cache_type: str, cache_key: str, *identifiers):
-        """Add cache key to index for efficient invalidation"""
-        if not self.redis:
-            return
-            
-        try:
-            # Create index key
-            index_key = f"analytics:index:{cache_type}"
-            
-            # Add cache key to set with identifiers
-            index_data = {
-                "key": cache_key,
-                "identifiers": list(identifiers),
-                "created_at": datetime.utcnow().isoformat()
-            }
-            
-            self.redis.sadd(index_key, json.dumps(index_data))
-            
-        except Exception as e:
-            print(f"Error adding to cache index: {e}")
-    
     async def invalidate_cache_key(self, cache_key: str):
         """Invalidate a specific cache key"""
         if not self.redis:
             return
             
         try:
-            self.redis.delete(cache_key)
+            await self.redis.unlink(cache_key)
+            await self._publish_invalidation(keys=[cache_key])
         except Exception as e:
             print(f"Error invalidating cache key {cache_key}: {e}")
     
     async def invalidate_by_pattern(self, pattern: str):
-        """Invalidate cache entries matching pattern with pipeline for efficiency"""
+        """Invalidate cache entries matching pattern through their tag set"""
         if not self.redis:
             return
             
         try:
-            keys = self.redis.keys(f"analytics:{pattern}*")
-            if keys:
-                # Use pipeline for batch deletion
-                pipe = self.redis.pipeline()
-                for key in keys:
-                    pipe.delete(key)
-                pipe.execute()
-                print(f"Invalidated {len(keys)} cache entries matching pattern: {pattern}")
+            count = await self._invalidate_pattern(pattern)
+            await self._publish_invalidation(patterns=[pattern])
+            if count:
+                print(f"Invalidated {count} cache entries matching pattern: {pattern}")
         except Exception as e:
             print(f"Error invalidating cache by pattern: {e}")
     
+    async def invalidate_patterns(self, patterns: List[str]) -> int:
+        """
+        Invalidate several patterns, then tell every process's L1 in a
+        single message. Returns the number of removed entries.
+        """
+        if not self.redis or not patterns:
+            return 0
+        
+        total = 0
+        for pattern in patterns:
+            count = await self._invalidate_pattern(pattern)
+            if count:
+                print(f"Invalidated {count} cache entries matching pattern: {pattern}")
+            total += count
+        await self._publish_invalidation(patterns=list(patterns))
+        return total
+    
     async def invalidate_related_caches(self, entity_type: str, entity_id: str = None):
         """Invalidate all caches related to a specific entity"""
         if not self.redis:
@@ -451,9 +1470,7 @@ class AnalyticsCache:
                     "aggregation:customer:*"
                 ])
             
-            # Invalidate all related patterns
-            for pattern in patterns_to_invalidate:
-                await self.invalidate_by_pattern(pattern)
+            await self.invalidate_patterns(patterns_to_invalidate)
                 
         except Exception as e:
             print(f"Error invalidating related caches: {e}")
@@ -479,7 +1496,7 @@ class AnalyticsCache:
                 "warmed": True
             }
             
-            self.redis.setex(cache_key, ttl, json.dumps(cache_data, default=str))
+            await self._store(cache_key, ttl, cache_data, cache_type, *args)
             print(f"Cache warmed for {cache_type}: {cache_key}")
             
         except Exception as e:
@@ -490,26 +1507,27 @@ class AnalyticsCache:
         if not self.redis:
             return None
             
+        started = time.perf_counter()
         try:
             cache_key = self._generate_key("raw_query", query_hash)
-            cached_data = self.redis.get(cache_key)
+            cached_data = await self._fetch(cache_key)
             
             if cached_data:
-                self._record_cache_hit("raw_query", query_hash)
-                data = json.loads(cached_data)
+                data = cached_data
                 
                 if self._is_cache_fresh(data, self.ttl_strategies["raw_query"]):
+                    self._record_cache_hit("raw_query", query_hash, started)
                     return data
                 else:
                     await self.invalidate_cache_key(cache_key)
-                    self._record_cache_miss("raw_query", query_hash)
+                    self._record_cache_miss("raw_query", query_hash, started)
                     return None
             else:
-                self._record_cache_miss("raw_query", query_hash)
+                self._record_cache_miss("raw_query", query_hash, started)
                 
         except Exception as e:
             print(f"Error retrieving query cache: {e}")
-            self._record_cache_miss("raw_query", query_hash)
+            self._record_cache_miss("raw_query", query_hash, started)
         
         return None
     
@@ -532,7 +1550,7 @@ class AnalyticsCache:
                 "result_count": len(results)
             }
             
-            self.redis.setex(cache_key, ttl, json.dumps(cache_data, default=str))
+            await self._store(cache_key, ttl, cache_data, "raw_query")
             
         except Exception as e:
             print(f"Error caching query results: {e}")
@@ -542,27 +1560,27 @@ class AnalyticsCache:
         if not self.redis:
             return None
             
+        started = time.perf_counter()
         try:
-            filter_hash = hash(str(sorted(filters.items()))) if filters else "no_filters"
-            cache_key = self._generate_key("aggregation", agg_type, entity_type, period=time_period, filters=filter_hash)
-            cached_data = self.redis.get(cache_key)
+            cache_key = self._generate_key("aggregation", agg_type, entity_type, period=time_period, filters=filters or None)
+            cached_data = await self._fetch(cache_key)
             
             if cached_data:
-                self._record_cache_hit("aggregation", f"{agg_type}:{entity_type}")
-                data = json.loads(cached_data)
+                data = cached_data
                 
                 if self._is_cache_fresh(data, self.ttl_strategies["aggregation"]):
+                    self._record_cache_hit("aggregation", cache_key, started)
                     return data
                 else:
                     await self.invalidate_cache_key(cache_key)
-                    self._record_cache_miss("aggregation", f"{agg_type}:{entity_type}")
+                    self._record_cache_miss("aggregation", cache_key, started)
                     return None
             else:
-                self._record_cache_miss("aggregation", f"{agg_type}:{entity_type}")
+                self._record_cache_miss("aggregation", cache_key, started)
                 
         except Exception as e:
             print(f"Error retrieving aggregation cache: {e}")
-            self._record_cache_miss("aggregation", f"{agg_type}:{entity_type}")
+            self._record_cache_miss("aggregation", f"{agg_type}:{entity_type}", started)
         
         return None
     
@@ -572,8 +1590,7 @@ class AnalyticsCache:
             return
             
         try:
-            filter_hash = hash(str(sorted(filters.items()))) if filters else "no_filters"
-            cache_key = self._generate_key("aggregation", agg_type, entity_type, period=time_period, filters=filter_hash)
+            cache_key = self._generate_key("aggregation", agg_type, entity_type, period=time_period, filters=filters or None)
             ttl = self.ttl_strategies["aggregation"]
             
             cache_data = {
@@ -587,15 +1604,31 @@ class AnalyticsCache:
                 "filters": filters
             }
             
-            self.redis.setex(cache_key, ttl, json.dumps(cache_data, default=str))
+            await self._store(cache_key, ttl, cache_data, "aggregation", agg_type, entity_type)
             
         except Exception as e:
             print(f"Error caching aggregation results: {e}")
     
     async def reset_cache_stats(self):
-        """Reset cache hit/miss statistics"""
+        """
+        Reset cache hit/miss statistics
+
+        The shared counters are kept (other processes keep adding to them);
+        get_metrics() ignores minutes before the reset instead.
+        """
         self.cache_hit_stats.clear()
         self.cache_miss_stats.clear()
+        self._metric_counts.clear()
+        self._metric_keys.clear()
+        if self.redis:
+            try:
+                await self.redis.set(METRICS_RESET_KEY, time.time(), ex=METRICS_RETENTION)
+            except Exception as e:
+                print(f"Error resetting shared cache metrics: {e}")
+        self.l2_hits = 0
+        self.l2_misses = 0
+        if self.local_cache is not None:
+            self.local_cache.hits = self.local_cache.misses = self.local_cache.evictions = 0
         print("Cache statistics reset")
     
     async def get_cache_health(self) -> Dict:
@@ -605,22 +1638,22 @@ class AnalyticsCache:
         
         try:
             # Test basic operations
-            test_key = "analytics:health_check"
+            test_key = f"{CACHE_NAMESPACE}:health_check"
             test_value = {"timestamp": datetime.utcnow().isoformat()}
             
             # Test write
-            self.redis.setex(test_key, 10, json.dumps(test_value))
+            await self.redis.setex(test_key, 10, json.dumps(test_value))
             
             # Test read
-            retrieved = self.redis.get(test_key)
+            retrieved = await self.redis.get(test_key)
             if not retrieved:
                 return {"status": "unhealthy", "reason": "Failed to retrieve test data"}
             
             # Test delete
-            self.redis.delete(test_key)
+            await self.redis.delete(test_key)
             
             # Get memory usage
-            info = self.redis.info()
+            info = await self.redis.info()
             memory_used_mb = info.get("used_memory", 0) / (1024 * 1024)
             memory_limit_mb = 256  # From docker-compose.yml
             memory_usage_percent = (memory_used_mb / memory_limit_mb) * 100
@@ -644,9 +1677,55 @@ class AnalyticsCache:
         except Exception as e:
             return {"status": "unhealthy", "reason": str(e)}
 
+class SyncAnalyticsCache:
+    """
+    Blocking facade over AnalyticsCache for Celery tasks and scripts
+
+    Coroutine methods run on a private event loop in a background thread,
+    so every caller in the process (including worker threads) shares that
+    loop's connection pool. Other attributes are passed through.
+    """
+    
+    def __init__(self, cache: AnalyticsCache):
+        self._cache = cache
+        self._loop = None
+        self._lock = threading.Lock()
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="analytics-cache-loop", daemon=True
+                ).start()
+            return self._loop
+    
+    def _reset_after_fork(self):
+        """The loop thread does not survive fork(); children start their own"""
+        self._loop = None
+        self._lock = threading.Lock()
+    
+    def run(self, coroutine):
+        """Run a coroutine on the cache loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop()).result()
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self._cache, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return self.run(attr(*args, **kwargs))
+        return call
+
 # Global instances
 redis_config = RedisConfig()
 analytics_cache = AnalyticsCache(redis_config)
+sync_analytics_cache = SyncAnalyticsCache(analytics_cache)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=sync_analytics_cache._reset_after_fork)
 
 def get_redis_client():
     """Dependency to get Redis client"""
@@ -654,4 +1733,8 @@ def get_redis_client():
 
 def get_analytics_cache():
     """Dependency to get analytics cache"""
-    return analytics_cache
\ No newline at end of file
+    return analytics_cache
+
+def get_sync_analytics_cache():
+    """Analytics cache for synchronous callers such as Celery tasks"""
+    return sync_analytics_cache
\ No newline at end of file
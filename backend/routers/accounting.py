@@ -27,6 +27,7 @@ from schemas_accounting import (
     CheckManagementCreate, CheckManagementUpdate, CheckManagement as CheckManagementSchema,
     InstallmentAccountCreate, InstallmentAccountUpdate, InstallmentAccount as InstallmentAccountSchema,
     BankReconciliationCreate, BankReconciliationUpdate, BankReconciliation as BankReconciliationSchema,
+    AccountingPeriod as AccountingPeriodSchema,
     TrialBalance, BalanceSheet, ProfitLossStatement, CashFlowStatement,
     JournalEntryFilters, CheckFilters, InstallmentFilters
 )
@@ -216,6 +217,20 @@ async def create_bank_reconciliation(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Accounting Periods
+@router.post("/periods/{period_code}/close", response_model=AccountingPeriodSchema)
+async def close_accounting_period(
+    period_code: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Close accounting period and snapshot its closing balances"""
+    service = AccountingService(db)
+    try:
+        return await service.close_accounting_period(period_code, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # Financial Reports
 @router.get("/reports/trial-balance", response_model=TrialBalance)
 async def get_trial_balance(
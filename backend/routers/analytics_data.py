@@ -26,7 +26,7 @@ async def get_demand_forecast_data(
     item_id: Optional[str] = Query(None, description="Specific item ID for forecast"),
     category_id: Optional[str] = Query(None, description="Category ID for category-wide forecast"),
     periods: int = Query(30, ge=1, le=365, description="Number of periods to forecast"),
-    model_type: str = Query("arima", description="Forecasting model type (arima, linear_regression, seasonal)"),
+    model_type: str = Query("auto", description="Forecasting model type (auto, arima, linear_regression, seasonal_decompose, exponential_smoothing, croston, sba)"),
     confidence_level: float = Query(0.95, ge=0.5, le=0.99, description="Confidence level for intervals"),
     include_historical: bool = Query(True, description="Include historical data in response"),
     db: Session = Depends(get_db),
@@ -118,6 +118,9 @@ async def get_demand_forecast_data(
             )
             result["historical_data"] = historical_data
         
+        # Keep the model parameters the forecast store flushed
+        db.commit()
+        
         return result
         
     except Exception as e:
@@ -13,7 +13,7 @@ from datetime import datetime, timedelta
 import logging
 
 from database import get_db
-from redis_config import get_analytics_cache
+from redis_config import get_analytics_cache, CACHE_NAMESPACE, SCAN_COUNT
 from services.cache_invalidation_service import get_cache_invalidation_service
 from services.cache_performance_service import get_cache_performance_service
 from auth import get_current_user
@@ -33,7 +33,7 @@ async def get_cache_statistics(
     """
     try:
         cache = get_analytics_cache()
-        cache_stats = cache.get_cache_stats()
+        cache_stats = await cache.get_cache_stats()
         
         invalidation_service = get_cache_invalidation_service(db)
         invalidation_stats = await invalidation_service.get_invalidation_stats()
@@ -215,6 +215,33 @@ async def get_performance_history(
         logger.error(f"Error getting performance history: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get performance history: {str(e)}")
 
+@router.get("/performance/metrics")
+async def get_cache_metrics(
+    minutes: int = 60,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get live cache hit/miss counters and lookup latency of all processes
+    """
+    try:
+        if minutes < 1 or minutes > 1440:  # Up to 24 hours
+            raise HTTPException(status_code=400, detail="Minutes must be between 1 and 1440")
+        
+        performance_service = get_cache_performance_service(db)
+        metrics = await performance_service.get_cache_metrics(minutes)
+        
+        return {
+            "cache_metrics": metrics,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting cache metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get cache metrics: {str(e)}")
+
 @router.post("/performance/stress-test")
 async def run_stress_test(
     duration_seconds: int = 60,
@@ -300,6 +327,8 @@ async def get_cache_configuration(
         
         return {
             "ttl_strategies": cache.ttl_strategies,
+            "refresh_strategies": cache.refresh_strategies,
+            "codec": cache.codec.describe(),
             "default_ttl": cache.default_ttl,
             "cache_types": list(cache.ttl_strategies.keys()),
             "timestamp": datetime.utcnow().isoformat()
@@ -313,15 +342,26 @@ async def get_cache_configuration(
 async def update_ttl_strategy(
     cache_type: str,
     ttl_seconds: int,
+    stale_while_revalidate: Optional[int] = None,
+    xfetch_beta: Optional[float] = None,
     current_user: User = Depends(get_current_user)
 ):
     """
     Update TTL strategy for a specific cache type
+    
+    Optionally also sets how long stale entries may be served while one
+    worker recomputes them, and the early-refresh (XFetch) beta.
     """
     try:
         if ttl_seconds < 60 or ttl_seconds > 86400:  # 1 minute to 24 hours
             raise HTTPException(status_code=400, detail="TTL must be between 60 and 86400 seconds")
         
+        if stale_while_revalidate is not None and not 0 <= stale_while_revalidate <= 86400:
+            raise HTTPException(status_code=400, detail="Stale-while-revalidate must be between 0 and 86400 seconds")
+        
+        if xfetch_beta is not None and not 0 <= xfetch_beta <= 10:
+            raise HTTPException(status_code=400, detail="XFetch beta must be between 0 and 10")
+        
         cache = get_analytics_cache()
         
         if cache_type not in cache.ttl_strategies:
@@ -330,11 +370,20 @@ async def update_ttl_strategy(
         old_ttl = cache.ttl_strategies[cache_type]
         cache.ttl_strategies[cache_type] = ttl_seconds
         
+        refresh_strategy = cache.refresh_strategies.setdefault(
+            cache_type, {"stale_while_revalidate": 0, "xfetch_beta": 1.0}
+        )
+        if stale_while_revalidate is not None:
+            refresh_strategy["stale_while_revalidate"] = stale_while_revalidate
+        if xfetch_beta is not None:
+            refresh_strategy["xfetch_beta"] = xfetch_beta
+        
         return {
             "message": f"TTL strategy updated for {cache_type}",
             "cache_type": cache_type,
             "old_ttl_seconds": old_ttl,
             "new_ttl_seconds": ttl_seconds,
+            "refresh_strategy": refresh_strategy,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -346,7 +395,7 @@ async def update_ttl_strategy(
 
 @router.get("/keys")
 async def get_cache_keys(
-    pattern: str = "analytics:*",
+    pattern: str = f"{CACHE_NAMESPACE}:*",
     limit: int = 100,
     current_user: User = Depends(get_current_user)
 ):
@@ -362,14 +411,18 @@ async def get_cache_keys(
         if not cache.redis:
             raise HTTPException(status_code=503, detail="Redis not available")
         
-        keys = cache.redis.keys(pattern)[:limit]
+        keys = []
+        async for key in cache.redis.scan_iter(match=pattern, count=SCAN_COUNT):
+            keys.append(key)
+            if len(keys) >= limit:
+                break
         
         # Get key details
         key_details = []
         for key in keys:
             try:
-                ttl = cache.redis.ttl(key)
-                key_type = cache.redis.type(key)
+                ttl = await cache.redis.ttl(key)
+                key_type = await cache.redis.type(key)
                 
                 key_details.append({
                     "key": key,
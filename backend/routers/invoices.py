@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, func
-from typing import List, Optional
+from sqlalchemy import and_, or_, desc, func, case, update
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 import uuid
@@ -10,6 +10,8 @@ from database import get_db
 from auth import get_current_user
 import models
 import schemas
+from services.sales_fact_service import SalesFactService
+from services.document_number_service import DocumentNumberService
 
 router = APIRouter(
     prefix="/invoices",
@@ -23,40 +25,67 @@ def generate_invoice_number(db: Session) -> str:
     now = datetime.now()
     year_month = now.strftime("%Y%m")
     
-    # Find the last invoice number for this month
-    last_invoice = db.query(models.Invoice).filter(
-        models.Invoice.invoice_number.like(f"INV-{year_month}-%")
-    ).order_by(desc(models.Invoice.invoice_number)).first()
-    
-    if last_invoice:
-        # Extract sequence number and increment
-        last_seq = int(last_invoice.invoice_number.split("-")[-1])
-        new_seq = last_seq + 1
-    else:
-        new_seq = 1
+    def last_sequence() -> int:
+        # Only read when the month's counter is created
+        last_invoice = db.query(models.Invoice).filter(
+            models.Invoice.invoice_number.like(f"INV-{year_month}-%")
+        ).order_by(desc(models.Invoice.invoice_number)).first()
+        return int(last_invoice.invoice_number.split("-")[-1]) if last_invoice else 0
     
+    new_seq = DocumentNumberService(db).next_value("invoice", year_month, seed=last_sequence)
     return f"INV-{year_month}-{new_seq:04d}"
 
+def load_inventory_items(
+    db: Session,
+    items: List[schemas.InvoiceItemCreate],
+    lock: bool = False
+) -> Dict[UUID, models.InventoryItem]:
+    """
+    Load the inventory items of all invoice lines with one WHERE id IN (...) query
+    
+    With ``lock`` the rows are locked FOR UPDATE in id order, so invoices
+    sharing items queue on their stock instead of deadlocking.
+    """
+    item_ids = {item_data.inventory_item_id for item_data in items}
+    if not item_ids:
+        return {}
+    
+    query = db.query(models.InventoryItem).filter(
+        models.InventoryItem.id.in_(item_ids)
+    ).order_by(models.InventoryItem.id)
+    if lock:
+        query = query.with_for_update()
+    
+    return {inventory_item.id: inventory_item for inventory_item in query.all()}
+
 def calculate_invoice_totals(
     items: List[schemas.InvoiceItemCreate],
     gold_price_per_gram: float,
     labor_cost_percentage: float,
     profit_percentage: float,
     vat_percentage: float,
-    db: Session
+    db: Session,
+    inventory_items: Optional[Dict[UUID, models.InventoryItem]] = None
 ) -> schemas.InvoiceCalculationSummary:
-    """Calculate invoice totals with gram-based pricing"""
+    """
+    Calculate invoice totals with gram-based pricing
+    
+    ``inventory_items`` are the rows preloaded by load_inventory_items;
+    they are loaded here (without locks) when not given.
+    """
+    if inventory_items is None:
+        inventory_items = load_inventory_items(db, items)
+    
     calculations = []
     subtotal = 0
     total_labor_cost = 0
     total_profit = 0
     total_vat = 0
+    requested = {}
     
     for item_data in items:
         # Get inventory item
-        inventory_item = db.query(models.InventoryItem).filter(
-            models.InventoryItem.id == item_data.inventory_item_id
-        ).first()
+        inventory_item = inventory_items.get(item_data.inventory_item_id)
         
         if not inventory_item:
             raise HTTPException(
@@ -64,11 +93,12 @@ def calculate_invoice_totals(
                 detail=f"Inventory item {item_data.inventory_item_id} not found"
             )
         
-        # Check stock availability
-        if inventory_item.stock_quantity < item_data.quantity:
+        # Check stock availability, across all lines of the same item
+        requested[inventory_item.id] = requested.get(inventory_item.id, 0) + item_data.quantity
+        if inventory_item.stock_quantity < requested[inventory_item.id]:
             raise HTTPException(
                 status_code=400,
-                detail=f"Insufficient stock for {inventory_item.name}. Available: {inventory_item.stock_quantity}, Requested: {item_data.quantity}"
+                detail=f"Insufficient stock for {inventory_item.name}. Available: {inventory_item.stock_quantity}, Requested: {requested[inventory_item.id]}"
             )
         
         # Calculate prices based on gram weight
@@ -116,15 +146,21 @@ def calculate_invoice_totals(
     )
 
 def update_inventory_stock(db: Session, items: List[schemas.InvoiceItemCreate]):
-    """Update inventory stock levels after invoice creation"""
+    """Update inventory stock levels after invoice creation with one UPDATE"""
+    quantities = {}
     for item_data in items:
-        inventory_item = db.query(models.InventoryItem).filter(
-            models.InventoryItem.id == item_data.inventory_item_id
-        ).first()
-        
-        if inventory_item:
-            inventory_item.stock_quantity -= item_data.quantity
-            db.add(inventory_item)
+        quantities[item_data.inventory_item_id] = quantities.get(item_data.inventory_item_id, 0) + item_data.quantity
+    
+    if not quantities:
+        return
+    
+    db.execute(
+        update(models.InventoryItem).where(
+            models.InventoryItem.id.in_(quantities)
+        ).values(
+            stock_quantity=models.InventoryItem.stock_quantity - case(quantities, value=models.InventoryItem.id)
+        ).execution_options(synchronize_session="fetch")
+    )
 
 def create_accounting_entries(db: Session, invoice: models.Invoice):
     """Create accounting entries for invoice"""
@@ -191,6 +227,9 @@ def create_invoice(
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
         
+        # Lock the stock of all invoice items with one query
+        inventory_items = load_inventory_items(db, invoice_data.items, lock=True)
+        
         # Calculate totals
         calculation_summary = calculate_invoice_totals(
             invoice_data.items,
@@ -198,7 +237,8 @@ def create_invoice(
             invoice_data.labor_cost_percentage,
             invoice_data.profit_percentage,
             invoice_data.vat_percentage,
-            db
+            db,
+            inventory_items
         )
         
         # Create invoice
@@ -332,6 +372,8 @@ def update_invoice(
         setattr(invoice, field, value)
     
     db.add(invoice)
+    db.flush()
+    SalesFactService(db).refresh_for_invoice(invoice.id, invoice.created_at.date())
     db.commit()
     
     return get_invoice_with_details(invoice_id, db)
@@ -399,6 +441,10 @@ def add_invoice_payment(
         )
         db.add(cash_entry)
         
+        # Paid / partially paid invoices count as sales
+        db.flush()
+        SalesFactService(db).refresh_for_invoice(invoice.id, invoice.created_at.date())
+        
         db.commit()
         return payment
         
@@ -429,6 +475,8 @@ def update_invoice_status(
     
     invoice.status = status_update.status
     db.add(invoice)
+    db.flush()
+    SalesFactService(db).refresh_for_invoice(invoice.id, invoice.created_at.date())
     db.commit()
     
     return invoice
@@ -470,7 +518,10 @@ def delete_invoice(invoice_id: UUID, db: Session = Depends(get_db)):
         ).delete()
         
         # Delete invoice
+        invoice_date = invoice.created_at.date()
         db.delete(invoice)
+        db.flush()
+        SalesFactService(db).refresh_for_invoice(invoice_id, invoice_date)
         db.commit()
         
         return {"message": "Invoice deleted successfully"}
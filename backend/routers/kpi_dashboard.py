@@ -323,6 +323,12 @@ async def get_kpi_dashboard(
         operational_calculator = OperationalKPICalculator(db)
         customer_calculator = CustomerKPICalculator(db)
         
+        # Read the cached KPIs in one round trip; the calculators below are
+        # answered from this batch and only recompute misses
+        await financial_calculator.cache.prefetch_kpi_data(
+            dashboard_kpi_cache_requests(start_date, end_date, target_dict)
+        )
+        
         # Calculate all KPIs concurrently for better performance
         financial_task = asyncio.create_task(
             get_financial_kpis_data(financial_calculator, start_date, end_date, target_dict)
@@ -544,6 +550,17 @@ async def refresh_kpi_cache(
         )
 
 # Helper functions
+def dashboard_kpi_cache_requests(start_date: date, end_date: date, targets: dict) -> list:
+    """Cache entries read by get_financial_kpis_data, as (kpi_type, kpi_name, params)"""
+    period = {"start_date": start_date, "end_date": end_date}
+    requests = [
+        ("financial", "revenue", {**period, "targets": targets}),
+        ("financial", "profit_margin", period),
+    ]
+    if targets:
+        requests.append(("financial", "achievement", {**period, "targets": targets}))
+    return requests
+
 async def get_financial_kpis_data(calculator, start_date: date, end_date: date, targets: dict) -> dict:
     """Get financial KPIs data"""
     revenue_kpis = await calculator.calculate_revenue_kpis(start_date, end_date, targets)
@@ -5,8 +5,8 @@ Handles both Gold and General invoice types with comprehensive workflow manageme
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, func, text
-from typing import List, Optional
+from sqlalchemy import and_, or_, desc, func, text, case, update
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 from decimal import Decimal
@@ -20,6 +20,7 @@ from database import get_db
 from auth import get_current_user
 import models_universal as models
 import schemas_universal as schemas
+from services.document_number_service import DocumentNumberService
 
 router = APIRouter(
     prefix="/universal-invoices",
@@ -35,33 +36,86 @@ def generate_invoice_number(db: Session, invoice_type: str) -> str:
     # Different prefixes for different types
     prefix = "GOLD" if invoice_type == "gold" else "INV"
     
-    # Find the last invoice number for this type and month
-    last_invoice = db.query(models.UniversalInvoice).filter(
-        and_(
-            models.UniversalInvoice.invoice_number.like(f"{prefix}-{year_month}-%"),
-            models.UniversalInvoice.type == invoice_type
-        )
-    ).order_by(desc(models.UniversalInvoice.invoice_number)).first()
-    
-    if last_invoice:
-        # Extract sequence number and increment
-        last_seq = int(last_invoice.invoice_number.split("-")[-1])
-        new_seq = last_seq + 1
-    else:
-        new_seq = 1
+    def last_sequence() -> int:
+        # Only read when the counter of this type and month is created
+        last_invoice = db.query(models.UniversalInvoice).filter(
+            and_(
+                models.UniversalInvoice.invoice_number.like(f"{prefix}-{year_month}-%"),
+                models.UniversalInvoice.type == invoice_type
+            )
+        ).order_by(desc(models.UniversalInvoice.invoice_number)).first()
+        return int(last_invoice.invoice_number.split("-")[-1]) if last_invoice else 0
     
+    new_seq = DocumentNumberService(db).next_value(
+        f"universal_invoice:{invoice_type}", year_month, seed=last_sequence
+    )
     return f"{prefix}-{year_month}-{new_seq:04d}"
 
 def generate_sku() -> str:
     """Generate unique SKU for items without inventory reference"""
     return f"ITEM-{uuid.uuid4().hex[:8].upper()}"
 
+def load_inventory_items(
+    db: Session,
+    items: List[schemas.UniversalInvoiceItemCreate],
+    lock: bool = False
+) -> Dict[UUID, models.UniversalInventoryItem]:
+    """
+    Load the inventory items of all invoice lines with one WHERE id IN (...) query
+    
+    With ``lock`` the rows are locked FOR UPDATE in id order, so invoices
+    sharing items queue on their stock instead of deadlocking. Lines
+    without an inventory item are skipped.
+    """
+    item_ids = {item_data.inventory_item_id for item_data in items if item_data.inventory_item_id}
+    if not item_ids:
+        return {}
+    
+    query = db.query(models.UniversalInventoryItem).filter(
+        models.UniversalInventoryItem.id.in_(item_ids)
+    ).order_by(models.UniversalInventoryItem.id)
+    if lock:
+        query = query.with_for_update()
+    
+    return {inventory_item.id: inventory_item for inventory_item in query.all()}
+
+def _get_inventory_item(
+    inventory_items: Dict[UUID, models.UniversalInventoryItem],
+    item_data: schemas.UniversalInvoiceItemCreate,
+    requested: Dict[UUID, Decimal]
+) -> Optional[models.UniversalInventoryItem]:
+    """Preloaded inventory item of a line, checking stock across all lines of the item"""
+    if not item_data.inventory_item_id:
+        return None
+    
+    inventory_item = inventory_items.get(item_data.inventory_item_id)
+    if not inventory_item:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Inventory item {item_data.inventory_item_id} not found"
+        )
+    
+    # Check stock availability
+    requested[inventory_item.id] = requested.get(inventory_item.id, 0) + item_data.quantity
+    if inventory_item.stock_quantity < requested[inventory_item.id]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient stock for {inventory_item.name}. Available: {inventory_item.stock_quantity}, Requested: {requested[inventory_item.id]}"
+        )
+    
+    return inventory_item
+
 def calculate_gold_invoice_totals(
     items: List[schemas.UniversalInvoiceItemCreate],
     gold_fields: schemas.GoldInvoiceFields,
-    db: Session
+    db: Session,
+    inventory_items: Optional[Dict[UUID, models.UniversalInventoryItem]] = None
 ) -> schemas.InvoiceCalculationSummary:
     """Calculate totals for Gold invoice with specialized pricing"""
+    if inventory_items is None:
+        inventory_items = load_inventory_items(db, items)
+    
+    requested = {}
     calculations = []
     subtotal = Decimal('0')
     total_labor_cost = Decimal('0')
@@ -70,24 +124,7 @@ def calculate_gold_invoice_totals(
     
     for item_data in items:
         # Get inventory item if available
-        inventory_item = None
-        if item_data.inventory_item_id:
-            inventory_item = db.query(models.UniversalInventoryItem).filter(
-                models.UniversalInventoryItem.id == item_data.inventory_item_id
-            ).first()
-            
-            if not inventory_item:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Inventory item {item_data.inventory_item_id} not found"
-                )
-            
-            # Check stock availability
-            if inventory_item.stock_quantity < item_data.quantity:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Insufficient stock for {inventory_item.name}. Available: {inventory_item.stock_quantity}, Requested: {item_data.quantity}"
-                )
+        inventory_item = _get_inventory_item(inventory_items, item_data, requested)
         
         # Calculate prices based on gold weight
         weight = item_data.weight_grams or Decimal('0')
@@ -138,32 +175,20 @@ def calculate_gold_invoice_totals(
 
 def calculate_general_invoice_totals(
     items: List[schemas.UniversalInvoiceItemCreate],
-    db: Session
+    db: Session,
+    inventory_items: Optional[Dict[UUID, models.UniversalInventoryItem]] = None
 ) -> schemas.InvoiceCalculationSummary:
     """Calculate totals for General invoice with standard pricing"""
+    if inventory_items is None:
+        inventory_items = load_inventory_items(db, items)
+    
+    requested = {}
     calculations = []
     subtotal = Decimal('0')
     
     for item_data in items:
         # Get inventory item if available
-        inventory_item = None
-        if item_data.inventory_item_id:
-            inventory_item = db.query(models.UniversalInventoryItem).filter(
-                models.UniversalInventoryItem.id == item_data.inventory_item_id
-            ).first()
-            
-            if not inventory_item:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Inventory item {item_data.inventory_item_id} not found"
-                )
-            
-            # Check stock availability
-            if inventory_item.stock_quantity < item_data.quantity:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Insufficient stock for {inventory_item.name}. Available: {inventory_item.stock_quantity}, Requested: {item_data.quantity}"
-                )
+        inventory_item = _get_inventory_item(inventory_items, item_data, requested)
         
         # Use provided unit price or inventory item price
         unit_price = item_data.unit_price
@@ -195,35 +220,58 @@ def calculate_general_invoice_totals(
         grand_total=subtotal
     )
 
-def update_inventory_stock(db: Session, items: List[schemas.UniversalInvoiceItemCreate], operation: str = "deduct"):
-    """Update inventory stock levels (deduct or restore)"""
+def update_inventory_stock(
+    db: Session,
+    items: List[schemas.UniversalInvoiceItemCreate],
+    operation: str = "deduct",
+    inventory_items: Optional[Dict[UUID, models.UniversalInventoryItem]] = None
+):
+    """
+    Update inventory stock levels (deduct or restore)
+    
+    Stock of all lines is changed with one set-based UPDATE. The movement
+    records need the stock before the change, so the items are loaded and
+    locked first unless ``inventory_items`` already holds them locked.
+    """
+    if inventory_items is None:
+        inventory_items = load_inventory_items(db, items, lock=True)
+    
+    sign = -1 if operation == "deduct" else 1
+    changes = {}
+    
     for item_data in items:
-        if item_data.inventory_item_id:
-            inventory_item = db.query(models.UniversalInventoryItem).filter(
-                models.UniversalInventoryItem.id == item_data.inventory_item_id
-            ).first()
-            
-            if inventory_item:
-                if operation == "deduct":
-                    inventory_item.stock_quantity -= item_data.quantity
-                elif operation == "restore":
-                    inventory_item.stock_quantity += item_data.quantity
-                
-                db.add(inventory_item)
-                
-                # Create inventory movement record
-                movement = models.InventoryMovement(
-                    inventory_item_id=inventory_item.id,
-                    movement_type="out" if operation == "deduct" else "in",
-                    quantity_change=-item_data.quantity if operation == "deduct" else item_data.quantity,
-                    quantity_before=inventory_item.stock_quantity + (item_data.quantity if operation == "deduct" else -item_data.quantity),
-                    quantity_after=inventory_item.stock_quantity,
-                    unit_of_measure=inventory_item.unit_of_measure,
-                    reference_type="invoice",
-                    reason=f"Invoice {'creation' if operation == 'deduct' else 'deletion/void'}",
-                    status="completed"
+        inventory_item = inventory_items.get(item_data.inventory_item_id)
+        if not inventory_item:
+            continue
+        
+        quantity_change = sign * item_data.quantity
+        quantity_before = inventory_item.stock_quantity + changes.get(inventory_item.id, 0)
+        changes[inventory_item.id] = changes.get(inventory_item.id, 0) + quantity_change
+        
+        # Create inventory movement record
+        movement = models.InventoryMovement(
+            inventory_item_id=inventory_item.id,
+            movement_type="out" if operation == "deduct" else "in",
+            quantity_change=quantity_change,
+            quantity_before=quantity_before,
+            quantity_after=quantity_before + quantity_change,
+            unit_of_measure=inventory_item.unit_of_measure,
+            reference_type="invoice",
+            reason=f"Invoice {'creation' if operation == 'deduct' else 'deletion/void'}",
+            status="completed"
+        )
+        db.add(movement)
+    
+    if changes:
+        db.execute(
+            update(models.UniversalInventoryItem).where(
+                models.UniversalInventoryItem.id.in_(changes)
+            ).values(
+                stock_quantity=models.UniversalInventoryItem.stock_quantity + case(
+                    changes, value=models.UniversalInventoryItem.id
                 )
-                db.add(movement)
+            ).execution_options(synchronize_session="fetch")
+        )
 
 def create_qr_code_and_card(invoice: models.UniversalInvoice, db: Session, created_by: UUID = None) -> models.QRInvoiceCard:
     """Create QR code and card for invoice using the comprehensive service"""
@@ -293,11 +341,17 @@ def create_invoice(
         # Validate business rules
         validate_invoice_business_rules(invoice_data)
         
+        # Load all invoice items with one query, shared by the calculation,
+        # the item snapshots and the stock deduction (which needs them locked)
+        inventory_items = load_inventory_items(db, invoice_data.items, lock=not invoice_data.requires_approval)
+        
         # Calculate totals
         if invoice_data.type == "gold":
-            calculation_summary = calculate_gold_invoice_totals(invoice_data.items, invoice_data.gold_fields, db)
+            calculation_summary = calculate_gold_invoice_totals(
+                invoice_data.items, invoice_data.gold_fields, db, inventory_items
+            )
         else:
-            calculation_summary = calculate_general_invoice_totals(invoice_data.items, db)
+            calculation_summary = calculate_general_invoice_totals(invoice_data.items, db, inventory_items)
         
         # Create invoice
         invoice = models.UniversalInvoice(
@@ -353,11 +407,7 @@ def create_invoice(
             calculation = calculation_summary.items[i]
             
             # Get inventory item details for snapshot
-            inventory_item = None
-            if item_data.inventory_item_id:
-                inventory_item = db.query(models.UniversalInventoryItem).filter(
-                    models.UniversalInventoryItem.id == item_data.inventory_item_id
-                ).first()
+            inventory_item = inventory_items.get(item_data.inventory_item_id)
             
             invoice_item = models.UniversalInvoiceItem(
                 invoice_id=invoice.id,
@@ -385,7 +435,7 @@ def create_invoice(
             invoice.stock_affected = True
             
             # Update inventory stock
-            update_inventory_stock(db, invoice_data.items, "deduct")
+            update_inventory_stock(db, invoice_data.items, "deduct", inventory_items)
         
         db.flush()  # Ensure invoice_items are available
         
@@ -4,7 +4,7 @@ Comprehensive service for managing double-entry accounting system
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc, asc, text
+from sqlalchemy import func, and_, or_, desc, asc, text, case, insert, select, union_all, update
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, date, timedelta
 from uuid import UUID, uuid4
@@ -15,7 +15,7 @@ from models_accounting import (
     ChartOfAccounts, SubsidiaryAccount, JournalEntry, JournalEntryLine,
     CheckManagement, InstallmentAccount, InstallmentPayment,
     BankReconciliation, BankReconciliationItem, AccountingPeriod,
-    AccountingAuditTrail
+    AccountingAuditTrail, AccountBalanceSnapshot
 )
 from schemas_accounting import (
     ChartOfAccountsCreate, ChartOfAccountsUpdate,
@@ -27,6 +27,10 @@ from schemas_accounting import (
     AccountingPeriodCreate, AccountingPeriodUpdate,
     TrialBalance, BalanceSheet, ProfitLossStatement, CashFlowStatement
 )
+from services.document_number_service import DocumentNumberService
+
+# Advisory lock serializing balance snapshot writes against postings that invalidate them
+_SNAPSHOT_LOCK_NAMESPACE = 7302
 
 class AccountingService:
     """Comprehensive accounting service with double-entry bookkeeping"""
@@ -281,6 +285,7 @@ class AccountingService:
         entry.status = 'posted'
         entry.posted_at = datetime.utcnow()
         entry.posted_by = user_id
+        await self._invalidate_balance_snapshots(entry.entry_date)
         
         self.db.commit()
         
@@ -338,6 +343,7 @@ class AccountingService:
         original_entry.reversal_reason = reversal_reason
         original_entry.reversed_at = datetime.utcnow()
         original_entry.reversed_by = user_id
+        await self._invalidate_balance_snapshots(original_entry.entry_date)
         
         self.db.commit()
         
@@ -514,22 +520,59 @@ class AccountingService:
         
         return reconciliation
     
+    # Accounting Periods and Balance Snapshots
+    async def close_accounting_period(self, period_code: str, user_id: UUID) -> AccountingPeriod:
+        """Close accounting period and snapshot account balances at its end"""
+        period = self.db.query(AccountingPeriod).filter(
+            AccountingPeriod.period_code == period_code
+        ).first()
+        if not period:
+            raise ValueError("Accounting period not found")
+
+        if period.status != 'open':
+            raise ValueError("Only open periods can be closed")
+
+        await self._write_balance_snapshot(period.end_date)
+
+        period.status = 'closed'
+        period.closed_at = datetime.utcnow()
+        period.closed_by = user_id
+
+        self.db.commit()
+
+        # Log audit trail
+        await self._log_audit_trail(
+            table_name="accounting_periods",
+            record_id=period.id,
+            operation="update",
+            old_values={"status": "open"},
+            new_values={"status": "closed"},
+            user_id=user_id,
+            change_description=f"Closed accounting period: {period.period_code}"
+        )
+
+        return period
+
+    async def snapshot_account_balances(self, period_end: date) -> int:
+        """
+        Snapshot cumulative account balances as of ``period_end``
+
+        Replaces an existing snapshot of the same date. Returns the number
+        of account/subsidiary rows written.
+        """
+        rows = await self._write_balance_snapshot(period_end)
+        self.db.commit()
+        return rows
+
     # Financial Reports
     async def generate_trial_balance(self, as_of_date: date) -> TrialBalance:
         """Generate trial balance report"""
-        # Get all accounts with balances
-        accounts_query = self.db.query(ChartOfAccounts).filter(
-            ChartOfAccounts.is_active == True
-        ).order_by(ChartOfAccounts.account_code)
-        
-        accounts = accounts_query.all()
+        # Get all accounts with balances as of date
         trial_balance_items = []
         total_debits = Decimal('0')
         total_credits = Decimal('0')
         
-        for account in accounts:
-            # Calculate balance as of date
-            debit_balance, credit_balance = await self._calculate_account_balance(account.id, as_of_date)
+        for account, debit_balance, credit_balance in await self._get_account_totals(as_of_date):
             net_balance = debit_balance - credit_balance
             
             if debit_balance != 0 or credit_balance != 0:
@@ -556,14 +599,16 @@ class AccountingService:
     
     async def generate_balance_sheet(self, as_of_date: date) -> BalanceSheet:
         """Generate balance sheet report"""
+        totals = await self._get_account_totals(as_of_date, account_types=['asset', 'liability', 'equity'])
+        
         # Get assets
-        assets = await self._get_balance_sheet_section('asset', as_of_date)
+        assets = await self._get_balance_sheet_section('asset', as_of_date, totals)
         
         # Get liabilities
-        liabilities = await self._get_balance_sheet_section('liability', as_of_date)
+        liabilities = await self._get_balance_sheet_section('liability', as_of_date, totals)
         
         # Get equity
-        equity = await self._get_balance_sheet_section('equity', as_of_date)
+        equity = await self._get_balance_sheet_section('equity', as_of_date, totals)
         
         total_assets = sum(item['amount'] for item in assets['items'])
         total_liabilities_equity = sum(item['amount'] for item in liabilities['items']) + sum(item['amount'] for item in equity['items'])
@@ -580,11 +625,13 @@ class AccountingService:
     
     async def generate_profit_loss_statement(self, period_start: date, period_end: date) -> ProfitLossStatement:
         """Generate profit and loss statement"""
+        totals = await self._get_account_totals(period_end, period_start, account_types=['revenue', 'expense'])
+        
         # Get revenue
-        revenue = await self._get_profit_loss_section('revenue', period_start, period_end)
+        revenue = await self._get_profit_loss_section('revenue', period_start, period_end, totals)
         
         # Get expenses
-        expenses = await self._get_profit_loss_section('expense', period_start, period_end)
+        expenses = await self._get_profit_loss_section('expense', period_start, period_end, totals)
         
         total_revenue = sum(item['amount'] for item in revenue['items'])
         total_expenses = sum(item['amount'] for item in expenses['items'])
@@ -715,31 +762,27 @@ class AccountingService:
         
         prefix = type_prefixes.get(account_type, '9')
         
-        # Find next available code
-        last_account = self.db.query(ChartOfAccounts).filter(
-            ChartOfAccounts.account_code.like(f"{prefix}%")
-        ).order_by(desc(ChartOfAccounts.account_code)).first()
+        def last_number() -> int:
+            last_account = self.db.query(ChartOfAccounts).filter(
+                ChartOfAccounts.account_code.like(f"{prefix}%")
+            ).order_by(desc(ChartOfAccounts.account_code)).first()
+            return int(last_account.account_code[1:]) if last_account else 999
         
-        if last_account:
-            last_number = int(last_account.account_code[1:])
-            next_number = last_number + 1
-        else:
-            next_number = 1000
+        next_number = DocumentNumberService(self.db).next_value(f"account_code:{prefix}", seed=last_number)
         
         return f"{prefix}{next_number:03d}"
     
     async def _generate_subsidiary_code(self, main_account_code: str, subsidiary_type: str) -> str:
         """Generate subsidiary account code"""
-        # Find next available subsidiary code for this main account
-        last_subsidiary = self.db.query(SubsidiaryAccount).filter(
-            SubsidiaryAccount.subsidiary_code.like(f"{main_account_code}-%")
-        ).order_by(desc(SubsidiaryAccount.subsidiary_code)).first()
-        
-        if last_subsidiary:
-            last_number = int(last_subsidiary.subsidiary_code.split('-')[-1])
-            next_number = last_number + 1
-        else:
-            next_number = 1
+        def last_number() -> int:
+            last_subsidiary = self.db.query(SubsidiaryAccount).filter(
+                SubsidiaryAccount.subsidiary_code.like(f"{main_account_code}-%")
+            ).order_by(desc(SubsidiaryAccount.subsidiary_code)).first()
+            return int(last_subsidiary.subsidiary_code.split('-')[-1]) if last_subsidiary else 0
+        
+        next_number = DocumentNumberService(self.db).next_value(
+            f"subsidiary_code:{main_account_code}", seed=last_number
+        )
         
         return f"{main_account_code}-{next_number:03d}"
     
@@ -748,62 +791,96 @@ class AccountingService:
         today = date.today()
         prefix = f"JE{today.strftime('%Y%m')}"
         
-        last_entry = self.db.query(JournalEntry).filter(
-            JournalEntry.entry_number.like(f"{prefix}%")
-        ).order_by(desc(JournalEntry.entry_number)).first()
+        def last_number() -> int:
+            last_entry = self.db.query(JournalEntry).filter(
+                JournalEntry.entry_number.like(f"{prefix}%")
+            ).order_by(desc(JournalEntry.entry_number)).first()
+            return int(last_entry.entry_number[8:]) if last_entry else 0
         
-        if last_entry:
-            last_number = int(last_entry.entry_number[8:])
-            next_number = last_number + 1
-        else:
-            next_number = 1
+        next_number = DocumentNumberService(self.db).next_value(
+            "journal_entry", today.strftime('%Y%m'), seed=last_number
+        )
         
         return f"{prefix}{next_number:04d}"
     
     async def _update_account_balances(self, journal_entry_id: UUID):
-        """Update account balances after journal entry"""
-        lines = self.db.query(JournalEntryLine).filter(
+        """
+        Update account balances after journal entry
+        
+        The entry's lines are summed per account and per subsidiary and
+        applied as ``balance = balance + delta`` with one UPDATE each. The
+        affected rows are locked first in id order, accounts before
+        subsidiaries, so concurrent postings neither deadlock nor lose
+        updates.
+        """
+        account_deltas = select(
+            JournalEntryLine.account_id,
+            func.sum(JournalEntryLine.debit_amount).label('debit_amount'),
+            func.sum(JournalEntryLine.credit_amount).label('credit_amount')
+        ).where(
             JournalEntryLine.journal_entry_id == journal_entry_id
-        ).all()
+        ).group_by(JournalEntryLine.account_id).subquery()
+        
+        subsidiary_deltas = select(
+            JournalEntryLine.subsidiary_account_id,
+            func.sum(JournalEntryLine.debit_amount).label('debit_amount'),
+            func.sum(JournalEntryLine.credit_amount).label('credit_amount')
+        ).where(
+            JournalEntryLine.journal_entry_id == journal_entry_id,
+            JournalEntryLine.subsidiary_account_id.isnot(None)
+        ).group_by(JournalEntryLine.subsidiary_account_id).subquery()
+        
+        self.db.execute(
+            select(ChartOfAccounts.id).where(
+                ChartOfAccounts.id.in_(select(account_deltas.c.account_id))
+            ).order_by(ChartOfAccounts.id).with_for_update()
+        )
+        self.db.execute(
+            select(SubsidiaryAccount.id).where(
+                SubsidiaryAccount.id.in_(select(subsidiary_deltas.c.subsidiary_account_id))
+            ).order_by(SubsidiaryAccount.id).with_for_update()
+        )
         
-        for line in lines:
-            # Update main account balance
-            account = self.db.query(ChartOfAccounts).filter(
-                ChartOfAccounts.id == line.account_id
-            ).first()
-            
-            if account:
-                account.debit_balance += line.debit_amount
-                account.credit_balance += line.credit_amount
-                
-                # Calculate current balance based on account type
-                if account.account_type in ['asset', 'expense']:
-                    account.current_balance = account.debit_balance - account.credit_balance
-                else:
-                    account.current_balance = account.credit_balance - account.debit_balance
-            
-            # Update subsidiary account balance if applicable
-            if line.subsidiary_account_id:
-                subsidiary = self.db.query(SubsidiaryAccount).filter(
-                    SubsidiaryAccount.id == line.subsidiary_account_id
-                ).first()
-                
-                if subsidiary:
-                    subsidiary.debit_balance += line.debit_amount
-                    subsidiary.credit_balance += line.credit_amount
-                    
-                    # Calculate current balance based on main account type
-                    main_account = self.db.query(ChartOfAccounts).filter(
-                        ChartOfAccounts.id == subsidiary.main_account_id
-                    ).first()
-                    
-                    if main_account and main_account.account_type in ['asset', 'expense']:
-                        subsidiary.current_balance = subsidiary.debit_balance - subsidiary.credit_balance
-                    else:
-                        subsidiary.current_balance = subsidiary.credit_balance - subsidiary.debit_balance
+        # Main account balances, by the account's own type
+        self.db.execute(
+            update(ChartOfAccounts).where(
+                ChartOfAccounts.id == account_deltas.c.account_id
+            ).values(**self._balance_update_values(
+                ChartOfAccounts, account_deltas,
+                ChartOfAccounts.account_type.in_(['asset', 'expense'])
+            )).execution_options(synchronize_session=False)
+        )
+        
+        # Subsidiary balances, by the type of their main account
+        main_account_type = select(ChartOfAccounts.account_type).where(
+            ChartOfAccounts.id == SubsidiaryAccount.main_account_id
+        ).scalar_subquery()
+        self.db.execute(
+            update(SubsidiaryAccount).where(
+                SubsidiaryAccount.id == subsidiary_deltas.c.subsidiary_account_id
+            ).values(**self._balance_update_values(
+                SubsidiaryAccount, subsidiary_deltas,
+                main_account_type.in_(['asset', 'expense'])
+            )).execution_options(synchronize_session=False)
+        )
         
         self.db.commit()
     
+    @staticmethod
+    def _balance_update_values(model, deltas, debit_normal) -> Dict[str, Any]:
+        """SET clause adding ``deltas`` to the debit/credit balances of ``model``"""
+        debit_balance = model.debit_balance + deltas.c.debit_amount
+        credit_balance = model.credit_balance + deltas.c.credit_amount
+        
+        return {
+            "debit_balance": debit_balance,
+            "credit_balance": credit_balance,
+            "current_balance": case(
+                (debit_normal, debit_balance - credit_balance),
+                else_=credit_balance - debit_balance
+            )
+        }
+    
     async def _log_audit_trail(self, table_name: str, record_id: UUID, operation: str,
                              old_values: Optional[Dict] = None, new_values: Optional[Dict] = None,
                              user_id: Optional[UUID] = None, change_description: Optional[str] = None):
@@ -874,38 +951,153 @@ class AccountingService:
         
         return account
     
-    async def _calculate_account_balance(self, account_id: UUID, as_of_date: date) -> Tuple[Decimal, Decimal]:
-        """Calculate account balance as of specific date"""
-        result = self.db.query(
-            func.sum(JournalEntryLine.debit_amount).label('total_debit'),
-            func.sum(JournalEntryLine.credit_amount).label('total_credit')
-        ).join(JournalEntry).filter(
-            and_(
-                JournalEntryLine.account_id == account_id,
+    async def _get_account_totals(self, as_of_date: date, period_start: Optional[date] = None,
+                                  account_types: Optional[List[str]] = None) -> List[Tuple[ChartOfAccounts, Decimal, Decimal]]:
+        """
+        Debit and credit totals of every active account in a single query
+        
+        Posted lines up to ``as_of_date`` (and from ``period_start``, if
+        given) are summed with one GROUP BY per account and joined to the
+        chart of accounts, ordered by account code. Accounts without lines
+        get zero totals. Without ``period_start`` the sum starts from the
+        latest balance snapshot on or before ``as_of_date``, so only the
+        lines of the periods after it are read.
+        """
+        if period_start is not None:
+            movements = select(
+                JournalEntryLine.account_id,
+                JournalEntryLine.debit_amount,
+                JournalEntryLine.credit_amount
+            ).join(JournalEntry).where(
+                JournalEntry.entry_date >= period_start,
                 JournalEntry.entry_date <= as_of_date,
                 JournalEntry.status == 'posted'
-            )
-        ).first()
-        
-        total_debit = result.total_debit or Decimal('0')
-        total_credit = result.total_credit or Decimal('0')
-        
-        return total_debit, total_credit
+            ).subquery()
+        else:
+            snapshot_date = self.db.query(func.max(AccountBalanceSnapshot.period_end)).filter(
+                AccountBalanceSnapshot.period_end <= as_of_date
+            ).scalar_subquery()
+            movements = self._balance_movements(snapshot_date, as_of_date)
+
+        totals = self.db.query(
+            movements.c.account_id.label('account_id'),
+            func.sum(movements.c.debit_amount).label('total_debit'),
+            func.sum(movements.c.credit_amount).label('total_credit')
+        ).group_by(movements.c.account_id).subquery()
+        
+        query = self.db.query(
+            ChartOfAccounts, totals.c.total_debit, totals.c.total_credit
+        ).outerjoin(
+            totals, totals.c.account_id == ChartOfAccounts.id
+        ).filter(ChartOfAccounts.is_active == True)
+        
+        if account_types:
+            query = query.filter(ChartOfAccounts.account_type.in_(account_types))
+        
+        return [
+            (account, total_debit or Decimal('0'), total_credit or Decimal('0'))
+            for account, total_debit, total_credit in query.order_by(ChartOfAccounts.account_code).all()
+        ]
+
+    def _balance_movements(self, snapshot_date, as_of_date: date):
+        """
+        Snapshot rows at ``snapshot_date`` plus the posted lines after it up to ``as_of_date``
+
+        ``snapshot_date`` is a SQL expression that may be NULL when no
+        snapshot exists; all lines up to ``as_of_date`` are read then.
+        """
+        snapshot_rows = select(
+            AccountBalanceSnapshot.account_id,
+            AccountBalanceSnapshot.subsidiary_account_id,
+            AccountBalanceSnapshot.debit_total.label('debit_amount'),
+            AccountBalanceSnapshot.credit_total.label('credit_amount')
+        ).where(AccountBalanceSnapshot.period_end == snapshot_date)
+
+        open_lines = select(
+            JournalEntryLine.account_id,
+            JournalEntryLine.subsidiary_account_id,
+            JournalEntryLine.debit_amount,
+            JournalEntryLine.credit_amount
+        ).join(JournalEntry).where(
+            JournalEntry.entry_date > func.coalesce(snapshot_date, date.min),
+            JournalEntry.entry_date <= as_of_date,
+            JournalEntry.status == 'posted'
+        )
+
+        return union_all(snapshot_rows, open_lines).subquery()
+
+    async def _write_balance_snapshot(self, period_end: date) -> int:
+        """Replace the balance snapshot at ``period_end``, built from the previous snapshot"""
+        # Wait for in-flight postings and keep new ones out until the snapshot commits
+        self._lock_balance_snapshots(exclusive=True)
+        
+        previous_date = self.db.query(func.max(AccountBalanceSnapshot.period_end)).filter(
+            AccountBalanceSnapshot.period_end < period_end
+        ).scalar_subquery()
+        movements = self._balance_movements(previous_date, period_end)
+
+        balances = self.db.query(
+            movements.c.account_id,
+            movements.c.subsidiary_account_id,
+            func.sum(movements.c.debit_amount),
+            func.sum(movements.c.credit_amount)
+        ).group_by(movements.c.account_id, movements.c.subsidiary_account_id).all()
+
+        self.db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.period_end == period_end
+        ).delete(synchronize_session=False)
+
+        if balances:
+            self.db.execute(insert(AccountBalanceSnapshot), [
+                {
+                    "period_end": period_end,
+                    "period_code": period_end.strftime("%Y-%m"),
+                    "account_id": account_id,
+                    "subsidiary_account_id": subsidiary_account_id,
+                    "debit_total": debit_total or Decimal('0'),
+                    "credit_total": credit_total or Decimal('0')
+                }
+                for account_id, subsidiary_account_id, debit_total, credit_total in balances
+            ])
+
+        return len(balances)
+
+    async def _invalidate_balance_snapshots(self, entry_date: date):
+        """Drop snapshots that a change to a posted entry on ``entry_date`` makes stale"""
+        self._lock_balance_snapshots(exclusive=False)
+        self.db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.period_end >= entry_date
+        ).delete(synchronize_session=False)
+
+    def _lock_balance_snapshots(self, exclusive: bool):
+        """
+        Transaction-level advisory lock on the balance snapshots
+        
+        Postings take it shared, so they do not wait for each other; a
+        snapshot write takes it exclusive, so it never reads the ledger
+        while a posting that will drop its snapshot is still uncommitted.
+        """
+        if self.db.get_bind().dialect.name != 'postgresql':
+            return
+        
+        lock = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+        self.db.execute(
+            text(f"SELECT {lock}(:namespace, 0)"),
+            {"namespace": _SNAPSHOT_LOCK_NAMESPACE}
+        )
     
-    async def _get_balance_sheet_section(self, account_type: str, as_of_date: date) -> Dict[str, Any]:
-        """Get balance sheet section data"""
-        accounts = self.db.query(ChartOfAccounts).filter(
-            and_(
-                ChartOfAccounts.account_type == account_type,
-                ChartOfAccounts.is_active == True
-            )
-        ).order_by(ChartOfAccounts.account_code).all()
+    async def _get_balance_sheet_section(self, account_type: str, as_of_date: date,
+                                         totals: Optional[List[Tuple[ChartOfAccounts, Decimal, Decimal]]] = None) -> Dict[str, Any]:
+        """Get balance sheet section data, from ``totals`` of _get_account_totals if given"""
+        if totals is None:
+            totals = await self._get_account_totals(as_of_date, account_types=[account_type])
         
         items = []
         total = Decimal('0')
         
-        for account in accounts:
-            debit_balance, credit_balance = await self._calculate_account_balance(account.id, as_of_date)
+        for account, debit_balance, credit_balance in totals:
+            if account.account_type != account_type:
+                continue
             
             if account_type in ['asset', 'expense']:
                 amount = debit_balance - credit_balance
@@ -936,33 +1128,18 @@ class AccountingService:
             "total": total
         }
     
-    async def _get_profit_loss_section(self, account_type: str, period_start: date, period_end: date) -> Dict[str, Any]:
-        """Get profit and loss section data"""
-        accounts = self.db.query(ChartOfAccounts).filter(
-            and_(
-                ChartOfAccounts.account_type == account_type,
-                ChartOfAccounts.is_active == True
-            )
-        ).order_by(ChartOfAccounts.account_code).all()
+    async def _get_profit_loss_section(self, account_type: str, period_start: date, period_end: date,
+                                       totals: Optional[List[Tuple[ChartOfAccounts, Decimal, Decimal]]] = None) -> Dict[str, Any]:
+        """Get profit and loss section data, from ``totals`` of _get_account_totals if given"""
+        if totals is None:
+            totals = await self._get_account_totals(period_end, period_start, account_types=[account_type])
         
         items = []
         total = Decimal('0')
         
-        for account in accounts:
-            result = self.db.query(
-                func.sum(JournalEntryLine.debit_amount).label('total_debit'),
-                func.sum(JournalEntryLine.credit_amount).label('total_credit')
-            ).join(JournalEntry).filter(
-                and_(
-                    JournalEntryLine.account_id == account.id,
-                    JournalEntry.entry_date >= period_start,
-                    JournalEntry.entry_date <= period_end,
-                    JournalEntry.status == 'posted'
-                )
-            ).first()
-            
-            total_debit = result.total_debit or Decimal('0')
-            total_credit = result.total_credit or Decimal('0')
+        for account, total_debit, total_credit in totals:
+            if account.account_type != account_type:
+                continue
             
             if account_type == 'revenue':
                 amount = total_credit - total_debit
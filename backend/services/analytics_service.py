@@ -28,8 +28,8 @@ class AnalyticsService:
         """Calculate financial KPIs for the specified period"""
         
         # Check cache first
-        cache_key = f"financial_kpis_{period_start}_{period_end}"
-        cached_data = await self.cache.get_kpi_data("financial", "summary", period=cache_key)
+        cache_params = {"period_start": period_start, "period_end": period_end}
+        cached_data = await self.cache.get_kpi_data("financial", "summary", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -90,7 +90,7 @@ class AnalyticsService:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("financial", "summary", kpis, ttl=300, period=cache_key)
+            await self.cache.set_kpi_data("financial", "summary", kpis, ttl=300, params=cache_params)
             
             return kpis
             
@@ -101,8 +101,8 @@ class AnalyticsService:
     async def calculate_operational_kpis(self, period_start: date, period_end: date) -> Dict[str, Any]:
         """Calculate operational KPIs for inventory and operations"""
         
-        cache_key = f"operational_kpis_{period_start}_{period_end}"
-        cached_data = await self.cache.get_kpi_data("operational", "summary", period=cache_key)
+        cache_params = {"period_start": period_start, "period_end": period_end}
+        cached_data = await self.cache.get_kpi_data("operational", "summary", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -164,7 +164,7 @@ class AnalyticsService:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("operational", "summary", kpis, ttl=300, period=cache_key)
+            await self.cache.set_kpi_data("operational", "summary", kpis, ttl=300, params=cache_params)
             
             return kpis
             
@@ -175,8 +175,8 @@ class AnalyticsService:
     async def calculate_customer_kpis(self, period_start: date, period_end: date) -> Dict[str, Any]:
         """Calculate customer-related KPIs"""
         
-        cache_key = f"customer_kpis_{period_start}_{period_end}"
-        cached_data = await self.cache.get_kpi_data("customer", "summary", period=cache_key)
+        cache_params = {"period_start": period_start, "period_end": period_end}
+        cached_data = await self.cache.get_kpi_data("customer", "summary", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -247,7 +247,7 @@ class AnalyticsService:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("customer", "summary", kpis, ttl=300, period=cache_key)
+            await self.cache.set_kpi_data("customer", "summary", kpis, ttl=300, params=cache_params)
             
             return kpis
             
@@ -327,7 +327,7 @@ class AnalyticsService:
         
         try:
             # Redis cache stats
-            redis_stats = self.cache.get_cache_stats()
+            redis_stats = await self.cache.get_cache_stats()
             
             # Database cache stats
             db_cache_query = text("""
@@ -7,16 +7,177 @@ ensuring cache consistency while maintaining performance.
 Requirements covered: 1.4, 1.5
 """
 
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import event, text
+from sqlalchemy import event, inspect, text
 import asyncio
+import json
 import logging
-from redis_config import get_analytics_cache, AnalyticsCache
+import os
+import queue
+import socket
+import threading
+import redis
+from redis_config import (
+    get_analytics_cache, get_sync_analytics_cache, get_redis_client, AnalyticsCache, CACHE_NAMESPACE
+)
+from services.cache_warming_service import schedule_cache_warming
 
 logger = logging.getLogger(__name__)
 
+# What caches to invalidate when data in each table changes. Tables listed
+# here are also tracked by the session commit listeners below.
+CACHE_DEPENDENCIES = {
+    "invoices": {
+        "patterns": [
+            "kpi:financial:*",
+            "kpi:customer:*", 
+            "chart:revenue:*",
+            "chart:profit:*",
+            "dashboard:*",
+            "aggregation:sales:*",
+            "aggregation:revenue:*",
+            "trend:financial:*",
+            "comparison:period:*"
+        ],
+        "related_entities": ["customers", "invoice_items"]
+    },
+    "invoice_items": {
+        "patterns": [
+            "kpi:financial:*",
+            "kpi:operational:*",
+            "chart:inventory:*",
+            "chart:category:*",
+            "aggregation:product:*",
+            "forecast:*",
+            "optimization:*"
+        ],
+        "related_entities": ["inventory_items", "invoices"]
+    },
+    "inventory_items": {
+        "patterns": [
+            "kpi:operational:*",
+            "chart:inventory:*",
+            "forecast:*",
+            "optimization:*",
+            "aggregation:inventory:*",
+            "trend:inventory:*"
+        ],
+        "related_entities": ["categories", "invoice_items"]
+    },
+    "customers": {
+        "patterns": [
+            "kpi:customer:*",
+            "chart:customer:*",
+            "aggregation:customer:*",
+            "trend:customer:*"
+        ],
+        "related_entities": ["invoices"]
+    },
+    "payments": {
+        "patterns": [
+            "kpi:financial:*",
+            "chart:payment:*",
+            "aggregation:payment:*",
+            "dashboard:*"
+        ],
+        "related_entities": ["invoices", "customers"]
+    },
+    "categories": {
+        "patterns": [
+            "chart:category:*",
+            "aggregation:category:*",
+            "optimization:category:*"
+        ],
+        "related_entities": ["inventory_items"]
+    },
+    "journal_entries": {
+        "patterns": [
+            "kpi:financial:*",
+            "report:*",
+            "dashboard:*",
+            "trend:financial:*"
+        ],
+        "related_entities": []
+    }
+}
+
+# Extra patterns per operation, on top of the table's dependencies
+_INSERT_PATTERNS = {
+    # New invoice affects financial KPIs and customer metrics
+    "invoices": ["dashboard:*", "aggregation:*"],
+    # New inventory item affects operational KPIs
+    "inventory_items": ["kpi:operational:*", "chart:inventory:*"],
+    # New customer affects customer acquisition metrics
+    "customers": ["kpi:customer:acquisition:*"]
+}
+
+_DELETE_PATTERNS = {
+    # Deleted invoice affects all financial metrics
+    "invoices": ["kpi:financial:*", "kpi:customer:*", "dashboard:*", "aggregation:*", "trend:*"],
+    # Deleted inventory item affects operational metrics and forecasts
+    "inventory_items": ["kpi:operational:*", "forecast:*", "optimization:*"]
+}
+
+# (changed fields, patterns) per table for UPDATE operations
+_UPDATE_PATTERNS = {
+    "invoices": [
+        (["total_amount", "paid_amount", "status", "vat_percentage"],
+         ["kpi:financial:*", "chart:revenue:*", "chart:profit:*"]),
+        # Status changes affect many metrics
+        (["status"], ["dashboard:*", "aggregation:*"])
+    ],
+    "inventory_items": [
+        (["stock_quantity", "min_stock_level", "purchase_price", "sell_price"],
+         ["kpi:operational:*", "forecast:*", "optimization:*"])
+    ],
+    "customers": [
+        (["status", "customer_type"], ["kpi:customer:*", "aggregation:customer:*"])
+    ]
+}
+
+
+def invalidation_patterns(table_name: str, operation: str, changed_fields: List[str] = None) -> List[str]:
+    """
+    Cache patterns to invalidate for a change to ``table_name``, without
+    duplicates and in a stable order
+
+    UPDATEs with unknown changed fields are treated like INSERTs.
+    """
+    dependencies = CACHE_DEPENDENCIES.get(table_name, {})
+    patterns = list(dependencies.get("patterns", []))
+    
+    if operation == "UPDATE" and not changed_fields:
+        operation = "INSERT"
+    
+    if operation == "INSERT":
+        patterns.extend(_INSERT_PATTERNS.get(table_name, []))
+    elif operation == "UPDATE":
+        for fields, field_patterns in _UPDATE_PATTERNS.get(table_name, []):
+            if any(field in changed_fields for field in fields):
+                patterns.extend(field_patterns)
+    elif operation == "DELETE":
+        patterns.extend(_DELETE_PATTERNS.get(table_name, []))
+        # Historical data changed, so period comparisons are stale too
+        patterns.append("comparison:*")
+    
+    for related_entity in dependencies.get("related_entities", []):
+        patterns.extend(CACHE_DEPENDENCIES.get(related_entity, {}).get("patterns", []))
+    
+    return list(dict.fromkeys(patterns))
+
+
+def collapse_patterns(patterns: List[str]) -> List[str]:
+    """Drop patterns already covered by a broader prefix pattern in the list"""
+    unique = list(dict.fromkeys(patterns))
+    prefixes = [p[:-1] for p in unique if p.endswith(":*")]
+    return [
+        pattern for pattern in unique
+        if not any(pattern != prefix + "*" and pattern.startswith(prefix) for prefix in prefixes)
+    ]
+
+
 class CacheInvalidationService:
     """
     Intelligent cache invalidation service that monitors data changes
@@ -27,72 +188,7 @@ class CacheInvalidationService:
         self.db = db_session
         self.cache = get_analytics_cache()
         
-        # Define cache dependencies - what caches to invalidate when data changes
-        self.cache_dependencies = {
-            "invoices": {
-                "patterns": [
-                    "kpi:financial:*",
-                    "kpi:customer:*", 
-                    "chart:revenue:*",
-                    "chart:profit:*",
-                    "dashboard:*",
-                    "aggregation:sales:*",
-                    "aggregation:revenue:*",
-                    "trend:financial:*",
-                    "comparison:period:*"
-                ],
-                "related_entities": ["customers", "invoice_items"]
-            },
-            "invoice_items": {
-                "patterns": [
-                    "kpi:financial:*",
-                    "kpi:operational:*",
-                    "chart:inventory:*",
-                    "chart:category:*",
-                    "aggregation:product:*",
-                    "forecast:*",
-                    "optimization:*"
-                ],
-                "related_entities": ["inventory_items", "invoices"]
-            },
-            "inventory_items": {
-                "patterns": [
-                    "kpi:operational:*",
-                    "chart:inventory:*",
-                    "forecast:*",
-                    "optimization:*",
-                    "aggregation:inventory:*",
-                    "trend:inventory:*"
-                ],
-                "related_entities": ["categories", "invoice_items"]
-            },
-            "customers": {
-                "patterns": [
-                    "kpi:customer:*",
-                    "chart:customer:*",
-                    "aggregation:customer:*",
-                    "trend:customer:*"
-                ],
-                "related_entities": ["invoices"]
-            },
-            "payments": {
-                "patterns": [
-                    "kpi:financial:*",
-                    "chart:payment:*",
-                    "aggregation:payment:*",
-                    "dashboard:*"
-                ],
-                "related_entities": ["invoices", "customers"]
-            },
-            "categories": {
-                "patterns": [
-                    "chart:category:*",
-                    "aggregation:category:*",
-                    "optimization:category:*"
-                ],
-                "related_entities": ["inventory_items"]
-            }
-        }
+        self.cache_dependencies = CACHE_DEPENDENCIES
         
         # Track invalidation events for analysis
         self.invalidation_log = []
@@ -114,43 +210,28 @@ class CacheInvalidationService:
             record_id: ID of the changed record
             changed_fields: List of fields that were changed (for UPDATE operations)
         """
+        dependencies = self.cache_dependencies.get(table_name, {})
+        patterns = invalidation_patterns(table_name, operation, changed_fields)
+        
+        # Track invalidation event
+        invalidation_event = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "table_name": table_name,
+            "operation": operation,
+            "record_id": record_id,
+            "changed_fields": changed_fields,
+            "patterns_invalidated": patterns,
+            "related_entities": dependencies.get("related_entities", [])
+        }
+        
         try:
             logger.info(f"Processing cache invalidation for {table_name} {operation}")
             
-            # Get cache patterns to invalidate
-            dependencies = self.cache_dependencies.get(table_name, {})
-            patterns = dependencies.get("patterns", [])
-            related_entities = dependencies.get("related_entities", [])
-            
-            # Track invalidation event
-            invalidation_event = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "table_name": table_name,
-                "operation": operation,
-                "record_id": record_id,
-                "changed_fields": changed_fields,
-                "patterns_invalidated": patterns,
-                "related_entities": related_entities
-            }
-            
-            # Invalidate direct cache patterns
             invalidated_count = 0
             for pattern in patterns:
                 await self.cache.invalidate_by_pattern(pattern)
                 invalidated_count += 1
             
-            # Handle specific invalidation logic based on operation type
-            if operation == "INSERT":
-                await self._handle_insert_invalidation(table_name, record_id)
-            elif operation == "UPDATE":
-                await self._handle_update_invalidation(table_name, record_id, changed_fields)
-            elif operation == "DELETE":
-                await self._handle_delete_invalidation(table_name, record_id)
-            
-            # Invalidate related entity caches
-            for related_entity in related_entities:
-                await self._invalidate_related_entity_caches(related_entity, table_name, record_id)
-            
             # Log the invalidation event
             invalidation_event["invalidated_count"] = invalidated_count
             invalidation_event["status"] = "completed"
@@ -164,99 +245,6 @@ class CacheInvalidationService:
             invalidation_event["error"] = str(e)
             self._log_invalidation_event(invalidation_event)
     
-    async def _handle_insert_invalidation(self, table_name: str, record_id: str):
-        """Handle cache invalidation for INSERT operations"""
-        
-        # For new records, we typically need to invalidate aggregation caches
-        # and dashboard data that might include the new record
-        
-        if table_name == "invoices":
-            # New invoice affects financial KPIs and customer metrics
-            await self.cache.invalidate_by_pattern("dashboard:*")
-            await self.cache.invalidate_by_pattern("aggregation:*")
-            
-        elif table_name == "inventory_items":
-            # New inventory item affects operational KPIs
-            await self.cache.invalidate_by_pattern("kpi:operational:*")
-            await self.cache.invalidate_by_pattern("chart:inventory:*")
-            
-        elif table_name == "customers":
-            # New customer affects customer acquisition metrics
-            await self.cache.invalidate_by_pattern("kpi:customer:acquisition:*")
-    
-    async def _handle_update_invalidation(self, table_name: str, record_id: str, changed_fields: List[str]):
-        """Handle cache invalidation for UPDATE operations"""
-        
-        if not changed_fields:
-            # If we don't know what changed, invalidate everything related
-            await self.invalidate_on_data_change(table_name, "INSERT", record_id)
-            return
-        
-        # Smart invalidation based on which fields changed
-        if table_name == "invoices":
-            financial_fields = ["total_amount", "paid_amount", "status", "vat_percentage"]
-            if any(field in changed_fields for field in financial_fields):
-                await self.cache.invalidate_by_pattern("kpi:financial:*")
-                await self.cache.invalidate_by_pattern("chart:revenue:*")
-                await self.cache.invalidate_by_pattern("chart:profit:*")
-            
-            if "status" in changed_fields:
-                # Status changes affect many metrics
-                await self.cache.invalidate_by_pattern("dashboard:*")
-                await self.cache.invalidate_by_pattern("aggregation:*")
-        
-        elif table_name == "inventory_items":
-            stock_fields = ["stock_quantity", "min_stock_level", "purchase_price", "sell_price"]
-            if any(field in changed_fields for field in stock_fields):
-                await self.cache.invalidate_by_pattern("kpi:operational:*")
-                await self.cache.invalidate_by_pattern("forecast:*")
-                await self.cache.invalidate_by_pattern("optimization:*")
-        
-        elif table_name == "customers":
-            if "status" in changed_fields or "customer_type" in changed_fields:
-                await self.cache.invalidate_by_pattern("kpi:customer:*")
-                await self.cache.invalidate_by_pattern("aggregation:customer:*")
-    
-    async def _handle_delete_invalidation(self, table_name: str, record_id: str):
-        """Handle cache invalidation for DELETE operations"""
-        
-        # Deletions typically require broad invalidation since we're removing data
-        # that might have been included in various aggregations
-        
-        if table_name == "invoices":
-            # Deleted invoice affects all financial metrics
-            await self.cache.invalidate_by_pattern("kpi:financial:*")
-            await self.cache.invalidate_by_pattern("kpi:customer:*")
-            await self.cache.invalidate_by_pattern("dashboard:*")
-            await self.cache.invalidate_by_pattern("aggregation:*")
-            await self.cache.invalidate_by_pattern("trend:*")
-        
-        elif table_name == "inventory_items":
-            # Deleted inventory item affects operational metrics and forecasts
-            await self.cache.invalidate_by_pattern("kpi:operational:*")
-            await self.cache.invalidate_by_pattern("forecast:*")
-            await self.cache.invalidate_by_pattern("optimization:*")
-        
-        # For any deletion, invalidate comparison caches since historical data changed
-        await self.cache.invalidate_by_pattern("comparison:*")
-    
-    async def _invalidate_related_entity_caches(self, related_entity: str, source_table: str, record_id: str):
-        """Invalidate caches for related entities"""
-        
-        try:
-            # Get the dependency patterns for the related entity
-            related_dependencies = self.cache_dependencies.get(related_entity, {})
-            related_patterns = related_dependencies.get("patterns", [])
-            
-            # Invalidate related patterns
-            for pattern in related_patterns:
-                await self.cache.invalidate_by_pattern(pattern)
-            
-            logger.debug(f"Invalidated {len(related_patterns)} patterns for related entity {related_entity}")
-            
-        except Exception as e:
-            logger.error(f"Error invalidating related entity caches: {str(e)}")
-    
     def _log_invalidation_event(self, event: Dict[str, Any]):
         """Log invalidation event for analysis"""
         
@@ -358,7 +346,7 @@ class CacheInvalidationService:
         
         try:
             # Get cache statistics
-            cache_stats = self.cache.get_cache_stats()
+            cache_stats = await self.cache.get_cache_stats()
             invalidation_stats = await self.get_invalidation_stats()
             
             # Calculate efficiency metrics
@@ -420,4 +408,250 @@ def get_cache_invalidation_service(db: Session) -> CacheInvalidationService:
     global cache_invalidation_service
     if cache_invalidation_service is None:
         cache_invalidation_service = CacheInvalidationService(db)
-    return cache_invalidation_service
\ No newline at end of file
+    return cache_invalidation_service
+
+
+# Session commit listeners
+#
+# Changes to tracked tables are collected per transaction in after_flush and
+# emitted as one deduplicated invalidation batch after commit, so routers do
+# not need to call invalidate_on_data_change themselves. Only unit-of-work
+# changes are seen; code that issues set-based UPDATE/DELETE statements
+# reports them with record_table_change.
+
+# "direct" invalidates the patterns itself, "stream" queues batches on a
+# Redis stream applied by consume_invalidation_stream, "off" disables both.
+# Either way the work happens on a background thread, never inside commit()
+INVALIDATION_MODE = os.getenv("ANALYTICS_INVALIDATION_MODE", "direct")
+INVALIDATION_STREAM = f"{CACHE_NAMESPACE}:invalidation:stream"
+INVALIDATION_STREAM_GROUP = "analytics-cache"
+INVALIDATION_STREAM_MAXLEN = 10000
+INVALIDATION_QUEUE_SIZE = int(os.getenv("ANALYTICS_INVALIDATION_QUEUE_SIZE", "10000"))
+
+_PENDING_CHANGES = "analytics_cache_changes"
+
+
+def record_table_change(session: Session, table_name: str, operation: str = "UPDATE",
+                        record_id: Any = None, changed_fields: List[str] = None):
+    """Register a change to be invalidated when ``session`` commits"""
+    if table_name not in CACHE_DEPENDENCIES:
+        return
+    
+    changes = session.info.setdefault(_PENDING_CHANGES, {})
+    change = changes.setdefault((table_name, operation), {"record_ids": set(), "changed_fields": set()})
+    if record_id is not None:
+        change["record_ids"].add(str(record_id))
+    if changed_fields:
+        change["changed_fields"].update(changed_fields)
+
+
+def _after_flush(session: Session, flush_context):
+    for obj in session.new:
+        record_table_change(session, getattr(obj, "__tablename__", None), "INSERT", getattr(obj, "id", None))
+    
+    for obj in session.dirty:
+        table_name = getattr(obj, "__tablename__", None)
+        if table_name not in CACHE_DEPENDENCIES or not session.is_modified(obj, include_collections=False):
+            continue
+        changed_fields = [attr.key for attr in inspect(obj).attrs if attr.history.has_changes()]
+        record_table_change(session, table_name, "UPDATE", getattr(obj, "id", None), changed_fields)
+    
+    for obj in session.deleted:
+        record_table_change(session, getattr(obj, "__tablename__", None), "DELETE", getattr(obj, "id", None))
+
+
+def _after_soft_rollback(session: Session, previous_transaction):
+    # A rolled back savepoint keeps the outer transaction's changes; at
+    # worst they invalidate a little more than needed
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_CHANGES, None)
+
+
+def _after_commit(session: Session):
+    changes = session.info.pop(_PENDING_CHANGES, None)
+    if not changes:
+        return
+    
+    invalidation_worker.submit(build_invalidation_batch(changes))
+
+
+def build_invalidation_batch(changes: Dict[Tuple[str, str], Dict[str, Set[str]]]) -> Dict[str, Any]:
+    """Merge the changes of one transaction into a single set of patterns"""
+    patterns = []
+    summary = []
+    for (table_name, operation), change in sorted(changes.items()):
+        changed_fields = sorted(change["changed_fields"])
+        patterns.extend(invalidation_patterns(table_name, operation, changed_fields))
+        summary.append({
+            "table_name": table_name,
+            "operation": operation,
+            "record_count": len(change["record_ids"]),
+            "changed_fields": changed_fields
+        })
+    
+    return {"patterns": collapse_patterns(patterns), "changes": summary}
+
+
+def merge_invalidation_batches(batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine batches committed since the worker last ran into one"""
+    patterns = []
+    changes = []
+    for batch in batches:
+        patterns.extend(batch["patterns"])
+        changes.extend(batch["changes"])
+    
+    return {"patterns": collapse_patterns(patterns), "changes": changes}
+
+
+def emit_invalidation_batch(batch: Dict[str, Any]):
+    """Invalidate a committed batch now, or queue it on the invalidation stream"""
+    if INVALIDATION_MODE == "stream":
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.xadd(
+                    INVALIDATION_STREAM,
+                    {"patterns": json.dumps(batch["patterns"]), "changes": json.dumps(batch["changes"])},
+                    maxlen=INVALIDATION_STREAM_MAXLEN,
+                    approximate=True
+                )
+                return
+            except Exception as e:
+                logger.error(f"Error queueing cache invalidation, invalidating directly: {str(e)}")
+    
+    if get_sync_analytics_cache().invalidate_patterns(batch["patterns"]):
+        # Recompute popular entries that were just dropped
+        schedule_cache_warming()
+
+
+class InvalidationWorker:
+    """
+    Applies committed invalidation batches on a daemon thread
+
+    Commit listeners only enqueue, so a slow or unreachable Redis never
+    holds up the request that committed. Batches that queued up while the
+    thread was busy are merged and applied together.
+    """
+    
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def _get_queue(self) -> queue.Queue:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=INVALIDATION_QUEUE_SIZE)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="analytics-cache-invalidation", daemon=True
+                )
+                self._thread.start()
+            return self._queue
+    
+    def _reset_after_fork(self):
+        """The worker thread does not survive fork(); children start their own"""
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def submit(self, batch: Dict[str, Any]):
+        """Queue a committed batch without waiting for it to be applied"""
+        try:
+            self._get_queue().put_nowait(batch)
+        except queue.Full:
+            # The transaction is already committed; entries expire with their TTL
+            logger.error("Cache invalidation queue is full, dropping batch")
+    
+    def flush(self):
+        """Block until every batch queued so far has been applied"""
+        if self._queue is not None:
+            self._queue.join()
+    
+    def _run(self, batches: queue.Queue):
+        while True:
+            pending = [batches.get()]
+            while True:
+                try:
+                    pending.append(batches.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                emit_invalidation_batch(merge_invalidation_batches(pending))
+            except Exception as e:
+                # The transaction is already committed; entries expire with their TTL
+                logger.error(f"Error invalidating caches after commit: {str(e)}")
+            finally:
+                for _ in pending:
+                    batches.task_done()
+
+
+invalidation_worker = InvalidationWorker()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=invalidation_worker._reset_after_fork)
+
+
+def register_cache_invalidation_listeners(target: Any = Session):
+    """Attach the commit listeners to ``target`` (all sessions by default)"""
+    if INVALIDATION_MODE == "off":
+        return
+    
+    for name, listener in (
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_soft_rollback", _after_soft_rollback)
+    ):
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
+
+
+async def apply_invalidation_entries(cache: AnalyticsCache, entries: List[Tuple[str, Dict[str, str]]]) -> int:
+    """Invalidate the merged patterns of several stream entries and acknowledge them"""
+    patterns = collapse_patterns([
+        # Entries trimmed from the stream while pending come back without fields
+        pattern for _, fields in entries if fields for pattern in json.loads(fields.get("patterns", "[]"))
+    ])
+    count = await cache.invalidate_patterns(patterns)
+    await cache.redis.xack(INVALIDATION_STREAM, INVALIDATION_STREAM_GROUP, *[entry_id for entry_id, _ in entries])
+    if count:
+        await asyncio.to_thread(schedule_cache_warming)
+    return count
+
+
+async def consume_invalidation_stream(consumer_name: str = None, batch_size: int = 100, block_ms: int = 5000):
+    """
+    Apply queued invalidation batches until cancelled
+
+    Runs in every API process; the consumer group hands each batch to one
+    of them, and L1 tiers are updated through the usual pub/sub message.
+    Entries this consumer read but never acknowledged are applied first.
+    """
+    cache = get_analytics_cache()
+    if not cache.redis:
+        return
+    
+    consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        await cache.redis.xgroup_create(INVALIDATION_STREAM, INVALIDATION_STREAM_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+    
+    last_id = "0"
+    while True:
+        try:
+            response = await cache.redis.xreadgroup(
+                INVALIDATION_STREAM_GROUP, consumer_name, {INVALIDATION_STREAM: last_id},
+                count=batch_size, block=block_ms
+            )
+            entries = response[0][1] if response else []
+            if entries:
+                await apply_invalidation_entries(cache, entries)
+            elif last_id == "0":
+                last_id = ">"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error consuming cache invalidation stream: {str(e)}")
+            await asyncio.sleep(1)
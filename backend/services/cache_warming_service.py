@@ -0,0 +1,230 @@
+"""
+Cache Warming Service for Analytics Caching Strategy
+
+Recomputes the analytics cache entries that are read most often and cost the
+most to compute, shortly before they expire or right after they have been
+invalidated. Popularity comes from the per-hour access statistics kept by
+AnalyticsCache; the same hour of the previous day is included so entries
+are warmed before the usual demand arrives (e.g. at shop opening).
+"""
+
+from typing import Dict, List, Any, Optional
+from datetime import date, datetime, timedelta
+from collections import Counter
+from sqlalchemy.orm import Session
+import json
+import logging
+import os
+import time
+
+from redis_config import get_analytics_cache, WARM_RECIPES_KEY, WARM_STATS_PREFIX
+from services.kpi_calculator_service import (
+    FinancialKPICalculator,
+    OperationalKPICalculator,
+    CustomerKPICalculator
+)
+
+logger = logging.getLogger(__name__)
+
+# Entries warmed per run and how long before expiry they are refreshed;
+# the lead must exceed the beat interval of warm_popular_caches
+WARM_TOP_N = int(os.getenv("ANALYTICS_WARM_TOP_N", "50"))
+WARM_LEAD_SECONDS = int(os.getenv("ANALYTICS_WARM_LEAD_SECONDS", "90"))
+
+# Debounce window for warming triggered by invalidations
+WARM_AFTER_INVALIDATION_DELAY = int(os.getenv("ANALYTICS_WARM_AFTER_INVALIDATION_DELAY", "5"))
+
+# Cost assumed for entries whose computation time was never measured
+DEFAULT_COMPUTE_SECONDS = 1.0
+
+# KPI entries that can be recomputed: (kpi_type, kpi_name) -> calculator method
+WARMABLE_KPIS = {
+    ("financial", "revenue"): (FinancialKPICalculator, "calculate_revenue_kpis"),
+    ("financial", "profit_margin"): (FinancialKPICalculator, "calculate_profit_margin_kpis"),
+    ("financial", "achievement"): (FinancialKPICalculator, "calculate_achievement_rate_kpis"),
+    ("operational", "inventory_turnover"): (OperationalKPICalculator, "calculate_inventory_turnover_kpis"),
+    ("operational", "stockout_frequency"): (OperationalKPICalculator, "calculate_stockout_frequency_kpis"),
+    ("operational", "carrying_cost"): (OperationalKPICalculator, "calculate_carrying_cost_kpis"),
+    ("customer", "acquisition"): (CustomerKPICalculator, "calculate_customer_acquisition_kpis"),
+    ("customer", "retention"): (CustomerKPICalculator, "calculate_customer_retention_kpis"),
+    ("customer", "value"): (CustomerKPICalculator, "calculate_customer_value_kpis"),
+}
+
+
+def recipe_params(recipe: Dict[str, Any], today: date = None) -> Dict[str, Any]:
+    """
+    Calculator arguments for a recipe as of ``today``
+
+    Ranges that ended on the day they were read ("last 30 days", "month to
+    date") are rolled forward so that they match today's requests; fixed
+    historical ranges are kept as they are.
+    """
+    today = today or date.today()
+    params = dict(recipe.get("params") or {})
+    for name, value in params.items():
+        if name.endswith("_date") and isinstance(value, str):
+            params[name] = date.fromisoformat(value)
+
+    recorded_on = date.fromisoformat(recipe["recorded_on"])
+    if params.get("end_date") == recorded_on and recorded_on < today:
+        shift = today - recorded_on
+        params = {name: value + shift if isinstance(value, date) else value for name, value in params.items()}
+    return params
+
+
+class CacheWarmingService:
+    """
+    Predictive cache warming based on access frequency and recompute cost
+    """
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+        self.cache = get_analytics_cache()
+        self._calculators = {}
+
+    @staticmethod
+    def demand_hours(now: datetime = None) -> List[datetime]:
+        """Hours whose reads predict the next minutes: now, the last hour and the next hour yesterday"""
+        now = now or datetime.utcnow()
+        return [now, now - timedelta(hours=1), now + timedelta(hours=1) - timedelta(days=1)]
+
+    async def select_candidates(self, hours: List[datetime], limit: int = WARM_TOP_N) -> List[Dict[str, Any]]:
+        """
+        Most valuable warmable entries for the given hours
+
+        Value is read count times measured compute time, so a report read
+        twice that takes 10 seconds beats a cheap KPI read ten times.
+        """
+        pipe = self.cache.redis.pipeline(transaction=False)
+        for hour in hours:
+            pipe.zrevrange(self.cache.access_stats_key(hour), 0, limit * 4 - 1, withscores=True)
+
+        reads = Counter()
+        for ranking in await pipe.execute():
+            for cache_key, count in ranking:
+                reads[cache_key] += count
+        if not reads:
+            return []
+
+        keys = [cache_key for cache_key, _ in reads.most_common(limit * 4)]
+        recipes = await self.cache.redis.hmget(WARM_RECIPES_KEY, keys)
+
+        candidates = {}
+        for cache_key, raw_recipe in zip(keys, recipes):
+            if not raw_recipe:
+                continue
+            recipe = json.loads(raw_recipe)
+            if (recipe["kpi_type"], recipe["kpi_name"]) not in WARMABLE_KPIS:
+                continue
+
+            params = recipe_params(recipe)
+            target_key = self.cache._kpi_key(recipe["kpi_type"], recipe["kpi_name"], params=params)
+            cost = recipe.get("compute_seconds") or DEFAULT_COMPUTE_SECONDS
+            candidate = candidates.setdefault(target_key, {
+                "cache_key": target_key,
+                "kpi_type": recipe["kpi_type"],
+                "kpi_name": recipe["kpi_name"],
+                "params": params,
+                "reads": 0,
+                "value": 0.0
+            })
+            candidate["reads"] += reads[cache_key]
+            candidate["value"] += reads[cache_key] * cost
+
+        return sorted(candidates.values(), key=lambda c: c["value"], reverse=True)[:limit]
+
+    async def due_for_refresh(self, candidates: List[Dict[str, Any]], lead_seconds: int = WARM_LEAD_SECONDS) -> List[Dict[str, Any]]:
+        """Candidates that are missing (expired or invalidated) or fresh for less than ``lead_seconds``"""
+        if not candidates:
+            return []
+
+        pipe = self.cache.redis.pipeline(transaction=False)
+        for candidate in candidates:
+            pipe.pttl(candidate["cache_key"])
+        ttls = await pipe.execute()
+
+        # Redis keeps entries through the stale window; freshness ends before
+        stale_window = self.cache._refresh_strategy("kpi")["stale_while_revalidate"]
+        return [
+            candidate for candidate, pttl in zip(candidates, ttls)
+            if pttl == -2 or (pttl >= 0 and pttl / 1000 - stale_window < lead_seconds)
+        ]
+
+    async def warm_entry(self, candidate: Dict[str, Any]) -> bool:
+        """Recompute one entry under its refresh lock; False if skipped or failed"""
+        cache_key = candidate["cache_key"]
+        if not await self.cache.begin_refresh(cache_key):
+            return False
+
+        calculator_class, method_name = WARMABLE_KPIS[(candidate["kpi_type"], candidate["kpi_name"])]
+        calculator = self._calculators.get(calculator_class)
+        if calculator is None:
+            calculator = self._calculators[calculator_class] = calculator_class(self.db)
+
+        try:
+            with self.cache.recomputing():
+                await getattr(calculator, method_name)(**candidate["params"])
+            return True
+        except Exception as e:
+            logger.error(f"Error warming cache entry {cache_key}: {str(e)}")
+            self.db.rollback()
+            return False
+        finally:
+            # No-op when the calculator wrote the entry (which releases it)
+            await self.cache.abandon_refresh(cache_key)
+
+    async def warm_popular_entries(
+        self,
+        limit: int = WARM_TOP_N,
+        lead_seconds: int = WARM_LEAD_SECONDS,
+        now: datetime = None
+    ) -> Dict[str, Any]:
+        """Warm the top entries of the current demand hours that are about to expire"""
+        started = time.monotonic()
+        result = {"candidates": 0, "due": 0, "warmed": 0, "skipped": 0}
+        if not self.cache.redis:
+            return {**result, "status": "disconnected"}
+
+        await self.cache.flush_access_stats()
+        await self.cache.flush_metrics()
+        candidates = await self.select_candidates(self.demand_hours(now), limit)
+        due = await self.due_for_refresh(candidates, lead_seconds)
+
+        for candidate in due:
+            if await self.warm_entry(candidate):
+                result["warmed"] += 1
+            else:
+                result["skipped"] += 1
+
+        result.update({
+            "candidates": len(candidates),
+            "due": len(due),
+            "duration_seconds": round(time.monotonic() - started, 3),
+            "status": "completed"
+        })
+        logger.info(f"Cache warming: {result}")
+        return result
+
+
+def schedule_cache_warming(delay: int = WARM_AFTER_INVALIDATION_DELAY) -> bool:
+    """
+    Queue warm_popular_caches shortly after an invalidation
+
+    Bursts of invalidations within ``delay`` seconds queue a single run.
+    """
+    from redis_config import get_redis_client
+
+    client = get_redis_client()
+    if client is None:
+        return False
+
+    try:
+        if not client.set(f"{WARM_STATS_PREFIX}:scheduled", "1", nx=True, ex=delay):
+            return False
+
+        from analytics_tasks.kpi_tasks import warm_popular_caches
+        warm_popular_caches.apply_async(countdown=delay)
+        return True
+    except Exception as e:
+        logger.error(f"Error scheduling cache warming: {str(e)}")
+        return False
@@ -0,0 +1,85 @@
+"""
+Document Number Service
+
+Hands out invoice, journal entry and account numbers from the
+``document_counters`` table, one row per document type and period, instead
+of scanning for the highest existing number with ``LIKE ... ORDER BY DESC``.
+
+A number is taken with a single ``UPDATE ... RETURNING`` in its own short
+transaction on a connection of the small ``numbering`` engine profile, so the
+counter row is locked only for that statement and not for the rest of the
+caller's transaction. The caller's pool is never asked for a second
+connection while the caller holds one. Like a
+Postgres sequence, numbers are unique and increasing but a rolled-back
+document leaves a gap.
+
+The first number of a document type and period seeds its counter from the
+highest existing number, so counters can be introduced over existing data.
+"""
+
+from typing import Callable, Optional
+from sqlalchemy import update, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import logging
+
+from database import get_engine
+from models import DocumentCounter
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentNumberService:
+    """Concurrency-safe sequence numbers per document type and period"""
+
+    def __init__(self, db: Session, engine: Optional[Engine] = None):
+        self.db = db
+        self.engine = engine or get_engine("numbering")
+
+    def next_value(self, document_type: str, period: str = "",
+                   seed: Optional[Callable[[], int]] = None) -> int:
+        """
+        Take the next number of ``document_type`` in ``period``
+
+        Args:
+            document_type: Counter name, e.g. 'invoice' or 'journal_entry'
+            period: Numbering period, e.g. '202410'; '' for running counters
+            seed: Returns the last number already issued, called only when
+                the counter does not exist yet
+
+        Returns:
+            The new number
+        """
+        value = self._increment(document_type, period)
+        if value is None:
+            start = seed() if seed else 0
+            self._create_counter(document_type, period, start)
+            value = self._increment(document_type, period)
+            logger.info(f"Started {document_type} counter for period '{period}' after {start}")
+        return value
+
+    def _increment(self, document_type: str, period: str) -> Optional[int]:
+        counters = DocumentCounter.__table__
+        statement = update(counters).where(
+            counters.c.document_type == document_type,
+            counters.c.period == period
+        ).values(
+            last_value=counters.c.last_value + 1,
+            updated_at=func.now()
+        ).returning(counters.c.last_value)
+
+        with self.engine.begin() as connection:
+            return connection.execute(statement).scalar()
+
+    def _create_counter(self, document_type: str, period: str, start: int) -> None:
+        """Insert the counter unless a concurrent caller created it first"""
+        with self.engine.begin() as connection:
+            dialect = sqlite if connection.dialect.name == "sqlite" else postgresql
+            connection.execute(
+                dialect.insert(DocumentCounter.__table__).values(
+                    document_type=document_type,
+                    period=period,
+                    last_value=start
+                ).on_conflict_do_nothing()
+            )
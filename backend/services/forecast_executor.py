@@ -0,0 +1,171 @@
+"""
+Forecast Executor Layer for Advanced Analytics & Business Intelligence
+
+Pluggable executors that run CPU-heavy model fitting (ARIMA grid search,
+seasonal decomposition) off the calling thread:
+- ProcessPoolForecastExecutor: shared process pool for API requests, so the
+  event loop is never pinned by a statsmodels fit
+- WorkerPoolForecastExecutor: billiard pool for Celery workers, whose
+  daemonic prefork children cannot start multiprocessing pools
+- InlineForecastExecutor: runs fits in the calling thread (tests, scripts)
+
+Every executor applies a per-fit timeout.
+
+Requirements covered: 3.4
+"""
+
+import asyncio
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORECAST_EXECUTOR = os.getenv("FORECAST_EXECUTOR", "process")
+FORECAST_POOL_WORKERS = int(os.getenv("FORECAST_POOL_WORKERS", str(os.cpu_count() or 2)))
+FORECAST_FIT_TIMEOUT = float(os.getenv("FORECAST_FIT_TIMEOUT", "120"))
+FORECAST_MP_START_METHOD = os.getenv("FORECAST_MP_START_METHOD", "spawn")
+
+class ForecastExecutor:
+    """
+    Base class for model-fit executors
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout if timeout is not None else FORECAST_FIT_TIMEOUT
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run ``func(*args)`` and return its result
+
+        Raises:
+            asyncio.TimeoutError: If the fit does not finish within the timeout
+        """
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Release pool resources"""
+        pass
+
+class InlineForecastExecutor(ForecastExecutor):
+    """
+    Runs fits synchronously in the calling thread
+    """
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        return func(*args)
+
+class ProcessPoolForecastExecutor(ForecastExecutor):
+    """
+    Runs fits in a lazily created process pool shared by the whole process
+
+    A timed-out fit stops being awaited immediately; the pool worker finishes
+    it in the background and is then reused.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        start_method: Optional[str] = None
+    ):
+        super().__init__(timeout)
+        self.max_workers = max_workers or FORECAST_POOL_WORKERS
+        self.start_method = start_method or FORECAST_MP_START_METHOD
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(self.start_method)
+                    )
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_pool(), func, *args)
+        return await asyncio.wait_for(future, timeout=timeout or self.timeout)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+class WorkerPoolForecastExecutor(ForecastExecutor):
+    """
+    Runs fits in a billiard pool owned by the Celery worker process
+
+    Billiard enforces the timeout inside the pool, so a hung fit is
+    terminated rather than left running.
+    """
+
+    def __init__(self, processes: Optional[int] = None, timeout: Optional[float] = None):
+        super().__init__(timeout)
+        self.processes = processes or FORECAST_POOL_WORKERS
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    from billiard.pool import Pool
+                    self._pool = Pool(processes=self.processes, enable_timeouts=True)
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        from billiard.exceptions import TimeLimitExceeded, TimeoutError as PoolTimeoutError
+
+        timeout = timeout or self.timeout
+        async_result = self._get_pool().apply_async(func, args, timeout=timeout)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, async_result.get, timeout)
+        except (PoolTimeoutError, TimeLimitExceeded) as e:
+            raise asyncio.TimeoutError(f"Model fit exceeded {timeout}s") from e
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+_executor_classes = {
+    "inline": InlineForecastExecutor,
+    "process": ProcessPoolForecastExecutor,
+    "worker": WorkerPoolForecastExecutor,
+}
+
+_executors: Dict[str, ForecastExecutor] = {}
+_executors_lock = threading.Lock()
+
+def get_forecast_executor(kind: Optional[str] = None) -> ForecastExecutor:
+    """
+    Get the shared executor of the given kind ('process', 'worker' or 'inline')
+
+    Defaults to FORECAST_EXECUTOR, which API processes leave as 'process'.
+    """
+    kind = kind or FORECAST_EXECUTOR
+    if kind not in _executor_classes:
+        raise ValueError(f"Unknown forecast executor: {kind}")
+
+    with _executors_lock:
+        if kind not in _executors:
+            _executors[kind] = _executor_classes[kind]()
+        return _executors[kind]
+
+def shutdown_forecast_executors() -> None:
+    """Shut down every shared executor (application shutdown)"""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
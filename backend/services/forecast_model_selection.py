@@ -0,0 +1,201 @@
+"""
+Forecast Model Selection for Advanced Analytics & Business Intelligence
+
+Cheap per-item model selection for demand forecasting:
+- Demand classification by average demand interval (ADI) and squared
+  coefficient of variation of non-zero demand (CV²), after Syntetos & Boylan
+- Fast NumPy forecasters for sparse series (Croston, SBA, simple
+  exponential smoothing)
+- Rolling-origin backtest that picks the candidate with the lowest MAE
+
+Requirements covered: 3.1, 3.2, 3.4
+"""
+
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Syntetos-Boylan classification cut-offs
+ADI_CUTOFF = 1.32
+CV2_CUTOFF = 0.49
+
+# Dense series need this many points before ARIMA is considered
+ARIMA_MIN_POINTS = 60
+
+BACKTEST_FOLDS = 3
+BACKTEST_MAX_HORIZON = 7
+BACKTEST_MIN_TRAIN = 14
+
+SMOOTHING_ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+
+def classify_demand(y: np.ndarray) -> Dict[str, Any]:
+    """
+    Classify a daily demand series as smooth, erratic, intermittent or lumpy
+
+    Returns:
+        Dict with demand_class, adi, cv2 and density (share of days with demand)
+    """
+    nonzero = y[y > 0]
+    if len(nonzero) == 0:
+        return {'demand_class': 'lumpy', 'adi': float('inf'), 'cv2': 0.0, 'density': 0.0}
+
+    adi = len(y) / len(nonzero)
+    mean_size = float(np.mean(nonzero))
+    cv2 = float(np.var(nonzero) / mean_size ** 2) if mean_size > 0 else 0.0
+
+    if adi < ADI_CUTOFF:
+        demand_class = 'smooth' if cv2 < CV2_CUTOFF else 'erratic'
+    else:
+        demand_class = 'intermittent' if cv2 < CV2_CUTOFF else 'lumpy'
+
+    return {
+        'demand_class': demand_class,
+        'adi': float(adi),
+        'cv2': cv2,
+        'density': float(len(nonzero) / len(y))
+    }
+
+def candidate_models(demand_class: str, num_points: int) -> List[str]:
+    """Candidate models for a demand class, cheapest first"""
+    if demand_class in ('intermittent', 'lumpy'):
+        return ['sba', 'croston', 'exponential_smoothing']
+    if num_points >= ARIMA_MIN_POINTS:
+        return ['exponential_smoothing', 'arima']
+    return ['exponential_smoothing']
+
+def simple_exponential_smoothing(y: np.ndarray, alpha: Optional[float] = None) -> Tuple[float, np.ndarray]:
+    """
+    Simple exponential smoothing
+
+    When ``alpha`` is not given it is chosen from SMOOTHING_ALPHAS by
+    one-step-ahead squared error.
+
+    Returns:
+        Tuple of (final level, one-step-ahead residuals)
+    """
+    alphas = (alpha,) if alpha is not None else SMOOTHING_ALPHAS
+    best = None
+
+    for a in alphas:
+        level = y[0]
+        residuals = np.empty(len(y) - 1)
+        for t in range(1, len(y)):
+            residuals[t - 1] = y[t] - level
+            level = level + a * (y[t] - level)
+        sse = float(np.sum(residuals ** 2))
+        if best is None or sse < best[0]:
+            best = (sse, level, residuals)
+
+    return float(best[1]), best[2]
+
+def croston(y: np.ndarray, alpha: float = 0.1, sba: bool = False) -> Tuple[float, np.ndarray]:
+    """
+    Croston's method (or the Syntetos-Boylan approximation when ``sba``)
+
+    Demand sizes and inter-demand intervals are smoothed separately; the
+    forecast is the flat demand rate size / interval.
+
+    Returns:
+        Tuple of (forecast demand rate, one-step-ahead residuals)
+    """
+    demand_idx = np.flatnonzero(y > 0)
+    if len(demand_idx) == 0:
+        return 0.0, y[1:].astype(float)
+
+    size = float(y[demand_idx[0]])
+    interval = float(demand_idx[0] + 1)
+    periods_since = 0
+    factor = (1 - alpha / 2) if sba else 1.0
+
+    residuals = np.empty(len(y) - 1)
+    for t in range(len(y)):
+        if t > 0:
+            residuals[t - 1] = y[t] - factor * size / interval
+        if t <= demand_idx[0]:
+            continue
+        periods_since += 1
+        if y[t] > 0:
+            size = size + alpha * (y[t] - size)
+            interval = interval + alpha * (periods_since - interval)
+            periods_since = 0
+
+    return factor * size / interval, residuals
+
+def _arima_point_forecast(y: np.ndarray, horizon: int) -> np.ndarray:
+    """Single fixed-order ARIMA fit, used only to score ARIMA in backtests"""
+    from statsmodels.tsa.arima.model import ARIMA
+    fitted_model = ARIMA(y, order=(1, 1, 1)).fit()
+    return np.asarray(fitted_model.forecast(steps=horizon), dtype=float)
+
+_point_forecasters: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    'exponential_smoothing': lambda y, h: np.full(h, simple_exponential_smoothing(y)[0]),
+    'croston': lambda y, h: np.full(h, croston(y)[0]),
+    'sba': lambda y, h: np.full(h, croston(y, sba=True)[0]),
+    'arima': _arima_point_forecast,
+}
+
+def rolling_origin_backtest(
+    y: np.ndarray,
+    models: List[str],
+    horizon: int = BACKTEST_MAX_HORIZON,
+    folds: int = BACKTEST_FOLDS
+) -> Dict[str, Any]:
+    """
+    Score candidate models on the last ``folds`` windows of ``horizon`` days
+
+    Returns:
+        Dict with per-model MAE, the folds actually used and the horizon
+    """
+    origins = [
+        len(y) - horizon * k
+        for k in range(folds, 0, -1)
+        if len(y) - horizon * k >= BACKTEST_MIN_TRAIN
+    ]
+
+    scores = {}
+    for model_name in models:
+        errors = []
+        for origin in origins:
+            try:
+                forecast = _point_forecasters[model_name](y[:origin], horizon)
+                actual = y[origin:origin + horizon]
+                errors.append(float(np.mean(np.abs(np.maximum(forecast, 0) - actual))))
+            except Exception as e:
+                logger.debug(f"Backtest fold failed for {model_name}: {str(e)}")
+                errors = []
+                break
+        if errors:
+            scores[model_name] = float(np.mean(errors))
+
+    return {'mae': scores, 'folds': len(origins), 'horizon': horizon}
+
+def select_forecast_model(y: np.ndarray, horizon: int = BACKTEST_MAX_HORIZON) -> Dict[str, Any]:
+    """
+    Classify the series and pick the candidate with the lowest backtest MAE
+
+    Module-level so that forecast executors can run it in another process.
+    Ties go to the cheaper model.
+
+    Returns:
+        Dict with selected_model, demand classification and backtest scores
+    """
+    y = np.asarray(y, dtype=float)
+    classification = classify_demand(y)
+    candidates = candidate_models(classification['demand_class'], len(y))
+
+    backtest = rolling_origin_backtest(y, candidates, horizon=min(horizon, BACKTEST_MAX_HORIZON))
+    scores = backtest['mae']
+
+    if scores:
+        selected_model = min(candidates, key=lambda m: scores.get(m, float('inf')))
+    else:
+        selected_model = candidates[0]
+
+    return {
+        'selected_model': selected_model,
+        'candidates': candidates,
+        **classification,
+        'backtest': backtest
+    }
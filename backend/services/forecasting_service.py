@@ -5,10 +5,13 @@ This service provides demand forecasting capabilities using multiple algorithms:
 - ARIMA (AutoRegressive Integrated Moving Average)
 - Linear Regression
 - Seasonal Decomposition
+- Exponential smoothing, Croston and SBA for sparse, intermittent demand
+- Automatic per-item model selection by rolling-origin backtest
 
 Requirements covered: 3.1, 3.2, 3.3, 3.4, 3.5
 """
 
+import asyncio
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
@@ -28,6 +31,11 @@ from statsmodels.tsa.stattools import adfuller
 import warnings
 warnings.filterwarnings('ignore')
 
+from services.sales_history_service import SalesHistoryService
+from services.forecast_executor import ForecastExecutor, get_forecast_executor
+from services.forecast_model_store import ForecastModelStore
+from services.forecast_model_selection import select_forecast_model, simple_exponential_smoothing, croston
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -65,24 +73,186 @@ class SafetyStockRecommendation:
     stockout_probability: float
     cost_impact: Decimal
 
+def _fit_arima_model(
+    ts_data: pd.DataFrame,
+    periods: int
+) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
+    """
+    Fit ARIMA with a small order grid search and forecast ``periods`` days
+
+    Module-level so that forecast executors can run it in another process.
+    """
+    predictions, confidence_intervals, accuracy_metrics, _ = _fit_arima_with_params(ts_data, periods)
+    return predictions, confidence_intervals, accuracy_metrics
+
+def _fit_arima_with_params(
+    ts_data: pd.DataFrame,
+    periods: int,
+    stored_params: Optional[Dict[str, Any]] = None
+) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float], Dict[str, Any]]:
+    """
+    ARIMA forecast that can reuse previously fitted parameters
+
+    With ``stored_params`` the stored order and coefficients are applied to
+    the current series with a Kalman filter pass only (the equivalent of
+    ``results.apply(refit=False)``), skipping the grid search and MLE fit.
+    Without them the order is grid-searched and the model refitted.
+
+    Returns:
+        Tuple of (predictions, confidence intervals, accuracy metrics, fitted parameters)
+    """
+    series = ts_data['quantity'].ffill()
+    
+    if stored_params:
+        best_order = tuple(stored_params['order'])
+        model = ARIMA(series, order=best_order)
+        fitted_model = model.filter(np.asarray(stored_params['params'], dtype=float))
+    else:
+        # Auto-determine ARIMA parameters
+        best_aic = float('inf')
+        best_order = (1, 1, 1)
+        
+        # Grid search for best parameters (simplified)
+        for p in range(0, 3):
+            for d in range(0, 2):
+                for q in range(0, 3):
+                    try:
+                        model = ARIMA(series, order=(p, d, q))
+                        fitted_model = model.fit()
+                        if fitted_model.aic < best_aic:
+                            best_aic = fitted_model.aic
+                            best_order = (p, d, q)
+                    except:
+                        continue
+        
+        # Fit best model
+        model = ARIMA(series, order=best_order)
+        fitted_model = model.fit()
+    
+    # Generate forecast with 95% confidence intervals
+    forecast = fitted_model.get_forecast(steps=periods)
+    predictions = forecast.predicted_mean.tolist()
+    confidence_intervals = [(row[0], row[1]) for row in forecast.conf_int(alpha=0.05).values]
+    
+    # Calculate accuracy metrics on training data
+    fitted_values = fitted_model.fittedvalues
+    actual_values = series[-len(fitted_values):]
+    
+    mae = mean_absolute_error(actual_values, fitted_values)
+    mse = mean_squared_error(actual_values, fitted_values)
+    rmse = np.sqrt(mse)
+    
+    accuracy_metrics = {
+        'mae': float(mae),
+        'mse': float(mse),
+        'rmse': float(rmse),
+        'aic': float(fitted_model.aic),
+        'model_order': best_order
+    }
+    
+    fitted_params = {
+        'order': list(best_order),
+        'params': [float(value) for value in np.asarray(fitted_model.params)],
+        'series_length': int(len(series))
+    }
+    
+    return predictions, confidence_intervals, accuracy_metrics, fitted_params
+
+def _fit_seasonal_decompose_model(
+    ts_data: pd.DataFrame,
+    periods: int
+) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
+    """
+    Forecast trend + seasonal components of an additive decomposition
+
+    Module-level so that forecast executors can run it in another process.
+    """
+    series = ts_data['quantity'].ffill()
+    
+    # Perform seasonal decomposition
+    decomposition = seasonal_decompose(
+        series, 
+        model='additive', 
+        period=min(12, len(series) // 2)
+    )
+    
+    # Extract components
+    trend = decomposition.trend.dropna()
+    seasonal = decomposition.seasonal
+    residual = decomposition.resid.dropna()
+    
+    # Forecast trend using linear regression
+    trend_X = np.arange(len(trend)).reshape(-1, 1)
+    trend_model = LinearRegression()
+    trend_model.fit(trend_X, trend.values)
+    
+    # Predict future trend
+    future_trend_X = np.arange(len(trend), len(trend) + periods).reshape(-1, 1)
+    future_trend = trend_model.predict(future_trend_X)
+    
+    # Get seasonal pattern for future periods
+    seasonal_pattern = seasonal.values[:min(12, len(seasonal))]
+    future_seasonal = []
+    for i in range(periods):
+        seasonal_index = i % len(seasonal_pattern)
+        future_seasonal.append(seasonal_pattern[seasonal_index])
+    
+    # Combine trend and seasonal components
+    predictions = (future_trend + future_seasonal).tolist()
+    
+    # Calculate confidence intervals based on residual variance
+    residual_std = np.std(residual)
+    confidence_intervals = [
+        (pred - 1.96 * residual_std, pred + 1.96 * residual_std)
+        for pred in predictions
+    ]
+    
+    # Calculate accuracy metrics
+    fitted_values = trend + seasonal + residual
+    actual_values = series[decomposition.trend.first_valid_index():decomposition.trend.last_valid_index()]
+    fitted_aligned = fitted_values[decomposition.trend.first_valid_index():decomposition.trend.last_valid_index()]
+    
+    mae = mean_absolute_error(actual_values, fitted_aligned)
+    mse = mean_squared_error(actual_values, fitted_aligned)
+    rmse = np.sqrt(mse)
+    
+    accuracy_metrics = {
+        'mae': float(mae),
+        'mse': float(mse),
+        'rmse': float(rmse),
+        'seasonal_strength': float(np.var(seasonal) / np.var(series))
+    }
+    
+    return predictions, confidence_intervals, accuracy_metrics
+
 class ForecastingService:
     """
     Advanced forecasting service with multiple algorithms
     """
     
-    def __init__(self, db_session: Session):
+    def __init__(
+        self,
+        db_session: Session,
+        executor: Optional[ForecastExecutor] = None,
+        model_store: Optional[ForecastModelStore] = None
+    ):
         self.db = db_session
+        self.executor = executor or get_forecast_executor()
+        self.model_store = model_store or (ForecastModelStore(db_session) if db_session is not None else None)
         self.models = {
             'arima': self._arima_forecast,
             'linear_regression': self._linear_regression_forecast,
-            'seasonal_decompose': self._seasonal_decompose_forecast
+            'seasonal_decompose': self._seasonal_decompose_forecast,
+            'exponential_smoothing': self._exponential_smoothing_forecast,
+            'croston': self._croston_forecast,
+            'sba': self._sba_forecast
         }
     
     async def forecast_demand(
         self,
         item_id: str,
         periods: int,
-        model_type: str = 'arima'
+        model_type: str = 'auto'
     ) -> DemandForecast:
         """
         Generate demand forecast for inventory items
@@ -90,7 +260,8 @@ class ForecastingService:
         Args:
             item_id: UUID of the inventory item
             periods: Number of periods to forecast
-            model_type: Type of forecasting model ('arima', 'linear_regression', 'seasonal_decompose')
+            model_type: Type of forecasting model ('auto', 'arima', 'linear_regression',
+                'seasonal_decompose', 'exponential_smoothing', 'croston', 'sba')
             
         Returns:
             DemandForecast object with predictions and confidence intervals
@@ -99,55 +270,116 @@ class ForecastingService:
             # Get historical sales data
             historical_data = self._get_historical_sales_data(item_id)
             
-            if len(historical_data) < 10:
-                raise ValueError(f"Insufficient historical data for item {item_id}. Need at least 10 data points.")
-            
-            # Prepare time series data
-            ts_data = self._prepare_time_series_data(historical_data)
-            
-            # Select and apply forecasting model
-            if model_type not in self.models:
-                model_type = 'arima'  # Default fallback
-                
-            forecast_func = self.models[model_type]
-            predictions, confidence_intervals, accuracy_metrics = await forecast_func(ts_data, periods)
-            
-            # Calculate confidence score
-            confidence_score = self._calculate_confidence_score(accuracy_metrics, len(historical_data))
-            
-            # Detect seasonality
-            seasonality_analysis = await self.analyze_seasonality(historical_data)
-            
-            # Format predictions
-            forecast_start = datetime.now().date() + timedelta(days=1)
-            formatted_predictions = []
-            
-            for i, (pred, ci) in enumerate(zip(predictions, confidence_intervals)):
-                forecast_date = forecast_start + timedelta(days=i)
-                formatted_predictions.append({
-                    'date': forecast_date.isoformat(),
-                    'predicted_demand': max(0, float(pred)),  # Ensure non-negative
-                    'confidence_lower': max(0, float(ci[0])),
-                    'confidence_upper': float(ci[1]),
-                    'day_of_week': forecast_date.strftime('%A'),
-                    'month': forecast_date.strftime('%B')
-                })
-            
-            return DemandForecast(
-                item_id=item_id,
-                predictions=formatted_predictions,
-                confidence_score=confidence_score,
-                model_used=model_type,
-                forecast_period_start=forecast_start,
-                forecast_period_end=forecast_start + timedelta(days=periods-1),
-                accuracy_metrics=accuracy_metrics,
-                seasonal_patterns=seasonality_analysis.seasonal_factors if seasonality_analysis.has_seasonality else None
-            )
+            return await self._forecast_from_history(item_id, historical_data, periods, model_type)
             
         except Exception as e:
             logger.error(f"Error forecasting demand for item {item_id}: {str(e)}")
             raise
     
+    async def forecast_demand_batch(
+        self,
+        item_ids: List[str],
+        periods: int,
+        model_type: str = 'auto'
+    ) -> Tuple[Dict[str, DemandForecast], Dict[str, str]]:
+        """
+        Generate demand forecasts for many items from a single sales history load
+        
+        Args:
+            item_ids: UUIDs of the inventory items
+            periods: Number of periods to forecast
+            model_type: Type of forecasting model
+            
+        Returns:
+            Tuple of (forecasts by item ID, error messages by item ID)
+        """
+        history = SalesHistoryService(self.db).load_daily_demand(item_ids)
+        
+        forecasts = {}
+        errors = {}
+        
+        async def forecast_item(item_id: str):
+            try:
+                forecasts[item_id] = await self._forecast_from_history(
+                    item_id, history.to_sales_records(item_id), periods, model_type
+                )
+            except Exception as e:
+                logger.warning(f"Error forecasting demand for item {item_id}: {str(e)}")
+                errors[item_id] = str(e)
+        
+        # Fits for different items run in parallel on the executor's pool
+        await asyncio.gather(*(forecast_item(item_id) for item_id in history.item_ids))
+        
+        return forecasts, errors
+    
+    async def _forecast_from_history(
+        self,
+        item_id: str,
+        historical_data: List[Dict[str, Any]],
+        periods: int,
+        model_type: str
+    ) -> DemandForecast:
+        """
+        Fit the requested model on already-loaded sales history
+        """
+        if len(historical_data) < 10:
+            raise ValueError(f"Insufficient historical data for item {item_id}. Need at least 10 data points.")
+        
+        # Prepare time series data
+        ts_data = self._prepare_time_series_data(historical_data)
+        
+        # Select and apply forecasting model
+        model_selection = None
+        if model_type == 'auto':
+            model_selection = await self._select_model(item_id, ts_data, periods, len(historical_data))
+            model_type = model_selection['selected_model']
+        elif model_type not in self.models:
+            model_type = 'arima'  # Default fallback
+            
+        if model_type == 'arima' and self.model_store is not None:
+            predictions, confidence_intervals, accuracy_metrics = await self._stored_arima_forecast(
+                item_id, ts_data, periods, len(historical_data)
+            )
+        else:
+            forecast_func = self.models[model_type]
+            predictions, confidence_intervals, accuracy_metrics = await forecast_func(ts_data, periods)
+        
+        if model_selection:
+            accuracy_metrics['demand_class'] = model_selection['demand_class']
+            accuracy_metrics['backtest'] = model_selection['backtest']
+        
+        # Calculate confidence score
+        confidence_score = self._calculate_confidence_score(accuracy_metrics, len(historical_data))
+        
+        # Detect seasonality
+        seasonality_analysis = await self.analyze_seasonality(historical_data)
+        
+        # Format predictions
+        forecast_start = datetime.now().date() + timedelta(days=1)
+        formatted_predictions = []
+        
+        for i, (pred, ci) in enumerate(zip(predictions, confidence_intervals)):
+            forecast_date = forecast_start + timedelta(days=i)
+            formatted_predictions.append({
+                'date': forecast_date.isoformat(),
+                'predicted_demand': max(0, float(pred)),  # Ensure non-negative
+                'confidence_lower': max(0, float(ci[0])),
+                'confidence_upper': float(ci[1]),
+                'day_of_week': forecast_date.strftime('%A'),
+                'month': forecast_date.strftime('%B')
+            })
+        
+        return DemandForecast(
+            item_id=item_id,
+            predictions=formatted_predictions,
+            confidence_score=confidence_score,
+            model_used=model_type,
+            forecast_period_start=forecast_start,
+            forecast_period_end=forecast_start + timedelta(days=periods-1),
+            accuracy_metrics=accuracy_metrics,
+            seasonal_patterns=seasonality_analysis.seasonal_factors if seasonality_analysis.has_seasonality else None
+        )
+    
     async def analyze_seasonality(
         self,
         sales_data: List[Dict[str, Any]]
@@ -299,62 +531,121 @@ class ForecastingService:
         periods: int
     ) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
         """
-        ARIMA forecasting implementation
+        ARIMA forecasting implementation (fitted on the forecast executor)
         """
         try:
-            # Check for stationarity
-            series = ts_data['quantity'].ffill()
-            
-            # Auto-determine ARIMA parameters
-            best_aic = float('inf')
-            best_order = (1, 1, 1)
-            
-            # Grid search for best parameters (simplified)
-            for p in range(0, 3):
-                for d in range(0, 2):
-                    for q in range(0, 3):
-                        try:
-                            model = ARIMA(series, order=(p, d, q))
-                            fitted_model = model.fit()
-                            if fitted_model.aic < best_aic:
-                                best_aic = fitted_model.aic
-                                best_order = (p, d, q)
-                        except:
-                            continue
-            
-            # Fit best model
-            model = ARIMA(series, order=best_order)
-            fitted_model = model.fit()
-            
-            # Generate forecast
-            forecast_result = fitted_model.forecast(steps=periods, alpha=0.05)  # 95% confidence
-            predictions = forecast_result.tolist()
-            
-            # Get confidence intervals
-            conf_int = fitted_model.get_forecast(steps=periods).conf_int()
-            confidence_intervals = [(row[0], row[1]) for row in conf_int.values]
-            
-            # Calculate accuracy metrics on training data
-            fitted_values = fitted_model.fittedvalues
-            actual_values = series[fitted_model.k_ar:]
-            
-            mae = mean_absolute_error(actual_values, fitted_values)
-            mse = mean_squared_error(actual_values, fitted_values)
-            rmse = np.sqrt(mse)
+            return await self.executor.run(_fit_arima_model, ts_data, periods)
             
-            accuracy_metrics = {
-                'mae': float(mae),
-                'mse': float(mse),
-                'rmse': float(rmse),
-                'aic': float(fitted_model.aic),
-                'model_order': best_order
+        except Exception as e:
+            logger.warning(f"ARIMA forecast failed: {str(e) or type(e).__name__}, falling back to linear regression")
+            return await self._linear_regression_forecast(ts_data, periods)
+    
+    async def _select_model(
+        self,
+        item_id: str,
+        ts_data: pd.DataFrame,
+        periods: int,
+        data_points: int
+    ) -> Dict[str, Any]:
+        """
+        Pick a model for an item by demand class and rolling-origin backtest
+        
+        The choice is cached in the forecast model store and re-used until the
+        series changes and the cached choice is older than the refit window.
+        If the backtest times out or the executor pool fails, the item falls
+        back to ARIMA, the default before automatic selection, uncached.
+        """
+        series = ts_data['quantity'].ffill()
+        fingerprint = ForecastModelStore.fingerprint(series)
+        stored = self.model_store.load(item_id, 'auto') if self.model_store else None
+        
+        if self.model_store and not self.model_store.needs_refit(stored, fingerprint):
+            return stored.model_params
+        
+        try:
+            selection = await self.executor.run(
+                select_forecast_model, series.to_numpy(dtype=float), periods
+            )
+        except Exception as e:
+            logger.warning(f"Model selection failed for item {item_id}: {str(e) or type(e).__name__}, falling back to arima")
+            return {
+                'selected_model': 'arima',
+                'demand_class': None,
+                'candidates': ['arima'],
+                'backtest': {'error': str(e) or type(e).__name__}
             }
+        
+        if self.model_store:
+            best_mae = min(selection['backtest']['mae'].values(), default=None)
+            self.model_store.save(
+                item_id=item_id,
+                model_type='auto',
+                fingerprint=fingerprint,
+                model_params=selection,
+                accuracy_metrics=selection['backtest'],
+                confidence_score=self._calculate_confidence_score(
+                    {'mae': best_mae, 'rmse': best_mae} if best_mae is not None else {}, data_points
+                ),
+                refitted=True,
+                stored=stored
+            )
+        
+        return selection
+    
+    async def _stored_arima_forecast(
+        self,
+        item_id: str,
+        ts_data: pd.DataFrame,
+        periods: int,
+        data_points: int
+    ) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
+        """
+        ARIMA forecast that reuses parameters from the forecast model store
+        
+        Items whose series is unchanged, or whose stored parameters are still
+        fresh, skip the grid search and refit entirely.
+        """
+        series = ts_data['quantity'].ffill()
+        fingerprint = ForecastModelStore.fingerprint(series)
+        stored = self.model_store.load(item_id, 'arima')
+        refit = self.model_store.needs_refit(stored, fingerprint)
+        
+        try:
+            predictions, confidence_intervals, accuracy_metrics, fitted_params = await self.executor.run(
+                _fit_arima_with_params, ts_data, periods, None if refit else stored.model_params
+            )
+        except Exception as e:
+            if refit:
+                logger.warning(f"ARIMA forecast failed: {str(e) or type(e).__name__}, falling back to linear regression")
+                return await self._linear_regression_forecast(ts_data, periods)
             
+            # Stored parameters no longer fit the data; refit from scratch
+            logger.info(f"Stored ARIMA parameters unusable for item {item_id}: {str(e) or type(e).__name__}")
+            refit = True
+            try:
+                predictions, confidence_intervals, accuracy_metrics, fitted_params = await self.executor.run(
+                    _fit_arima_with_params, ts_data, periods
+                )
+            except Exception as refit_error:
+                logger.warning(f"ARIMA forecast failed: {str(refit_error) or type(refit_error).__name__}, falling back to linear regression")
+                return await self._linear_regression_forecast(ts_data, periods)
+        
+        accuracy_metrics['refitted'] = refit
+        if not refit and stored.data_fingerprint == fingerprint:
             return predictions, confidence_intervals, accuracy_metrics
-            
-        except Exception as e:
-            logger.warning(f"ARIMA forecast failed: {str(e)}, falling back to linear regression")
-            return await self._linear_regression_forecast(ts_data, periods)
+        
+        self.model_store.save(
+            item_id=item_id,
+            model_type='arima',
+            fingerprint=fingerprint,
+            model_params=fitted_params,
+            accuracy_metrics=accuracy_metrics,
+            confidence_score=self._calculate_confidence_score(accuracy_metrics, data_points),
+            refitted=refit,
+            stored=stored
+        )
+        
+        return predictions, confidence_intervals, accuracy_metrics
     
     async def _linear_regression_forecast(
         self, 
@@ -429,78 +720,83 @@ class ForecastingService:
             logger.error(f"Linear regression forecast failed: {str(e)}")
             raise
     
+    async def _exponential_smoothing_forecast(
+        self,
+        ts_data: pd.DataFrame,
+        periods: int
+    ) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
+        """
+        Simple exponential smoothing forecasting implementation
+        """
+        y = ts_data['quantity'].fillna(0).to_numpy(dtype=float)
+        level, residuals = simple_exponential_smoothing(y)
+        return self._flat_forecast(level, residuals, periods)
+    
+    async def _croston_forecast(
+        self,
+        ts_data: pd.DataFrame,
+        periods: int
+    ) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
+        """
+        Croston forecasting implementation for intermittent demand
+        """
+        y = ts_data['quantity'].fillna(0).to_numpy(dtype=float)
+        rate, residuals = croston(y)
+        return self._flat_forecast(rate, residuals, periods)
+    
+    async def _sba_forecast(
+        self,
+        ts_data: pd.DataFrame,
+        periods: int
+    ) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
+        """
+        Syntetos-Boylan approximation forecasting implementation for intermittent demand
+        """
+        y = ts_data['quantity'].fillna(0).to_numpy(dtype=float)
+        rate, residuals = croston(y, sba=True)
+        return self._flat_forecast(rate, residuals, periods)
+    
+    def _flat_forecast(
+        self,
+        level: float,
+        residuals: np.ndarray,
+        periods: int
+    ) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
+        """
+        Format a constant-level forecast with residual-based intervals
+        """
+        residual_std = float(np.std(residuals)) if len(residuals) else 0.0
+        predictions = [level] * periods
+        confidence_intervals = [
+            (level - 1.96 * residual_std, level + 1.96 * residual_std)
+            for _ in range(periods)
+        ]
+        
+        mse = float(np.mean(residuals ** 2)) if len(residuals) else 0.0
+        accuracy_metrics = {
+            'mae': float(np.mean(np.abs(residuals))) if len(residuals) else 0.0,
+            'mse': mse,
+            'rmse': float(np.sqrt(mse))
+        }
+        
+        return predictions, confidence_intervals, accuracy_metrics
+    
     async def _seasonal_decompose_forecast(
         self, 
         ts_data: pd.DataFrame, 
         periods: int
     ) -> Tuple[List[float], List[Tuple[float, float]], Dict[str, float]]:
         """
-        Seasonal decomposition forecasting implementation
+        Seasonal decomposition forecasting implementation (fitted on the forecast executor)
         """
         try:
-            series = ts_data['quantity'].ffill()
-            
-            if len(series) < 24:  # Need sufficient data for seasonal decomposition
+            if len(ts_data) < 24:  # Need sufficient data for seasonal decomposition
                 return await self._linear_regression_forecast(ts_data, periods)
             
-            # Perform seasonal decomposition
-            decomposition = seasonal_decompose(
-                series, 
-                model='additive', 
-                period=min(12, len(series) // 2)
-            )
-            
-            # Extract components
-            trend = decomposition.trend.dropna()
-            seasonal = decomposition.seasonal
-            residual = decomposition.resid.dropna()
-            
-            # Forecast trend using linear regression
-            trend_X = np.arange(len(trend)).reshape(-1, 1)
-            trend_model = LinearRegression()
-            trend_model.fit(trend_X, trend.values)
-            
-            # Predict future trend
-            future_trend_X = np.arange(len(trend), len(trend) + periods).reshape(-1, 1)
-            future_trend = trend_model.predict(future_trend_X)
-            
-            # Get seasonal pattern for future periods
-            seasonal_pattern = seasonal.values[:min(12, len(seasonal))]
-            future_seasonal = []
-            for i in range(periods):
-                seasonal_index = i % len(seasonal_pattern)
-                future_seasonal.append(seasonal_pattern[seasonal_index])
-            
-            # Combine trend and seasonal components
-            predictions = (future_trend + future_seasonal).tolist()
-            
-            # Calculate confidence intervals based on residual variance
-            residual_std = np.std(residual)
-            confidence_intervals = [
-                (pred - 1.96 * residual_std, pred + 1.96 * residual_std)
-                for pred in predictions
-            ]
-            
-            # Calculate accuracy metrics
-            fitted_values = trend + seasonal + residual
-            actual_values = series[decomposition.trend.first_valid_index():decomposition.trend.last_valid_index()]
-            fitted_aligned = fitted_values[decomposition.trend.first_valid_index():decomposition.trend.last_valid_index()]
-            
-            mae = mean_absolute_error(actual_values, fitted_aligned)
-            mse = mean_squared_error(actual_values, fitted_aligned)
-            rmse = np.sqrt(mse)
-            
-            accuracy_metrics = {
-                'mae': float(mae),
-                'mse': float(mse),
-                'rmse': float(rmse),
-                'seasonal_strength': float(np.var(seasonal) / np.var(series))
-            }
-            
-            return predictions, confidence_intervals, accuracy_metrics
+            return await self.executor.run(_fit_seasonal_decompose_model, ts_data, periods)
             
         except Exception as e:
-            logger.warning(f"Seasonal decomposition failed: {str(e)}, falling back to linear regression")
+            logger.warning(f"Seasonal decomposition failed: {str(e) or type(e).__name__}, falling back to linear regression")
             return await self._linear_regression_forecast(ts_data, periods)
     
     def _get_historical_sales_data(self, item_id: str) -> List[Dict[str, Any]]:
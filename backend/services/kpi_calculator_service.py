@@ -19,6 +19,7 @@ from models import (
     KPISnapshot, AccountingEntry, Category
 )
 from redis_config import get_analytics_cache
+from services.kpi_query_builder import date_range_filter, date_range_params
 
 
 class FinancialKPICalculator:
@@ -38,8 +39,8 @@ class FinancialKPICalculator:
         """Calculate comprehensive revenue KPIs with trend analysis"""
         
         # Check cache first with enhanced caching strategy
-        cache_key = f"revenue_kpis_{start_date}_{end_date}_{hash(str(targets))}"
-        cached_data = await self.cache.get_kpi_data("financial", "revenue", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date, "targets": targets}
+        cached_data = await self.cache.get_kpi_data("financial", "revenue", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -97,7 +98,7 @@ class FinancialKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("financial", "revenue", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("financial", "revenue", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -119,8 +120,8 @@ class FinancialKPICalculator:
     ) -> Dict[str, Any]:
         """Calculate comprehensive profit margin KPIs with trend analysis"""
         
-        cache_key = f"profit_margin_kpis_{start_date}_{end_date}"
-        cached_data = await self.cache.get_kpi_data("financial", "profit_margin", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date}
+        cached_data = await self.cache.get_kpi_data("financial", "profit_margin", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -177,7 +178,7 @@ class FinancialKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("financial", "profit_margin", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("financial", "profit_margin", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -199,8 +200,8 @@ class FinancialKPICalculator:
     ) -> Dict[str, Any]:
         """Calculate achievement rates against targets with detailed analysis"""
         
-        cache_key = f"achievement_rate_kpis_{start_date}_{end_date}_{hash(str(targets))}"
-        cached_data = await self.cache.get_kpi_data("financial", "achievement", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date, "targets": targets}
+        cached_data = await self.cache.get_kpi_data("financial", "achievement", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -279,7 +280,7 @@ class FinancialKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("financial", "achievement", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("financial", "achievement", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -297,17 +298,13 @@ class FinancialKPICalculator:
         """Calculate total revenue for a specific period"""
         
         try:
-            revenue_query = text("""
-                SELECT COALESCE(SUM(total_amount), 0) as total_revenue
-                FROM invoices 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
-                AND status IN ('completed', 'paid', 'partially_paid')
+            revenue_query = text(f"""
+                SELECT COALESCE(SUM(invoice_amount), 0) as total_revenue
+                FROM sales_daily_facts
+                WHERE {date_range_filter('sale_date')}
             """)
             
-            result = self.db.execute(revenue_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(revenue_query, date_range_params(start_date, end_date)).fetchone()
             
             return float(result.total_revenue or 0)
             
@@ -320,25 +317,19 @@ class FinancialKPICalculator:
         
         try:
             # Calculate sales and cost data
-            profit_query = text("""
+            profit_query = text(f"""
                 SELECT 
-                    COALESCE(SUM(ii.total_price), 0) as total_sales,
-                    COALESCE(SUM(ii.quantity * item.purchase_price), 0) as total_cost,
-                    COALESCE(SUM(i.total_amount * i.labor_cost_percentage / 100), 0) as labor_costs,
-                    COALESCE(SUM(i.total_amount * i.vat_percentage / 100), 0) as tax_costs,
-                    COUNT(DISTINCT i.id) as invoice_count,
-                    COALESCE(SUM(ii.quantity), 0) as total_units
-                FROM invoice_items ii
-                JOIN invoices i ON ii.invoice_id = i.id
-                JOIN inventory_items item ON ii.inventory_item_id = item.id
-                WHERE DATE(i.created_at) BETWEEN :start_date AND :end_date
-                AND i.status IN ('completed', 'paid', 'partially_paid')
+                    COALESCE(SUM(revenue), 0) as total_sales,
+                    COALESCE(SUM(cost), 0) as total_cost,
+                    COALESCE(SUM(labor_cost), 0) as labor_costs,
+                    COALESCE(SUM(tax_cost), 0) as tax_costs,
+                    COALESCE(ROUND(SUM(invoice_share)), 0) as invoice_count,
+                    COALESCE(SUM(units), 0) as total_units
+                FROM sales_daily_facts
+                WHERE {date_range_filter('sale_date')}
             """)
             
-            result = self.db.execute(profit_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(profit_query, date_range_params(start_date, end_date)).fetchone()
             
             total_sales = float(result.total_sales or 0)
             total_cost = float(result.total_cost or 0)
@@ -389,7 +380,7 @@ class FinancialKPICalculator:
         """Calculate transaction-related metrics"""
         
         try:
-            transaction_query = text("""
+            transaction_query = text(f"""
                 SELECT 
                     COUNT(*) as transaction_count,
                     COUNT(DISTINCT customer_id) as unique_customers,
@@ -399,14 +390,11 @@ class FinancialKPICalculator:
                     COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_transactions,
                     COUNT(CASE WHEN remaining_amount > 0 THEN 1 END) as outstanding_transactions
                 FROM invoices 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
+                WHERE {date_range_filter('created_at')}
                 AND status != 'cancelled'
             """)
             
-            result = self.db.execute(transaction_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(transaction_query, date_range_params(start_date, end_date)).fetchone()
             
             transaction_count = result.transaction_count or 0
             unique_customers = result.unique_customers or 0
@@ -734,22 +722,18 @@ class FinancialKPICalculator:
         """Get daily revenue data for trend analysis"""
         
         try:
-            daily_query = text("""
+            daily_query = text(f"""
                 SELECT 
-                    DATE(created_at) as date,
-                    COALESCE(SUM(total_amount), 0) as revenue,
-                    COUNT(*) as transaction_count
-                FROM invoices 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
-                AND status IN ('completed', 'paid', 'partially_paid')
-                GROUP BY DATE(created_at)
-                ORDER BY DATE(created_at)
+                    sale_date as date,
+                    COALESCE(SUM(invoice_amount), 0) as revenue,
+                    ROUND(SUM(invoice_share))::integer as transaction_count
+                FROM sales_daily_facts
+                WHERE {date_range_filter('sale_date')}
+                GROUP BY sale_date
+                ORDER BY sale_date
             """)
             
-            results = self.db.execute(daily_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            results = self.db.execute(daily_query, date_range_params(start_date, end_date)).fetchall()
             
             return [
                 {
@@ -768,24 +752,18 @@ class FinancialKPICalculator:
         """Get daily profit margin data for trend analysis"""
         
         try:
-            daily_query = text("""
+            daily_query = text(f"""
                 SELECT 
-                    DATE(i.created_at) as date,
-                    COALESCE(SUM(ii.total_price), 0) as sales,
-                    COALESCE(SUM(ii.quantity * item.purchase_price), 0) as cost
-                FROM invoice_items ii
-                JOIN invoices i ON ii.invoice_id = i.id
-                JOIN inventory_items item ON ii.inventory_item_id = item.id
-                WHERE DATE(i.created_at) BETWEEN :start_date AND :end_date
-                AND i.status IN ('completed', 'paid', 'partially_paid')
-                GROUP BY DATE(i.created_at)
-                ORDER BY DATE(i.created_at)
+                    sale_date as date,
+                    COALESCE(SUM(revenue), 0) as sales,
+                    COALESCE(SUM(cost), 0) as cost
+                FROM sales_daily_facts
+                WHERE {date_range_filter('sale_date')}
+                GROUP BY sale_date
+                ORDER BY sale_date
             """)
             
-            results = self.db.execute(daily_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            results = self.db.execute(daily_query, date_range_params(start_date, end_date)).fetchall()
             
             daily_data = []
             for result in results:
@@ -1194,23 +1172,19 @@ class KPICalculatorService:
         """Get daily financial data for trend analysis"""
         
         try:
-            daily_query = text("""
+            daily_query = text(f"""
                 SELECT 
-                    DATE(created_at) as date,
-                    COALESCE(SUM(total_amount), 0) as revenue,
-                    COUNT(*) as transaction_count,
-                    COALESCE(AVG(total_amount), 0) as avg_transaction
-                FROM invoices 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
-                AND status IN ('completed', 'paid', 'partially_paid')
-                GROUP BY DATE(created_at)
-                ORDER BY DATE(created_at)
+                    sale_date as date,
+                    COALESCE(SUM(invoice_amount), 0) as revenue,
+                    ROUND(SUM(invoice_share))::integer as transaction_count,
+                    COALESCE(SUM(invoice_amount) / NULLIF(SUM(invoice_share), 0), 0) as avg_transaction
+                FROM sales_daily_facts
+                WHERE {date_range_filter('sale_date')}
+                GROUP BY sale_date
+                ORDER BY sale_date
             """)
             
-            results = self.db.execute(daily_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            results = self.db.execute(daily_query, date_range_params(start_date, end_date)).fetchall()
             
             return [
                 {
@@ -1230,13 +1204,9 @@ class KPICalculatorService:
         """Invalidate financial KPI cache"""
         
         try:
-            if time_range:
-                start_date, end_date = time_range
-                pattern = f"financial_kpis_{start_date}_{end_date}"
-            else:
-                pattern = "kpi:financial"
-            
-            await self.cache.invalidate_cache(pattern)
+            # Entries are tagged by KPI type, not by period; dates and targets
+            # live in the key digest, so a range drops the whole tag
+            await self.cache.invalidate_cache("kpi:financial")
             
         except Exception as e:
             print(f"Error invalidating financial cache: {e}")
@@ -1246,7 +1216,7 @@ class KPICalculatorService:
         
         try:
             # Get cache statistics
-            cache_stats = self.cache.get_cache_stats()
+            cache_stats = await self.cache.get_cache_stats()
             
             # Get KPI statistics from database
             kpi_stats_query = text("""
@@ -1307,8 +1277,8 @@ class OperationalKPICalculator:
         """Calculate comprehensive inventory turnover KPIs with proper time-period handling"""
         
         # Check cache first
-        cache_key = f"inventory_turnover_kpis_{start_date}_{end_date}_{category_id or 'all'}"
-        cached_data = await self.cache.get_kpi_data("operational", "inventory_turnover", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date, "category_id": category_id}
+        cached_data = await self.cache.get_kpi_data("operational", "inventory_turnover", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -1352,7 +1322,7 @@ class OperationalKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("operational", "inventory_turnover", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("operational", "inventory_turnover", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -1373,8 +1343,8 @@ class OperationalKPICalculator:
     ) -> Dict[str, Any]:
         """Build stockout frequency monitoring with alert threshold configuration"""
         
-        cache_key = f"stockout_frequency_kpis_{start_date}_{end_date}_{alert_threshold}"
-        cached_data = await self.cache.get_kpi_data("operational", "stockout_frequency", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date, "alert_threshold": alert_threshold}
+        cached_data = await self.cache.get_kpi_data("operational", "stockout_frequency", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -1424,7 +1394,7 @@ class OperationalKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("operational", "stockout_frequency", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("operational", "stockout_frequency", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -1449,8 +1419,8 @@ class OperationalKPICalculator:
     ) -> Dict[str, Any]:
         """Implement carrying cost calculations and dead stock percentage analysis"""
         
-        cache_key = f"carrying_cost_kpis_{start_date}_{end_date}_{carrying_cost_rate}"
-        cached_data = await self.cache.get_kpi_data("operational", "carrying_cost", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date, "carrying_cost_rate": carrying_cost_rate}
+        cached_data = await self.cache.get_kpi_data("operational", "carrying_cost", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -1500,7 +1470,7 @@ class OperationalKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("operational", "carrying_cost", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("operational", "carrying_cost", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -1529,7 +1499,7 @@ class OperationalKPICalculator:
         try:
             # Build category filter
             category_filter = ""
-            params = {"start_date": start_date, "end_date": end_date}
+            params = date_range_params(start_date, end_date)
             
             if category_id:
                 category_filter = "AND ii.category_id = :category_id"
@@ -1537,28 +1507,35 @@ class OperationalKPICalculator:
             
             # Calculate turnover metrics
             turnover_query = text(f"""
-                WITH sales_data AS (
+                WITH item_sales AS (
+                    SELECT 
+                        item_id,
+                        SUM(units) as units_sold,
+                        SUM(revenue) as sales_value,
+                        SUM(invoice_count) as transaction_count,
+                        MAX(sale_date) as last_sale_date
+                    FROM sales_daily_facts
+                    WHERE {date_range_filter('sale_date')}
+                    GROUP BY item_id
+                ),
+                sales_data AS (
                     SELECT 
                         ii.id as item_id,
                         ii.name as item_name,
-                        COALESCE(SUM(inv_items.quantity), 0) as units_sold,
+                        COALESCE(s.units_sold, 0) as units_sold,
                         -- Calculate average stock as (initial_stock + final_stock) / 2
                         -- For simplicity, use current stock + units_sold as approximation of average stock during period
                         CASE 
-                            WHEN COALESCE(SUM(inv_items.quantity), 0) > 0 
-                            THEN GREATEST(ii.stock_quantity + COALESCE(SUM(inv_items.quantity), 0) / 2.0, 1.0)
+                            WHEN COALESCE(s.units_sold, 0) > 0 
+                            THEN GREATEST(ii.stock_quantity + s.units_sold / 2.0, 1.0)
                             ELSE GREATEST(ii.stock_quantity, 1.0)
                         END as avg_stock,
-                        COALESCE(SUM(inv_items.quantity * inv_items.unit_price), 0) as sales_value,
-                        COUNT(DISTINCT inv.id) as transaction_count,
-                        MAX(inv.created_at) as last_sale_date
+                        COALESCE(s.sales_value, 0) as sales_value,
+                        COALESCE(s.transaction_count, 0) as transaction_count,
+                        s.last_sale_date
                     FROM inventory_items ii
-                    LEFT JOIN invoice_items inv_items ON ii.id = inv_items.inventory_item_id
-                    LEFT JOIN invoices inv ON inv_items.invoice_id = inv.id 
-                        AND DATE(inv.created_at) BETWEEN :start_date AND :end_date
-                        AND inv.status IN ('completed', 'paid', 'partially_paid')
+                    LEFT JOIN item_sales s ON s.item_id = ii.id
                     WHERE ii.is_active = true {category_filter}
-                    GROUP BY ii.id, ii.name, ii.stock_quantity
                 ),
                 turnover_calculations AS (
                     SELECT 
@@ -1647,7 +1624,7 @@ class OperationalKPICalculator:
             except:
                 pass
                 
-            stockout_query = text("""
+            stockout_query = text(f"""
                 WITH stockout_analysis AS (
                     SELECT 
                         ii.id as item_id,
@@ -1670,7 +1647,7 @@ class OperationalKPICalculator:
                     FROM inventory_items ii
                     LEFT JOIN invoice_items inv_items ON ii.id = inv_items.inventory_item_id
                     LEFT JOIN invoices inv ON inv_items.invoice_id = inv.id 
-                        AND DATE(inv.created_at) BETWEEN :start_date AND :end_date
+                        AND {date_range_filter('inv.created_at')}
                         AND inv.status IN ('completed', 'paid', 'partially_paid')
                     WHERE ii.is_active = true
                     GROUP BY ii.id, ii.name, ii.stock_quantity
@@ -1685,10 +1662,7 @@ class OperationalKPICalculator:
                 FROM stockout_analysis
             """)
             
-            result = self.db.execute(stockout_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(stockout_query, date_range_params(start_date, end_date)).fetchone()
             
             total_items = result.total_items or 0
             stockout_items = result.stockout_items or 0
@@ -1733,7 +1707,7 @@ class OperationalKPICalculator:
             except:
                 pass
             
-            carrying_cost_query = text("""
+            carrying_cost_query = text(f"""
                 WITH inventory_value AS (
                     SELECT 
                         ii.id as item_id,
@@ -1745,7 +1719,7 @@ class OperationalKPICalculator:
                     FROM inventory_items ii
                     LEFT JOIN invoice_items inv_items ON ii.id = inv_items.inventory_item_id
                     LEFT JOIN invoices inv ON inv_items.invoice_id = inv.id 
-                        AND DATE(inv.created_at) BETWEEN :start_date AND :end_date
+                        AND {date_range_filter('inv.created_at')}
                         AND inv.status IN ('completed', 'paid', 'partially_paid')
                     WHERE ii.is_active = true
                     GROUP BY ii.id, ii.name, ii.stock_quantity, ii.purchase_price
@@ -1759,10 +1733,7 @@ class OperationalKPICalculator:
                 FROM inventory_value
             """)
             
-            result = self.db.execute(carrying_cost_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(carrying_cost_query, date_range_params(start_date, end_date)).fetchone()
             
             total_inventory_value = float(result.total_inventory_value or 0)
             dead_stock_value = float(result.dead_stock_value or 0)
@@ -1812,7 +1783,7 @@ class OperationalKPICalculator:
             except:
                 pass
                 
-            dead_stock_query = text("""
+            dead_stock_query = text(f"""
                 WITH stock_analysis AS (
                     SELECT 
                         ii.id as item_id,
@@ -1831,7 +1802,7 @@ class OperationalKPICalculator:
                     FROM inventory_items ii
                     LEFT JOIN invoice_items inv_items ON ii.id = inv_items.inventory_item_id
                     LEFT JOIN invoices inv ON inv_items.invoice_id = inv.id 
-                        AND DATE(inv.created_at) BETWEEN :start_date AND :end_date
+                        AND {date_range_filter('inv.created_at')}
                         AND inv.status IN ('completed', 'paid', 'partially_paid')
                     WHERE ii.is_active = true AND ii.stock_quantity > 0
                     GROUP BY ii.id, ii.name, ii.stock_quantity, ii.purchase_price
@@ -1848,10 +1819,7 @@ class OperationalKPICalculator:
                 FROM stock_analysis
             """)
             
-            result = self.db.execute(dead_stock_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(dead_stock_query, date_range_params(start_date, end_date)).fetchone()
             
             total_items = result.total_items or 0
             total_inventory_value = float(result.total_inventory_value or 0)
@@ -1953,7 +1921,7 @@ class OperationalKPICalculator:
         try:
             # Build category filter
             category_filter = ""
-            params = {"start_date": start_date, "end_date": end_date}
+            params = date_range_params(start_date, end_date)
             
             if category_id:
                 category_filter = "AND ii.category_id = :category_id"
@@ -1980,7 +1948,7 @@ class OperationalKPICalculator:
                     LEFT JOIN categories c ON ii.category_id = c.id
                     LEFT JOIN invoice_items inv_items ON ii.id = inv_items.inventory_item_id
                     LEFT JOIN invoices inv ON inv_items.invoice_id = inv.id 
-                        AND DATE(inv.created_at) BETWEEN :start_date AND :end_date
+                        AND {date_range_filter('inv.created_at')}
                         AND inv.status IN ('completed', 'paid', 'partially_paid')
                     WHERE ii.is_active = true {category_filter}
                     GROUP BY ii.id, ii.name, c.name, ii.stock_quantity
@@ -2202,7 +2170,7 @@ class OperationalKPICalculator:
         """Calculate the cost impact of stockouts"""
         
         try:
-            cost_impact_query = text("""
+            cost_impact_query = text(f"""
                 WITH stockout_impact AS (
                     SELECT 
                         ii.id as item_id,
@@ -2218,7 +2186,7 @@ class OperationalKPICalculator:
                     FROM inventory_items ii
                     LEFT JOIN invoice_items inv_items ON ii.id = inv_items.inventory_item_id
                     LEFT JOIN invoices inv ON inv_items.invoice_id = inv.id 
-                        AND DATE(inv.created_at) BETWEEN :start_date AND :end_date
+                        AND {date_range_filter('inv.created_at')}
                         AND inv.status IN ('completed', 'paid', 'partially_paid')
                     WHERE ii.is_active = true
                     GROUP BY ii.id, ii.name, ii.stock_quantity, ii.purchase_price
@@ -2232,10 +2200,7 @@ class OperationalKPICalculator:
                 FROM stockout_impact
             """)
             
-            result = self.db.execute(cost_impact_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(cost_impact_query, date_range_params(start_date, end_date)).fetchone()
             
             return {
                 "items_with_lost_sales": result.items_with_lost_sales or 0,
@@ -2366,7 +2331,7 @@ class OperationalKPICalculator:
         try:
             # Build category filter
             category_filter = ""
-            params = {"start_date": start_date, "end_date": end_date}
+            params = date_range_params(start_date, end_date)
             
             if category_id:
                 category_filter = "AND ii.category_id = :category_id"
@@ -2375,16 +2340,14 @@ class OperationalKPICalculator:
             weekly_query = text(f"""
                 WITH weekly_sales AS (
                     SELECT 
-                        DATE_TRUNC('week', inv.created_at) as week_start,
-                        COALESCE(SUM(inv_items.quantity), 0) as weekly_units_sold,
+                        DATE_TRUNC('week', f.sale_date) as week_start,
+                        COALESCE(SUM(f.units), 0) as weekly_units_sold,
                         COALESCE(AVG(ii.stock_quantity), 0) as avg_weekly_stock
-                    FROM inventory_items ii
-                    LEFT JOIN invoice_items inv_items ON ii.id = inv_items.inventory_item_id
-                    LEFT JOIN invoices inv ON inv_items.invoice_id = inv.id 
-                        AND DATE(inv.created_at) BETWEEN :start_date AND :end_date
-                        AND inv.status IN ('completed', 'paid', 'partially_paid')
-                    WHERE ii.is_active = true {category_filter}
-                    GROUP BY DATE_TRUNC('week', inv.created_at)
+                    FROM sales_daily_facts f
+                    JOIN inventory_items ii ON f.item_id = ii.id
+                    WHERE {date_range_filter('f.sale_date')}
+                    AND ii.is_active = true {category_filter}
+                    GROUP BY DATE_TRUNC('week', f.sale_date)
                     ORDER BY week_start
                 )
                 SELECT 
@@ -2433,8 +2396,8 @@ class CustomerKPICalculator:
     ) -> Dict[str, Any]:
         """Calculate customer acquisition rate tracking with cohort analysis"""
         
-        cache_key = f"customer_acquisition_kpis_{start_date}_{end_date}"
-        cached_data = await self.cache.get_kpi_data("customer", "acquisition", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date}
+        cached_data = await self.cache.get_kpi_data("customer", "acquisition", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -2492,7 +2455,7 @@ class CustomerKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("customer", "acquisition", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("customer", "acquisition", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -2513,8 +2476,8 @@ class CustomerKPICalculator:
     ) -> Dict[str, Any]:
         """Calculate retention rate with customer lifecycle analysis"""
         
-        cache_key = f"customer_retention_kpis_{start_date}_{end_date}"
-        cached_data = await self.cache.get_kpi_data("customer", "retention", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date}
+        cached_data = await self.cache.get_kpi_data("customer", "retention", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -2569,7 +2532,7 @@ class CustomerKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("customer", "retention", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("customer", "retention", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -2590,8 +2553,8 @@ class CustomerKPICalculator:
     ) -> Dict[str, Any]:
         """Calculate average transaction value and customer lifetime value"""
         
-        cache_key = f"customer_value_kpis_{start_date}_{end_date}"
-        cached_data = await self.cache.get_kpi_data("customer", "value", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date}
+        cached_data = await self.cache.get_kpi_data("customer", "value", params=cache_params)
         
         if cached_data:
             return cached_data["data"]
@@ -2655,7 +2618,7 @@ class CustomerKPICalculator:
             }
             
             # Cache the results
-            await self.cache.set_kpi_data("customer", "value", result, ttl=self.cache_ttl, period=cache_key)
+            await self.cache.set_kpi_data("customer", "value", result, ttl=self.cache_ttl, params=cache_params)
             
             return result
             
@@ -2673,19 +2636,16 @@ class CustomerKPICalculator:
         
         try:
             # Get new customers in the period
-            new_customers_query = text("""
+            new_customers_query = text(f"""
                 SELECT 
                     COUNT(*) as new_customers,
                     COUNT(DISTINCT DATE(created_at)) as active_days
                 FROM customers 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
+                WHERE {date_range_filter('created_at')}
                 AND is_active = true
             """)
             
-            result = self.db.execute(new_customers_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(new_customers_query, date_range_params(start_date, end_date)).fetchone()
             
             new_customers = result.new_customers or 0
             active_days = result.active_days or 1
@@ -2729,18 +2689,15 @@ class CustomerKPICalculator:
         
         try:
             # Get customers who made purchases in the period
-            active_customers_query = text("""
+            active_customers_query = text(f"""
                 SELECT 
                     COUNT(DISTINCT customer_id) as active_customers
                 FROM invoices 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
+                WHERE {date_range_filter('created_at')}
                 AND status IN ('completed', 'paid', 'partially_paid')
             """)
             
-            active_result = self.db.execute(active_customers_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            active_result = self.db.execute(active_customers_query, date_range_params(start_date, end_date)).fetchone()
             
             active_customers = active_result.active_customers or 0
             
@@ -2749,44 +2706,42 @@ class CustomerKPICalculator:
             prev_start = start_date - timedelta(days=period_days)
             prev_end = start_date - timedelta(days=1)
             
-            previous_customers_query = text("""
+            previous_customers_query = text(f"""
                 SELECT 
                     COUNT(DISTINCT customer_id) as previous_customers
                 FROM invoices 
-                WHERE DATE(created_at) BETWEEN :prev_start AND :prev_end
+                WHERE {date_range_filter('created_at', 'prev_start', 'prev_end')}
                 AND status IN ('completed', 'paid', 'partially_paid')
             """)
             
-            previous_result = self.db.execute(previous_customers_query, {
-                "prev_start": prev_start,
-                "prev_end": prev_end
-            }).fetchone()
+            previous_result = self.db.execute(
+                previous_customers_query,
+                date_range_params(prev_start, prev_end, "prev_start", "prev_end")
+            ).fetchone()
             
             previous_customers = previous_result.previous_customers or 0
             
             # Get retained customers (customers who purchased in both periods)
-            retained_customers_query = text("""
+            retained_customers_query = text(f"""
                 SELECT COUNT(DISTINCT customer_id) as retained_customers
                 FROM (
                     SELECT customer_id
                     FROM invoices 
-                    WHERE DATE(created_at) BETWEEN :prev_start AND :prev_end
+                    WHERE {date_range_filter('created_at', 'prev_start', 'prev_end')}
                     AND status IN ('completed', 'paid', 'partially_paid')
                     
                     INTERSECT
                     
                     SELECT customer_id
                     FROM invoices 
-                    WHERE DATE(created_at) BETWEEN :start_date AND :end_date
+                    WHERE {date_range_filter('created_at')}
                     AND status IN ('completed', 'paid', 'partially_paid')
                 ) retained
             """)
             
             retained_result = self.db.execute(retained_customers_query, {
-                "prev_start": prev_start,
-                "prev_end": prev_end,
-                "start_date": start_date,
-                "end_date": end_date
+                **date_range_params(prev_start, prev_end, "prev_start", "prev_end"),
+                **date_range_params(start_date, end_date)
             }).fetchone()
             
             retained_customers = retained_result.retained_customers or 0
@@ -2799,22 +2754,19 @@ class CustomerKPICalculator:
             churn_rate = (churned_customers / previous_customers * 100) if previous_customers > 0 else 0
             
             # Calculate repeat purchase rate
-            repeat_customers_query = text("""
+            repeat_customers_query = text(f"""
                 SELECT COUNT(DISTINCT customer_id) as repeat_customers
                 FROM (
                     SELECT customer_id, COUNT(*) as purchase_count
                     FROM invoices 
-                    WHERE DATE(created_at) BETWEEN :start_date AND :end_date
+                    WHERE {date_range_filter('created_at')}
                     AND status IN ('completed', 'paid', 'partially_paid')
                     GROUP BY customer_id
                     HAVING COUNT(*) > 1
                 ) repeat_buyers
             """)
             
-            repeat_result = self.db.execute(repeat_customers_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            repeat_result = self.db.execute(repeat_customers_query, date_range_params(start_date, end_date)).fetchone()
             
             repeat_customers = repeat_result.repeat_customers or 0
             repeat_purchase_rate = (repeat_customers / active_customers * 100) if active_customers > 0 else 0
@@ -2848,7 +2800,7 @@ class CustomerKPICalculator:
         
         try:
             # Calculate average transaction value and customer lifetime value
-            value_query = text("""
+            value_query = text(f"""
                 SELECT 
                     COUNT(DISTINCT i.customer_id) as unique_customers,
                     COUNT(i.id) as total_transactions,
@@ -2857,14 +2809,11 @@ class CustomerKPICalculator:
                     COALESCE(MAX(i.total_amount), 0) as max_transaction_value,
                     COALESCE(MIN(i.total_amount), 0) as min_transaction_value
                 FROM invoices i
-                WHERE DATE(i.created_at) BETWEEN :start_date AND :end_date
+                WHERE {date_range_filter('i.created_at')}
                 AND i.status IN ('completed', 'paid', 'partially_paid')
             """)
             
-            result = self.db.execute(value_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(value_query, date_range_params(start_date, end_date)).fetchone()
             
             unique_customers = result.unique_customers or 0
             total_transactions = result.total_transactions or 0
@@ -2880,23 +2829,19 @@ class CustomerKPICalculator:
             purchase_frequency = (total_transactions / unique_customers) if unique_customers > 0 else 0
             
             # Get customer value distribution
-            value_distribution_query = text("""
+            value_distribution_query = text(f"""
                 SELECT 
                     customer_id,
-                    SUM(total_amount) as customer_total_value,
-                    COUNT(*) as customer_transaction_count,
-                    AVG(total_amount) as customer_avg_value
-                FROM invoices 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
-                AND status IN ('completed', 'paid', 'partially_paid')
+                    SUM(invoice_amount) as customer_total_value,
+                    ROUND(SUM(invoice_share))::integer as customer_transaction_count,
+                    SUM(invoice_amount) / NULLIF(SUM(invoice_share), 0) as customer_avg_value
+                FROM sales_daily_facts
+                WHERE {date_range_filter('sale_date')}
                 GROUP BY customer_id
                 ORDER BY customer_total_value DESC
             """)
             
-            distribution_results = self.db.execute(value_distribution_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            distribution_results = self.db.execute(value_distribution_query, date_range_params(start_date, end_date)).fetchall()
             
             # Calculate percentiles
             customer_values = [float(row.customer_total_value) for row in distribution_results]
@@ -2952,22 +2897,19 @@ class CustomerKPICalculator:
         
         try:
             # Get customer cohorts by month
-            cohort_query = text("""
+            cohort_query = text(f"""
                 SELECT 
                     DATE_TRUNC('month', created_at) as cohort_month,
                     COUNT(*) as cohort_size,
                     AVG(total_purchases) as avg_cohort_value
                 FROM customers 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
+                WHERE {date_range_filter('created_at')}
                 AND is_active = true
                 GROUP BY DATE_TRUNC('month', created_at)
                 ORDER BY cohort_month
             """)
             
-            cohort_results = self.db.execute(cohort_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            cohort_results = self.db.execute(cohort_query, date_range_params(start_date, end_date)).fetchall()
             
             cohorts = []
             for row in cohort_results:
@@ -3002,7 +2944,7 @@ class CustomerKPICalculator:
         
         try:
             # Analyze customer lifecycle stages
-            lifecycle_query = text("""
+            lifecycle_query = text(f"""
                 SELECT 
                     c.id,
                     c.name,
@@ -3014,16 +2956,13 @@ class CustomerKPICalculator:
                     COALESCE(EXTRACT(DAYS FROM (CURRENT_DATE - MAX(i.created_at))), 999) as days_since_last_purchase
                 FROM customers c
                 LEFT JOIN invoices i ON c.id = i.customer_id 
-                    AND DATE(i.created_at) BETWEEN :start_date AND :end_date
+                    AND {date_range_filter('i.created_at')}
                     AND i.status IN ('completed', 'paid', 'partially_paid')
                 WHERE c.is_active = true
                 GROUP BY c.id, c.name, c.created_at, c.total_purchases
             """)
             
-            lifecycle_results = self.db.execute(lifecycle_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            lifecycle_results = self.db.execute(lifecycle_query, date_range_params(start_date, end_date)).fetchall()
             
             # Categorize customers by lifecycle stage
             new_customers = []
@@ -3090,7 +3029,7 @@ class CustomerKPICalculator:
         
         try:
             # Segment customers by value and frequency
-            segments_query = text("""
+            segments_query = text(f"""
                 SELECT 
                     c.id,
                     c.name,
@@ -3100,7 +3039,7 @@ class CustomerKPICalculator:
                     COALESCE(AVG(i.total_amount), 0) as avg_transaction_value
                 FROM customers c
                 LEFT JOIN invoices i ON c.id = i.customer_id 
-                    AND DATE(i.created_at) BETWEEN :start_date AND :end_date
+                    AND {date_range_filter('i.created_at')}
                     AND i.status IN ('completed', 'paid', 'partially_paid')
                 WHERE c.is_active = true
                 GROUP BY c.id, c.name, c.customer_type
@@ -3108,10 +3047,7 @@ class CustomerKPICalculator:
                 ORDER BY total_value DESC
             """)
             
-            segment_results = self.db.execute(segments_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            segment_results = self.db.execute(segments_query, date_range_params(start_date, end_date)).fetchall()
             
             # Categorize customers into segments
             vip_customers = []
@@ -3190,21 +3126,18 @@ class CustomerKPICalculator:
         
         try:
             # Get customer value distribution
-            distribution_query = text("""
+            distribution_query = text(f"""
                 SELECT 
                     SUM(total_amount) as customer_value,
                     COUNT(*) as transaction_count
                 FROM invoices 
-                WHERE DATE(created_at) BETWEEN :start_date AND :end_date
+                WHERE {date_range_filter('created_at')}
                 AND status IN ('completed', 'paid', 'partially_paid')
                 GROUP BY customer_id
                 ORDER BY customer_value DESC
             """)
             
-            distribution_results = self.db.execute(distribution_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            distribution_results = self.db.execute(distribution_query, date_range_params(start_date, end_date)).fetchall()
             
             customer_values = [float(row.customer_value) for row in distribution_results]
             
@@ -3273,7 +3206,7 @@ class CustomerKPICalculator:
         
         try:
             # Calculate RFM metrics for each customer
-            rfm_query = text("""
+            rfm_query = text(f"""
                 SELECT 
                     c.id as customer_id,
                     c.name as customer_name,
@@ -3282,7 +3215,7 @@ class CustomerKPICalculator:
                     COALESCE(SUM(i.total_amount), 0) as monetary_value
                 FROM customers c
                 LEFT JOIN invoices i ON c.id = i.customer_id 
-                    AND DATE(i.created_at) BETWEEN :start_date AND :end_date
+                    AND {date_range_filter('i.created_at')}
                     AND i.status IN ('completed', 'paid', 'partially_paid')
                 WHERE c.is_active = true
                 GROUP BY c.id, c.name
@@ -3290,10 +3223,7 @@ class CustomerKPICalculator:
                 ORDER BY monetary_value DESC
             """)
             
-            rfm_results = self.db.execute(rfm_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            rfm_results = self.db.execute(rfm_query, date_range_params(start_date, end_date)).fetchall()
             
             if not rfm_results:
                 return {
@@ -3411,7 +3341,7 @@ class CustomerKPICalculator:
             # In a real scenario, you'd include marketing spend, sales costs, etc.
             
             # Get new customers and their first purchase values
-            cac_query = text("""
+            cac_query = text(f"""
                 SELECT 
                     COUNT(*) as new_customers,
                     COALESCE(AVG(first_purchase.total_amount), 0) as avg_first_purchase_value
@@ -3424,14 +3354,11 @@ class CustomerKPICalculator:
                     ORDER BY i.created_at ASC
                     LIMIT 1
                 ) first_purchase ON true
-                WHERE DATE(c.created_at) BETWEEN :start_date AND :end_date
+                WHERE {date_range_filter('c.created_at')}
                 AND c.is_active = true
             """)
             
-            result = self.db.execute(cac_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            result = self.db.execute(cac_query, date_range_params(start_date, end_date)).fetchone()
             
             new_customers = result.new_customers or 0
             avg_first_purchase = float(result.avg_first_purchase_value or 0)
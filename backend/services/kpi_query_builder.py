@@ -0,0 +1,47 @@
+"""
+KPI Query Builder
+Shared helpers for raw KPI SQL so that date filters stay index-friendly
+
+Date filters are always emitted as half-open ranges on the raw column
+(``created_at >= :start_date AND created_at < :end_date_exclusive``) rather
+than ``DATE(created_at) BETWEEN ...``, which hides the column from indexes
+such as ``idx_invoices_created_at_status``.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Any
+
+
+def date_range_filter(column: str, start_param: str = "start_date", end_param: str = "end_date") -> str:
+    """
+    SQL predicate selecting whole days ``start_param`` .. ``end_param`` (inclusive)
+
+    Args:
+        column: Timestamp or date column, optionally table-qualified
+        start_param: Bind parameter holding the first day
+        end_param: Bind parameter holding the last day; the predicate binds
+            ``<end_param>_exclusive``, supplied by ``date_range_params``
+
+    Returns:
+        SQL fragment usable inside a WHERE or JOIN condition
+    """
+    return f"{column} >= :{start_param} AND {column} < :{end_param}_exclusive"
+
+
+def date_range_params(
+    start_date: date,
+    end_date: date,
+    start_param: str = "start_date",
+    end_param: str = "end_date"
+) -> Dict[str, Any]:
+    """
+    Bind parameters for ``date_range_filter``
+
+    The inclusive ``end_param`` is kept alongside the exclusive bound for
+    queries that also use it outside the range predicate.
+    """
+    return {
+        start_param: start_date,
+        end_param: end_date,
+        f"{end_param}_exclusive": end_date + timedelta(days=1)
+    }
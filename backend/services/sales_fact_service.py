@@ -0,0 +1,182 @@
+"""
+Sales Fact Service for Advanced Analytics & Business Intelligence
+
+Maintains ``sales_daily_facts``, a daily roll-up of completed sales keyed by
+day x item x category x customer x invoice, so that KPI calculators aggregate
+a pre-joined fact table instead of re-scanning ``invoices`` and
+``invoice_items``.
+
+Facts are maintained per invoice: any change to an invoice rebuilds only that
+invoice's rows inside the caller's transaction. A nightly reconciliation
+rebuilds a trailing window day by day to catch changes made outside the
+invoice endpoints.
+
+Invoice-level amounts (total, labor, VAT) and the invoice count are
+allocated to lines in proportion to line totals, so sums over any roll-up
+that spans whole invoices are exact.
+
+Requirements covered: 1.1, 1.4
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text, bindparam
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Invoice statuses that count as sales in the facts (and in financial KPIs)
+FACT_INVOICE_STATUSES = ('completed', 'paid', 'partially_paid')
+
+# Trailing window rebuilt by the nightly reconciliation
+SALES_FACT_RECONCILE_DAYS = int(os.getenv("SALES_FACT_RECONCILE_DAYS", "35"))
+
+# Namespace for per-day advisory locks: invoice refreshes share a day,
+# day rebuilds hold it exclusively
+_FACT_LOCK_NAMESPACE = 7301
+
+_FACT_INSERT_SQL = """
+    WITH lines AS (
+        SELECT
+            DATE(i.created_at) as sale_date,
+            i.id as invoice_id,
+            i.customer_id,
+            ii.inventory_item_id as item_id,
+            item.category_id,
+            ii.quantity,
+            ii.total_price,
+            COALESCE(ii.quantity * item.purchase_price, 0) as cost,
+            i.total_amount,
+            COALESCE(i.labor_cost_percentage, 0) as labor_cost_percentage,
+            COALESCE(i.vat_percentage, 0) as vat_percentage,
+            CASE
+                WHEN SUM(ii.total_price) OVER invoice_lines > 0
+                THEN ii.total_price / SUM(ii.total_price) OVER invoice_lines
+                ELSE 1.0 / COUNT(*) OVER invoice_lines
+            END as weight
+        FROM invoice_items ii
+        JOIN invoices i ON ii.invoice_id = i.id
+        LEFT JOIN inventory_items item ON ii.inventory_item_id = item.id
+        WHERE i.status IN :statuses
+            {window_filter}
+        WINDOW invoice_lines AS (PARTITION BY i.id)
+    )
+    INSERT INTO sales_daily_facts (
+        id, sale_date, invoice_id, item_id, category_id, customer_id,
+        units, revenue, cost, invoice_amount, labor_cost, tax_cost,
+        invoice_count, invoice_share, updated_at
+    )
+    SELECT
+        gen_random_uuid(),
+        sale_date,
+        invoice_id,
+        item_id,
+        category_id,
+        customer_id,
+        SUM(quantity),
+        SUM(total_price),
+        SUM(cost),
+        SUM(total_amount * weight),
+        SUM(total_amount * labor_cost_percentage / 100 * weight),
+        SUM(total_amount * vat_percentage / 100 * weight),
+        COUNT(DISTINCT invoice_id),
+        SUM(weight),
+        now()
+    FROM lines
+    GROUP BY sale_date, invoice_id, item_id, category_id, customer_id
+"""
+
+class SalesFactService:
+    """
+    Rebuilds daily sales facts for changed invoices and days
+    """
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    @staticmethod
+    def backfill_statement():
+        """Statement that builds facts for every existing invoice"""
+        return text(_FACT_INSERT_SQL.format(window_filter="")).bindparams(
+            bindparam('statuses', value=list(FACT_INVOICE_STATUSES), expanding=True)
+        )
+
+    def _lock_day(self, day: date, exclusive: bool) -> None:
+        """Take the transaction-scoped advisory lock of a fact day"""
+        lock_function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+        self.db.execute(
+            text(f"SELECT {lock_function}(:namespace, :day_key)"),
+            {"namespace": _FACT_LOCK_NAMESPACE, "day_key": day.toordinal()}
+        )
+
+    def refresh_range(self, start_date: date, end_date: date) -> None:
+        """
+        Rebuild the facts for every day in [start_date, end_date]
+
+        Runs in the caller's transaction; the caller commits. Exclusive
+        per-day advisory locks keep invoice refreshes of those days out
+        until the caller's transaction ends.
+        """
+        day = start_date
+        while day <= end_date:
+            self._lock_day(day, exclusive=True)
+            day += timedelta(days=1)
+
+        self.db.execute(
+            text("""
+                DELETE FROM sales_daily_facts
+                WHERE sale_date >= :start_date AND sale_date <= :end_date
+            """),
+            {"start_date": start_date, "end_date": end_date}
+        )
+
+        insert_query = text(_FACT_INSERT_SQL.format(window_filter="""
+            AND i.created_at >= :window_start
+            AND i.created_at < :window_end
+        """)).bindparams(bindparam('statuses', expanding=True))
+
+        self.db.execute(insert_query, {
+            "statuses": list(FACT_INVOICE_STATUSES),
+            "window_start": start_date,
+            "window_end": end_date + timedelta(days=1)
+        })
+
+    def refresh_for_invoice(self, invoice_id, invoice_date: Optional[date]) -> None:
+        """
+        Rebuild an invoice's facts after it was created, changed status or
+        was deleted
+
+        Runs in the caller's transaction; the caller commits. Only the
+        invoice's own rows are replaced, so refreshes of different invoices
+        on the same day do not wait on each other.
+        """
+        self._lock_day(invoice_date or date.today(), exclusive=False)
+
+        self.db.execute(
+            text("DELETE FROM sales_daily_facts WHERE invoice_id = :invoice_id"),
+            {"invoice_id": str(invoice_id)}
+        )
+
+        insert_query = text(_FACT_INSERT_SQL.format(window_filter="""
+            AND i.id = :invoice_id
+        """)).bindparams(bindparam('statuses', expanding=True))
+
+        self.db.execute(insert_query, {
+            "statuses": list(FACT_INVOICE_STATUSES),
+            "invoice_id": str(invoice_id)
+        })
+
+    def reconcile(self, days: int = SALES_FACT_RECONCILE_DAYS) -> None:
+        """Rebuild the trailing ``days`` window, committing one day at a time"""
+        end_date = date.today()
+        day = end_date - timedelta(days=days)
+        while day <= end_date:
+            try:
+                self.refresh_range(day, day)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            day += timedelta(days=1)
@@ -19,6 +19,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 import logging
 
+from services.sales_history_service import SalesHistoryService, SalesHistoryMatrix
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -68,6 +70,24 @@ class ReorderPointCalculation:
     demand_variability: float
     stockout_probability: float
 
+@dataclass
+class BatchStockMetrics:
+    """Vectorized demand and stock metrics for a batch of items (one array entry per item)"""
+    item_ids: List[str]
+    sales_days: np.ndarray
+    avg_daily_demand: np.ndarray
+    demand_std_dev: np.ndarray
+    annual_demand: np.ndarray
+    total_sales: np.ndarray
+    holding_cost_per_unit: np.ndarray
+    economic_order_quantity: np.ndarray
+    lead_time_days: np.ndarray
+    safety_stock: np.ndarray
+    reorder_point: np.ndarray
+    stockout_probability: np.ndarray
+    service_level: float
+    valid: np.ndarray  # Enough sales data and a positive holding cost
+
 class StockOptimizationService:
     """
     Advanced stock optimization service with multiple algorithms
@@ -96,55 +116,173 @@ class StockOptimizationService:
             # Get items to analyze
             items_data = self._get_items_for_analysis(item_ids, category_ids)
             
-            recommendations = []
-            
-            for item_data in items_data:
-                try:
-                    # Get historical sales data
-                    sales_data = self._get_item_sales_data(item_data['id'])
-                    
-                    if len(sales_data) < 5:  # Need minimum data for analysis
-                        continue
-                    
-                    # Calculate demand statistics
-                    demand_stats = self._calculate_demand_statistics(sales_data)
-                    
-                    # Calculate EOQ
-                    eoq_result = await self._calculate_economic_order_quantity(
-                        item_data, demand_stats
-                    )
-                    
-                    # Calculate reorder point
-                    reorder_result = await self._calculate_reorder_point(
-                        item_data, demand_stats
-                    )
-                    
-                    # Generate recommendation
-                    recommendation = await self._generate_item_recommendation(
-                        item_data, demand_stats, eoq_result, reorder_result
-                    )
-                    
-                    if recommendation and (not priority_filter or recommendation.priority_level == priority_filter):
-                        recommendations.append(recommendation)
-                        
-                except Exception as e:
-                    logger.warning(f"Error analyzing item {item_data['id']}: {str(e)}")
-                    continue
-            
-            # Sort by priority and estimated savings
-            recommendations.sort(
-                key=lambda x: (
-                    {'high': 0, 'medium': 1, 'low': 2}[x.priority_level],
-                    -float(x.estimated_savings)
-                )
+            # Load sales history for every item in one query
+            history = SalesHistoryService(self.db).load_daily_demand(
+                [item['id'] for item in items_data]
             )
             
-            return recommendations
+            return await self.generate_stock_recommendations_batch(
+                items_data, history, priority_filter
+            )
             
         except Exception as e:
             logger.error(f"Error generating stock recommendations: {str(e)}")
             raise
     
+    async def generate_stock_recommendations_batch(
+        self,
+        items_data: List[Dict[str, Any]],
+        history: SalesHistoryMatrix,
+        priority_filter: Optional[str] = None
+    ) -> List[StockOptimizationRecommendation]:
+        """
+        Generate recommendations for a whole batch from a demand matrix
+        
+        Demand statistics, EOQ, safety stock and reorder points are computed
+        for every item at once; recommendation objects are only built for
+        items that need action.
+        """
+        metrics = self.calculate_batch_stock_metrics(items_data, history)
+        
+        current_stock = np.array(
+            [item['stock_quantity'] or 0 for item in items_data], dtype=np.float64
+        )
+        
+        # Same precedence as the per-item rules: reorder, reduce, discontinue
+        needs_reorder = metrics.valid & (current_stock <= metrics.reorder_point)
+        needs_reduce = metrics.valid & ~needs_reorder & (
+            current_stock > metrics.economic_order_quantity * 2
+        )
+        needs_discontinue = metrics.valid & ~needs_reorder & ~needs_reduce & (
+            metrics.avg_daily_demand < 0.1
+        )
+        
+        recommendations = []
+        
+        for i in np.flatnonzero(needs_reorder | needs_reduce | needs_discontinue):
+            item_data = items_data[i]
+            
+            try:
+                demand_stats = {
+                    'avg_daily_demand': float(metrics.avg_daily_demand[i]),
+                    'std_dev': float(metrics.demand_std_dev[i]),
+                    'annual_demand': float(metrics.annual_demand[i]),
+                    'total_sales': float(metrics.total_sales[i])
+                }
+                eoq_result = self._eoq_calculation_from_metrics(item_data, metrics, i)
+                reorder_result = ReorderPointCalculation(
+                    item_id=item_data['id'],
+                    reorder_point=int(metrics.reorder_point[i]),
+                    lead_time_days=int(metrics.lead_time_days[i]),
+                    average_daily_demand=demand_stats['avg_daily_demand'],
+                    safety_stock=int(metrics.safety_stock[i]),
+                    service_level=metrics.service_level,
+                    demand_variability=demand_stats['std_dev'],
+                    stockout_probability=float(metrics.stockout_probability[i])
+                )
+                
+                recommendation = await self._generate_item_recommendation(
+                    item_data, demand_stats, eoq_result, reorder_result
+                )
+                
+                if recommendation and (not priority_filter or recommendation.priority_level == priority_filter):
+                    recommendations.append(recommendation)
+                    
+            except Exception as e:
+                logger.warning(f"Error analyzing item {item_data['id']}: {str(e)}")
+                continue
+        
+        # Sort by priority and estimated savings
+        recommendations.sort(
+            key=lambda x: (
+                {'high': 0, 'medium': 1, 'low': 2}[x.priority_level],
+                -float(x.estimated_savings)
+            )
+        )
+        
+        return recommendations
+    
+    def calculate_batch_stock_metrics(
+        self,
+        items_data: List[Dict[str, Any]],
+        history: SalesHistoryMatrix,
+        service_level: Optional[float] = None
+    ) -> BatchStockMetrics:
+        """
+        Compute demand statistics, EOQ, safety stock and reorder points for
+        every item in one pass over the demand matrix
+        
+        Statistics are taken over days with sales only, matching
+        _calculate_demand_statistics for the single-item path.
+        """
+        from scipy.stats import norm
+        
+        service_level = service_level or self.default_service_level
+        item_ids = [item['id'] for item in items_data]
+        
+        # Align matrix rows with items_data; items without history get empty rows
+        rows = np.array([history.item_index.get(item_id, -1) for item_id in item_ids], dtype=np.int64)
+        has_row = rows >= 0
+        
+        observed = np.zeros((len(item_ids), history.num_days), dtype=bool)
+        quantities = np.zeros((len(item_ids), history.num_days), dtype=np.float64)
+        observed[has_row] = history.observed[rows[has_row]]
+        quantities[has_row] = np.where(history.observed[rows[has_row]], history.quantities[rows[has_row]], 0.0)
+        
+        sales_days = observed.sum(axis=1)
+        safe_days = np.maximum(sales_days, 1)
+        
+        # Demand statistics
+        total_sales = quantities.sum(axis=1)
+        avg_daily_demand = total_sales / safe_days
+        deviations = np.where(observed, quantities - avg_daily_demand[:, None], 0.0)
+        demand_std_dev = np.sqrt((deviations ** 2).sum(axis=1) / safe_days)
+        annual_demand = avg_daily_demand * 365
+        
+        # EOQ: sqrt(2 * D * S / H)
+        purchase_prices = np.array([item['purchase_price'] or 0 for item in items_data], dtype=np.float64)
+        holding_cost_per_unit = purchase_prices * self.default_holding_cost_rate
+        positive_holding = holding_cost_per_unit > 0
+        
+        eoq = np.sqrt(
+            2 * annual_demand * float(self.default_ordering_cost) /
+            np.where(positive_holding, holding_cost_per_unit, 1.0)
+        )
+        economic_order_quantity = np.maximum(1, np.round(eoq))
+        
+        # Safety stock and reorder point
+        lead_time_days = np.array(
+            [item.get('lead_time_days', self.default_lead_time_days) for item in items_data],
+            dtype=np.float64
+        )
+        z_score = norm.ppf(service_level)
+        safety_stock = np.maximum(0, np.trunc(z_score * np.sqrt(lead_time_days) * demand_std_dev))
+        reorder_point = np.maximum(1, np.trunc(avg_daily_demand * lead_time_days + safety_stock))
+        
+        lead_time_std = np.sqrt(lead_time_days) * demand_std_dev
+        stockout_probability = np.where(
+            demand_std_dev > 0,
+            1 - norm.cdf(safety_stock / np.where(lead_time_std > 0, lead_time_std, 1.0)),
+            0.0
+        )
+        
+        return BatchStockMetrics(
+            item_ids=item_ids,
+            sales_days=sales_days,
+            avg_daily_demand=avg_daily_demand,
+            demand_std_dev=demand_std_dev,
+            annual_demand=annual_demand,
+            total_sales=total_sales,
+            holding_cost_per_unit=holding_cost_per_unit,
+            economic_order_quantity=economic_order_quantity,
+            lead_time_days=lead_time_days,
+            safety_stock=safety_stock,
+            reorder_point=reorder_point,
+            stockout_probability=stockout_probability,
+            service_level=service_level,
+            valid=(sales_days >= 5) & positive_holding  # Need minimum data for analysis
+        )
+    
     async def calculate_safety_stock_optimization(
         self,
         item_id: str,
@@ -223,43 +361,8 @@ class StockOptimizationService:
             
             demand_stats = self._calculate_demand_statistics(sales_data)
             
-            # Use provided costs or defaults
-            ordering_cost = ordering_cost or self.default_ordering_cost
-            holding_cost_rate = holding_cost_rate or self.default_holding_cost_rate
-            
-            # Calculate holding cost per unit per year
-            item_value = Decimal(str(item_data['purchase_price']))
-            holding_cost_per_unit = item_value * Decimal(str(holding_cost_rate))
-            
-            # EOQ formula: sqrt(2 * D * S / H)
-            annual_demand = demand_stats['annual_demand']
-            
-            if holding_cost_per_unit <= 0:
-                raise ValueError("Holding cost per unit must be positive")
-            
-            eoq = math.sqrt(
-                (2 * annual_demand * float(ordering_cost)) / float(holding_cost_per_unit)
-            )
-            eoq = max(1, int(round(eoq)))
-            
-            # Calculate total annual cost
-            annual_ordering_cost = Decimal(str(annual_demand / eoq)) * ordering_cost
-            annual_holding_cost = Decimal(str(eoq / 2)) * holding_cost_per_unit
-            total_annual_cost = annual_ordering_cost + annual_holding_cost
-            
-            # Calculate order frequency and cycle time
-            order_frequency = annual_demand / eoq  # Orders per year
-            cycle_time_days = 365 / order_frequency  # Days between orders
-            
-            return EOQCalculation(
-                item_id=item_id,
-                economic_order_quantity=eoq,
-                annual_demand=annual_demand,
-                ordering_cost=ordering_cost,
-                holding_cost_per_unit=holding_cost_per_unit,
-                total_annual_cost=total_annual_cost,
-                order_frequency=order_frequency,
-                cycle_time_days=cycle_time_days
+            return self._compute_economic_order_quantity(
+                item_data, demand_stats, ordering_cost, holding_cost_rate
             )
             
         except Exception as e:
@@ -285,39 +388,8 @@ class StockOptimizationService:
             
             demand_stats = self._calculate_demand_statistics(sales_data)
             
-            # Use provided parameters or defaults
-            lead_time_days = lead_time_days or item_data.get('lead_time_days', self.default_lead_time_days)
-            service_level = service_level or self.default_service_level
-            
-            # Calculate average demand during lead time
-            average_daily_demand = demand_stats['avg_daily_demand']
-            lead_time_demand = average_daily_demand * lead_time_days
-            
-            # Calculate safety stock
-            from scipy.stats import norm
-            z_score = norm.ppf(service_level)
-            demand_std_dev = demand_stats['std_dev']
-            safety_stock = max(0, int(z_score * math.sqrt(lead_time_days) * demand_std_dev))
-            
-            # Reorder point = Lead time demand + Safety stock
-            reorder_point = max(1, int(lead_time_demand + safety_stock))
-            
-            # Calculate stockout probability
-            if demand_std_dev > 0:
-                current_z = safety_stock / (math.sqrt(lead_time_days) * demand_std_dev)
-                stockout_probability = 1 - norm.cdf(current_z)
-            else:
-                stockout_probability = 0.0
-            
-            return ReorderPointCalculation(
-                item_id=item_id,
-                reorder_point=reorder_point,
-                lead_time_days=lead_time_days,
-                average_daily_demand=average_daily_demand,
-                safety_stock=safety_stock,
-                service_level=service_level,
-                demand_variability=demand_std_dev,
-                stockout_probability=stockout_probability
+            return self._compute_reorder_point(
+                item_data, demand_stats, lead_time_days, service_level
             )
             
         except Exception as e:
@@ -462,13 +534,130 @@ class StockOptimizationService:
             'total_sales': float(total_sales)
         }
     
+    def _compute_economic_order_quantity(
+        self,
+        item_data: Dict[str, Any],
+        demand_stats: Dict[str, float],
+        ordering_cost: Optional[Decimal] = None,
+        holding_cost_rate: Optional[float] = None
+    ) -> EOQCalculation:
+        """Compute EOQ from already-loaded item data and demand statistics"""
+        # Use provided costs or defaults
+        ordering_cost = ordering_cost or self.default_ordering_cost
+        holding_cost_rate = holding_cost_rate or self.default_holding_cost_rate
+        
+        # Calculate holding cost per unit per year
+        item_value = Decimal(str(item_data['purchase_price']))
+        holding_cost_per_unit = item_value * Decimal(str(holding_cost_rate))
+        
+        # EOQ formula: sqrt(2 * D * S / H)
+        annual_demand = demand_stats['annual_demand']
+        
+        if holding_cost_per_unit <= 0:
+            raise ValueError("Holding cost per unit must be positive")
+        
+        eoq = math.sqrt(
+            (2 * annual_demand * float(ordering_cost)) / float(holding_cost_per_unit)
+        )
+        eoq = max(1, int(round(eoq)))
+        
+        # Calculate total annual cost
+        annual_ordering_cost = Decimal(str(annual_demand / eoq)) * ordering_cost
+        annual_holding_cost = Decimal(str(eoq / 2)) * holding_cost_per_unit
+        total_annual_cost = annual_ordering_cost + annual_holding_cost
+        
+        # Calculate order frequency and cycle time
+        order_frequency = annual_demand / eoq  # Orders per year
+        cycle_time_days = 365 / order_frequency  # Days between orders
+        
+        return EOQCalculation(
+            item_id=item_data['id'],
+            economic_order_quantity=eoq,
+            annual_demand=annual_demand,
+            ordering_cost=ordering_cost,
+            holding_cost_per_unit=holding_cost_per_unit,
+            total_annual_cost=total_annual_cost,
+            order_frequency=order_frequency,
+            cycle_time_days=cycle_time_days
+        )
+    
+    def _compute_reorder_point(
+        self,
+        item_data: Dict[str, Any],
+        demand_stats: Dict[str, float],
+        lead_time_days: Optional[int] = None,
+        service_level: Optional[float] = None
+    ) -> ReorderPointCalculation:
+        """Compute reorder point from already-loaded item data and demand statistics"""
+        # Use provided parameters or defaults
+        lead_time_days = lead_time_days or item_data.get('lead_time_days', self.default_lead_time_days)
+        service_level = service_level or self.default_service_level
+        
+        # Calculate average demand during lead time
+        average_daily_demand = demand_stats['avg_daily_demand']
+        lead_time_demand = average_daily_demand * lead_time_days
+        
+        # Calculate safety stock
+        from scipy.stats import norm
+        z_score = norm.ppf(service_level)
+        demand_std_dev = demand_stats['std_dev']
+        safety_stock = max(0, int(z_score * math.sqrt(lead_time_days) * demand_std_dev))
+        
+        # Reorder point = Lead time demand + Safety stock
+        reorder_point = max(1, int(lead_time_demand + safety_stock))
+        
+        # Calculate stockout probability
+        if demand_std_dev > 0:
+            current_z = safety_stock / (math.sqrt(lead_time_days) * demand_std_dev)
+            stockout_probability = 1 - norm.cdf(current_z)
+        else:
+            stockout_probability = 0.0
+        
+        return ReorderPointCalculation(
+            item_id=item_data['id'],
+            reorder_point=reorder_point,
+            lead_time_days=lead_time_days,
+            average_daily_demand=average_daily_demand,
+            safety_stock=safety_stock,
+            service_level=service_level,
+            demand_variability=demand_std_dev,
+            stockout_probability=stockout_probability
+        )
+    
+    def _eoq_calculation_from_metrics(
+        self,
+        item_data: Dict[str, Any],
+        metrics: BatchStockMetrics,
+        index: int
+    ) -> EOQCalculation:
+        """Build the EOQ result for one item of a vectorized batch"""
+        ordering_cost = self.default_ordering_cost
+        holding_cost_per_unit = Decimal(str(item_data['purchase_price'])) * Decimal(str(self.default_holding_cost_rate))
+        annual_demand = float(metrics.annual_demand[index])
+        eoq = int(metrics.economic_order_quantity[index])
+        
+        annual_ordering_cost = Decimal(str(annual_demand / eoq)) * ordering_cost
+        annual_holding_cost = Decimal(str(eoq / 2)) * holding_cost_per_unit
+        order_frequency = annual_demand / eoq
+        
+        return EOQCalculation(
+            item_id=item_data['id'],
+            economic_order_quantity=eoq,
+            annual_demand=annual_demand,
+            ordering_cost=ordering_cost,
+            holding_cost_per_unit=holding_cost_per_unit,
+            total_annual_cost=annual_ordering_cost + annual_holding_cost,
+            order_frequency=order_frequency,
+            cycle_time_days=365 / order_frequency if order_frequency > 0 else float('inf')
+        )
+    
     async def _calculate_economic_order_quantity(
         self,
         item_data: Dict[str, Any],
         demand_stats: Dict[str, float]
     ) -> EOQCalculation:
         """Calculate EOQ for an item"""
-        return await self.calculate_economic_order_quantity(item_data['id'])
+        return self._compute_economic_order_quantity(item_data, demand_stats)
     
     async def _calculate_reorder_point(
         self,
@@ -476,7 +665,7 @@ class StockOptimizationService:
         demand_stats: Dict[str, float]
     ) -> ReorderPointCalculation:
         """Calculate reorder point for an item"""
-        return await self.calculate_reorder_point_with_lead_time(item_data['id'])
+        return self._compute_reorder_point(item_data, demand_stats)
     
     async def _generate_item_recommendation(
         self,
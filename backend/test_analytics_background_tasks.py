@@ -179,9 +179,9 @@ class TestKPIBackgroundTasks:
         """Test cache cleanup task"""
         
         # Mock analytics cache
-        with patch('analytics_tasks.kpi_tasks.get_analytics_cache') as mock_cache:
+        with patch('analytics_tasks.kpi_tasks.get_sync_analytics_cache') as mock_cache:
             mock_cache_instance = Mock()
-            mock_cache_instance.cleanup_expired_cache = AsyncMock()
+            mock_cache_instance.cleanup_expired_cache = Mock()
             mock_cache_instance.get_cache_stats.return_value = {
                 "status": "connected",
                 "analytics_keys": 150,
@@ -283,9 +283,9 @@ class TestForecastingBackgroundTasks:
             mock_instance.forecast_demand = AsyncMock(return_value=Mock(**sample_forecast_result))
             
             # Mock cache
-            with patch('analytics_tasks.forecasting_tasks.get_analytics_cache') as mock_cache:
+            with patch('analytics_tasks.forecasting_tasks.get_sync_analytics_cache') as mock_cache:
                 mock_cache_instance = Mock()
-                mock_cache_instance.set_forecast_data = AsyncMock()
+                mock_cache_instance.set_forecast_data = Mock()
                 mock_cache.return_value = mock_cache_instance
                 
                 # Create task instance
@@ -480,9 +480,9 @@ class TestReportBackgroundTasks:
             })
             
             # Mock cache
-            with patch('analytics_tasks.report_tasks.get_analytics_cache') as mock_cache:
+            with patch('analytics_tasks.report_tasks.get_sync_analytics_cache') as mock_cache:
                 mock_cache_instance = Mock()
-                mock_cache_instance.set_report_data = AsyncMock()
+                mock_cache_instance.set_report_data = Mock()
                 mock_cache.return_value = mock_cache_instance
                 
                 # Create task instance
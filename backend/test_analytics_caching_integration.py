@@ -74,7 +74,7 @@ class TestAnalyticsCachingIntegration:
         assert performance_improvement > 0, "Cache should improve performance"
         
         # Get cache statistics
-        cache_stats = self.cache.get_cache_stats()
+        cache_stats = await self.cache.get_cache_stats()
         assert cache_stats["cache_performance"]["cache_hits"] > 0
         
         print(f"✓ First call: {first_call_time:.2f}ms")
@@ -95,8 +95,8 @@ class TestAnalyticsCachingIntegration:
         result1 = await self.kpi_calculator.calculate_revenue_kpis(start_date, end_date)
         
         # Verify data is cached
-        cache_key = f"revenue_kpis_{start_date}_{end_date}_{hash(str(None))}"
-        cached_data = await self.cache.get_kpi_data("financial", "revenue", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date, "targets": None}
+        cached_data = await self.cache.get_kpi_data("financial", "revenue", params=cache_params)
         assert cached_data is not None, "Data should be cached"
         
         # Simulate data change (new invoice)
@@ -107,7 +107,7 @@ class TestAnalyticsCachingIntegration:
         )
         
         # Verify cache was invalidated
-        cached_data_after = await self.cache.get_kpi_data("financial", "revenue", period=cache_key)
+        cached_data_after = await self.cache.get_kpi_data("financial", "revenue", params=cache_params)
         assert cached_data_after is None, "Cache should be invalidated"
         
         # Verify new calculation works
@@ -211,7 +211,7 @@ class TestAnalyticsCachingIntegration:
             )
         
         # Get cache statistics
-        cache_stats = self.cache.get_cache_stats()
+        cache_stats = await self.cache.get_cache_stats()
         
         # Verify statistics structure
         assert "cache_performance" in cache_stats
@@ -320,7 +320,7 @@ class TestAnalyticsCachingIntegration:
         print("Testing cache memory efficiency...")
         
         # Get initial memory usage
-        initial_stats = self.cache.get_cache_stats()
+        initial_stats = await self.cache.get_cache_stats()
         initial_keys = initial_stats.get("analytics_keys", 0)
         
         # Cache various data types
@@ -343,7 +343,7 @@ class TestAnalyticsCachingIntegration:
                 await self.cache.set_aggregation_cache(entity_type, entity_id, "monthly", data)
         
         # Get final memory usage
-        final_stats = self.cache.get_cache_stats()
+        final_stats = await self.cache.get_cache_stats()
         final_keys = final_stats.get("analytics_keys", 0)
         
         # Verify cache keys were created
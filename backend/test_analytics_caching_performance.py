@@ -79,7 +79,7 @@ class TestAnalyticsCachingPerformance:
         assert second_call_time < first_call_time * 0.5  # At least 50% faster
         
         # Get cache statistics
-        cache_stats = self.cache.get_cache_stats()
+        cache_stats = await self.cache.get_cache_stats()
         
         # Verify cache hit was recorded
         assert cache_stats["cache_performance"]["cache_hits"] > 0
@@ -99,8 +99,8 @@ class TestAnalyticsCachingPerformance:
         result1 = await self.kpi_calculator.calculate_revenue_kpis(start_date, end_date)
         
         # Verify data is cached
-        cache_key = f"revenue_kpis_{start_date}_{end_date}"
-        cached_data = await self.cache.get_kpi_data("financial", "revenue", period=cache_key)
+        cache_params = {"start_date": start_date, "end_date": end_date, "targets": None}
+        cached_data = await self.cache.get_kpi_data("financial", "revenue", params=cache_params)
         assert cached_data is not None
         
         # Simulate data change (new invoice)
@@ -111,7 +111,7 @@ class TestAnalyticsCachingPerformance:
         )
         
         # Verify cache was invalidated
-        cached_data_after = await self.cache.get_kpi_data("financial", "revenue", period=cache_key)
+        cached_data_after = await self.cache.get_kpi_data("financial", "revenue", params=cache_params)
         assert cached_data_after is None
         
         # Verify new calculation works
@@ -195,7 +195,7 @@ class TestAnalyticsCachingPerformance:
         """Test cache memory usage and efficiency"""
         
         # Get initial memory usage
-        initial_stats = self.cache.get_cache_stats()
+        initial_stats = await self.cache.get_cache_stats()
         initial_keys = initial_stats.get("analytics_keys", 0)
         
         # Cache multiple data types
@@ -218,7 +218,7 @@ class TestAnalyticsCachingPerformance:
                 await self.cache.set_aggregation_cache(entity_type, entity_id, "monthly", data)
         
         # Get final memory usage
-        final_stats = self.cache.get_cache_stats()
+        final_stats = await self.cache.get_cache_stats()
         final_keys = final_stats.get("analytics_keys", 0)
         
         # Verify cache keys were created
@@ -328,7 +328,7 @@ class TestAnalyticsCachingPerformance:
         await self.invalidation_service.warm_critical_caches()
         
         # Verify caches were warmed
-        cache_stats = self.cache.get_cache_stats()
+        cache_stats = await self.cache.get_cache_stats()
         assert cache_stats["analytics_keys"] > 0
         
         # Test that warmed data is accessible quickly
@@ -9,12 +9,16 @@ import asyncio
 import time
 import json
 from datetime import datetime, timedelta, date
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
-from redis_config import AnalyticsCache, RedisConfig
+from redis_config import AnalyticsCache, RedisConfig, CACHE_NAMESPACE
 from services.cache_invalidation_service import CacheInvalidationService
 from services.cache_performance_service import CachePerformanceService
 
+async def _async_iter(items):
+    for item in items:
+        yield item
+
 class TestAnalyticsCachingSimple:
     """Simple test suite for analytics caching"""
     
@@ -22,12 +26,19 @@ class TestAnalyticsCachingSimple:
     def setup(self):
         """Setup for each test"""
         # Mock Redis for testing
-        self.mock_redis = MagicMock()
+        self.mock_redis = AsyncMock()
+        self.mock_pipeline = MagicMock()
+        self.mock_pipeline.execute = AsyncMock(return_value=[])
+        self.mock_redis.pipeline = MagicMock(return_value=self.mock_pipeline)
+        self.mock_redis.sscan_iter = MagicMock(return_value=_async_iter([]))
+        self.mock_redis.scan_iter = MagicMock(return_value=_async_iter([]))
         self.redis_config = RedisConfig()
-        self.redis_config.redis_client = self.mock_redis
+        self.redis_config.async_client = self.mock_redis
+        self.redis_config.async_binary_client = self.mock_redis
         
         self.cache = AnalyticsCache(self.redis_config)
         self.cache.redis = self.mock_redis
+        self.cache.payload_redis = self.mock_redis
         
         yield
     
@@ -47,7 +58,7 @@ class TestAnalyticsCachingSimple:
         await self.cache.set_kpi_data("financial", "revenue", test_data, period="monthly")
         
         # Verify setex was called
-        self.mock_redis.setex.assert_called()
+        self.mock_pipeline.setex.assert_called()
         
         # Mock Redis get to return cached data (cache hit)
         cached_response = {
@@ -78,48 +89,49 @@ class TestAnalyticsCachingSimple:
         await self.cache.set_forecast_data("item-123", "30_days", forecast_data)
         
         # Verify setex was called with correct TTL
-        self.mock_redis.setex.assert_called()
-        call_args = self.mock_redis.setex.call_args
-        assert call_args[0][1] == 3600  # 1 hour TTL for forecasts
+        self.mock_pipeline.setex.assert_called()
+        call_args = self.mock_pipeline.setex.call_args
+        # 1 hour TTL for forecasts, kept in Redis through the stale window
+        assert call_args[0][1] == 3600 + self.cache.refresh_strategies["forecast"]["stale_while_revalidate"]
     
     @pytest.mark.asyncio
     async def test_cache_invalidation_by_pattern(self):
         """Test cache invalidation by pattern"""
         
-        # Mock keys method
-        self.mock_redis.keys.return_value = [
-            "analytics:kpi:financial:revenue",
-            "analytics:kpi:financial:profit",
-            "analytics:chart:revenue:monthly"
-        ]
-        
-        # Mock pipeline for batch deletion
-        mock_pipeline = MagicMock()
-        self.mock_redis.pipeline.return_value = mock_pipeline
+        # Mock the members of the kpi:financial tag set
+        self.mock_redis.sscan_iter.return_value = _async_iter([
+            f"{CACHE_NAMESPACE}:kpi:financial:revenue",
+            f"{CACHE_NAMESPACE}:kpi:financial:profit"
+        ])
         
         # Test pattern invalidation
         await self.cache.invalidate_by_pattern("kpi:financial:*")
         
-        # Verify keys was called with correct pattern
-        self.mock_redis.keys.assert_called_with("analytics:kpi:financial:**")
+        # Verify the tag set was claimed and no keyspace enumeration happened
+        renamed_from = self.mock_redis.rename.call_args[0][0]
+        assert renamed_from == f"{CACHE_NAMESPACE}:tag:kpi:financial"
+        self.mock_redis.keys.assert_not_called()
         
-        # Verify pipeline was used for batch deletion
-        self.mock_redis.pipeline.assert_called()
+        # Verify members were unlinked in a pipelined batch
+        self.mock_pipeline.unlink.assert_called_with(
+            f"{CACHE_NAMESPACE}:kpi:financial:revenue",
+            f"{CACHE_NAMESPACE}:kpi:financial:profit"
+        )
     
     def test_cache_key_generation(self):
         """Test cache key generation"""
         
         # Test basic key generation
         key = self.cache._generate_key("kpi", "financial", "revenue")
-        assert key == "analytics:kpi:financial:revenue"
+        assert key == f"{CACHE_NAMESPACE}:kpi:financial:revenue"
         
         # Test key with additional parameters
         key = self.cache._generate_key("kpi", "financial", "revenue", period="monthly", filters="active")
-        assert "analytics:kpi:financial:revenue" in key
-        assert "period:monthly" in key
-        assert "filters:active" in key
+        assert key.startswith(f"{CACHE_NAMESPACE}:kpi:financial:revenue:")
+        assert key == self.cache._generate_key("kpi", "financial", "revenue", filters="active", period="monthly")
     
-    def test_cache_statistics(self):
+    @pytest.mark.asyncio
+    async def test_cache_statistics(self):
         """Test cache statistics collection"""
         
         # Mock Redis info
@@ -130,17 +142,24 @@ class TestAnalyticsCachingSimple:
             "uptime_in_seconds": 3600
         }
         
-        # Mock keys count
-        self.mock_redis.keys.return_value = ["key1", "key2", "key3"]
+        # Mock tag set cardinalities, one per cache type, then one minute of
+        # shared hit/miss counters and the distinct keys per cache type
+        cache_types = len(self.cache.ttl_strategies)
+        self.mock_redis.get.return_value = None
+        self.mock_pipeline.execute.side_effect = [
+            [3] + [0] * (cache_types - 1),
+            [{"kpi:hits": "3", "kpi:misses": "1"}] + [0] * cache_types
+        ]
         
         # Get cache stats
-        stats = self.cache.get_cache_stats()
+        stats = await self.cache.get_cache_stats(minutes=1)
         
         # Verify stats structure
         assert stats["status"] == "connected"
         assert stats["analytics_keys"] == 3
         assert stats["memory_used"] == "1MB"
-        assert "cache_performance" in stats
+        assert stats["cache_performance"]["hit_rate_percent"] == 75.0
+        assert stats["cache_type_breakdown"]["kpi"]["hits"] == 3
     
     @pytest.mark.asyncio
     async def test_cache_health_check(self):
@@ -215,8 +234,8 @@ class TestAnalyticsCachingSimple:
         await self.cache.set_expensive_query_cache("query_hash_123", query_results)
         
         # Verify setex was called with raw_query TTL
-        self.mock_redis.setex.assert_called()
-        call_args = self.mock_redis.setex.call_args
+        self.mock_pipeline.setex.assert_called()
+        call_args = self.mock_pipeline.setex.call_args
         assert call_args[0][1] == self.cache.ttl_strategies["raw_query"]
     
     @pytest.mark.asyncio
@@ -233,7 +252,7 @@ class TestAnalyticsCachingSimple:
         await self.cache.set_aggregation_cache("sales", "category", "monthly", agg_results)
         
         # Verify setex was called
-        self.mock_redis.setex.assert_called()
+        self.mock_pipeline.setex.assert_called()
     
     def test_cache_freshness_check(self):
         """Test cache freshness validation"""
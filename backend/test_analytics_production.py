@@ -154,7 +154,7 @@ class TestAnalyticsProduction:
             assert cached_data["data"]["revenue"] == 10000 + i * 100
         
         # Test cache statistics
-        stats = analytics_cache.get_cache_stats()
+        stats = await analytics_cache.get_cache_stats()
         assert stats["status"] == "connected", "Cache not connected"
         assert stats["analytics_keys"] >= 100, "Not all cache entries found"
         
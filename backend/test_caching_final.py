@@ -63,12 +63,12 @@ async def comprehensive_caching_test():
     
     # Test 3: Cache Invalidation
     print('\n🔄 Testing cache invalidation...')
-    initial_keys = cache.get_cache_stats()['analytics_keys']
+    initial_keys = (await cache.get_cache_stats())['analytics_keys']
     
     await cache.invalidate_by_pattern('kpi:financial:*')
     await invalidation_service.invalidate_on_data_change('invoices', 'INSERT', 'test-123')
     
-    final_keys = cache.get_cache_stats()['analytics_keys']
+    final_keys = (await cache.get_cache_stats())['analytics_keys']
     print(f'  Keys before invalidation: {initial_keys}')
     print(f'  Keys after invalidation: {final_keys}')
     invalidation_status = '✓' if final_keys < initial_keys else '✗'
@@ -76,7 +76,7 @@ async def comprehensive_caching_test():
     
     # Test 4: Cache Statistics and Health
     print('\n📈 Testing cache monitoring...')
-    stats = cache.get_cache_stats()
+    stats = (await cache.get_cache_stats())
     health = await cache.get_cache_health()
     
     print(f'  Cache status: {stats["status"]}')
@@ -8,7 +8,11 @@ from decimal import Decimal
 from datetime import datetime
 import uuid
 
+from sqlalchemy import create_engine
+
 import schemas_universal as schemas
+from models import DocumentCounter
+from services import document_number_service
 from routers.universal_invoices import (
     generate_invoice_number, 
     validate_invoice_business_rules,
@@ -16,6 +20,14 @@ from routers.universal_invoices import (
     calculate_general_invoice_totals
 )
 
+@pytest.fixture(autouse=True)
+def numbering_engine(monkeypatch):
+    """Document numbers come from a real counter table"""
+    engine = create_engine("sqlite://")
+    DocumentCounter.__table__.create(engine)
+    monkeypatch.setattr(document_number_service, "get_engine", lambda profile=None: engine)
+    return engine
+
 class MockDB:
     """Mock database session for testing"""
     def __init__(self):
@@ -180,6 +192,15 @@ class TestInvoiceNumberGeneration:
         assert len(parts[1]) == 6  # YYYYMM
         assert len(parts[2]) == 4  # NNNN
         assert parts[2].isdigit()
+    
+    def test_invoice_numbers_are_consecutive_per_type(self):
+        """Test that each type has its own running number"""
+        db = MockDB()
+        gold = [generate_invoice_number(db, "gold") for _ in range(2)]
+        general = generate_invoice_number(db, "general")
+        
+        assert [n.split("-")[2] for n in gold] == ["0001", "0002"]
+        assert general.split("-")[2] == "0001"
 
 class TestGoldInvoiceCalculations:
     """Test gold invoice calculation accuracy"""
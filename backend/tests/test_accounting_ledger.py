@@ -0,0 +1,256 @@
+"""
+Tests for ledger aggregation in AccountingService
+Runs on SQLite with the accounting tables the reports read
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from models_accounting import (
+    AccountBalanceSnapshot, AccountingPeriod, Base, ChartOfAccounts, JournalEntry, JournalEntryLine,
+    SubsidiaryAccount
+)
+from services.accounting_service import AccountingService
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+LEDGER_TABLES = [t.__table__ for t in (ChartOfAccounts, SubsidiaryAccount, JournalEntry, JournalEntryLine,
+                                        AccountingPeriod, AccountBalanceSnapshot)]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=LEDGER_TABLES)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+@pytest.fixture
+def statements(db):
+    """SQL statements executed by the session"""
+    executed = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+def _account(db, code, account_type):
+    account = ChartOfAccounts(account_code=code, account_name=f"Account {code}",
+                              account_type=account_type, account_category=account_type)
+    db.add(account)
+    db.flush()
+    return account
+
+
+def _entry(db, number, entry_date, lines, status="posted"):
+    """Journal entry from (account, debit, credit) tuples"""
+    entry = JournalEntry(entry_number=number, entry_date=entry_date, description=number,
+                         source_type="manual", status=status)
+    entry.journal_lines = [
+        JournalEntryLine(line_number=i, account_id=account.id,
+                         debit_amount=Decimal(debit), credit_amount=Decimal(credit))
+        for i, (account, debit, credit) in enumerate(lines, start=1)
+    ]
+    db.add(entry)
+    db.flush()
+    return entry
+
+
+@pytest.fixture
+def ledger(db):
+    cash = _account(db, "1000", "asset")
+    payable = _account(db, "2000", "liability")
+    capital = _account(db, "3000", "equity")
+    sales = _account(db, "4000", "revenue")
+    wages = _account(db, "5000", "expense")
+    _account(db, "5100", "expense")  # never used
+
+    _entry(db, "JE-1", date(2024, 1, 5), [(cash, "1000", "0"), (capital, "0", "1000")])
+    _entry(db, "JE-2", date(2024, 2, 10), [(cash, "500", "0"), (sales, "0", "500")])
+    _entry(db, "JE-3", date(2024, 2, 20), [(wages, "200", "0"), (payable, "0", "200")])
+    _entry(db, "JE-4", date(2024, 3, 1), [(cash, "300", "0"), (sales, "0", "300")])
+    _entry(db, "JE-5", date(2024, 2, 25), [(cash, "999", "0"), (sales, "0", "999")], status="draft")
+    db.commit()
+    return {"cash": cash, "sales": sales, "wages": wages}
+
+
+class TestGroupedReports:
+    """Test suite for the single-query financial statements"""
+
+    @pytest.mark.asyncio
+    async def test_trial_balance_in_one_query(self, db, ledger, statements):
+        """All account totals come from one grouped statement"""
+        trial_balance = await AccountingService(db).generate_trial_balance(date(2024, 2, 28))
+
+        assert len(statements) == 1
+        assert "GROUP BY" in statements[0]
+        balances = {item.account_code: (item.debit_balance, item.credit_balance) for item in trial_balance.accounts}
+        assert balances == {
+            "1000": (Decimal("1500"), Decimal("0")),
+            "2000": (Decimal("0"), Decimal("200")),
+            "3000": (Decimal("0"), Decimal("1000")),
+            "4000": (Decimal("0"), Decimal("500")),
+            "5000": (Decimal("200"), Decimal("0")),
+        }
+        assert trial_balance.is_balanced
+
+    @pytest.mark.asyncio
+    async def test_balance_sheet_and_profit_loss(self, db, ledger, statements):
+        """Both statements read their sections from a single query each"""
+        service = AccountingService(db)
+
+        balance_sheet = await service.generate_balance_sheet(date(2024, 3, 31))
+        profit_loss = await service.generate_profit_loss_statement(date(2024, 2, 1), date(2024, 2, 29))
+
+        assert len(statements) == 2
+        assert balance_sheet.total_assets == Decimal("1800")
+        assert balance_sheet.liabilities.total == Decimal("200")
+        assert profit_loss.revenue.total == Decimal("500")
+        assert [item.account_code for item in profit_loss.expenses.items] == ["5000"]
+        assert profit_loss.net_profit == Decimal("300")
+
+
+class TestBalanceSnapshots:
+    """Test suite for as-of-date reports over closed-period snapshots"""
+
+    @pytest.fixture
+    def service(self, db, monkeypatch):
+        service = AccountingService(db)
+        monkeypatch.setattr(service, "_log_audit_trail", AsyncMock())
+        return service
+
+    @pytest.mark.asyncio
+    async def test_trial_balance_reads_snapshot_plus_open_lines(self, db, ledger, service, statements):
+        """Balances equal the full scan while only lines after the snapshot are summed"""
+        expected = await service.generate_trial_balance(date(2024, 3, 31))
+        await service.snapshot_account_balances(date(2024, 1, 31))
+        await service.snapshot_account_balances(date(2024, 2, 29))
+
+        # Lines inside the snapshots are no longer read
+        db.query(JournalEntryLine).filter(JournalEntryLine.account_id == ledger["wages"].id).update(
+            {"debit_amount": Decimal("7777")}, synchronize_session=False
+        )
+        statements.clear()
+        trial_balance = await service.generate_trial_balance(date(2024, 3, 31))
+
+        assert len(statements) == 1
+        assert "account_balance_snapshots" in statements[0]
+        assert trial_balance.accounts == expected.accounts
+        assert db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.period_end == date(2024, 2, 29),
+            AccountBalanceSnapshot.account_id == ledger["cash"].id
+        ).one().debit_total == Decimal("1500")
+
+    @pytest.mark.asyncio
+    async def test_back_dated_posting_drops_stale_snapshots(self, db, ledger, service):
+        """Posting into a snapshotted month removes that and later snapshots"""
+        await service.snapshot_account_balances(date(2024, 1, 31))
+        await service.snapshot_account_balances(date(2024, 2, 29))
+        draft = db.query(JournalEntry).filter(JournalEntry.entry_number == "JE-5").one()
+
+        await service.post_journal_entry(draft.id, uuid4())
+        trial_balance = await service.generate_trial_balance(date(2024, 2, 29))
+
+        assert {s.period_end for s in db.query(AccountBalanceSnapshot)} == {date(2024, 1, 31)}
+        cash = next(item for item in trial_balance.accounts if item.account_code == "1000")
+        assert cash.debit_balance == Decimal("2499")
+
+    def test_postings_and_snapshot_writes_share_a_lock(self):
+        """On Postgres postings take the snapshot lock shared and snapshot writes exclusive"""
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = "postgresql"
+        service = AccountingService(db)
+
+        service._lock_balance_snapshots(exclusive=False)
+        service._lock_balance_snapshots(exclusive=True)
+
+        shared, exclusive = (str(c.args[0]) for c in db.execute.call_args_list)
+        assert "pg_advisory_xact_lock_shared(" in shared
+        assert "pg_advisory_xact_lock(" in exclusive
+
+    @pytest.mark.asyncio
+    async def test_closing_period_writes_snapshot(self, db, ledger, service):
+        period = AccountingPeriod(period_code="2024-02", period_name="February 2024", fiscal_year=2024,
+                                  start_date=date(2024, 2, 1), end_date=date(2024, 2, 29))
+        db.add(period)
+        db.commit()
+
+        closed = await service.close_accounting_period("2024-02", uuid4())
+
+        assert closed.status == "closed"
+        assert db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.period_end == date(2024, 2, 29)
+        ).count() == 5
+        with pytest.raises(ValueError):
+            await service.close_accounting_period("2024-02", uuid4())
+
+
+class TestBalanceUpdates:
+    """Test suite for the set-based account balance updates"""
+
+    @pytest.mark.asyncio
+    async def test_entry_lines_applied_in_few_statements(self, db, statements):
+        """Lines are summed per account and subsidiary and added to the stored balances"""
+        cash = _account(db, "1000", "asset")
+        sales = _account(db, "4000", "revenue")
+        customer = SubsidiaryAccount(subsidiary_code="1000-001", subsidiary_name="Customer",
+                                     main_account_id=cash.id, subsidiary_type="customer")
+        db.add(customer)
+        cash.debit_balance, cash.credit_balance = Decimal("100"), Decimal("0")
+        sales.debit_balance, sales.credit_balance = Decimal("0"), Decimal("0")
+        customer.debit_balance, customer.credit_balance = Decimal("0"), Decimal("0")
+        entry = _entry(db, "JE-1", date(2024, 1, 5), [(cash, "300", "0"), (cash, "200", "0"),
+                                                      (sales, "0", "450"), (sales, "50", "0"), (sales, "0", "100")])
+        entry.journal_lines[0].subsidiary_account_id = customer.id
+        entry.journal_lines[1].subsidiary_account_id = customer.id
+        entry_id = entry.id
+        db.commit()
+        statements.clear()
+
+        await AccountingService(db)._update_account_balances(entry_id)
+
+        assert len(statements) == 4
+        assert "FOR UPDATE" not in statements[0]  # SQLite has no row locks
+        assert "ORDER BY" in statements[0] and "ORDER BY" in statements[1]
+        db.refresh(cash), db.refresh(sales), db.refresh(customer)
+        assert (cash.debit_balance, cash.current_balance) == (Decimal("600"), Decimal("600"))
+        assert (sales.debit_balance, sales.credit_balance, sales.current_balance) == (
+            Decimal("50"), Decimal("550"), Decimal("500"))
+        assert (customer.debit_balance, customer.current_balance) == (Decimal("500"), Decimal("500"))
+
+
+class TestSnapshotTask:
+    """Test suite for the scheduled balance snapshot task"""
+
+    def test_task_snapshots_last_month_end_once(self, db, ledger, monkeypatch):
+        """The beat task writes the month-end snapshot and skips it on later runs"""
+        from analytics_tasks import report_tasks
+        monkeypatch.setattr(report_tasks, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+        first = report_tasks.snapshot_account_balances_task.apply(kwargs={"period_end": "2024-02-29"}).get()
+        again = report_tasks.snapshot_account_balances_task.apply().get()
+        repeat = report_tasks.snapshot_account_balances_task.apply().get()
+
+        assert (first["status"], first["rows"]) == ("completed", 5)
+        assert again["skipped"] is False and repeat["skipped"] is True
+        assert {s.period_end for s in db.query(AccountBalanceSnapshot)} == {
+            date(2024, 2, 29), date.fromisoformat(again["period_end"])
+        }
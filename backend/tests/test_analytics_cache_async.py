@@ -0,0 +1,125 @@
+"""
+Tests for the asyncio analytics cache client
+Covers per-loop connection pools, batched KPI reads and the sync facade
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import redis_config
+from redis_config import AnalyticsCache, AsyncRedisClient, SyncAnalyticsCache
+
+
+def _entry(value, age=0, ttl=None):
+    cached_at = datetime.utcnow() - timedelta(seconds=age)
+    return json.dumps({"data": {"value": value}, "cached_at": cached_at.isoformat(), "ttl": ttl})
+
+
+class TestAnalyticsCacheAsync:
+    """Test suite for the async cache client"""
+
+    @pytest.fixture
+    def cache(self):
+        """Analytics cache over a mocked async Redis client"""
+        redis_config = MagicMock()
+        redis_config.get_async_client.return_value = AsyncMock()
+        return AnalyticsCache(redis_config)
+
+    def test_one_client_per_event_loop(self):
+        """Coroutines on the same loop share a client; a new loop gets its own"""
+        client = AsyncRedisClient("redis://localhost:6379/0", decode_responses=True)
+
+        async def clients():
+            return client.client(), client.client()
+
+        first, second = asyncio.run(clients())
+        third, _ = asyncio.run(clients())
+
+        assert first is second
+        assert third is not first
+
+    def test_pool_closed_when_loop_shuts_down(self, monkeypatch):
+        """asyncio.run() disconnects the pool it created before closing its loop"""
+        pools = []
+
+        def from_url(url, **options):
+            redis = MagicMock()
+            redis.connection_pool.disconnect = AsyncMock()
+            pools.append(redis.connection_pool)
+            return redis
+
+        monkeypatch.setattr(redis_config.aioredis, "from_url", from_url)
+        client = AsyncRedisClient("redis://localhost:6379/0")
+
+        async def use_client():
+            client.client()
+
+        asyncio.run(use_client())
+        asyncio.run(use_client())
+
+        assert len(pools) == 2
+        for pool in pools:
+            pool.disconnect.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_many_kpi_entries_in_one_round_trip(self, cache):
+        """get_many_kpi_data issues a single MGET and keeps request order"""
+        cache.redis.mget.return_value = [_entry(1), None]
+
+        results = await cache.get_many_kpi_data([
+            ("financial", "revenue", {"start_date": "2024-01-01"}),
+            ("financial", "profit_margin", {"start_date": "2024-01-01"}),
+        ])
+
+        cache.redis.mget.assert_awaited_once()
+        assert results[0]["data"]["value"] == 1
+        assert results[1] is None
+        assert cache.cache_hit_stats["kpi"] == 1
+        assert cache.cache_miss_stats["kpi"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_freshness_uses_each_entry_ttl(self, cache):
+        """An entry stored with a long TTL outlives the KPI default; a short one does not"""
+        cache.redis.mget.return_value = [_entry(1, age=600, ttl=3600), _entry(2, age=120, ttl=60)]
+
+        results = await cache.get_many_kpi_data([
+            ("financial", "revenue", None),
+            ("financial", "profit_margin", None),
+        ])
+
+        assert results[0]["data"]["value"] == 1
+        assert results[1] is None
+
+    @pytest.mark.asyncio
+    async def test_prefetched_entries_skip_redis(self, cache):
+        """After a prefetch, hits are served from the batch and only misses reach Redis"""
+        requests = [("financial", "revenue", {"targets": None}), ("customer", "value", None)]
+        cache.redis.mget.return_value = [_entry(5), None]
+        cache.redis.get.return_value = None
+
+        await cache.prefetch_kpi_data(requests)
+
+        async def read_in_task():
+            return await cache.get_kpi_data("financial", "revenue", params={"targets": None})
+
+        hit = await asyncio.create_task(read_in_task())
+        miss = await cache.get_kpi_data("customer", "value")
+
+        assert hit["data"]["value"] == 5
+        assert miss is None
+        cache.redis.get.assert_awaited_once_with(cache._kpi_key("customer", "value"))
+
+    def test_sync_facade_blocks_on_coroutines(self, cache):
+        """Coroutine methods become blocking calls; other attributes pass through"""
+        cache.redis.mget.return_value = [_entry(7)]
+        facade = SyncAnalyticsCache(cache)
+
+        results = facade.get_many_kpi_data([("financial", "revenue", None)])
+
+        assert results[0]["data"]["value"] == 7
+        assert facade.ttl_strategies is cache.ttl_strategies
+        assert facade.build_key("kpi") == cache.build_key("kpi")
@@ -0,0 +1,133 @@
+"""
+Tests for analytics cache stampede protection
+Covers the single-flight refresh lock, stale-while-revalidate and XFetch
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import redis_config
+from redis_config import AnalyticsCache, CACHE_NAMESPACE
+
+
+def _entry(value, age_seconds=0, ttl=300, compute_seconds=None):
+    entry = {
+        "data": {"value": value},
+        "cached_at": (datetime.utcnow() - timedelta(seconds=age_seconds)).isoformat(),
+        "ttl": ttl
+    }
+    if compute_seconds is not None:
+        entry["compute_seconds"] = compute_seconds
+    return json.dumps(entry)
+
+
+class TestAnalyticsCacheCoalescing:
+    """Test suite for coalesced analytics cache reads"""
+
+    @pytest.fixture
+    def cache(self):
+        """Analytics cache without L1 over a mocked Redis client"""
+        redis_config_mock = MagicMock()
+        redis_config_mock.get_async_client.return_value = AsyncMock()
+        cache = AnalyticsCache(redis_config_mock)
+        cache.local_cache = None
+        cache.redis.pipeline = MagicMock()
+        cache.redis.pipeline.return_value.execute = AsyncMock(return_value=[])
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_only_lock_holder_recomputes_a_miss(self, cache):
+        """The first reader gets the lease, the write releases it"""
+        cache.redis.get.return_value = None
+        cache.redis.set.return_value = True
+
+        assert await cache.get_kpi_data("financial", "revenue") is None
+
+        key = cache._kpi_key("financial", "revenue")
+        lock_key = cache.redis.set.await_args.args[0]
+        assert lock_key == f"{CACHE_NAMESPACE}:lock:kpi:financial:revenue"
+        assert cache.redis.set.await_args.kwargs["nx"] is True
+
+        await cache.set_kpi_data("financial", "revenue", {"value": 1})
+
+        cache.redis.eval.assert_awaited_once()
+        assert cache.redis.eval.await_args.args[2] == lock_key
+        payload = cache.redis.pipeline.return_value.setex.call_args.args
+        assert payload[0] == key
+        assert "compute_seconds" in cache.codec.decode(payload[2])
+        assert key not in redis_config._refresh_leases.get()
+
+    @pytest.mark.asyncio
+    async def test_other_readers_wait_for_the_refresh(self, cache):
+        """Without the lease a reader polls until the new value lands"""
+        cache.redis.get.side_effect = [None, None, _entry(2)]
+        cache.redis.set.return_value = None
+
+        with patch("redis_config.asyncio.sleep", AsyncMock()):
+            result = await cache.get_kpi_data("financial", "revenue")
+
+        assert result["data"]["value"] == 2
+        assert cache.redis.get.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_revalidating(self, cache):
+        """Within the stale window only the lease holder misses"""
+        cache.redis.get.return_value = _entry(3, age_seconds=310)
+        cache.redis.set.side_effect = [True, None]
+
+        first = await cache.get_kpi_data("financial", "revenue")
+        second = await cache.get_kpi_data("financial", "revenue", params={"x": 1})
+
+        assert first is None
+        assert second["data"]["value"] == 3
+
+    @pytest.mark.asyncio
+    async def test_stale_window_extends_redis_ttl(self, cache):
+        """Entries outlive their TTL in Redis by the stale window"""
+        cache.refresh_strategies["kpi"]["stale_while_revalidate"] = 45
+
+        await cache.set_kpi_data("financial", "revenue", {"value": 1}, ttl=300)
+
+        assert cache.redis.pipeline.return_value.setex.call_args.args[1] == 345
+        cache.redis.eval.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_xfetch_refreshes_before_expiry(self, cache):
+        """An expensive entry close to expiry is refreshed early by one reader"""
+        cache.redis.get.return_value = _entry(4, age_seconds=295, compute_seconds=10)
+        cache.redis.set.return_value = True
+
+        with patch.object(redis_config.random, "random", return_value=0.5):
+            assert await cache.get_kpi_data("financial", "revenue") is None
+
+        cache.refresh_strategies["kpi"]["xfetch_beta"] = 0
+        result = await cache.get_kpi_data("financial", "revenue", params={"x": 1})
+        assert result["data"]["value"] == 4
+
+    @pytest.mark.asyncio
+    async def test_one_recompute_per_key_within_a_process(self):
+        """Concurrent readers in one process share the winner's result"""
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        cache = AnalyticsCache(MagicMock())
+        cache.local_cache = None
+        cache.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        cache.payload_redis = fakeredis.aioredis.FakeRedis(server=server)
+
+        async def get_or_compute(delay):
+            await asyncio.sleep(delay)
+            cached = await cache.get_kpi_data("financial", "revenue")
+            if cached is not None:
+                return cached["data"]["value"], "cached"
+            await asyncio.sleep(0.1)
+            await cache.set_kpi_data("financial", "revenue", {"value": 7})
+            return 7, "computed"
+
+        results = await asyncio.gather(*(get_or_compute(i * 0.01) for i in range(5)))
+
+        assert sorted(results) == [(7, "cached")] * 4 + [(7, "computed")]
+        assert not cache._local_refreshes
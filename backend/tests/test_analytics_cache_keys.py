@@ -0,0 +1,130 @@
+"""
+Tests for analytics cache key generation and tag invalidation
+Keys must be identical across processes so that workers share cache entries
+"""
+
+import os
+import subprocess
+import sys
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock, AsyncMock
+
+import pytest
+
+from redis_config import AnalyticsCache, CACHE_NAMESPACE, INVALIDATION_BATCH_SIZE, params_digest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+KEY_SCRIPT = """
+from datetime import date
+from decimal import Decimal
+from redis_config import AnalyticsCache
+
+print(AnalyticsCache.build_key("kpi", "financial", "revenue", params={
+    "start_date": date(2024, 1, 1),
+    "end_date": date(2024, 1, 31),
+    "targets": {"revenue": Decimal("50000"), "transactions": 120},
+    "categories": {"rings", "chains", "coins"},
+}))
+print(AnalyticsCache.build_key("aggregation", "sales", "category", params={
+    "period": "monthly",
+    "filters": {"status": "completed", "category_id": "c-1"},
+}))
+"""
+
+
+async def _async_iter(items):
+    for item in items:
+        yield item
+
+
+class TestAnalyticsCacheKeys:
+    """Test suite for canonical cache keys"""
+
+    def _keys_in_subprocess(self, hash_seed: str):
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed, PYTHONPATH=BACKEND_DIR)
+        result = subprocess.run(
+            [sys.executable, "-c", KEY_SCRIPT],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120, check=True
+        )
+        return [line for line in result.stdout.splitlines() if line.startswith(CACHE_NAMESPACE)]
+
+    def test_keys_identical_across_interpreter_runs(self):
+        """Different hash seeds produce the same keys"""
+        keys = {tuple(self._keys_in_subprocess(seed)) for seed in ("0", "1", "12345")}
+
+        assert len(keys) == 1
+        assert len(next(iter(keys))) == 2
+
+    def test_params_order_does_not_change_key(self):
+        """Parameter and nested dict ordering are irrelevant"""
+        first = AnalyticsCache.build_key("kpi", "financial", "revenue", params={
+            "start_date": date(2024, 1, 1), "targets": {"a": 1, "b": Decimal("2.50")}
+        })
+        second = AnalyticsCache.build_key("kpi", "financial", "revenue", params={
+            "targets": {"b": Decimal("2.50"), "a": 1}, "start_date": date(2024, 1, 1)
+        })
+
+        assert first == second
+        assert first.startswith(f"{CACHE_NAMESPACE}:kpi:financial:revenue:")
+
+    def test_none_params_are_ignored(self):
+        """Unset optional parameters map to the same entry as omitted ones"""
+        assert AnalyticsCache.build_key("kpi", "operational", params={"category_id": None}) == (
+            f"{CACHE_NAMESPACE}:kpi:operational"
+        )
+        assert params_digest({"a": 1}) != params_digest({"a": 2})
+
+
+class TestAnalyticsCacheTags:
+    """Test suite for tag-based invalidation"""
+
+    @pytest.fixture
+    def cache(self):
+        """Analytics cache over a mocked Redis client"""
+        cache = AnalyticsCache(MagicMock())
+        cache.redis = AsyncMock()
+        cache.redis.pipeline = MagicMock()
+        cache.redis.pipeline.return_value.execute = AsyncMock(return_value=[])
+        cache.redis.scan_iter = MagicMock()
+        cache.redis.sscan_iter = MagicMock()
+        cache.payload_redis = cache.redis
+        cache.ttl_strategies = {"kpi": 300, "forecast": 3600}
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_entries_register_in_hierarchical_tags(self, cache):
+        """A write registers the key under each prefix of its readable parts"""
+        await cache._store("k", 300, {"data": 1}, "kpi", "financial", "revenue")
+        pipe = cache.redis.pipeline.return_value
+
+        tagged = [c.args[0] for c in pipe.sadd.call_args_list]
+        assert tagged == [
+            AnalyticsCache.tag_key("kpi"),
+            AnalyticsCache.tag_key("kpi:financial"),
+            AnalyticsCache.tag_key("kpi:financial:revenue"),
+        ]
+        assert all(c.args[1] == 3600 for c in pipe.expire.call_args_list)
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation_unlinks_in_batches(self, cache):
+        """Members are unlinked in batches and the keyspace is never enumerated"""
+        members = [f"{CACHE_NAMESPACE}:kpi:financial:{i}" for i in range(INVALIDATION_BATCH_SIZE + 1)]
+        cache.redis.sscan_iter.return_value = _async_iter(members)
+
+        assert await cache._invalidate_pattern("kpi:financial:*") == len(members)
+
+        unlinked = cache.redis.pipeline.return_value.unlink.call_args_list
+        assert [len(c.args) for c in unlinked] == [INVALIDATION_BATCH_SIZE, 1]
+        cache.redis.keys.assert_not_called()
+        cache.redis.scan_iter.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_wildcard_patterns_fall_back_to_scan(self, cache):
+        """Patterns that are not a tag prefix use incremental SCAN"""
+        cache.redis.scan_iter.return_value = _async_iter([f"{CACHE_NAMESPACE}:chart:a:revenue"])
+
+        assert await cache._invalidate_pattern("chart:*:revenue") == 1
+        cache.redis.scan_iter.assert_called_once()
+        cache.redis.rename.assert_not_called()
@@ -0,0 +1,115 @@
+"""
+Tests for the shared analytics cache metrics
+Covers per-minute counters, latency histograms and their aggregation
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from redis_config import AnalyticsCache, METRICS_RESET_KEY, histogram_percentile, latency_bucket
+from services.cache_performance_service import CachePerformanceService
+
+
+@pytest.fixture
+def cache():
+    """Analytics cache without L1 over a mocked Redis client"""
+    redis_config = MagicMock()
+    redis_config.get_async_client.return_value = AsyncMock()
+    cache = AnalyticsCache(redis_config)
+    cache.local_cache = None
+    cache.redis.pipeline = MagicMock()
+    cache.redis.pipeline.return_value.execute = AsyncMock(return_value=[])
+    return cache
+
+
+class TestCacheMetrics:
+    """Test suite for the Redis-backed hit/miss metrics"""
+
+    def test_latency_histogram_buckets(self):
+        """Latencies fall into the smallest bucket that holds them"""
+        assert latency_bucket(0.3) == "1"
+        assert latency_bucket(7) == "10"
+        assert latency_bucket(60000) == "inf"
+        assert histogram_percentile({"1": 90, "25": 9, "inf": 1}, 50) == 1.0
+        assert histogram_percentile({"1": 90, "25": 9, "inf": 1}, 95) == 25.0
+        assert histogram_percentile({}, 95) is None
+
+    @pytest.mark.asyncio
+    async def test_lookups_flushed_with_hincrby_in_one_round_trip(self, cache):
+        """Buffered lookups become per-minute HINCRBY counters and a HyperLogLog of keys"""
+        cache._record_cache_hit("kpi", "k1", started=0.0)
+        cache._record_cache_hit("kpi", "k1")
+        cache._record_cache_miss("kpi", "k2")
+        cache._record_cache_miss("chart", "c1")
+
+        await cache.flush_metrics()
+
+        pipe = cache.redis.pipeline.return_value
+        increments = {c.args[1]: c.args[2] for c in pipe.hincrby.call_args_list}
+        assert increments["kpi:hits"] == 2
+        assert increments["kpi:misses"] == 1
+        assert increments["chart:misses"] == 1
+        assert increments["kpi:lat:inf"] == 1
+        hll = {c.args[0]: set(c.args[1:]) for c in pipe.pfadd.call_args_list}
+        minute = datetime.utcnow().strftime("%Y%m%d%H%M")
+        assert hll[cache.metrics_keys_key(minute, "kpi")] == {"k1", "k2"}
+        pipe.execute.assert_awaited_once()
+        assert not cache._metric_counts
+
+    @pytest.mark.asyncio
+    async def test_metrics_aggregate_minutes_of_all_processes(self, cache):
+        """Counters of several minutes are summed per cache type"""
+        cache.redis.get.return_value = None
+        cache.redis.pipeline.return_value.execute.return_value = [
+            {"kpi:hits": "8", "kpi:misses": "2", "kpi:lat:1": "9", "kpi:lat:50": "1", "kpi:lat_sum_us": "30000"},
+            {"kpi:hits": "2", "forecast:misses": "1", "unknown:hits": "5"},
+            7, 1
+        ]
+
+        metrics = await cache.get_metrics(minutes=2, cache_types=["kpi", "forecast"])
+
+        kpi = metrics["cache_types"]["kpi"]
+        assert (kpi["hits"], kpi["misses"], kpi["hit_rate_percent"]) == (10, 2, 83.33)
+        assert kpi["unique_keys"] == 7
+        assert kpi["avg_latency_ms"] == 3.0
+        assert kpi["p95_latency_ms"] == 50.0
+        assert metrics["totals"] == {"hits": 10, "misses": 3, "requests": 13, "hit_rate_percent": 76.92}
+        assert [m["hits"] for m in metrics["per_minute"]] == [8, 2]
+
+    @pytest.mark.asyncio
+    async def test_window_starts_at_last_reset(self, cache):
+        """Minutes before reset_cache_stats are not read"""
+        reset_at = datetime.utcnow() - timedelta(minutes=1)
+        cache.redis.get.return_value = str(reset_at.timestamp())
+
+        metrics = await cache.get_metrics(minutes=60, cache_types=["kpi"])
+
+        assert metrics["since"] == reset_at.replace(second=0, microsecond=0).isoformat()
+        assert cache.redis.pipeline.return_value.hgetall.call_count == 2
+
+        await cache.reset_cache_stats()
+        assert cache.redis.set.await_args.args[0] == METRICS_RESET_KEY
+
+
+class TestCachePerformanceMetrics:
+    """Test suite for CachePerformanceService reading the shared metrics"""
+
+    def test_scenario_lookups_are_snapshot_differences(self, cache, monkeypatch):
+        """Only lookups made between two snapshots are attributed to a run"""
+        monkeypatch.setattr("services.cache_performance_service.get_analytics_cache", lambda: cache)
+        service = CachePerformanceService(MagicMock())
+        before = {"cache_types": {"kpi": {"hits": 5, "misses": 5, "latency_histogram": {"1": 10}}}}
+        after = {"cache_types": {
+            "kpi": {"hits": 23, "misses": 7, "latency_histogram": {"1": 29, "100": 1}},
+            "chart": {"hits": 4, "misses": 0, "latency_histogram": {}}
+        }}
+
+        kpi = service._metrics_delta(before, after, "kpi")
+        everything = service._metrics_delta(before, after)
+
+        assert (kpi["hits"], kpi["misses"]) == (18, 2)
+        assert kpi["latency_histogram"] == {"1": 19, "100": 1}
+        assert kpi["p95_latency_ms"] == 1.0
+        assert everything["hits"] == 22
@@ -0,0 +1,101 @@
+"""
+Tests for the in-process L1 analytics cache tier
+Covers LRU/TTL/byte limits, read-through from Redis and pub/sub coherence
+"""
+
+import json
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from redis_config import AnalyticsCache, LocalCache, CACHE_NAMESPACE, L1_INVALIDATION_CHANNEL
+
+
+class TestLocalCache:
+    """Test suite for the bounded LRU/TTL cache"""
+
+    def test_evicts_least_recently_used_over_byte_budget(self):
+        """Inserting past the byte budget evicts the coldest entry"""
+        local = LocalCache(max_bytes=800, max_ttl=60)
+        local.put("a", {"v": 1}, 100, 60)
+        local.put("b", {"v": 2}, 100, 60)
+        local.get("a")
+        for i in range(7):
+            local.put(f"c{i}", {"v": i}, 100, 60)
+
+        assert local.get("b") is None
+        assert local.get("a") == {"v": 1}
+        assert local.current_bytes <= 800
+        assert local.evictions == 1
+
+    def test_expiry_and_oversized_entries(self):
+        """Entries expire after their TTL and oversized payloads are not kept"""
+        local = LocalCache(max_bytes=800, max_ttl=60)
+        local.put("short", {"v": 1}, 10, 0.01)
+        local.put("huge", {"v": 2}, 500, 60)
+        time.sleep(0.02)
+
+        assert local.get("short") is None
+        assert local.get("huge") is None
+        assert local.current_bytes == 0
+
+
+class TestAnalyticsCacheL1:
+    """Test suite for the L1 tier inside AnalyticsCache"""
+
+    @pytest.fixture
+    def cache(self):
+        """Analytics cache with L1 enabled over a mocked Redis client"""
+        redis_config = MagicMock()
+        redis_config.get_async_client.return_value = AsyncMock()
+        cache = AnalyticsCache(redis_config)
+        cache.local_cache = LocalCache(max_bytes=1024 * 1024, max_ttl=60)
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_hot_reads_are_served_from_memory(self, cache):
+        """The second read of a key never reaches Redis"""
+        entry = {"data": {"value": 1}, "cached_at": datetime.utcnow().isoformat(), "ttl": 300}
+        cache.redis.get.return_value = json.dumps(entry)
+
+        first = await cache.get_kpi_data("financial", "revenue")
+        second = await cache.get_kpi_data("financial", "revenue")
+
+        assert first == second == entry
+        cache.redis.get.assert_awaited_once()
+
+        tiers = cache._tier_stats()
+        assert tiers["l1"]["hit_ratio"] == 0.5
+        assert tiers["l2"]["hit_ratio"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_related_invalidation_is_published_once(self, cache):
+        """invalidate_related_caches clears local entries and publishes all patterns together"""
+        cache.local_cache.put(f"{CACHE_NAMESPACE}:kpi:customer:value:abc", {"v": 1}, 10, 60)
+        cache.local_cache.put(f"{CACHE_NAMESPACE}:kpi:financial:revenue:abc", {"v": 2}, 10, 60)
+        cache._invalidate_pattern = AsyncMock(return_value=0)
+
+        await cache.invalidate_related_caches("customer")
+
+        cache.redis.publish.assert_awaited_once()
+        channel, message = cache.redis.publish.await_args.args
+        assert channel == L1_INVALIDATION_CHANNEL
+        assert "kpi:customer:*" in json.loads(message)["patterns"]
+        assert cache.local_cache.get(f"{CACHE_NAMESPACE}:kpi:customer:value:abc") is None
+        assert cache.local_cache.get(f"{CACHE_NAMESPACE}:kpi:financial:revenue:abc") == {"v": 2}
+
+    def test_messages_from_other_processes_drop_entries(self, cache):
+        """Invalidation messages remove matching keys and patterns only"""
+        kept = f"{CACHE_NAMESPACE}:chart:inventory:monthly"
+        for key in (f"{CACHE_NAMESPACE}:kpi:operational:x", f"{CACHE_NAMESPACE}:forecast:item:1", kept):
+            cache.local_cache.put(key, {"v": key}, 10, 60)
+
+        cache._handle_invalidation_message({"data": json.dumps({
+            "keys": [f"{CACHE_NAMESPACE}:forecast:item:1"],
+            "patterns": ["kpi:operational:*"]
+        })})
+
+        assert cache.local_cache.stats()["entries"] == 1
+        assert cache.local_cache.get(kept) == {"v": kept}
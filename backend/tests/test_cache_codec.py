@@ -0,0 +1,151 @@
+"""
+Tests for the analytics cache payload codecs
+Covers the header byte, compression threshold and legacy JSON entries
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import cache_codec
+from cache_codec import CacheCodec, CodecError, COMPRESSION_ZSTD, SERIALIZER_JSON, is_legacy_payload
+from redis_config import AnalyticsCache, CACHE_NAMESPACE
+
+
+def _entry():
+    return {
+        "data": {
+            "predictions": [{"date": date(2024, 1, d), "value": Decimal("12.5") * d} for d in range(1, 29)],
+            "generated": datetime(2024, 1, 1, 8, 30),
+            "weights": {1: 0.5, 2: 0.5}
+        },
+        "cached_at": "2024-01-01T08:30:00",
+        "ttl": 3600
+    }
+
+
+class TestCacheCodec:
+    """Test suite for CacheCodec"""
+
+    def test_json_round_trip_with_header(self):
+        """Entries carry a header byte and decode to plain JSON types"""
+        codec = CacheCodec("orjson", "none")
+        payload = codec.encode(_entry())
+
+        assert payload[0] == SERIALIZER_JSON
+        assert not is_legacy_payload(payload)
+
+        decoded = codec.decode(payload)
+        assert decoded["data"]["predictions"][1] == {"date": "2024-01-02", "value": "25.0"}
+        assert decoded["data"]["generated"] == "2024-01-01T08:30:00"
+        assert decoded["data"]["weights"] == {"1": 0.5, "2": 0.5}
+
+    def test_legacy_json_entries_are_readable(self):
+        """Entries written with json.dumps before the codec layer still decode"""
+        legacy = json.dumps(_entry(), default=str)
+        codec = CacheCodec("orjson", "none")
+
+        assert codec.decode(legacy)["ttl"] == 3600
+        assert codec.decode(legacy.encode())["cached_at"] == "2024-01-01T08:30:00"
+
+    def test_unknown_header_is_rejected(self):
+        """Corrupt or future formats fail loudly instead of returning garbage"""
+        with pytest.raises(CodecError):
+            CacheCodec().decode(b"\x4f{}")
+
+    def test_missing_compressor_falls_back_to_uncompressed(self, monkeypatch):
+        """A worker without zstd still writes entries everyone can read"""
+        monkeypatch.setattr(cache_codec, "ZSTD_AVAILABLE", False)
+        codec = CacheCodec("orjson", "zstd", compress_min_bytes=0)
+
+        assert codec.name == "orjson"
+        assert codec.encode({"a": 1})[0] == SERIALIZER_JSON
+
+    def test_zstd_only_above_threshold(self):
+        """Small bodies skip compression, large ones are compressed"""
+        pytest.importorskip("zstandard")
+        codec = CacheCodec("orjson", "zstd", compress_min_bytes=256)
+
+        small = codec.encode({"a": 1})
+        large = codec.encode(_entry())
+
+        assert small[0] & COMPRESSION_ZSTD == 0
+        assert large[0] & COMPRESSION_ZSTD
+        assert len(large) < len(CacheCodec("orjson", "none").encode(_entry()))
+        assert codec.decode(large) == CacheCodec("orjson", "none").decode(
+            CacheCodec("orjson", "none").encode(_entry())
+        )
+
+    def test_msgpack_round_trip(self):
+        """msgpack entries decode to the same structure as JSON ones"""
+        pytest.importorskip("msgpack")
+        entry = _entry()
+        json_codec = CacheCodec("orjson", "none")
+
+        decoded = CacheCodec("msgpack", "none").decode(CacheCodec("msgpack", "none").encode(entry))
+
+        assert decoded["data"]["predictions"] == json_codec.decode(json_codec.encode(entry))["data"]["predictions"]
+        # Readers decode any format, whatever codec they write with
+        assert json_codec.decode(CacheCodec("msgpack", "none").encode(entry))["ttl"] == 3600
+
+
+class TestLegacyEntryMigration:
+    """Test suite for re-encoding legacy JSON entries"""
+
+    @pytest.mark.asyncio
+    async def test_legacy_entries_rewritten_with_ttl(self):
+        """Only legacy string entries are rewritten, keeping their TTL"""
+        cache = AnalyticsCache(MagicMock())
+        cache.redis = MagicMock()
+        cache.payload_redis = MagicMock()
+
+        keys = [f"{CACHE_NAMESPACE}:kpi:a", f"{CACHE_NAMESPACE}:kpi:b", f"{CACHE_NAMESPACE}:tag:kpi"]
+
+        async def scan_iter(**kwargs):
+            for key in keys:
+                yield key
+
+        cache.redis.scan_iter = scan_iter
+        reads = MagicMock()
+        reads.execute = AsyncMock(return_value=[
+            json.dumps({"ttl": 300}).encode(), 120000,
+            cache.codec.encode({"ttl": 300}), 120000,
+            Exception("WRONGTYPE"), -1
+        ])
+        writes = MagicMock()
+        writes.execute = AsyncMock(return_value=[True])
+        cache.payload_redis.pipeline.side_effect = [reads, writes]
+
+        assert await cache.reencode_legacy_entries() == 1
+
+        key, payload = writes.set.call_args.args
+        assert key == keys[0]
+        assert writes.set.call_args.kwargs == {"px": 120000, "xx": True}
+        assert cache.codec.decode(payload) == {"ttl": 300}
+        assert not is_legacy_payload(payload)
+
+
+class TestKpiEntryWrites:
+    """Test suite for KPI entries written through the codec"""
+
+    @pytest.mark.asyncio
+    async def test_kpi_entry_is_serialized_once(self, monkeypatch):
+        """The payload is encoded by the codec only; no extra JSON pass for a size field"""
+        cache = AnalyticsCache(MagicMock())
+        cache.local_cache = None
+        cache.redis = MagicMock()
+        cache.payload_redis = MagicMock()
+        cache.payload_redis.pipeline.return_value.execute = AsyncMock(return_value=[])
+        dumps = MagicMock(side_effect=json.dumps)
+        monkeypatch.setattr("redis_config.json.dumps", dumps)
+
+        await cache.set_kpi_data("financial", "revenue", _entry()["data"])
+
+        payload = cache.payload_redis.pipeline.return_value.setex.call_args.args[2]
+        entry = cache.codec.decode(payload)
+        assert entry["data"]["weights"] == {"1": 0.5, "2": 0.5}
+        assert "data_size" not in entry
+        dumps.assert_not_called()
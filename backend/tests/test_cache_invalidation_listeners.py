@@ -0,0 +1,172 @@
+"""
+Tests for commit-driven analytics cache invalidation
+Changes are collected per transaction and emitted once after commit
+"""
+
+import json
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import Column, Integer, Numeric, String, create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from services import cache_invalidation_service
+from services.cache_invalidation_service import (
+    apply_invalidation_entries, collapse_patterns, invalidation_patterns,
+    register_cache_invalidation_listeners, invalidation_worker, INVALIDATION_STREAM
+)
+
+Base = declarative_base()
+
+
+class Invoice(Base):
+    __tablename__ = "invoices"
+    id = Column(Integer, primary_key=True)
+    status = Column(String(20))
+    total_amount = Column(Numeric(12, 2))
+    notes = Column(String(200))
+
+
+class Customer(Base):
+    __tablename__ = "customers"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+
+
+class AuditNote(Base):
+    __tablename__ = "audit_notes"
+    id = Column(Integer, primary_key=True)
+    text = Column(String(100))
+
+
+class TestCommitInvalidation:
+    """Test suite for the session commit listeners"""
+
+    @pytest.fixture
+    def emitted(self, monkeypatch):
+        """Batches that would have been invalidated directly"""
+        batches = []
+        cache = MagicMock()
+        cache.invalidate_patterns.side_effect = batches.append
+        monkeypatch.setattr(cache_invalidation_service, "INVALIDATION_MODE", "direct")
+        monkeypatch.setattr(cache_invalidation_service, "get_sync_analytics_cache", lambda: cache)
+        return batches
+
+    @pytest.fixture
+    def session(self):
+        """SQLite session with the listeners attached"""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        register_cache_invalidation_listeners(session_factory)
+        with session_factory() as session:
+            yield session
+        # The event registry is keyed by id(); a later factory reusing this
+        # one's address must not look registered already
+        for name, listener in (
+            ("after_flush", cache_invalidation_service._after_flush),
+            ("after_commit", cache_invalidation_service._after_commit),
+            ("after_soft_rollback", cache_invalidation_service._after_soft_rollback)
+        ):
+            event.remove(session_factory, name, listener)
+
+    def test_one_deduplicated_batch_per_transaction(self, session, emitted):
+        """Several flushes and tables produce a single batch after commit"""
+        session.add(Invoice(id=1, status="draft", total_amount=10))
+        session.flush()
+        session.add_all([Invoice(id=2, status="draft", total_amount=20), Customer(id=1, name="A")])
+        session.add(AuditNote(id=1, text="untracked"))
+        session.commit()
+        invalidation_worker.flush()
+
+        assert len(emitted) == 1
+        patterns = emitted[0]
+        assert len(patterns) == len(set(patterns))
+        assert "aggregation:*" in patterns
+        assert "aggregation:sales:*" not in patterns
+        assert "kpi:customer:*" in patterns
+
+    def test_rolled_back_changes_are_not_emitted(self, session, emitted):
+        """A rollback discards what was collected"""
+        session.add(Invoice(id=1, status="draft", total_amount=10))
+        session.flush()
+        session.rollback()
+        session.add(AuditNote(id=1, text="untracked"))
+        session.commit()
+        invalidation_worker.flush()
+
+        assert emitted == []
+
+    def test_updates_use_changed_fields(self, session, emitted):
+        """Only the rules for the changed columns apply to an UPDATE"""
+        session.add(Invoice(id=1, status="draft", total_amount=10))
+        session.commit()
+        invalidation_worker.flush()
+        emitted.clear()
+
+        invoice = session.get(Invoice, 1)
+        invoice.notes = "called customer"
+        session.commit()
+        invalidation_worker.flush()
+
+        assert "aggregation:*" not in emitted[0]
+        assert emitted[0] == collapse_patterns(invalidation_patterns("invoices", "UPDATE", ["notes"]))
+
+        invoice.status = "completed"
+        session.commit()
+        invalidation_worker.flush()
+
+        assert "aggregation:*" in emitted[1]
+
+    def test_commit_does_not_wait_for_redis(self, session, monkeypatch):
+        """A slow invalidation runs on the worker thread after commit returns"""
+        release = threading.Event()
+        applied = []
+        cache = MagicMock()
+        cache.invalidate_patterns.side_effect = lambda patterns: release.wait(5) and applied.append(patterns)
+        monkeypatch.setattr(cache_invalidation_service, "INVALIDATION_MODE", "direct")
+        monkeypatch.setattr(cache_invalidation_service, "get_sync_analytics_cache", lambda: cache)
+
+        session.add(Customer(id=1, name="A"))
+        session.commit()
+        assert applied == []
+
+        release.set()
+        invalidation_worker.flush()
+        assert len(applied) == 1
+
+    def test_stream_mode_queues_batch(self, session, monkeypatch):
+        """In stream mode the batch is appended to the stream instead"""
+        client = MagicMock()
+        monkeypatch.setattr(cache_invalidation_service, "INVALIDATION_MODE", "stream")
+        monkeypatch.setattr(cache_invalidation_service, "get_redis_client", lambda: client)
+
+        session.add(Customer(id=1, name="A"))
+        session.commit()
+        invalidation_worker.flush()
+
+        stream, fields = client.xadd.call_args.args
+        assert stream == INVALIDATION_STREAM
+        assert "kpi:customer:acquisition:*" not in json.loads(fields["patterns"])
+        assert json.loads(fields["changes"])[0]["table_name"] == "customers"
+
+    @pytest.mark.asyncio
+    async def test_stream_entries_merged_and_acknowledged(self, monkeypatch):
+        """A consumer invalidates the union of a read batch once, acks it and schedules warming"""
+        schedule = MagicMock(return_value=True)
+        monkeypatch.setattr(cache_invalidation_service, "schedule_cache_warming", schedule)
+        cache = MagicMock()
+        cache.invalidate_patterns = AsyncMock(return_value=3)
+        cache.redis.xack = AsyncMock()
+        entries = [
+            ("1-0", {"patterns": json.dumps(["kpi:customer:*", "chart:customer:*"])}),
+            ("2-0", {"patterns": json.dumps(["kpi:customer:*", "kpi:*"])}),
+            ("3-0", None)
+        ]
+
+        assert await apply_invalidation_entries(cache, entries) == 3
+
+        cache.invalidate_patterns.assert_awaited_once_with(["chart:customer:*", "kpi:*"])
+        assert cache.redis.xack.await_args.args[2:] == ("1-0", "2-0", "3-0")
+        schedule.assert_called_once()
@@ -0,0 +1,149 @@
+"""
+Tests for predictive analytics cache warming
+Covers access statistics, recipe roll-forward, ranking and recomputation
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import redis_config
+from redis_config import AnalyticsCache, WARM_RECIPES_KEY
+from services.cache_warming_service import CacheWarmingService, recipe_params
+from services.kpi_calculator_service import FinancialKPICalculator
+
+
+def _recipe(kpi_name, end_date, recorded_on, compute_seconds=None):
+    return json.dumps({
+        "kpi_type": "financial",
+        "kpi_name": kpi_name,
+        "params": {"start_date": (end_date - timedelta(days=30)).isoformat(), "end_date": end_date.isoformat()},
+        "recorded_on": recorded_on.isoformat(),
+        "compute_seconds": compute_seconds
+    })
+
+
+@pytest.fixture
+def cache():
+    """Analytics cache without L1 over a mocked Redis client"""
+    redis_config = MagicMock()
+    redis_config.get_async_client.return_value = AsyncMock()
+    cache = AnalyticsCache(redis_config)
+    cache.local_cache = None
+    cache.redis.pipeline = MagicMock()
+    cache.redis.pipeline.return_value.execute = AsyncMock(return_value=[])
+    return cache
+
+
+class TestAccessStatistics:
+    """Test suite for the statistics AnalyticsCache records for warming"""
+
+    @pytest.mark.asyncio
+    async def test_reads_are_counted_and_flushed_in_one_round_trip(self, cache):
+        """Reads are counted in process and flushed per hour"""
+        cache._access_counts.update(["a", "a", "b"])
+
+        await cache.flush_access_stats()
+
+        pipe = cache.redis.pipeline.return_value
+        increments = {c.args[2]: c.args[1] for c in pipe.zincrby.call_args_list}
+        assert increments == {"a": 2, "b": 1}
+        assert pipe.zincrby.call_args.args[0] == cache.access_stats_key(datetime.utcnow())
+        pipe.execute.assert_awaited_once()
+        assert not cache._access_counts
+
+    @pytest.mark.asyncio
+    async def test_writes_record_how_to_recompute(self, cache):
+        """KPI entries computed from params store a recipe with their cost"""
+        params = {"start_date": date(2024, 1, 1), "end_date": date(2024, 1, 31)}
+        redis_config._refresh_leases.set({cache._kpi_key("financial", "revenue", params=params): ("t", 0.0)})
+
+        await cache.set_kpi_data("financial", "revenue", {"value": 1}, params=params)
+
+        key, field, value = cache.redis.pipeline.return_value.hset.call_args.args
+        recipe = json.loads(value)
+        assert key == WARM_RECIPES_KEY
+        assert field == cache._kpi_key("financial", "revenue", params=params)
+        assert recipe["params"] == {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+        assert recipe["compute_seconds"] > 0
+
+    @pytest.mark.asyncio
+    async def test_reads_miss_while_recomputing(self, cache):
+        """Calculators called by the warmer never see the cached value"""
+        with cache.recomputing():
+            assert await cache.get_kpi_data("financial", "revenue", params={"a": 1}) is None
+
+        cache.redis.get.assert_not_awaited()
+
+
+class TestCacheWarmingService:
+    """Test suite for CacheWarmingService"""
+
+    @pytest.fixture
+    def service(self, cache, monkeypatch):
+        monkeypatch.setattr("services.cache_warming_service.get_analytics_cache", lambda: cache)
+        return CacheWarmingService(MagicMock())
+
+    def test_rolling_ranges_move_to_today(self):
+        """A 'last 30 days' range read yesterday becomes today's range"""
+        today = date(2024, 3, 2)
+        rolling = recipe_params(json.loads(_recipe("revenue", date(2024, 3, 1), date(2024, 3, 1))), today)
+        fixed = recipe_params(json.loads(_recipe("revenue", date(2024, 2, 1), date(2024, 3, 1))), today)
+
+        assert rolling == {"start_date": date(2024, 2, 1), "end_date": today}
+        assert fixed["end_date"] == date(2024, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_candidates_ranked_by_reads_times_cost(self, service, cache):
+        """Expensive entries outrank cheap ones read more often"""
+        today = date.today()
+        cache.redis.pipeline.return_value.execute.return_value = [
+            [("k-revenue", 10.0), ("k-profit", 4.0)],
+            [("k-revenue", 2.0), ("k-unknown", 50.0)],
+            []
+        ]
+        # Keys are looked up most read first: k-unknown, k-revenue, k-profit
+        cache.redis.hmget.return_value = [
+            None,
+            _recipe("revenue", today, today, 0.1),
+            _recipe("profit_margin", today, today, 2.0),
+        ]
+
+        candidates = await service.select_candidates(service.demand_hours(), limit=5)
+
+        assert [c["kpi_name"] for c in candidates] == ["profit_margin", "revenue"]
+        assert candidates[1]["reads"] == 12
+        assert candidates[0]["params"]["end_date"] == today
+
+    @pytest.mark.asyncio
+    async def test_only_missing_or_expiring_entries_are_due(self, service, cache):
+        """Entries with plenty of freshness left are not recomputed"""
+        swr = cache.refresh_strategies["kpi"]["stale_while_revalidate"]
+        candidates = [{"cache_key": k} for k in ("gone", "expiring", "fresh", "stale")]
+        cache.redis.pipeline.return_value.execute.return_value = [
+            -2, (swr + 30) * 1000, (swr + 250) * 1000, (swr - 10) * 1000
+        ]
+
+        due = await service.due_for_refresh(candidates, lead_seconds=90)
+
+        assert [c["cache_key"] for c in due] == ["gone", "expiring", "stale"]
+
+    @pytest.mark.asyncio
+    async def test_failed_recompute_releases_lock(self, service, cache):
+        """The refresh lock is given back when the calculator fails"""
+        cache.redis.set.return_value = True
+        candidate = {
+            "cache_key": "k", "kpi_type": "financial", "kpi_name": "revenue",
+            "params": {"start_date": date(2024, 1, 1), "end_date": date(2024, 1, 31)}
+        }
+        calculator = MagicMock()
+        calculator.calculate_revenue_kpis = AsyncMock(side_effect=RuntimeError("db down"))
+        service._calculators[FinancialKPICalculator] = calculator
+
+        assert await service.warm_entry(candidate) is False
+
+        calculator.calculate_revenue_kpis.assert_awaited_once_with(**candidate["params"])
+        cache.redis.eval.assert_awaited_once()
+        assert "k" not in redis_config._refresh_leases.get()
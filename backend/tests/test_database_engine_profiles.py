@@ -0,0 +1,85 @@
+"""
+Tests for the shared database engines per workload profile
+Covers environment overrides and connection pool telemetry
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import database
+from database import InstrumentedQueuePool, PoolTelemetry, engine_settings
+
+
+class TestEngineProfiles:
+    """Test suite for engine profile settings"""
+
+    def test_profile_and_global_overrides(self, monkeypatch):
+        """DB_<PROFILE>_<SETTING> beats DB_<SETTING>, which beats the profile"""
+        monkeypatch.setenv("DB_POOL_TIMEOUT", "5")
+        monkeypatch.setenv("DB_CELERY_KPI_POOL_SIZE", "7")
+
+        kpi = engine_settings("celery-kpi")
+        api = engine_settings("api")
+
+        assert kpi["pool_size"] == 7
+        assert kpi["pool_timeout"] == 5
+        assert api["pool_size"] == database.ENGINE_PROFILES["api"]["pool_size"]
+
+    def test_unknown_profile_is_rejected(self):
+        with pytest.raises(ValueError):
+            engine_settings("batch")
+
+    def test_engines_are_shared_per_profile(self, monkeypatch, tmp_path):
+        """Task modules asking for the same profile share one pool"""
+        monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path}/profiles.db")
+        monkeypatch.setattr(database, "_engines", {})
+        monkeypatch.setattr(database, "_telemetry", {})
+
+        assert database.get_engine("reporting") is database.get_engine("reporting")
+        assert database.get_engine("reporting") is not database.get_engine("celery-kpi")
+        assert set(database.pool_metrics()) == {"reporting", "celery-kpi"}
+
+
+class TestPoolTelemetry:
+    """Test suite for checkout wait and overflow telemetry"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        telemetry = PoolTelemetry("api")
+        engine = create_engine(
+            f"sqlite:///{tmp_path}/pool.db",
+            poolclass=InstrumentedQueuePool.reporting_to(telemetry),
+            pool_size=1,
+            max_overflow=1,
+            pool_timeout=0.05
+        )
+        yield engine, telemetry
+        engine.dispose()
+
+    def test_checkouts_overflow_and_timeouts(self, engine):
+        """Waiting callers, overflow connections and timeouts are counted"""
+        engine, telemetry = engine
+        first = engine.connect()
+        second = engine.connect()
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+        stats = telemetry.snapshot(engine.pool)
+        assert stats["checkouts"] == 2
+        assert stats["checkout_timeouts"] == 1
+        assert stats["overflow_peak"] == 1
+        assert stats["checked_out"] == 2
+        first.close()
+        second.close()
+
+    def test_telemetry_survives_dispose(self, engine):
+        """Pools recreated by dispose() keep reporting to the same telemetry"""
+        engine, telemetry = engine
+        engine.dispose()
+
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        assert engine.pool.telemetry is telemetry
+        assert telemetry.checkouts == 1
@@ -0,0 +1,82 @@
+"""
+Tests for the counter-backed document numbering
+Runs on a SQLite file standing in for the numbering engine, so that each
+number is taken on its own connection
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import database
+from models import DocumentCounter
+from services.document_number_service import DocumentNumberService
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/numbers.db", connect_args={"timeout": 30})
+    DocumentCounter.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+class TestDocumentNumberService:
+    """Test suite for DocumentNumberService"""
+
+    def test_counters_per_type_and_period(self, db, engine):
+        numbers = DocumentNumberService(db, engine)
+
+        assert [numbers.next_value("invoice", "202410") for _ in range(3)] == [1, 2, 3]
+        assert numbers.next_value("invoice", "202411") == 1
+        assert numbers.next_value("journal_entry", "202410") == 1
+
+    def test_new_counter_continues_after_existing_numbers(self, db, engine):
+        """The seed is read once, when the counter is created"""
+        seeds = []
+
+        def last_issued():
+            seeds.append(1)
+            return 41
+
+        numbers = DocumentNumberService(db, engine)
+        assert numbers.next_value("invoice", "202410", seed=last_issued) == 42
+        assert numbers.next_value("invoice", "202410", seed=last_issued) == 43
+        assert len(seeds) == 1
+
+    def test_parallel_callers_never_share_a_number(self, db, engine):
+        """Concurrent terminals get distinct, gap-free numbers"""
+        def take(_):
+            return DocumentNumberService(db, engine).next_value("invoice", "202410")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            values = list(pool.map(take, range(80)))
+
+        assert sorted(values) == list(range(1, 81))
+        assert db.get(DocumentCounter, ("invoice", "202410")).last_value == 80
+
+    def test_numbers_come_from_the_numbering_engine(self, monkeypatch, tmp_path):
+        """The caller's pool is not asked for a second connection"""
+        monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path}/numbering.db")
+        monkeypatch.setattr(database, "_engines", {})
+        monkeypatch.setattr(database, "_telemetry", {})
+        DocumentCounter.__table__.create(database.get_engine("numbering"))
+
+        caller_engine = create_engine(f"sqlite:///{tmp_path}/caller.db")
+        checkouts = []
+        event.listen(caller_engine, "checkout", lambda *args: checkouts.append(1))
+
+        with sessionmaker(bind=caller_engine)() as session:
+            assert DocumentNumberService(session).next_value("invoice", "202410") == 1
+
+        assert checkouts == []
+        with sessionmaker(bind=database.get_engine("numbering"))() as numbering:
+            assert numbering.get(DocumentCounter, ("invoice", "202410")).last_value == 1
@@ -0,0 +1,53 @@
+"""
+Tests for the forecast executors
+Runs stdlib functions, which pickle into spawned pool processes
+"""
+
+import asyncio
+import operator
+import time
+
+import pytest
+
+from services.forecast_executor import (
+    InlineForecastExecutor,
+    ProcessPoolForecastExecutor,
+    get_forecast_executor,
+    shutdown_forecast_executors
+)
+
+
+@pytest.fixture(autouse=True)
+def shared_executors():
+    yield
+    shutdown_forecast_executors()
+
+
+class TestForecastExecutors:
+    """Test suite for the inline and process pool executors"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("kind", ["inline", "process"])
+    async def test_runs_function_and_returns_result(self, kind):
+        executor = get_forecast_executor(kind)
+
+        assert await executor.run(operator.mul, 6, 7) == 42
+        assert get_forecast_executor(kind) is executor
+
+    def test_kinds_map_to_executor_classes(self):
+        assert isinstance(get_forecast_executor("inline"), InlineForecastExecutor)
+        assert isinstance(get_forecast_executor("process"), ProcessPoolForecastExecutor)
+        with pytest.raises(ValueError):
+            get_forecast_executor("threads")
+
+    @pytest.mark.asyncio
+    async def test_fit_past_the_timeout_raises(self):
+        executor = get_forecast_executor("process")
+
+        started = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(time.sleep, 2, timeout=0.2)
+
+        assert time.perf_counter() - started < 2
+        # The pool stays usable after a timed-out fit
+        assert await executor.run(operator.add, 1, 2) == 3
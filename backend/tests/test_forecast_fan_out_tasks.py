@@ -0,0 +1,143 @@
+"""
+Tests for the catalog-wide and bulk forecast dispatch tasks
+Runs the Celery tasks eagerly on SQLite with the chord dispatch captured
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from analytics_tasks import forecasting_tasks
+from celery_app import celery_app
+from models import Base, DemandForecast, InventoryItem
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    """Eager Celery over a SQLite inventory table"""
+    engine = create_engine(f"sqlite:///{tmp_path}/forecast.db")
+    Base.metadata.create_all(engine, tables=[InventoryItem.__table__])
+    session_factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(forecasting_tasks, "SessionLocal", session_factory)
+
+    monkeypatch.setitem(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setitem(celery_app.conf, "task_eager_propagates", True)
+    yield session_factory
+    engine.dispose()
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Record fan-out dispatches instead of building the chord"""
+    calls = []
+
+    def fake_dispatch(items, periods, model_type, summary_metadata):
+        calls.append((items, periods, model_type))
+        return {**summary_metadata, "total_items": len(items), "batches_dispatched": 1, "status": "dispatched"}
+
+    monkeypatch.setattr(forecasting_tasks, "_dispatch_forecast_fan_out", fake_dispatch)
+    return calls
+
+
+def _add_item(db, name, stock_quantity, is_active=True):
+    item = InventoryItem(
+        name=name,
+        weight_grams=Decimal("1.000"),
+        purchase_price=Decimal("10.00"),
+        sell_price=Decimal("15.00"),
+        stock_quantity=stock_quantity,
+        is_active=is_active
+    )
+    db.add(item)
+    return item
+
+
+class TestForecastFanOutTasks:
+    """Test suite for update_all_forecasts and bulk_forecast_generation"""
+
+    def test_update_all_dispatches_active_stocked_items(self, sessions, dispatched):
+        with sessions() as db:
+            ring = _add_item(db, "Gold Ring", 4)
+            _add_item(db, "Sold Out Chain", 0)
+            _add_item(db, "Retired Bangle", 9, is_active=False)
+            db.commit()
+            ring_id = str(ring.id)
+
+        result = forecasting_tasks.update_all_forecasts_task.apply().get()
+
+        assert result["status"] == "dispatched"
+        assert dispatched == [([{"item_id": ring_id, "item_name": "Gold Ring"}], 30, "auto")]
+
+    def test_update_all_without_items_completes_empty(self, sessions, dispatched):
+        result = forecasting_tasks.update_all_forecasts_task.apply().get()
+
+        assert result["status"] == "completed"
+        assert result["total_items"] == 0
+        assert dispatched == []
+
+    def test_bulk_generation_runs_without_session_argument(self, sessions, dispatched):
+        result = forecasting_tasks.bulk_forecast_generation_task.apply(
+            kwargs={"item_ids": ["item-1", "item-2"], "periods": 14, "model_type": "arima"}
+        ).get()
+
+        assert result["periods"] == 14
+        assert dispatched == [(
+            [{"item_id": "item-1", "item_name": None}, {"item_id": "item-2", "item_name": None}],
+            14,
+            "arima"
+        )]
+
+    def test_batch_load_failure_marks_every_item_failed(self, sessions, monkeypatch):
+        """A failed history load is reported per item instead of failing the chord"""
+        load = MagicMock(side_effect=RuntimeError("history query timed out"))
+        monkeypatch.setattr(forecasting_tasks.ForecastingService, "forecast_demand_batch", load)
+        items = [{"item_id": "item-1", "item_name": "Ring"}, {"item_id": "item-2", "item_name": None}]
+
+        result = forecasting_tasks.forecast_item_batch_task.apply(kwargs={"items": items}).get()
+
+        assert result["successful"] == []
+        assert [failure["item_id"] for failure in result["failed"]] == ["item-1", "item-2"]
+        assert {failure["error"] for failure in result["failed"]} == {"history query timed out"}
+
+
+class TestDemandForecastUpsert:
+    """Test suite for the forecast row upsert"""
+
+    def test_rows_are_keyed_by_item_and_date(self):
+        """A refresh with a different model overwrites the earlier rows"""
+        db = MagicMock()
+        forecasting_tasks._upsert_demand_forecasts(db, [{
+            "item_id": "item-1",
+            "forecast_date": date(2024, 1, 15),
+            "forecast_period": "daily",
+            "predicted_demand": 2.5,
+            "model_used": "croston"
+        }])
+
+        statement = db.execute.call_args.args[0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (item_id, forecast_date) DO UPDATE" in sql
+        assert "model_used = excluded.model_used" in sql
+        db.commit.assert_called_once()
+
+    def test_unique_index_matches_conflict_target(self):
+        unique_indexes = [index for index in DemandForecast.__table__.indexes if index.unique]
+
+        assert [[column.name for column in index.columns] for index in unique_indexes] == [["item_id", "forecast_date"]]
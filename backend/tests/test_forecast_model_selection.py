@@ -0,0 +1,85 @@
+"""
+Tests for forecast model selection
+Checks demand classification, candidate routing and backtest reporting
+"""
+
+import asyncio
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from services.forecast_model_selection import (
+    classify_demand,
+    candidate_models,
+    croston,
+    select_forecast_model,
+    ARIMA_MIN_POINTS
+)
+from services.forecasting_service import ForecastingService
+
+
+class _FailingExecutor:
+    """Forecast executor whose fits never finish in time"""
+
+    async def run(self, func, *args, timeout=None):
+        raise asyncio.TimeoutError()
+
+
+class TestForecastModelSelection:
+    """Test suite for per-item model selection"""
+
+    @pytest.fixture
+    def intermittent_series(self):
+        """Mostly-zero demand with steady order sizes"""
+        rng = np.random.default_rng(7)
+        return np.where(rng.random(180) < 0.1, 3.0, 0.0)
+
+    @pytest.fixture
+    def dense_series(self):
+        """Daily demand with noise around a constant level"""
+        rng = np.random.default_rng(7)
+        return 20 + rng.normal(0, 2, 180)
+
+    def test_classifies_sparse_and_dense_series(self, intermittent_series, dense_series):
+        """ADI and CV² separate intermittent from smooth demand"""
+        assert classify_demand(intermittent_series)['demand_class'] == 'intermittent'
+        assert classify_demand(dense_series)['demand_class'] == 'smooth'
+        assert classify_demand(np.zeros(30))['demand_class'] == 'lumpy'
+
+    def test_arima_only_for_long_dense_series(self):
+        """ARIMA is never a candidate for sparse or short series"""
+        assert 'arima' not in candidate_models('intermittent', 365)
+        assert 'arima' not in candidate_models('smooth', ARIMA_MIN_POINTS - 1)
+        assert 'arima' in candidate_models('smooth', ARIMA_MIN_POINTS)
+
+    def test_sba_rate_is_below_croston(self, intermittent_series):
+        """SBA applies the (1 - alpha / 2) bias correction"""
+        croston_rate, residuals = croston(intermittent_series)
+        sba_rate, _ = croston(intermittent_series, sba=True)
+
+        assert sba_rate == pytest.approx(croston_rate * 0.95)
+        assert len(residuals) == len(intermittent_series) - 1
+
+    def test_selection_reports_backtest(self, intermittent_series):
+        """The selected model is the candidate with the lowest backtest MAE"""
+        selection = select_forecast_model(intermittent_series, horizon=14)
+        scores = selection['backtest']['mae']
+
+        assert selection['selected_model'] in selection['candidates']
+        assert set(scores) == set(selection['candidates'])
+        assert scores[selection['selected_model']] == min(scores.values())
+        assert selection['backtest']['folds'] == 3
+        assert selection['backtest']['horizon'] == 7
+
+    @pytest.mark.asyncio
+    async def test_selection_falls_back_to_arima_when_executor_fails(self, dense_series):
+        """A timed-out backtest selects the pre-selection default model"""
+        service = ForecastingService(None, executor=_FailingExecutor())
+        ts_data = pd.DataFrame({'quantity': dense_series})
+
+        selection = await service._select_model('item-1', ts_data, 14, len(dense_series))
+
+        assert selection['selected_model'] == 'arima'
+        assert selection['candidates'] == ['arima']
+        assert selection['backtest'] == {'error': 'TimeoutError'}
@@ -0,0 +1,178 @@
+"""
+Tests for the forecast model store and stored-parameter ARIMA fits
+Store lookups run on SQLite; fits run in-process
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, ForecastModel
+from services.forecast_model_store import ForecastModelStore
+from services.forecasting_service import _fit_arima_with_params
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/models.db")
+
+    # Let SQLAlchemy emit BEGIN so that savepoints nest in the transaction
+    @event.listens_for(engine, "connect")
+    def _no_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(engine, tables=[ForecastModel.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+def _series(values, start="2024-01-01"):
+    return pd.Series(values, index=pd.date_range(start, periods=len(values), freq="D"), dtype=float)
+
+
+def _stored(training_date, fingerprint="abc", model_params=None):
+    return ForecastModel(item_id=uuid4(), model_type="arima", confidence_score=0.5,
+                         training_date=training_date, data_fingerprint=fingerprint,
+                         model_params={"order": [1, 0, 0]} if model_params is None else model_params)
+
+
+class TestForecastModelStore:
+    """Test suite for ForecastModelStore"""
+
+    def test_fingerprint_covers_start_date_and_values(self):
+        series = _series([1, 2, 3])
+
+        assert ForecastModelStore.fingerprint(series) == ForecastModelStore.fingerprint(_series([1, 2, 3]))
+        assert ForecastModelStore.fingerprint(series) != ForecastModelStore.fingerprint(_series([1, 2, 4]))
+        assert ForecastModelStore.fingerprint(series) != ForecastModelStore.fingerprint(_series([1, 2, 3], "2024-01-02"))
+
+    def test_needs_refit(self):
+        store = ForecastModelStore(None, refit_after_days=7)
+        fresh = _stored(date.today() - timedelta(days=3))
+        stale = _stored(date.today() - timedelta(days=8))
+
+        assert store.needs_refit(None, "abc")
+        assert store.needs_refit(_stored(date.today(), model_params={}), "abc")
+        assert not store.needs_refit(stale, "abc")  # Unchanged series
+        assert not store.needs_refit(fresh, "def")  # Changed, parameters still fresh
+        assert store.needs_refit(stale, "def")
+
+    def test_load_returns_latest_parameters(self, db):
+        item_id = uuid4()
+        for days_ago, params in ((10, {"order": [1, 0, 0]}), (2, {"order": [2, 1, 0]})):
+            db.add(ForecastModel(item_id=item_id, model_type="arima", confidence_score=0.5,
+                                 training_date=date.today() - timedelta(days=days_ago), model_params=params))
+        # Rows written without parameters (e.g. model recommendations) are skipped
+        db.add(ForecastModel(item_id=item_id, model_type="arima", confidence_score=0.5,
+                             training_date=date.today()))
+        db.add(ForecastModel(item_id=item_id, model_type="auto", confidence_score=0.5,
+                             training_date=date.today(), model_params={"selected_model": "sba"}))
+        db.commit()
+
+        store = ForecastModelStore(db)
+
+        assert store.load(item_id, "arima").model_params == {"order": [2, 1, 0]}
+        assert store.load(uuid4(), "arima") is None
+
+    def test_load_failure_is_a_miss(self):
+        db = MagicMock()
+        db.query.side_effect = RuntimeError("connection lost")
+
+        assert ForecastModelStore(db).load(uuid4(), "arima") is None
+
+    def test_save_leaves_the_commit_to_the_caller(self, db, engine):
+        item_id = uuid4()
+        ForecastModelStore(db).save(item_id=item_id, model_type="arima", fingerprint="abc",
+                                    model_params={"order": [1, 0, 0]}, accuracy_metrics={},
+                                    confidence_score=0.75, refitted=True)
+
+        with sessionmaker(bind=engine)() as other:
+            assert other.query(ForecastModel).count() == 0
+
+        db.commit()
+        with sessionmaker(bind=engine)() as other:
+            saved = other.query(ForecastModel).one()
+            assert saved.item_id == item_id
+            assert saved.training_date == date.today()
+
+    def test_reapplied_parameters_keep_their_training_date(self, db):
+        trained = date.today() - timedelta(days=5)
+        stored = _stored(trained)
+        db.add(stored)
+        db.flush()
+
+        ForecastModelStore(db).save(item_id=stored.item_id, model_type="arima", fingerprint="def",
+                                    model_params=stored.model_params, accuracy_metrics={},
+                                    confidence_score=0.6, refitted=False, stored=stored)
+
+        assert stored.training_date == trained
+        assert stored.data_fingerprint == "def"
+
+    def test_failed_save_keeps_the_callers_changes(self, db):
+        kept = _stored(date.today())
+        db.add(kept)
+
+        ForecastModelStore(db).save(item_id=None, model_type="arima", fingerprint="abc",
+                                    model_params={}, accuracy_metrics={},
+                                    confidence_score=0.5, refitted=True)
+        db.commit()
+
+        assert db.query(ForecastModel).all() == [kept]
+
+
+class TestStoredArimaFit:
+    """Test suite for _fit_arima_with_params"""
+
+    @pytest.fixture
+    def ts_data(self):
+        rng = np.random.default_rng(3)
+        values = np.empty(90)
+        values[0] = 20.0
+        for i in range(1, 90):
+            values[i] = 20 + 0.6 * (values[i - 1] - 20) + rng.normal(0, 1)
+        return pd.DataFrame({"quantity": _series(values)})
+
+    def test_refit_returns_reusable_parameters(self, ts_data):
+        predictions, intervals, metrics, params = _fit_arima_with_params(ts_data, 7)
+
+        assert len(predictions) == len(intervals) == 7
+        assert tuple(params["order"]) == tuple(metrics["model_order"])
+        assert params["series_length"] == 90
+        assert all(lower <= prediction <= upper for prediction, (lower, upper) in zip(predictions, intervals))
+
+    def test_stored_parameters_reproduce_the_fit(self, ts_data):
+        predictions, _, _, params = _fit_arima_with_params(ts_data, 7)
+
+        reapplied, _, metrics, reapplied_params = _fit_arima_with_params(ts_data, 7, params)
+
+        assert reapplied == pytest.approx(predictions)
+        assert reapplied_params["order"] == params["order"]
+        assert reapplied_params["params"] == pytest.approx(params["params"])
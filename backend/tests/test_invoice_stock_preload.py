@@ -0,0 +1,85 @@
+"""
+Tests for the bulk inventory preload of the invoice endpoints
+Runs on SQLite with the inventory table only
+"""
+
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+import models
+import schemas
+from routers.invoices import calculate_invoice_totals, load_inventory_items, update_inventory_stock
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine, tables=[models.InventoryItem.__table__])
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+@pytest.fixture
+def statements(db):
+    """SQL statements executed by the session"""
+    executed = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+@pytest.fixture
+def stock(db):
+    items = [
+        models.InventoryItem(name=f"Ring {i}", weight_grams=Decimal("2.5"), purchase_price=Decimal("10"),
+                             sell_price=Decimal("20"), stock_quantity=10)
+        for i in range(30)
+    ]
+    db.add_all(items)
+    db.commit()
+    return [item.id for item in items]
+
+
+def _lines(item_ids, quantity=2):
+    return [schemas.InvoiceItemCreate(inventory_item_id=item_id, quantity=quantity, unit_price=0, weight_grams=2.5)
+            for item_id in item_ids]
+
+
+class TestInvoiceStockPreload:
+    """Test suite for the shared inventory preload and set-based stock update"""
+
+    def test_thirty_lines_in_two_statements(self, db, stock, statements):
+        """One IN (...) preload for all lines and one UPDATE for all stock"""
+        lines = _lines(stock)
+        statements.clear()
+
+        inventory_items = load_inventory_items(db, lines, lock=True)
+        summary = calculate_invoice_totals(lines, 100, 10, 5, 9, db, inventory_items)
+        update_inventory_stock(db, lines)
+
+        assert len(summary.items) == 30
+        assert len(statements) == 2
+        assert " IN (" in statements[0] and statements[1].startswith("UPDATE inventory_items")
+        db.expire_all()
+        assert {item.stock_quantity for item in db.query(models.InventoryItem)} == {8}
+
+    def test_repeated_item_is_checked_and_deducted_in_total(self, db, stock):
+        lines = _lines([stock[0], stock[0]], quantity=4)
+
+        update_inventory_stock(db, lines)
+        assert db.get(models.InventoryItem, stock[0]).stock_quantity == 2
+
+        with pytest.raises(HTTPException) as error:
+            calculate_invoice_totals(_lines([stock[1], stock[1]], quantity=6), 100, 10, 5, 9, db)
+        assert error.value.status_code == 400
@@ -9,6 +9,7 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 
 from services.kpi_calculator_service import KPICalculatorService, FinancialKPICalculator
+from services.sales_fact_service import SalesFactService
 from models import (
     Invoice, InvoiceItem, InventoryItem, Customer, Category, 
     KPISnapshot, Payment, User, Role
@@ -240,6 +241,8 @@ async def create_test_data(db_session: Session):
             )
             db_session.add(payment)
         
+        # Seeded invoices bypass the invoice endpoints; build their daily facts
+        SalesFactService(db_session).refresh_range(base_date, date.today())
         db_session.commit()
         print("✅ Test data created successfully")
         
@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from services.kpi_calculator_service import KPICalculatorService, FinancialKPICalculator
+from services.sales_fact_service import SalesFactService
 from models import (
     Invoice, InvoiceItem, InventoryItem, Customer, Category, 
     KPISnapshot, Payment, User, Role
@@ -155,6 +156,8 @@ class TestKPICalculatorService:
                 )
                 db_session.add(payment)
         
+        # Seeded invoices bypass the invoice endpoints; build their daily facts
+        SalesFactService(db_session).refresh_range(base_date, date.today())
         db_session.commit()
         
         return {
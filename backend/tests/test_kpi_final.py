@@ -10,6 +10,7 @@ from decimal import Decimal
 from sqlalchemy import text
 
 from services.kpi_calculator_service import KPICalculatorService, FinancialKPICalculator
+from services.sales_fact_service import SalesFactService
 
 
 @pytest.mark.asyncio
@@ -216,6 +217,8 @@ async def create_test_data_sql(db_session):
                 "description": f"Test payment for invoice {invoice_id}"
             })
         
+        # Seeded invoices bypass the invoice endpoints; build their daily facts
+        SalesFactService(db_session).refresh_range(base_date, date.today())
         db_session.commit()
         print("✅ Test data created successfully using raw SQL")
         
@@ -0,0 +1,102 @@
+"""
+Regression tests for index-friendly date filtering in KPI queries
+Runs EXPLAIN on the SQL the calculators actually issue against a seeded
+PostgreSQL dataset and checks that invoice date filters hit an index
+"""
+
+import pytest
+import re
+from datetime import date, timedelta
+from sqlalchemy import text
+
+from services.kpi_calculator_service import FinancialKPICalculator, CustomerKPICalculator
+from services.kpi_query_builder import date_range_filter, date_range_params
+from models import Customer
+
+
+def _plan_nodes(node):
+    """Flatten an EXPLAIN (FORMAT JSON) plan tree"""
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+class TestKPIQueryRanges:
+    """Test suite for sargable KPI date filters"""
+
+    @pytest.fixture
+    def seeded_invoices(self, db_session):
+        """Two years of hourly invoices so that a one-week range is selective"""
+        customer = Customer(name="Explain Customer", phone="5550000000")
+        db_session.add(customer)
+        db_session.flush()
+
+        db_session.execute(text("""
+            INSERT INTO invoices (
+                id, invoice_number, customer_id, total_amount, paid_amount,
+                remaining_amount, gold_price_per_gram, status, created_at
+            )
+            SELECT
+                gen_random_uuid(), 'EXPLAIN-' || g, :customer_id, 100, 100,
+                0, 60, 'completed', now() - (g || ' hours')::interval
+            FROM generate_series(1, 17520) g
+        """), {"customer_id": customer.id})
+        db_session.execute(text("ANALYZE invoices"))
+        db_session.execute(text("SET LOCAL enable_seqscan = off"))
+        return customer
+
+    @pytest.fixture
+    def recorded_queries(self, db_session, monkeypatch):
+        """Capture every statement the calculators execute"""
+        queries = []
+        execute = db_session.execute
+
+        def recording_execute(statement, params=None, *args, **kwargs):
+            queries.append((statement, params))
+            return execute(statement, params, *args, **kwargs)
+
+        monkeypatch.setattr(db_session, "execute", recording_execute)
+        return queries
+
+    def test_date_range_filter_is_half_open(self):
+        """The builder never wraps the column and binds the next day as the bound"""
+        assert date_range_filter("i.created_at") == (
+            "i.created_at >= :start_date AND i.created_at < :end_date_exclusive"
+        )
+        params = date_range_params(date(2024, 1, 1), date(2024, 1, 31), "prev_start", "prev_end")
+        assert params == {
+            "prev_start": date(2024, 1, 1),
+            "prev_end": date(2024, 1, 31),
+            "prev_end_exclusive": date(2024, 2, 1)
+        }
+
+    @pytest.mark.asyncio
+    async def test_invoice_date_filters_use_index(self, db_session, seeded_invoices, recorded_queries):
+        """Invoice queries filtered by date resolve the range through an index"""
+        end_date = date.today()
+        start_date = end_date - timedelta(days=6)
+
+        await FinancialKPICalculator(db_session)._calculate_transaction_metrics(start_date, end_date)
+        customer_calculator = CustomerKPICalculator(db_session)
+        await customer_calculator._calculate_retention_metrics(start_date, end_date)
+        await customer_calculator._calculate_value_metrics(start_date, end_date)
+
+        invoice_range_queries = [
+            (statement, params) for statement, params in recorded_queries
+            if re.search(r"FROM invoices( i)?\s+WHERE (i\.)?created_at >= :", str(statement))
+        ]
+        assert len(invoice_range_queries) >= 4
+
+        for statement, params in invoice_range_queries:
+            assert "DATE(created_at) BETWEEN" not in str(statement)
+
+            plan = db_session.execute(
+                text("EXPLAIN (FORMAT JSON) " + str(statement)), params
+            ).scalar()
+            nodes = list(_plan_nodes(plan[0]["Plan"]))
+
+            assert any(
+                node.get("Relation Name", node.get("Index Name", "")).startswith(("invoices", "idx_invoices"))
+                and "created_at" in node.get("Index Cond", "")
+                for node in nodes
+            ), f"No index range scan on invoices.created_at for: {statement}"
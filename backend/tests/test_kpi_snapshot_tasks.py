@@ -0,0 +1,112 @@
+"""
+Tests for the KPI snapshot generation tasks
+Runs the Celery tasks eagerly on SQLite with stubbed calculators, and the
+real calculators against a cache that already holds every KPI
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from analytics_tasks import kpi_tasks
+from services import kpi_calculator_service
+from celery_app import celery_app
+from models import Base, KPISnapshot
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    """Eager Celery over a SQLite KPI snapshot table, with fixed calculator results"""
+    engine = create_engine(f"sqlite:///{tmp_path}/kpi.db")
+    Base.metadata.create_all(engine, tables=[KPISnapshot.__table__])
+    session_factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(kpi_tasks, "SessionLocal", session_factory)
+
+    monkeypatch.setattr(kpi_tasks, "_calculate_financial_kpis",
+                        lambda db, start, end, targets=None: {"revenue_kpis": {"current_revenue": 1200.5}})
+    monkeypatch.setattr(kpi_tasks, "_calculate_operational_kpis",
+                        lambda db, start, end: {"inventory_kpis": {"turnover_rate": 3, "label": "n/a"}})
+    monkeypatch.setattr(kpi_tasks, "_calculate_customer_kpis",
+                        lambda db, start, end: {"acquisition_kpis": {"new_customers": 7}})
+
+    monkeypatch.setitem(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setitem(celery_app.conf, "task_eager_propagates", True)
+    yield session_factory
+    engine.dispose()
+
+
+class TestKpiSnapshotTasks:
+    """Test suite for generate_kpi_snapshots in both modes"""
+
+    @pytest.mark.parametrize("mode", ["chord", "concurrent"])
+    def test_snapshots_written_from_all_calculators(self, sessions, mode):
+        kpi_tasks.generate_kpi_snapshots.apply(kwargs={"interval": "daily", "mode": mode}).get()
+
+        with sessions() as db:
+            snapshots = {(s.kpi_type, s.kpi_name): float(s.value) for s in db.query(KPISnapshot)}
+        assert snapshots == {
+            ("financial", "revenue_current_revenue"): 1200.5,
+            ("operational", "inventory_turnover_rate"): 3.0,
+            ("customer", "acquisition_new_customers"): 7.0,
+        }
+
+    def test_calculator_tasks_open_their_own_session(self, sessions):
+        """The chord members run without a session argument"""
+        result = kpi_tasks.calculate_operational_kpis_task.apply(args=("2024-01-01", "2024-01-31")).get()
+
+        assert result["inventory_kpis"]["turnover_rate"] == 3
+
+
+class TestKpiCalculatorWiring:
+    """The calculation helpers call methods that exist on the real calculators"""
+
+    @pytest.fixture
+    def cached_kpis(self, monkeypatch):
+        """Cache hits for every KPI, so no calculator reaches the database"""
+        cache = MagicMock()
+        cache.get_kpi_data = AsyncMock(side_effect=lambda kpi_type, kpi_name, params=None: {
+            "data": {"kpi": f"{kpi_type}:{kpi_name}"}
+        })
+        monkeypatch.setattr(kpi_calculator_service, "get_analytics_cache", lambda: cache)
+        return cache
+
+    def test_customer_kpis_use_existing_calculator_methods(self, cached_kpis):
+        result = kpi_tasks._calculate_customer_kpis(MagicMock(), "2024-01-01", "2024-01-31")
+
+        assert result["acquisition_kpis"] == {"kpi": "customer:acquisition"}
+        assert result["retention_kpis"] == {"kpi": "customer:retention"}
+        assert result["value_kpis"] == {"kpi": "customer:value"}
+
+    def test_financial_and_operational_kpis_use_existing_calculator_methods(self, cached_kpis):
+        financial = kpi_tasks._calculate_financial_kpis(MagicMock(), "2024-01-01", "2024-01-31", {"revenue": 1})
+        operational = kpi_tasks._calculate_operational_kpis(MagicMock(), "2024-01-01", "2024-01-31")
+
+        assert financial["achievement_kpis"] == {"kpi": "financial:achievement"}
+        assert operational["carrying_cost_kpis"] == {"kpi": "operational:carrying_cost"}
+
+    def test_calculations_reuse_the_thread_event_loop(self):
+        """Each thread keeps one loop, so its Redis pool outlives a single calculation"""
+        async def running_loop():
+            return asyncio.get_running_loop()
+
+        first = kpi_tasks._run_async(running_loop())
+        second = kpi_tasks._run_async(running_loop())
+        pooled = kpi_tasks._get_snapshot_pool().submit(kpi_tasks._run_async, running_loop()).result()
+
+        assert first is second
+        assert pooled is not first
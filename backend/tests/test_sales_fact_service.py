@@ -0,0 +1,132 @@
+"""
+Tests for the Sales Fact Service
+Checks allocation and per-invoice rebuilds against real PostgreSQL
+"""
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from services.sales_fact_service import SalesFactService
+from models import Invoice, InvoiceItem, InventoryItem, Customer, Category
+
+pytestmark = pytest.mark.database
+
+
+class TestSalesFactService:
+    """Test suite for sales fact maintenance"""
+
+    # Use the db_session fixture from conftest.py
+
+    @pytest.fixture
+    def sale_day(self):
+        return date(2024, 3, 14)
+
+    @pytest.fixture
+    def sample_data(self, db_session, sale_day):
+        """Two completed invoices on the same day"""
+        category = Category(name=f"Facts {uuid.uuid4().hex[:8]}", description="Fact test items")
+        db_session.add(category)
+        db_session.flush()
+
+        items = []
+        for purchase_price in (Decimal("300.00"), Decimal("200.00")):
+            item = InventoryItem(
+                name=f"Fact Item {purchase_price}",
+                category_id=category.id,
+                weight_grams=Decimal("5.000"),
+                purchase_price=purchase_price,
+                sell_price=purchase_price * 2,
+                stock_quantity=10
+            )
+            items.append(item)
+            db_session.add(item)
+
+        customer = Customer(name="Fact Customer", phone="5550100")
+        db_session.add(customer)
+        db_session.flush()
+
+        invoices = []
+        for line_totals in ((Decimal("600.00"), Decimal("400.00")), (Decimal("250.00"),)):
+            invoice = Invoice(
+                invoice_number=f"INV-FACT-{uuid.uuid4().hex[:10]}",
+                customer_id=customer.id,
+                total_amount=Decimal("1000.00"),
+                paid_amount=Decimal("1000.00"),
+                remaining_amount=Decimal("0.00"),
+                gold_price_per_gram=Decimal("60.00"),
+                labor_cost_percentage=Decimal("10.00"),
+                vat_percentage=Decimal("5.00"),
+                status="completed",
+                created_at=datetime.combine(sale_day, datetime.min.time())
+            )
+            db_session.add(invoice)
+            db_session.flush()
+
+            for item, line_total in zip(items, line_totals):
+                db_session.add(InvoiceItem(
+                    invoice_id=invoice.id,
+                    inventory_item_id=item.id,
+                    quantity=1,
+                    unit_price=line_total,
+                    total_price=line_total,
+                    weight_grams=Decimal("5.000")
+                ))
+            invoices.append(invoice)
+
+        db_session.flush()
+        return {"invoices": invoices, "items": items}
+
+    def _facts(self, db_session, invoice_id):
+        return db_session.execute(text("""
+            SELECT item_id, units, revenue, cost, invoice_amount, labor_cost,
+                   tax_cost, invoice_count, invoice_share
+            FROM sales_daily_facts
+            WHERE invoice_id = :invoice_id
+            ORDER BY revenue DESC
+        """), {"invoice_id": str(invoice_id)}).fetchall()
+
+    def test_invoice_amounts_allocated_by_line_total(self, db_session, sample_data, sale_day):
+        invoice = sample_data["invoices"][0]
+        SalesFactService(db_session).refresh_for_invoice(invoice.id, sale_day)
+
+        facts = self._facts(db_session, invoice.id)
+
+        assert [fact.item_id for fact in facts] == [item.id for item in sample_data["items"]]
+        assert [fact.revenue for fact in facts] == [Decimal("600.00"), Decimal("400.00")]
+        assert [fact.cost for fact in facts] == [Decimal("300.00"), Decimal("200.00")]
+        assert [fact.invoice_amount for fact in facts] == [Decimal("600.0000"), Decimal("400.0000")]
+        assert sum(fact.labor_cost for fact in facts) == Decimal("100.0000")
+        assert sum(fact.tax_cost for fact in facts) == Decimal("50.0000")
+        assert sum(fact.invoice_share for fact in facts) == Decimal("1.000000")
+        assert all(fact.invoice_count == 1 for fact in facts)
+
+    def test_rebuilds_are_idempotent(self, db_session, sample_data, sale_day):
+        service = SalesFactService(db_session)
+        first, second = sample_data["invoices"]
+
+        service.refresh_for_invoice(first.id, sale_day)
+        service.refresh_for_invoice(second.id, sale_day)
+        expected = {invoice.id: self._facts(db_session, invoice.id) for invoice in (first, second)}
+
+        service.refresh_for_invoice(first.id, sale_day)
+        service.refresh_range(sale_day, sale_day)
+
+        for invoice_id, facts in expected.items():
+            assert self._facts(db_session, invoice_id) == facts
+
+    def test_invoice_refresh_leaves_other_invoices_alone(self, db_session, sample_data, sale_day):
+        service = SalesFactService(db_session)
+        first, second = sample_data["invoices"]
+        service.refresh_range(sale_day, sale_day)
+        second_facts = self._facts(db_session, second.id)
+
+        first.status = "cancelled"
+        db_session.flush()
+        service.refresh_for_invoice(first.id, sale_day)
+
+        assert self._facts(db_session, first.id) == []
+        assert self._facts(db_session, second.id) == second_facts
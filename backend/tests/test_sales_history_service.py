@@ -0,0 +1,75 @@
+"""
+Tests for the bulk sales history loader
+Feeds aggregated query rows through a mocked session
+"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from services.sales_history_service import SalesHistoryService
+
+
+def _row(item_id, sale_date, quantity, total_value, avg_price):
+    return SimpleNamespace(item_id=item_id, sale_date=sale_date, quantity=quantity,
+                           total_value=total_value, avg_price=avg_price)
+
+
+class TestSalesHistoryService:
+    """Test suite for load_daily_demand and SalesHistoryMatrix"""
+
+    @pytest.fixture
+    def items(self):
+        return [uuid4(), uuid4(), uuid4()]
+
+    @pytest.fixture
+    def matrix(self, items):
+        ring, chain, _ = items
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [
+            _row(ring, date(2024, 3, 1), 2, Decimal("300.00"), Decimal("150.00")),
+            _row(ring, date(2024, 3, 5), 1, Decimal("160.00"), Decimal("160.00")),
+            _row(chain, date(2024, 3, 3), 4, Decimal("800.00"), Decimal("200.00")),
+        ]
+        # The third item sold nothing in the window
+        return SalesHistoryService(db).load_daily_demand(items + [items[0]], days=4, end_date=date(2024, 3, 5))
+
+    def test_dense_matrix_is_zero_filled(self, matrix, items):
+        assert matrix.item_ids == [str(item_id) for item_id in items]
+        assert matrix.dates == [date(2024, 3, day) for day in range(1, 6)]
+        np.testing.assert_array_equal(matrix.quantities, [
+            [2, 0, 0, 0, 1],
+            [0, 0, 4, 0, 0],
+            [0, 0, 0, 0, 0],
+        ])
+        np.testing.assert_array_equal(matrix.revenue[1], [0, 0, 800, 0, 0])
+        np.testing.assert_array_equal(matrix.avg_prices[0], [150, 0, 0, 0, 160])
+
+    def test_observed_days_per_item(self, matrix):
+        np.testing.assert_array_equal(matrix.sales_days(), [2, 1, 0])
+        assert not matrix.observed[2].any()
+
+    def test_sales_records_only_cover_days_with_sales(self, matrix, items):
+        ring, _, idle = items
+
+        assert matrix.to_sales_records(ring) == [
+            {'item_id': str(ring), 'sale_date': date(2024, 3, 1), 'quantity': 2.0,
+             'total_value': 300.0, 'avg_price': 150.0},
+            {'item_id': str(ring), 'sale_date': date(2024, 3, 5), 'quantity': 1.0,
+             'total_value': 160.0, 'avg_price': 160.0},
+        ]
+        assert matrix.to_sales_records(idle) == []
+        assert matrix.to_sales_records(uuid4()) == []
+
+    def test_no_items_skips_the_query(self):
+        db = MagicMock()
+
+        matrix = SalesHistoryService(db).load_daily_demand([], days=30, end_date=date(2024, 3, 5))
+
+        assert matrix.quantities.shape == (0, 31)
+        db.execute.assert_not_called()
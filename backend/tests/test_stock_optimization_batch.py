@@ -0,0 +1,110 @@
+"""
+Tests for the vectorized stock optimization path
+Checks that batch recommendations match the per-item calculations
+"""
+
+import pytest
+import numpy as np
+from datetime import date, timedelta
+
+from services.stock_optimization_service import StockOptimizationService
+from services.sales_history_service import SalesHistoryMatrix
+
+
+class TestVectorizedStockRecommendations:
+    """Test suite for StockOptimizationService batch recommendations"""
+
+    @pytest.fixture
+    def service(self):
+        """Service without a session; the batch path never queries"""
+        return StockOptimizationService(None)
+
+    @pytest.fixture
+    def catalog(self):
+        """Synthetic catalog with a zero-filled demand matrix"""
+        rng = np.random.default_rng(42)
+        num_items, num_days = 300, 366
+
+        observed = rng.random((num_items, num_days)) < rng.random((num_items, 1)) * 0.3
+        quantities = np.where(observed, rng.integers(1, 5, (num_items, num_days)), 0).astype(float)
+        item_ids = [f"item-{i}" for i in range(num_items)]
+
+        history = SalesHistoryMatrix(
+            item_ids=item_ids,
+            start_date=date.today() - timedelta(days=num_days - 1),
+            end_date=date.today(),
+            quantities=quantities,
+            revenue=quantities * 10,
+            avg_prices=np.where(observed, 10.0, 0.0),
+            observed=observed
+        )
+
+        items_data = []
+        for i, item_id in enumerate(item_ids):
+            purchase_price = float(rng.integers(0, 500))
+            items_data.append({
+                'id': item_id,
+                'name': f"Item {i}",
+                'stock_quantity': int(rng.integers(0, 300)),
+                'purchase_price': purchase_price,
+                'category_name': None,
+                'sell_price': purchase_price * 1.5
+            })
+
+        return items_data, history
+
+    async def _per_item_recommendations(self, service, items_data, history):
+        recommendations = []
+        for item_data in items_data:
+            sales_data = history.to_sales_records(item_data['id'])
+            if len(sales_data) < 5:
+                continue
+            try:
+                demand_stats = service._calculate_demand_statistics(sales_data)
+                eoq_result = service._compute_economic_order_quantity(item_data, demand_stats)
+                reorder_result = service._compute_reorder_point(item_data, demand_stats)
+                recommendation = await service._generate_item_recommendation(
+                    item_data, demand_stats, eoq_result, reorder_result
+                )
+            except ValueError:
+                continue
+            if recommendation:
+                recommendations.append(recommendation)
+
+        recommendations.sort(
+            key=lambda x: (
+                {'high': 0, 'medium': 1, 'low': 2}[x.priority_level],
+                -float(x.estimated_savings)
+            )
+        )
+        return recommendations
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_per_item_path(self, service, catalog):
+        """Vectorized recommendations equal the per-item results"""
+        items_data, history = catalog
+
+        batch = await service.generate_stock_recommendations_batch(items_data, history)
+        expected = await self._per_item_recommendations(service, items_data, history)
+
+        assert len(batch) == len(expected)
+        for actual, reference in zip(batch, expected):
+            assert actual.item_id == reference.item_id
+            assert actual.recommendation_type == reference.recommendation_type
+            assert actual.reorder_point == reference.reorder_point
+            assert actual.safety_stock == reference.safety_stock
+            assert actual.economic_order_quantity == reference.economic_order_quantity
+            assert actual.estimated_savings == reference.estimated_savings
+            assert actual.confidence_score == pytest.approx(reference.confidence_score)
+
+    def test_batch_metrics_skip_sparse_and_free_items(self, service, catalog):
+        """Items with too few sales days or no holding cost are not valid"""
+        items_data, history = catalog
+        items_data[0]['purchase_price'] = 0.0
+
+        metrics = service.calculate_batch_stock_metrics(items_data, history)
+
+        assert not metrics.valid[0]
+        assert np.array_equal(metrics.valid[1:], (history.sales_days() >= 5)[1:] & (metrics.holding_cost_per_unit[1:] > 0))
+        assert np.all(metrics.reorder_point >= 1)
+        assert np.all(metrics.economic_order_quantity >= 1)